@@ -0,0 +1,256 @@
+# // Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# // SPDX-License-Identifier: MIT-0
+
+"""
+Compact Audio Codecs for WebSocket Audio
+
+This module provides the audio codecs that Base64AudioSerializer can negotiate with a client
+to reduce bandwidth compared to 16-bit PCM:
+- G.711 μ-law: 8 bits per sample, encoded and decoded with NumPy lookup tables
+- IMA-ADPCM: 4 bits per sample, two samples per byte (first sample in the high nibble)
+
+Codecs convert between the wire format and 16-bit little-endian PCM, so the resamplers and
+the rest of the pipeline keep working with PCM. IMA-ADPCM is stateful, so each direction of
+a session needs its own codec instance.
+"""
+
+from typing import Dict, Type
+
+import numpy as np
+
+PCM16 = "pcm16"
+MULAW = "mulaw"
+ADPCM = "adpcm"
+
+# G.711 μ-law constants
+_MULAW_BIAS = 0x84
+_MULAW_CLIP = 32635
+_MULAW_SEGMENT_ENDS = np.array([0x3F, 0x7F, 0xFF, 0x1FF, 0x3FF, 0x7FF, 0xFFF, 0x1FFF])
+
+# IMA-ADPCM tables
+_ADPCM_INDEX_TABLE = [-1, -1, -1, -1, 2, 4, 6, 8, -1, -1, -1, -1, 2, 4, 6, 8]
+_ADPCM_STEP_TABLE = [
+    7, 8, 9, 10, 11, 12, 13, 14, 16, 17, 19, 21, 23, 25, 28, 31, 34, 37, 41, 45,
+    50, 55, 60, 66, 73, 80, 88, 97, 107, 118, 130, 143, 157, 173, 190, 209, 230,
+    253, 279, 307, 337, 371, 408, 449, 494, 544, 598, 658, 724, 796, 876, 963,
+    1060, 1166, 1282, 1411, 1552, 1707, 1878, 2066, 2272, 2499, 2749, 3024, 3327,
+    3660, 4026, 4428, 4871, 5358, 5894, 6484, 7132, 7845, 8630, 9493, 10442,
+    11487, 12635, 13899, 15289, 16818, 18500, 20350, 22385, 24623, 27086, 29794,
+    32767,
+]
+
+
+def _build_mulaw_tables():
+    """Builds the μ-law encode (65536 entries) and decode (256 entries) lookup tables."""
+    # Decode table
+    codes = ~np.arange(256, dtype=np.int32) & 0xFF
+    exponent = (codes >> 4) & 0x07
+    mantissa = codes & 0x0F
+    magnitude = (((mantissa << 3) + _MULAW_BIAS) << exponent) - _MULAW_BIAS
+    decode = np.where(codes & 0x80, -magnitude, magnitude).astype('<i2')
+
+    # Encode table, indexed by the 16-bit sample reinterpreted as unsigned. This follows the
+    # reference G.711 encoder, which works on the top 14 bits of the sample.
+    samples = np.arange(65536, dtype=np.uint16).view(np.int16).astype(np.int32) >> 2
+    mask = np.where(samples < 0, 0x7F, 0xFF)
+    magnitude = np.minimum(np.abs(samples), _MULAW_CLIP >> 2) + (_MULAW_BIAS >> 2)
+    segment = np.searchsorted(_MULAW_SEGMENT_ENDS, magnitude)
+    mantissa = (magnitude >> (segment + 1)) & 0x0F
+    encode = (((segment << 4) | mantissa) ^ mask).astype(np.uint8)
+
+    return encode, decode
+
+
+_MULAW_ENCODE, _MULAW_DECODE = _build_mulaw_tables()
+
+
+def _build_adpcm_tables():
+    """Builds per (step index, code) tables of the quantized difference and next step index."""
+    diffs = []
+    next_indexes = []
+    for index, step in enumerate(_ADPCM_STEP_TABLE):
+        diff_row = []
+        next_row = []
+        for code in range(16):
+            diff = step >> 3
+            if code & 4:
+                diff += step
+            if code & 2:
+                diff += step >> 1
+            if code & 1:
+                diff += step >> 2
+            diff_row.append(-diff if code & 8 else diff)
+            next_row.append(min(max(index + _ADPCM_INDEX_TABLE[code], 0), 88))
+        diffs.append(diff_row)
+        next_indexes.append(next_row)
+    return diffs, next_indexes
+
+
+_ADPCM_DIFFS, _ADPCM_NEXT_INDEX = _build_adpcm_tables()
+_ADPCM_DIFFS_ARRAY = np.array(_ADPCM_DIFFS, dtype=np.int32)
+
+
+class AudioCodec:
+    """Base class for wire audio codecs. The base class is the 16-bit PCM passthrough."""
+
+    name = PCM16
+    bits_per_sample = 16
+
+    def encode(self, pcm: bytes) -> bytes:
+        """Encodes 16-bit little-endian PCM into the wire format.
+
+        Args:
+            pcm: Raw 16-bit PCM audio
+
+        Returns:
+            Encoded audio
+        """
+        return pcm
+
+    def decode(self, data: bytes) -> bytes:
+        """Decodes wire audio into 16-bit little-endian PCM.
+
+        Args:
+            data: Encoded audio
+
+        Returns:
+            Raw 16-bit PCM audio
+        """
+        return data
+
+    def reset(self):
+        """Resets any codec state, e.g. after an interruption."""
+
+
+class MuLawCodec(AudioCodec):
+    """G.711 μ-law codec using vectorized lookup tables."""
+
+    name = MULAW
+    bits_per_sample = 8
+
+    def encode(self, pcm: bytes) -> bytes:
+        samples = np.frombuffer(pcm, dtype='<u2')
+        return _MULAW_ENCODE[samples].tobytes()
+
+    def decode(self, data: bytes) -> bytes:
+        codes = np.frombuffer(data, dtype=np.uint8)
+        return _MULAW_DECODE[codes].tobytes()
+
+
+class ImaAdpcmCodec(AudioCodec):
+    """IMA-ADPCM codec with streaming state.
+
+    The encoder is inherently sequential (each code depends on the previous
+    reconstructed sample), so it runs a table-driven loop. The decoder only walks
+    the step indexes sequentially and reconstructs the samples with NumPy.
+    """
+
+    name = ADPCM
+    bits_per_sample = 4
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self._predictor = 0
+        self._index = 0
+        # Sample left over from an odd-length encode, sent with the next chunk
+        self._pending = None
+
+    def encode(self, pcm: bytes) -> bytes:
+        samples = np.frombuffer(pcm, dtype='<i2').tolist()
+        if self._pending is not None:
+            samples.insert(0, self._pending)
+            self._pending = None
+        if len(samples) % 2:
+            self._pending = samples.pop()
+
+        predictor = self._predictor
+        index = self._index
+        codes = bytearray(len(samples) // 2)
+        high = 0
+
+        for i, sample in enumerate(samples):
+            step = _ADPCM_STEP_TABLE[index]
+            diff = sample - predictor
+            code = 0
+            if diff < 0:
+                code = 8
+                diff = -diff
+            if diff >= step:
+                code |= 4
+                diff -= step
+            if diff >= step >> 1:
+                code |= 2
+                diff -= step >> 1
+            if diff >= step >> 2:
+                code |= 1
+
+            predictor += _ADPCM_DIFFS[index][code]
+            if predictor > 32767:
+                predictor = 32767
+            elif predictor < -32768:
+                predictor = -32768
+            index = _ADPCM_NEXT_INDEX[index][code]
+
+            if i % 2 == 0:
+                high = code << 4
+            else:
+                codes[i >> 1] = high | code
+
+        self._predictor = predictor
+        self._index = index
+        return bytes(codes)
+
+    def decode(self, data: bytes) -> bytes:
+        packed = np.frombuffer(data, dtype=np.uint8)
+        codes = np.empty(len(packed) * 2, dtype=np.uint8)
+        codes[0::2] = packed >> 4
+        codes[1::2] = packed & 0x0F
+
+        # Step indexes depend only on the codes, but are clamped, so walk them sequentially
+        indexes = []
+        index = self._index
+        for code in codes.tolist():
+            indexes.append(index)
+            index = _ADPCM_NEXT_INDEX[index][code]
+
+        diffs = _ADPCM_DIFFS_ARRAY[np.array(indexes, dtype=np.intp), codes]
+        samples = self._predictor + np.cumsum(diffs, dtype=np.int64)
+
+        if len(samples) and (samples.max() > 32767 or samples.min() < -32768):
+            # Clamping changes every later sample, so fall back to the sequential form
+            predictor = self._predictor
+            for i, diff in enumerate(diffs.tolist()):
+                predictor = min(max(predictor + diff, -32768), 32767)
+                samples[i] = predictor
+
+        if len(samples):
+            self._predictor = int(samples[-1])
+        self._index = index
+        return samples.astype('<i2').tobytes()
+
+
+CODECS: Dict[str, Type[AudioCodec]] = {
+    PCM16: AudioCodec,
+    MULAW: MuLawCodec,
+    ADPCM: ImaAdpcmCodec,
+}
+
+
+def create_codec(name: str) -> AudioCodec:
+    """Creates a codec instance by name.
+
+    Args:
+        name: One of the keys of CODECS
+
+    Returns:
+        A new codec instance
+
+    Raises:
+        ValueError: If the codec is unknown
+    """
+    try:
+        return CODECS[name]()
+    except KeyError:
+        raise ValueError(f"Unknown audio codec: {name}")
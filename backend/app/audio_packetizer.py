@@ -0,0 +1,122 @@
+# // Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# // SPDX-License-Identifier: MIT-0
+
+"""
+Outbound Audio Packets
+
+Clients can pick the duration of the bot audio packets they receive. The output transport does
+the packing: it re-chunks bot audio into `audio_out_10ms_chunks` × 10 ms chunks and writes each
+chunk as one WebSocket message, so setting that to `packet_ms // 10` is enough for full packets.
+
+What the transport doesn't do is send a partial chunk. The remainder of a turn that doesn't fill
+a packet waits in its buffer and is discarded when the bot stops speaking, cutting off the end
+of the turn. This module provides a frame processor that pads the tail of each turn with silence
+up to a full packet, so the last words are always sent.
+"""
+
+from typing import Optional
+
+from pipecat.frames.frames import (
+    EndFrame,
+    Frame,
+    LLMFullResponseEndFrame,
+    OutputAudioRawFrame,
+    StartInterruptionFrame,
+    TTSStoppedFrame,
+)
+from pipecat.processors.frame_processor import FrameDirection, FrameProcessor
+
+from base64_serializer import parse_subprotocols
+
+# WebSocket subprotocol prefix used by clients to pick a packet duration, e.g. "audio.packet.80"
+PACKET_PROTOCOL_PREFIX = "audio.packet."
+MIN_PACKET_MS = 20
+MAX_PACKET_MS = 200
+
+
+def packet_ms_from_subprotocols(header: Optional[str], default: int) -> int:
+    """Gets the packet duration requested by the client, if any.
+
+    Args:
+        header: The raw `sec-websocket-protocol` header value
+        default: Packet duration to use when the client did not request one
+
+    Returns:
+        The packet duration in milliseconds, a multiple of 10 ms
+    """
+    for protocol in parse_subprotocols(header):
+        if not protocol.startswith(PACKET_PROTOCOL_PREFIX):
+            continue
+        try:
+            packet_ms = int(protocol[len(PACKET_PROTOCOL_PREFIX):])
+        except ValueError:
+            continue
+        if MIN_PACKET_MS <= packet_ms <= MAX_PACKET_MS and packet_ms % 10 == 0:
+            return packet_ms
+    return default
+
+
+class AudioTailPadder(FrameProcessor):
+    """Pads the bot audio of each turn with silence to a whole number of packets.
+
+    Place it right before `transport.output()` and set the transport's
+    `audio_out_10ms_chunks` to `packet_ms // 10`. Audio frames pass through
+    unchanged, only their length is tracked.
+    """
+
+    def __init__(self, packet_ms: int = 40, **kwargs):
+        """Initialize the padder.
+
+        Args:
+            packet_ms: Duration of each outgoing packet in milliseconds
+            **kwargs: Additional arguments passed to FrameProcessor
+        """
+        super().__init__(**kwargs)
+        self._packet_ms = packet_ms
+        # Bytes of the current turn past the last full packet
+        self._pending = 0
+        self._frame_type = OutputAudioRawFrame
+        self._sample_rate = 0
+        self._num_channels = 1
+
+    @property
+    def packet_ms(self) -> int:
+        """Gets the packet duration in milliseconds."""
+        return self._packet_ms
+
+    def _packet_bytes(self) -> int:
+        """Gets the packet size in bytes for the current audio format."""
+        return self._sample_rate * self._packet_ms // 1000 * 2 * self._num_channels
+
+    async def process_frame(self, frame: Frame, direction: FrameDirection):
+        """Tracks bot audio and pads the end of each turn.
+
+        Args:
+            frame: The frame to process
+            direction: The direction of frame flow in the pipeline
+        """
+        await super().process_frame(frame, direction)
+
+        if direction == FrameDirection.DOWNSTREAM and isinstance(frame, OutputAudioRawFrame):
+            if frame.sample_rate != self._sample_rate or frame.num_channels != self._num_channels:
+                self._sample_rate = frame.sample_rate
+                self._num_channels = frame.num_channels
+                self._pending = 0
+            self._frame_type = type(frame)
+            self._pending = (self._pending + len(frame.audio)) % self._packet_bytes()
+        elif isinstance(frame, StartInterruptionFrame):
+            # The transport drops its buffered audio on interruption
+            self._pending = 0
+        elif isinstance(frame, (TTSStoppedFrame, LLMFullResponseEndFrame, EndFrame)):
+            await self.flush()
+        await self.push_frame(frame, direction)
+
+    async def flush(self):
+        """Pushes the silence completing the last packet of the turn, if it is partial."""
+        if not self._pending:
+            return
+        silence = bytes(self._packet_bytes() - self._pending)
+        self._pending = 0
+        await self.push_frame(
+            self._frame_type(audio=silence, sample_rate=self._sample_rate, num_channels=self._num_channels)
+        )
@@ -13,11 +13,20 @@ The serializer is designed to work with the Pipecat audio processing pipeline an
 - Deserialization of incoming base64 data to audio frames
 - Audio resampling when input/output sample rates differ
 - Special handling for interruption events
+
+Clients that offer the `BINARY_AUDIO_PROTOCOL` subprotocol are switched to binary mode,
+where audio travels as raw little-endian 16-bit PCM binary WebSocket messages and only
+control events (e.g. `stop`) are sent as small JSON text messages.
+
+Clients can also negotiate a compact codec (`audio.codec.mulaw` or `audio.codec.adpcm`) and
+a wire sample rate (e.g. `audio.rate.8000`). The codec is applied in front of the resamplers,
+so the pipeline always sees 16-bit PCM at its own sample rate.
 """
 
-from typing import Optional
+from typing import Callable, List, Optional
 from pydantic import BaseModel
 import base64
+import binascii
 import json
 from loguru import logger
 
@@ -31,6 +40,38 @@ from pipecat.frames.frames import (
 from pipecat.serializers.base_serializer import FrameSerializer, FrameSerializerType
 from pipecat.audio.utils import create_stream_resampler
 
+from audio_codecs import CODECS, PCM16, create_codec
+from metrics import SERIALIZER_BYTES, SERIALIZER_FRAMES
+
+# WebSocket subprotocol offered by clients that want raw PCM binary audio frames.
+BINARY_AUDIO_PROTOCOL = "audio.pcm16"
+# WebSocket subprotocol prefixes used to pick a codec and a wire sample rate,
+# e.g. "audio.codec.mulaw" and "audio.rate.8000"
+CODEC_PROTOCOL_PREFIX = "audio.codec."
+RATE_PROTOCOL_PREFIX = "audio.rate."
+SUPPORTED_SAMPLE_RATES = (8000, 16000, 24000, 48000)
+
+# Resolved once, these are updated for every audio frame
+_FRAMES_IN = SERIALIZER_FRAMES.labels("in")
+_FRAMES_OUT = SERIALIZER_FRAMES.labels("out")
+_BYTES_IN = SERIALIZER_BYTES.labels("in")
+_BYTES_OUT = SERIALIZER_BYTES.labels("out")
+
+
+def parse_subprotocols(header: Optional[str]) -> List[str]:
+    """Splits a `sec-websocket-protocol` header into its offered subprotocols.
+
+    Args:
+        header: The raw header value, e.g. "my-api-key, audio.pcm16"
+
+    Returns:
+        The list of offered subprotocols, in the order the client sent them
+    """
+    if not header:
+        return []
+    return [protocol.strip() for protocol in header.split(",") if protocol.strip()]
+
+
 class Base64AudioSerializer(FrameSerializer):
     """Serializer for base64-encoded audio data over WebSocket.
     
@@ -44,20 +85,55 @@ class Base64AudioSerializer(FrameSerializer):
         Parameters:
             target_sample_rate: Target sample rate for audio processing
             sample_rate: Optional override for pipeline input sample rate
+            binary: Send and receive audio as raw binary messages instead of base64 JSON
+            codec: Wire audio codec, one of audio_codecs.CODECS
         """
         target_sample_rate: int = 16000
         sample_rate: Optional[int] = None
+        binary: bool = False
+        codec: str = PCM16
+
+        @classmethod
+        def from_subprotocols(cls, header: Optional[str], **kwargs) -> "Base64AudioSerializer.InputParams":
+            """Builds serializer parameters from the subprotocols offered by the client.
+
+            Args:
+                header: The raw `sec-websocket-protocol` header value
+                **kwargs: Additional parameter overrides
+
+            Returns:
+                InputParams with binary mode, codec and wire sample rate set from
+                the offered subprotocols
+            """
+            protocols = parse_subprotocols(header)
+            negotiated = {"binary": BINARY_AUDIO_PROTOCOL in protocols}
+
+            for protocol in protocols:
+                if protocol.startswith(CODEC_PROTOCOL_PREFIX):
+                    codec = protocol[len(CODEC_PROTOCOL_PREFIX):]
+                    if codec in CODECS:
+                        negotiated["codec"] = codec
+                elif protocol.startswith(RATE_PROTOCOL_PREFIX):
+                    rate = protocol[len(RATE_PROTOCOL_PREFIX):]
+                    if rate.isdigit() and int(rate) in SUPPORTED_SAMPLE_RATES:
+                        negotiated["target_sample_rate"] = int(rate)
+
+            negotiated.update(kwargs)
+            return cls(**negotiated)
 
     def __init__(
         self,
         params: Optional[InputParams] = None,
+        on_audio_serialized: Optional[Callable[[], None]] = None,
     ):
         """Initialize the Base64AudioSerializer.
 
         Args:
             params: Configuration parameters for sample rates and resampling
+            on_audio_serialized: Called after every outgoing audio frame is serialized
         """
         self._params = params or Base64AudioSerializer.InputParams()
+        self._on_audio_serialized = on_audio_serialized
         self._target_sample_rate = self._params.target_sample_rate
         self._sample_rate = 0  # Pipeline input rate
 
@@ -65,13 +141,19 @@ class Base64AudioSerializer(FrameSerializer):
         self._input_resampler = create_stream_resampler()
         self._output_resampler = create_stream_resampler()
 
+        # Codecs keep per-direction state, so each direction gets its own instance
+        self._input_codec = create_codec(self._params.codec)
+        self._output_codec = create_codec(self._params.codec)
+
     @property
     def type(self) -> FrameSerializerType:
         """Gets the serializer type.
 
         Returns:
-            The serializer type (TEXT for base64-encoded data)
+            The serializer type (BINARY for raw PCM mode, TEXT for base64-encoded data)
         """
+        if self._params.binary:
+            return FrameSerializerType.BINARY
         return FrameSerializerType.TEXT
 
     async def setup(self, frame: StartFrame):
@@ -90,14 +172,19 @@ class Base64AudioSerializer(FrameSerializer):
 
         Returns:
             JSON string containing base64-encoded audio data or control events,
-            or None if frame type is not handled
+            raw PCM bytes for audio in binary mode, or None if frame type is not handled
 
         The serialized format is a JSON object with:
         - For audio: {"event": "media", "data": "<base64-encoded-audio>"}
         - For interruption: {"event": "stop"}
+
+        In binary mode audio is returned as raw bytes in the negotiated codec,
+        while control events keep their JSON text format. Stateful codecs are reset
+        on interruption, and clients reset their decoder when they receive `stop`.
         """
         try:
             if isinstance(frame, StartInterruptionFrame):
+                self._output_codec.reset()
                 response = {"event": "stop"}
                 return json.dumps(response)
 
@@ -112,11 +199,21 @@ class Base64AudioSerializer(FrameSerializer):
                 else:
                     resampled_data = frame.audio
 
+                resampled_data = self._output_codec.encode(resampled_data)
+                _FRAMES_OUT.inc()
+                if self._on_audio_serialized:
+                    self._on_audio_serialized()
+
+                if self._params.binary:
+                    _BYTES_OUT.inc(len(resampled_data))
+                    return bytes(resampled_data)
+
                 # Encode to base64
                 encoded_data = base64.b64encode(resampled_data).decode('utf-8')
 
-                response = {"event": "media", "data": encoded_data}
-                return json.dumps(response)
+                response = json.dumps({"event": "media", "data": encoded_data})
+                _BYTES_OUT.inc(len(response))
+                return response
 
             else:
                 print('Unhandled frame: ', frame)
@@ -130,42 +227,48 @@ class Base64AudioSerializer(FrameSerializer):
         """Deserializes base64-encoded data to Pipecat frames.
 
         Args:
-            data: The base64-encoded audio data as string or bytes
+            data: The base64-encoded audio data as string or bytes, or raw PCM
+                bytes in binary mode
 
         Returns:
             An InputAudioRawFrame containing the decoded and resampled audio data,
             or None if deserialization fails
 
         Process:
-        1. Decode base64 data to bytes
-        2. Convert to numpy array (16-bit PCM format)
+        1. Decode base64 data to bytes (binary messages are used as-is)
+        2. Decode the negotiated codec to 16-bit PCM
         3. Resample if needed
         4. Create InputAudioRawFrame with processed audio
+
+        When no resampling is needed the decoded buffer is handed to the pipeline
+        without any further copies.
         """
         try:
-            # Decode base64 data
-            if isinstance(data, bytes):
-                data = data.decode('utf-8')
-            
-            decoded_data = base64.b64decode(data)
-            
-            # Convert to numpy array (assuming 16-bit PCM)
-            import numpy as np
-            audio_data = np.frombuffer(decoded_data, dtype=np.int16)
+            _BYTES_IN.inc(len(data))
+
+            if isinstance(data, bytes) and self._params.binary:
+                # Binary messages already carry raw PCM
+                audio = data
+            else:
+                # a2b_base64 accepts both str and bytes, avoiding an extra decode
+                audio = binascii.a2b_base64(data)
+
+            audio = self._input_codec.decode(audio)
+
+            if len(audio) % 2:
+                raise ValueError(f"expected 16-bit PCM, got {len(audio)} bytes")
 
             # Resample if needed
             if self._target_sample_rate != self._sample_rate:
-                audio_data = await self._input_resampler.resample(
-                    audio_data,
+                audio = await self._input_resampler.resample(
+                    audio,
                     self._target_sample_rate,
                     self._sample_rate
                 )
 
-            # Convert back to bytes
-            decoded_data = audio_data.tobytes()
-
+            _FRAMES_IN.inc()
             return InputAudioRawFrame(
-                audio=decoded_data,
+                audio=audio,
                 num_channels=1,
                 sample_rate=self._sample_rate
             )
@@ -0,0 +1,200 @@
+# // Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# // SPDX-License-Identifier: MIT-0
+
+"""
+Bedrock Runtime Client
+
+One shared, pooled client for Bedrock `InvokeModel` calls, used by SQLQueryGenerator and
+available to other tools. A default `boto3.client("bedrock-runtime")` keeps only 10 pooled
+connections, so with more concurrent tool calls than that, calls queue for a connection or
+open new ones and pay the TLS handshake again.
+
+- Connection pool sized for the concurrent tool calls, with TCP keep-alive so idle pooled
+  connections survive NAT and load balancer idle timeouts
+- Adaptive retries: throttling responses raise a send delay shared by all calls, which halves
+  again with every success, and failed calls are retried with jittered exponential backoff.
+  Both stop at a per call latency budget: a voice caller is better served by an error after
+  20 s than by an answer after a minute. Botocore's own "adaptive" mode isn't used as it
+  blocks sends for as long as it sees fit, outside any budget
+
+Calls are blocking, tools make them from the tool executor's threads.
+"""
+
+import json
+import random
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+import boto3
+from botocore.config import Config
+from botocore.exceptions import ClientError, ConnectionError as BotocoreConnectionError, ReadTimeoutError
+from loguru import logger
+
+from metrics import BEDROCK_RETRIES
+
+DEFAULT_MAX_CONNECTIONS = 50
+DEFAULT_CONNECT_TIMEOUT_SECS = 3.0
+DEFAULT_READ_TIMEOUT_SECS = 30.0
+DEFAULT_MAX_ATTEMPTS = 3
+DEFAULT_LATENCY_BUDGET_SECS = 25.0
+# Exponential backoff with full jitter between attempts
+BACKOFF_BASE_SECS = 0.25
+BACKOFF_MAX_SECS = 4.0
+# Smallest shared send delay after a throttling response
+THROTTLE_DELAY_MIN_SECS = 0.1
+
+RETRYABLE_ERRORS = {
+    "ThrottlingException",
+    "ServiceUnavailableException",
+    "InternalServerException",
+    "ModelNotReadyException",
+    "ModelTimeoutException",
+}
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+
+class BedrockError(Exception):
+    """A Bedrock call that failed, after retries if the error was retryable."""
+
+    def __init__(self, message: str, code: str = "", status: int = 0):
+        super().__init__(message)
+        self.code = code
+        self.status = status
+
+    @property
+    def throttled(self) -> bool:
+        return self.code == "ThrottlingException" or self.status == 429
+
+    @property
+    def retryable(self) -> bool:
+        return self.code in RETRYABLE_ERRORS or self.status in RETRYABLE_STATUS
+
+
+class BedrockRuntimeClient:
+    """Shared Bedrock runtime client with pooled connections and budgeted retries."""
+
+    def __init__(
+        self,
+        region_name: str = "us-east-1",
+        max_connections: int = DEFAULT_MAX_CONNECTIONS,
+        connect_timeout_secs: float = DEFAULT_CONNECT_TIMEOUT_SECS,
+        read_timeout_secs: float = DEFAULT_READ_TIMEOUT_SECS,
+        max_attempts: int = DEFAULT_MAX_ATTEMPTS,
+        latency_budget_secs: float = DEFAULT_LATENCY_BUDGET_SECS,
+        endpoint_url: Optional[str] = None,
+        session: Optional[boto3.Session] = None,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        """Initialize the client. Connections are opened on first use.
+
+        Args:
+            region_name: AWS region name where Bedrock is available
+            max_connections: Pooled connections, at least the expected concurrent calls
+            connect_timeout_secs: Timeout for opening a connection
+            read_timeout_secs: Timeout for a response
+            max_attempts: Attempts per call, including the first
+            latency_budget_secs: Time after which a call is not retried any more
+            endpoint_url: Endpoint override, e.g. a local stand-in for benchmarks
+            session: boto3 session providing credentials, the default session if None
+            sleep: Blocking sleep between attempts, replaceable in tests
+        """
+        self.region_name = region_name
+        self.max_connections = max_connections
+        self.connect_timeout_secs = connect_timeout_secs
+        self.read_timeout_secs = read_timeout_secs
+        self.max_attempts = max_attempts
+        self.latency_budget_secs = latency_budget_secs
+        self._session = session or boto3.Session()
+        self._sleep = sleep
+
+        self._client = self._session.client(
+            "bedrock-runtime",
+            region_name=region_name,
+            endpoint_url=endpoint_url,
+            config=Config(
+                max_pool_connections=max_connections,
+                connect_timeout=connect_timeout_secs,
+                read_timeout=read_timeout_secs,
+                tcp_keepalive=True,
+                # Retries are done by invoke_model() within the latency budget
+                retries={"mode": "standard", "total_max_attempts": 1},
+            ),
+        )
+
+        self._throttle_delay = 0.0
+        self._throttle_lock = threading.Lock()
+
+    def _backoff_secs(self, attempt: int, remaining: float) -> float:
+        return min(random.uniform(0, BACKOFF_BASE_SECS * 2 ** attempt), BACKOFF_MAX_SECS, max(remaining, 0.0))
+
+    def _send_delay(self, deadline: float) -> float:
+        """Returns the delay before sending while Bedrock is throttling, within the budget."""
+        with self._throttle_lock:
+            delay = self._throttle_delay
+        if not delay:
+            return 0.0
+        return min(random.uniform(delay / 2, delay), max(deadline - time.monotonic(), 0.0))
+
+    def _record(self, error: Optional[BedrockError]):
+        """Raises the shared send delay on throttling, lowers it on success."""
+        with self._throttle_lock:
+            if error is not None and error.throttled:
+                self._throttle_delay = min(max(self._throttle_delay * 2, THROTTLE_DELAY_MIN_SECS), BACKOFF_MAX_SECS)
+            elif error is None and self._throttle_delay:
+                self._throttle_delay = self._throttle_delay / 2 if self._throttle_delay > THROTTLE_DELAY_MIN_SECS else 0.0
+
+    def _retry(self, operation: str, error: BedrockError, attempt: int, deadline: float) -> Optional[float]:
+        """Returns the seconds to wait before retrying, or None when the call should fail."""
+        remaining = deadline - time.monotonic()
+        if not error.retryable or attempt + 1 >= self.max_attempts or remaining <= 0:
+            return None
+        BEDROCK_RETRIES.labels(operation, error.code or str(error.status)).inc()
+        delay = self._backoff_secs(attempt, remaining)
+        logger.warning(f"Bedrock {operation} failed with {error.code or error.status}, retrying in {delay:.2f}s")
+        return delay
+
+    def invoke_model(self, model_id: str, body: Dict[str, Any], operation: str = "invoke_model") -> Dict[str, Any]:
+        """Invokes a model and returns its parsed JSON response. Blocking.
+
+        Args:
+            model_id: Model id or inference profile ARN
+            body: Request body, sent as JSON
+            operation: What the call is for, labels the retry metric
+
+        Returns:
+            The parsed response body
+
+        Raises:
+            BedrockError: The call failed or ran out of attempts or latency budget
+        """
+        deadline = time.monotonic() + self.latency_budget_secs
+        payload = json.dumps(body)
+        attempt = 0
+        while True:
+            delay = self._send_delay(deadline)
+            if delay:
+                self._sleep(delay)
+            try:
+                response = self._client.invoke_model(modelId=model_id, body=payload)
+                result = json.loads(response["body"].read())
+                self._record(None)
+                return result
+            except ClientError as e:
+                error = BedrockError(
+                    str(e),
+                    e.response.get("Error", {}).get("Code", ""),
+                    e.response.get("ResponseMetadata", {}).get("HTTPStatusCode", 0),
+                )
+            except (BotocoreConnectionError, ReadTimeoutError) as e:
+                error = BedrockError(str(e), "ServiceUnavailableException")
+            self._record(error)
+            delay = self._retry(operation, error, attempt, deadline)
+            if delay is None:
+                raise error
+            self._sleep(delay)
+            attempt += 1
+
+    def close(self):
+        """Closes the pooled connections."""
+        self._client.close()
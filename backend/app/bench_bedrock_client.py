@@ -0,0 +1,244 @@
+# // Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# // SPDX-License-Identifier: MIT-0
+
+"""
+Bedrock client benchmark
+
+Compares ways of making concurrent InvokeModel calls against a local HTTP stand-in for
+Bedrock that answers after a fixed model latency, so no AWS access is needed:
+
+- boto3-default: `boto3.client("bedrock-runtime")` with default settings on a thread per call,
+  the setup SQLQueryGenerator used to have (pool of 10 connections)
+- pooled: BedrockRuntimeClient.invoke_model() on a thread per call
+
+Each run sends bursts of simultaneous calls, the way tool calls of many sessions pile up. For
+every concurrency level it reports throughput, latency percentiles and how many TCP
+connections the stand-in accepted. Connections above the concurrency level were opened
+again after the client's pool discarded them between bursts, each of which costs a TLS
+handshake against the real endpoint.
+
+Usage:
+    python bench_bedrock_client.py --concurrency 10 50 100 --latency-ms 200
+"""
+
+import argparse
+import json
+import multiprocessing
+import statistics
+import threading
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List, Optional, Tuple
+
+import boto3
+
+from bedrock_client import BedrockRuntimeClient
+
+MODEL_ID = "anthropic.claude-3-5-sonnet-20241022-v2:0"
+BODY = {
+    "anthropic_version": "bedrock-2023-05-31",
+    "max_tokens": 300,
+    "messages": [{"role": "user", "content": "How many orders are pending?"}],
+}
+
+
+class StandInBedrock:
+    """Local HTTP server answering InvokeModel like Bedrock after a fixed latency."""
+
+    def __init__(self, latency_secs: float = 0.2, reply: str = "SELECT 1"):
+        """Initialize the stand-in.
+
+        Args:
+            latency_secs: Time before each response, standing in for model latency
+            reply: Text of every model reply
+        """
+        self.latency_secs = latency_secs
+        self.reply = reply
+        # (status, error type) responses to send before answering normally
+        self.failures: List[Tuple[int, str]] = []
+        self.requests = 0
+        self.signed = 0
+        self.connections = 0
+        self._lock = threading.Lock()
+        self._server: Optional[ThreadingHTTPServer] = None
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self._server.server_address[1]}"
+
+    def start(self):
+        stand_in = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_POST(self):
+                self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                with stand_in._lock:
+                    stand_in.requests += 1
+                    stand_in.signed += self.headers.get("Authorization", "").startswith("AWS4-HMAC-SHA256")
+                    failure = stand_in.failures.pop(0) if stand_in.failures else None
+                time.sleep(stand_in.latency_secs)
+                if failure:
+                    status, error_type = failure
+                    self._send(status, {"message": f"stand-in {error_type}"}, {"x-amzn-ErrorType": error_type})
+                else:
+                    self._send(200, {"content": [{"type": "text", "text": stand_in.reply}]})
+
+            def do_GET(self):
+                # Counters for a benchmark running the stand-in in another process
+                if self.path == "/reset":
+                    stand_in.reset()
+                with stand_in._lock:
+                    stats = {"requests": stand_in.requests, "signed": stand_in.signed,
+                             "connections": stand_in.connections}
+                self._send(200, stats)
+
+            def _send(self, status: int, body: Dict, headers: Optional[Dict[str, str]] = None):
+                data = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format, *args):
+                pass
+
+        class Server(ThreadingHTTPServer):
+            daemon_threads = True
+            request_queue_size = 512
+
+            def process_request(self, request, client_address):
+                with stand_in._lock:
+                    stand_in.connections += 1
+                super().process_request(request, client_address)
+
+        self._server = Server(("127.0.0.1", 0), Handler)
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def reset(self):
+        with self._lock:
+            self.requests = self.signed = 0
+            self.connections = 0
+
+
+def serve_stand_in(latency_secs: float, ports: multiprocessing.Queue):
+    """Runs a stand-in in its own process, so it doesn't compete with the clients for the GIL."""
+    stand_in = StandInBedrock(latency_secs=latency_secs)
+    stand_in.start()
+    ports.put(stand_in.url)
+    threading.Event().wait()
+
+
+def stand_in_stats(url: str, reset: bool = False) -> Dict:
+    with urllib.request.urlopen(f"{url}/{'reset' if reset else 'stats'}") as response:
+        return json.loads(response.read())
+
+
+def stand_in_session() -> boto3.Session:
+    """A boto3 session with static credentials, enough to sign requests to the stand-in."""
+    return boto3.Session(aws_access_key_id="bench", aws_secret_access_key="bench", region_name="us-east-1")
+
+
+def summarize(mode: str, concurrency: int, latencies: List[float], elapsed: float, errors: int, connections: int) -> Dict:
+    latencies.sort()
+    return {
+        "mode": mode,
+        "concurrency": concurrency,
+        "calls": len(latencies),
+        "errors": errors,
+        "calls_per_sec": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(statistics.median(latencies) * 1000, 1),
+        "p95_ms": round(latencies[int(len(latencies) * 0.95)] * 1000, 1),
+        "connections": connections,
+    }
+
+
+def run_threads(call: Callable[[], None], concurrency: int, bursts: int) -> Tuple[List[float], int, float]:
+    """Runs bursts of `concurrency` simultaneous blocking calls, one thread per call."""
+    latencies: List[float] = []
+    errors = 0
+
+    def timed():
+        nonlocal errors
+        start = time.perf_counter()
+        try:
+            call()
+            latencies.append(time.perf_counter() - start)
+        except Exception:
+            errors += 1
+
+    # One untimed call, so one-time client setup isn't counted
+    call()
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for _ in range(bursts):
+            for future in [pool.submit(timed) for _ in range(concurrency)]:
+                future.result()
+    return latencies, errors, time.perf_counter() - start
+
+
+def bench(url: str, mode: str, concurrency: int, bursts: int) -> Dict:
+    stand_in_stats(url, reset=True)
+    if mode == "boto3-default":
+        client = stand_in_session().client("bedrock-runtime", endpoint_url=url)
+        payload = json.dumps(BODY)
+        latencies, errors, elapsed = run_threads(
+            lambda: client.invoke_model(modelId=MODEL_ID, body=payload)["body"].read(), concurrency, bursts
+        )
+    else:
+        client = BedrockRuntimeClient(max_connections=concurrency, endpoint_url=url, session=stand_in_session())
+        latencies, errors, elapsed = run_threads(lambda: client.invoke_model(MODEL_ID, BODY), concurrency, bursts)
+    client.close()
+    # Less the connection of the stats request itself
+    connections = stand_in_stats(url)["connections"] - 1
+    return summarize(mode, concurrency, latencies, elapsed, errors, connections)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bedrock client benchmark against a local stand-in")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[10, 50, 100],
+                        help="Concurrent calls to try")
+    parser.add_argument("--modes", nargs="+", default=["boto3-default", "pooled"],
+                        choices=["boto3-default", "pooled"])
+    parser.add_argument("--latency-ms", type=float, default=200.0, help="Stand-in model latency")
+    parser.add_argument("--bursts", type=int, default=5,
+                        help="Bursts of simultaneous calls per run, tool calls arrive in bursts too")
+    parser.add_argument("--output", help="Write the results as JSON to this file")
+    args = parser.parse_args()
+
+    ports: multiprocessing.Queue = multiprocessing.Queue()
+    server = multiprocessing.Process(target=serve_stand_in, args=(args.latency_ms / 1000, ports), daemon=True)
+    server.start()
+    url = ports.get(timeout=30)
+    results = []
+    try:
+        for concurrency in args.concurrency:
+            for mode in args.modes:
+                result = bench(url, mode, concurrency, args.bursts)
+                results.append(result)
+                print(f"  {result}", flush=True)
+    finally:
+        server.terminate()
+
+    print(f"\n{'mode':>14} {'concurrency':>12} {'calls/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'conns':>6} {'errors':>7}")
+    for r in results:
+        print(f"{r['mode']:>14} {r['concurrency']:>12} {r['calls_per_sec']:>8} {r['p50_ms']:>8} "
+              f"{r['p95_ms']:>8} {r['connections']:>6} {r['errors']:>7}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,224 @@
+# // Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# // SPDX-License-Identifier: MIT-0
+
+"""
+Schema pruning report
+
+Measures how many SQL prompt tokens schema pruning saves on a fixed question set, and what it
+costs in SQL accuracy.
+
+Offline (the default), accuracy is schema coverage: a question counts as covered when its
+reference SQL only uses tables and columns the pruned schema kept, so the model was shown
+everything the right answer needs. Two schemas are reported: the built-in
+customers/orders/payments schema, and EXTENDED_SCHEMA, the same with the product, shipment,
+refund and support tables a growing database would add.
+
+With --generate, each question is also sent to Claude with the full and with the pruned
+schema, and the generated SQL is checked against the full schema. --execute additionally runs
+both queries and compares their results, which needs the Postgres database.
+
+Usage:
+    python bench_schema_pruning.py
+    python bench_schema_pruning.py --generate --execute --schemas default
+"""
+
+import argparse
+import json
+import statistics
+from typing import Dict, List, Optional, Tuple
+
+from schema_pruning import SchemaPruner, estimate_tokens
+from semantic_cache import parse_schema, verify_sql
+from sql_generator import DEFAULT_SCHEMA
+
+EXTENDED_SCHEMA = DEFAULT_SCHEMA + """
+        4. PRODUCTS Table:
+           - product_id (SERIAL PRIMARY KEY)
+           - name (VARCHAR(100))
+           - category (VARCHAR(50)) [valid values: electronics, clothing, home, books]
+           - unit_price (DECIMAL(10,2))
+           - stock_quantity (INTEGER)
+           - created_at (TIMESTAMP)
+
+        5. ORDER_ITEMS Table:
+           - order_item_id (SERIAL PRIMARY KEY)
+           - order_id (INTEGER, FK -> orders)
+           - product_id (INTEGER, FK -> products)
+           - quantity (INTEGER)
+           - unit_price (DECIMAL(10,2))
+
+        6. SHIPMENTS Table:
+           - shipment_id (SERIAL PRIMARY KEY)
+           - order_id (INTEGER, FK -> orders)
+           - carrier (VARCHAR(50)) [valid values: ups, fedex, usps, dhl]
+           - tracking_number (VARCHAR(100), UNIQUE)
+           - shipped_at (TIMESTAMP)
+           - delivered_at (TIMESTAMP)
+
+        7. REFUNDS Table:
+           - refund_id (SERIAL PRIMARY KEY)
+           - payment_id (INTEGER, FK -> payments)
+           - refund_amount (DECIMAL(10,2))
+           - reason (VARCHAR(50)) [valid values: damaged, late_delivery, wrong_item, changed_mind]
+           - refunded_at (TIMESTAMP)
+
+        8. SUPPORT_TICKETS Table:
+           - ticket_id (SERIAL PRIMARY KEY)
+           - customer_id (INTEGER, FK -> customers)
+           - subject (VARCHAR(200))
+           - priority (VARCHAR(20)) [valid values: low, normal, high, urgent]
+           - opened_at (TIMESTAMP)
+           - closed_at (TIMESTAMP)
+        """
+
+# (question, reference SQL, schemas the question applies to)
+QUESTIONS: List[Tuple[str, str, Tuple[str, ...]]] = [
+    ("How many orders are pending?", "SELECT COUNT(*) FROM orders WHERE status = 'pending'", ("default", "extended")),
+    ("What's the status of order 1234?", "SELECT status FROM orders WHERE order_id = 1234", ("default", "extended")),
+    ("How many customers do we have?", "SELECT COUNT(*) FROM customers", ("default", "extended")),
+    ("What is the email of customer Jane Doe?",
+     "SELECT email FROM customers WHERE first_name = 'Jane' AND last_name = 'Doe'", ("default", "extended")),
+    ("How many payments failed this week?",
+     "SELECT COUNT(*) FROM payments WHERE status = 'failed' AND payment_date >= date_trunc('week', now())",
+     ("default", "extended")),
+    ("What is the total of credit card payments?",
+     "SELECT SUM(amount) FROM payments WHERE payment_method = 'credit_card' AND status = 'success'",
+     ("default", "extended")),
+    ("What are the five most recent orders?",
+     "SELECT order_id, status, total_amount FROM orders ORDER BY order_date DESC LIMIT 5", ("default", "extended")),
+    ("Which customers spent the most?",
+     "SELECT c.first_name, c.last_name, SUM(o.total_amount) AS spent FROM customers c "
+     "JOIN orders o ON o.customer_id = c.customer_id GROUP BY c.customer_id ORDER BY spent DESC LIMIT 5",
+     ("default", "extended")),
+    ("How much has jane@example.com paid?",
+     "SELECT SUM(p.amount) FROM payments p JOIN orders o ON o.order_id = p.order_id "
+     "JOIN customers c ON c.customer_id = o.customer_id WHERE c.email = 'jane@example.com'",
+     ("default", "extended")),
+    ("What is the average order value?", "SELECT AVG(total_amount) FROM orders", ("default", "extended")),
+    ("How many orders were shipped to Seattle?",
+     "SELECT COUNT(*) FROM orders WHERE shipping_address ILIKE '%seattle%'", ("default", "extended")),
+    ("Which payment methods do customers use most?",
+     "SELECT payment_method, COUNT(*) FROM payments GROUP BY payment_method ORDER BY 2 DESC",
+     ("default", "extended")),
+    ("List customers with a cancelled order",
+     "SELECT DISTINCT c.first_name, c.last_name FROM customers c JOIN orders o "
+     "ON o.customer_id = c.customer_id WHERE o.status = 'cancelled'", ("default", "extended")),
+    ("How many transactions were declined by digital wallet?",
+     "SELECT COUNT(*) FROM payments WHERE payment_method = 'digital_wallet' AND status = 'failed'",
+     ("default", "extended")),
+    ("Which products are low on stock?",
+     "SELECT name, stock_quantity FROM products ORDER BY stock_quantity LIMIT 5", ("extended",)),
+    ("What are the best selling products in electronics?",
+     "SELECT p.name, SUM(i.quantity) AS sold FROM order_items i JOIN products p ON p.product_id = i.product_id "
+     "WHERE p.category = 'electronics' GROUP BY p.name ORDER BY sold DESC LIMIT 5", ("extended",)),
+    ("How many shipments did fedex deliver late?",
+     "SELECT COUNT(*) FROM shipments WHERE carrier = 'fedex' AND delivered_at > shipped_at + interval '5 days'",
+     ("extended",)),
+    ("What is the total refund amount for damaged items?",
+     "SELECT SUM(refund_amount) FROM refunds WHERE reason = 'damaged'", ("extended",)),
+    ("How many urgent support tickets are still open?",
+     "SELECT COUNT(*) FROM support_tickets WHERE priority = 'urgent' AND closed_at IS NULL", ("extended",)),
+    ("Which customers opened the most support tickets?",
+     "SELECT c.first_name, c.last_name, COUNT(*) AS tickets FROM support_tickets t JOIN customers c "
+     "ON c.customer_id = t.customer_id GROUP BY c.customer_id ORDER BY tickets DESC LIMIT 5", ("extended",)),
+    ("What did customer 42 buy last month?",
+     "SELECT p.name, i.quantity FROM orders o JOIN order_items i ON i.order_id = o.order_id "
+     "JOIN products p ON p.product_id = i.product_id WHERE o.customer_id = 42 "
+     "AND o.order_date >= date_trunc('month', now()) - interval '1 month'", ("extended",)),
+]
+
+SCHEMAS = {"default": DEFAULT_SCHEMA, "extended": EXTENDED_SCHEMA}
+
+
+def evaluate(name: str, schema: str, generator=None, execute: bool = False) -> Dict:
+    """Prunes the schema for every question of a schema and scores the result."""
+    pruner = SchemaPruner()
+    full_info = parse_schema(schema)
+    full_tokens = estimate_tokens(schema)
+    rows = []
+    for question, reference, schemas in QUESTIONS:
+        if name not in schemas:
+            continue
+        selection = pruner.select(question, schema)
+        row = {
+            "question": question,
+            "tables": list(selection.tables),
+            "result": selection.reason,
+            "prompt_schema_tokens": estimate_tokens(selection.schema),
+            "covered": verify_sql(reference, parse_schema(selection.schema)),
+        }
+        if generator is not None:
+            row.update(generate(generator, question, schema, selection.schema, full_info, execute))
+        rows.append(row)
+
+    saved = [1 - row["prompt_schema_tokens"] / full_tokens for row in rows]
+    summary = {
+        "schema": name,
+        "questions": len(rows),
+        "full_schema_tokens": full_tokens,
+        "mean_prompt_schema_tokens": round(statistics.mean(row["prompt_schema_tokens"] for row in rows), 1),
+        "mean_tokens_saved_pct": round(100 * statistics.mean(saved), 1),
+        "pruned_rate": pruner.stats()["pruned_rate"],
+        "coverage": round(sum(row["covered"] for row in rows) / len(rows), 3),
+    }
+    for key in ("valid_full", "valid_pruned", "same_result"):
+        scored = [row[key] for row in rows if row.get(key) is not None]
+        if scored:
+            summary[key] = round(sum(scored) / len(scored), 3)
+    return {"summary": summary, "questions": rows}
+
+
+def generate(generator, question: str, schema: str, pruned: str, full_info, execute: bool) -> Dict:
+    """Generates SQL with the full and the pruned schema and compares the two."""
+    full_sql = generator._invoke_model("sql_generation", generator._sql_generation_body(question, schema))
+    pruned_sql = generator._invoke_model("sql_generation", generator._sql_generation_body(question, pruned))
+    row = {
+        "full_sql": full_sql,
+        "pruned_sql": pruned_sql,
+        "valid_full": verify_sql(full_sql, full_info),
+        "valid_pruned": verify_sql(pruned_sql, full_info),
+        "same_result": None,
+    }
+    if execute:
+        row["same_result"] = run(generator, full_sql) == run(generator, pruned_sql)
+    return row
+
+
+def run(generator, sql: str) -> Optional[List]:
+    try:
+        rows = generator.db.execute_query(sql)
+    except Exception:
+        return None
+    # Column names and row order may differ between equivalent queries
+    return sorted(json.dumps(list(row.values()), default=str) for row in rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Prompt tokens saved by schema pruning against SQL accuracy")
+    parser.add_argument("--schemas", nargs="+", default=list(SCHEMAS), choices=list(SCHEMAS))
+    parser.add_argument("--generate", action="store_true", help="Also generate SQL with Claude (needs AWS)")
+    parser.add_argument("--execute", action="store_true", help="Compare query results (needs Postgres)")
+    parser.add_argument("--verbose", action="store_true", help="Print every question")
+    parser.add_argument("--output", help="Write the results as JSON to this file")
+    args = parser.parse_args()
+
+    generator = None
+    if args.generate:
+        from sql_generator import SQLQueryGenerator
+        generator = SQLQueryGenerator()
+
+    results = [evaluate(name, SCHEMAS[name], generator, args.execute) for name in args.schemas]
+    for result in results:
+        if args.verbose:
+            for row in result["questions"]:
+                print(f"  {row['result']:>12} {row['prompt_schema_tokens']:>5} tok "
+                      f"{'covered' if row['covered'] else 'MISSING':>8}  {row['question']}  {row['tables']}")
+        print(json.dumps(result["summary"]))
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
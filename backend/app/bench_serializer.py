@@ -0,0 +1,322 @@
+# // Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# // SPDX-License-Identifier: MIT-0
+
+"""
+Serializer and Resampler Benchmark Suite
+
+Pushes synthetic PCM through the per-frame hot path of every session:
+- Base64AudioSerializer.deserialize (client audio into the pipeline)
+- Base64AudioSerializer.serialize (bot audio out to the client)
+- The create_stream_resampler resamplers on their own
+- The wire codecs on their own
+
+Each case runs at several chunk sizes and client/pipeline sample-rate pairs (16k, 8k, 24k and
+48k clients against the 16 kHz pipeline) for every wire mode, and reports frames/sec,
+microseconds per frame, allocated blocks and bytes per frame and bytes on the wire. Results
+are written as JSON so builds can be compared before rolling new containers.
+
+Usage:
+    python bench_serializer.py [--frames 1000] [--output results.json]
+    python bench_serializer.py --output new.json --compare baseline.json
+"""
+
+import argparse
+import asyncio
+import base64
+import json
+import platform
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+import numpy as np
+
+from pipecat.audio.utils import create_stream_resampler
+from pipecat.frames.frames import OutputAudioRawFrame, StartFrame
+
+from audio_codecs import ADPCM, CODECS, MULAW, AudioCodec, create_codec
+from base64_serializer import Base64AudioSerializer
+
+PIPELINE_SAMPLE_RATE = 16000
+CHUNK_MS = (10, 20, 40, 100)
+CLIENT_SAMPLE_RATES = (16000, 8000, 24000, 48000)
+MODES = {
+    "text": {},
+    "binary": {"binary": True},
+    "mulaw": {"binary": True, "codec": MULAW},
+    "adpcm": {"binary": True, "codec": ADPCM},
+}
+WARMUP_FRAMES = 10
+
+
+def make_chunks(count: int, chunk_ms: int, sample_rate: int):
+    """Generates synthetic 16-bit PCM chunks of a sine tone.
+
+    Args:
+        count: Number of chunks to generate
+        chunk_ms: Duration of each chunk in milliseconds
+        sample_rate: Sample rate of the generated audio
+
+    Returns:
+        List of raw PCM byte strings
+    """
+    samples = sample_rate * chunk_ms // 1000
+    t = np.arange(samples * count) / sample_rate
+    tone = (np.sin(2 * np.pi * 440 * t) * 8000).astype(np.int16)
+    return [chunk.tobytes() for chunk in np.split(tone, count)]
+
+
+def client_payload(chunk: bytes, params: Base64AudioSerializer.InputParams, codec: AudioCodec) -> str | bytes:
+    """Encodes a PCM chunk the way a client sends it to the server.
+
+    Args:
+        chunk: Raw PCM audio
+        params: Serializer parameters negotiated with the client
+        codec: The client's encoder for the negotiated codec
+
+    Returns:
+        Raw bytes in binary mode, otherwise a base64 string
+    """
+    encoded = codec.encode(chunk)
+    if params.binary:
+        return encoded
+    return base64.b64encode(encoded).decode('utf-8')
+
+
+async def measure(fn, inputs, alloc_samples: int):
+    """Times an async per-frame function and measures its allocations.
+
+    Args:
+        fn: Async function called once per input
+        inputs: Per-frame inputs
+        alloc_samples: Number of frames to measure allocations for
+
+    Returns:
+        Tuple of (result dictionary, outputs of the timed run)
+    """
+    for item in inputs[:WARMUP_FRAMES]:
+        await fn(item)
+
+    start = time.perf_counter()
+    outputs = [await fn(item) for item in inputs]
+    elapsed = time.perf_counter() - start
+
+    # Allocations are measured in a separate pass, tracing slows everything down
+    ignore_tracing = [tracemalloc.Filter(False, tracemalloc.__file__)]
+    samples = inputs[:alloc_samples]
+    kept = []
+    blocks = 0
+    alloc_bytes = 0
+
+    tracemalloc.start()
+    try:
+        for item in samples:
+            before = tracemalloc.take_snapshot().filter_traces(ignore_tracing)
+            tracemalloc.reset_peak()
+            current, _ = tracemalloc.get_traced_memory()
+            kept.append(await fn(item))
+            _, peak = tracemalloc.get_traced_memory()
+            after = tracemalloc.take_snapshot().filter_traces(ignore_tracing)
+
+            alloc_bytes += peak - current
+            blocks += sum(
+                max(stat.count_diff, 0) for stat in after.compare_to(before, "filename")
+            )
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "frames": len(inputs),
+        "frames_per_sec": len(inputs) / elapsed,
+        "us_per_frame": elapsed / len(inputs) * 1e6,
+        "allocs_per_frame": blocks / max(len(samples), 1),
+        "alloc_bytes_per_frame": alloc_bytes / max(len(samples), 1),
+    }, outputs
+
+
+async def bench_inbound(mode: str, client_rate: int, chunk_ms: int, frames: int, alloc_samples: int):
+    """Benchmarks deserialize() for client audio at client_rate into the pipeline."""
+    params = Base64AudioSerializer.InputParams(target_sample_rate=client_rate, **MODES[mode])
+    serializer = Base64AudioSerializer(params)
+    await serializer.setup(StartFrame(audio_in_sample_rate=PIPELINE_SAMPLE_RATE))
+
+    client_codec = create_codec(params.codec)
+    chunks = make_chunks(frames, chunk_ms, client_rate)
+    payloads = [client_payload(chunk, params, client_codec) for chunk in chunks]
+
+    result, _ = await measure(serializer.deserialize, payloads, alloc_samples)
+    result["wire_bytes_per_audio_sec"] = sum(len(p) for p in payloads) / (frames * chunk_ms / 1000)
+    return result
+
+
+async def bench_outbound(mode: str, client_rate: int, chunk_ms: int, frames: int, alloc_samples: int):
+    """Benchmarks serialize() for pipeline audio out to a client at client_rate."""
+    params = Base64AudioSerializer.InputParams(target_sample_rate=client_rate, **MODES[mode])
+    serializer = Base64AudioSerializer(params)
+    await serializer.setup(StartFrame(audio_in_sample_rate=PIPELINE_SAMPLE_RATE))
+
+    audio_frames = [
+        OutputAudioRawFrame(audio=chunk, sample_rate=PIPELINE_SAMPLE_RATE, num_channels=1)
+        for chunk in make_chunks(frames, chunk_ms, PIPELINE_SAMPLE_RATE)
+    ]
+
+    result, payloads = await measure(serializer.serialize, audio_frames, alloc_samples)
+    result["wire_bytes_per_audio_sec"] = sum(len(p) for p in payloads) / (frames * chunk_ms / 1000)
+    return result
+
+
+async def bench_resampler(in_rate: int, out_rate: int, chunk_ms: int, frames: int, alloc_samples: int):
+    """Benchmarks a stream resampler on its own."""
+    resampler = create_stream_resampler()
+
+    async def resample(chunk: bytes):
+        return await resampler.resample(chunk, in_rate, out_rate)
+
+    result, _ = await measure(resample, make_chunks(frames, chunk_ms, in_rate), alloc_samples)
+    return result
+
+
+def bench_codec(name: str, chunk_ms: int, frames: int):
+    """Benchmarks one codec on its own, per second of 16 kHz audio."""
+    chunks = make_chunks(frames, chunk_ms, PIPELINE_SAMPLE_RATE)
+    encoder = create_codec(name)
+    decoder = create_codec(name)
+
+    start = time.perf_counter()
+    encoded = [encoder.encode(chunk) for chunk in chunks]
+    encode_secs = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for payload in encoded:
+        decoder.decode(payload)
+    decode_secs = time.perf_counter() - start
+
+    audio_secs = frames * chunk_ms / 1000
+    pcm_bytes = sum(len(chunk) for chunk in chunks)
+    codec_bytes = sum(len(payload) for payload in encoded)
+
+    return {
+        "encode_us_per_audio_sec": encode_secs / audio_secs * 1e6,
+        "decode_us_per_audio_sec": decode_secs / audio_secs * 1e6,
+        "bytes_per_audio_sec": codec_bytes / audio_secs,
+        "bandwidth_saved": 1 - codec_bytes / pcm_bytes,
+    }
+
+
+def environment_info():
+    """Collects the versions that affect the results."""
+    try:
+        from importlib.metadata import version
+        pipecat_version = version("pipecat-ai")
+    except Exception:
+        pipecat_version = None
+
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "numpy": np.__version__,
+        "pipecat": pipecat_version,
+    }
+
+
+async def run_suite(args):
+    """Runs every benchmark case selected on the command line.
+
+    Returns:
+        Dictionary with the environment and the list of case results
+    """
+    results = []
+
+    def add(case_id: str, fields: dict, result: dict):
+        results.append({"id": case_id, **fields, **result})
+        if not args.quiet:
+            print(
+                f"{case_id:<42} {result.get('us_per_frame', 0):>10.2f} us "
+                f"{result.get('frames_per_sec', 0):>12.0f} fps "
+                f"{result.get('allocs_per_frame', 0):>6.1f} allocs "
+                f"{result.get('alloc_bytes_per_frame', 0):>8.0f} B",
+                flush=True,
+            )
+
+    for chunk_ms in args.chunk_ms:
+        for client_rate in args.rates:
+            rates = f"{client_rate // 1000}k->{PIPELINE_SAMPLE_RATE // 1000}k"
+            for mode in args.modes:
+                fields = {"mode": mode, "chunk_ms": chunk_ms, "client_sample_rate": client_rate}
+                add(
+                    f"deserialize/{mode}/{rates}/{chunk_ms}ms",
+                    {"component": "deserialize", **fields},
+                    await bench_inbound(mode, client_rate, chunk_ms, args.frames, args.alloc_samples),
+                )
+                add(
+                    f"serialize/{mode}/{PIPELINE_SAMPLE_RATE // 1000}k->{client_rate // 1000}k/{chunk_ms}ms",
+                    {"component": "serialize", **fields},
+                    await bench_outbound(mode, client_rate, chunk_ms, args.frames, args.alloc_samples),
+                )
+
+            if client_rate != PIPELINE_SAMPLE_RATE:
+                fields = {"chunk_ms": chunk_ms, "in_sample_rate": client_rate, "out_sample_rate": PIPELINE_SAMPLE_RATE}
+                add(
+                    f"resampler/{rates}/{chunk_ms}ms",
+                    {"component": "resampler", **fields},
+                    await bench_resampler(client_rate, PIPELINE_SAMPLE_RATE, chunk_ms, args.frames, args.alloc_samples),
+                )
+
+    for name in CODECS:
+        result = bench_codec(name, 20, args.frames)
+        results.append({"id": f"codec/{name}", "component": "codec", "codec": name, **result})
+        if not args.quiet:
+            print(
+                f"{'codec/' + name:<42} {result['encode_us_per_audio_sec']:>10.0f} us/s encode "
+                f"{result['decode_us_per_audio_sec']:>8.0f} us/s decode {result['bandwidth_saved']:>6.0%} saved"
+            )
+
+    return {"environment": environment_info(), "results": results}
+
+
+def compare(report: dict, baseline: dict):
+    """Prints per-case changes against a baseline report.
+
+    Args:
+        report: The report of this run
+        baseline: A report written by an earlier run
+    """
+    previous = {result["id"]: result for result in baseline.get("results", [])}
+    print(f"\n{'case':<42} {'us/frame':>16} {'alloc bytes':>16}")
+    for result in report["results"]:
+        before = previous.get(result["id"])
+        if not before or "us_per_frame" not in result:
+            continue
+        time_change = result["us_per_frame"] / before["us_per_frame"] - 1
+        bytes_change = result["alloc_bytes_per_frame"] - before["alloc_bytes_per_frame"]
+        print(f"{result['id']:<42} {time_change:>+15.1%} {bytes_change:>+15.0f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the serializer and resampler hot path")
+    parser.add_argument("--frames", type=int, default=1000, help="Frames per case")
+    parser.add_argument("--alloc-samples", type=int, default=50, help="Frames traced for allocations per case")
+    parser.add_argument("--chunk-ms", type=int, nargs="+", default=list(CHUNK_MS), help="Chunk durations in ms")
+    parser.add_argument("--rates", type=int, nargs="+", default=list(CLIENT_SAMPLE_RATES), help="Client sample rates")
+    parser.add_argument("--modes", nargs="+", default=list(MODES), choices=list(MODES), help="Wire modes")
+    parser.add_argument("--output", help="Write the results as JSON to this file")
+    parser.add_argument("--compare", help="Compare against a JSON report from an earlier run")
+    parser.add_argument("--quiet", action="store_true", help="Only print the comparison, if any")
+    args = parser.parse_args()
+
+    report = asyncio.run(run_suite(args))
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if args.compare:
+        with open(args.compare) as f:
+            compare(report, json.load(f))
+
+
+if __name__ == "__main__":
+    main()
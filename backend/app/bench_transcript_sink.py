@@ -0,0 +1,64 @@
+# // Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# // SPDX-License-Identifier: MIT-0
+
+"""
+Transcript sink benchmark
+
+Measures how many transcript messages per second the sink writes to each store and what a
+single `put()` costs on the event loop.
+
+Usage:
+    python bench_transcript_sink.py --messages 100000 --sessions 100
+"""
+
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+from transcript_sink import TranscriptRecord, TranscriptSink, create_store
+
+CONTENT = "I would like to know the total amount of my completed orders from last month."
+
+
+async def bench_store(url: str, messages: int, sessions: int, batch_size: int) -> dict:
+    sink = TranscriptSink(create_store(url), max_queue=messages, batch_size=batch_size)
+    records = [
+        TranscriptRecord(session_id=f"session-{i % sessions}", role="user" if i % 2 else "assistant", content=CONTENT)
+        for i in range(messages)
+    ]
+
+    await sink.start()
+    start = time.perf_counter()
+    for record in records:
+        sink.put(record)
+    put_secs = time.perf_counter() - start
+    await sink.stop()
+    total_secs = time.perf_counter() - start
+
+    return {
+        "store": url.split(":")[0],
+        "messages": messages,
+        "put_us": round(put_secs / messages * 1e6, 2),
+        "messages_per_sec": round(messages / total_secs),
+        "batches": sink.batches,
+        "dropped": sink.dropped,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Transcript sink benchmark")
+    parser.add_argument("--messages", type=int, default=100000)
+    parser.add_argument("--sessions", type=int, default=100)
+    parser.add_argument("--batch-size", type=int, default=500)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for url in (f"sqlite:{os.path.join(tmp, 'transcripts.db')}", f"jsonl:{os.path.join(tmp, 'transcripts')}"):
+            result = asyncio.run(bench_store(url, args.messages, args.sessions, args.batch_size))
+            print(result)
+
+
+if __name__ == "__main__":
+    main()
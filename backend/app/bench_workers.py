@@ -0,0 +1,203 @@
+# // Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# // SPDX-License-Identifier: MIT-0
+
+"""
+Multi-worker load test
+
+Measures how many concurrent real-time audio sessions the server sustains with 1 worker
+process versus several. The server side runs a stand-in for the per-session CPU work of the
+real pipeline (serializer, Silero VAD on every window and an optional busy loop for the rest
+of the pipeline) behind WorkerSupervisor, so no AWS access is needed.
+
+Each simulated client streams 20 ms base64 chunks at real-time pace and measures the round
+trip of every chunk. A session count is sustained when the clients keep real-time pace and
+the p95 round trip stays under --max-p95-ms. The sustained session count should grow roughly linearly with the workers,
+up to the number of cores.
+
+Usage:
+    python bench_workers.py --workers 1 2 --sessions 10 20 40 80
+"""
+
+import argparse
+import asyncio
+import base64
+import json
+import os
+import statistics
+import sys
+import time
+from typing import Dict, List
+
+import numpy as np
+import websockets
+from fastapi import FastAPI, WebSocket, WebSocketDisconnect
+
+from base64_serializer import Base64AudioSerializer
+from worker_supervisor import WorkerSupervisor, default_worker_count
+
+SAMPLE_RATE = 16000
+CHUNK_MS = 20
+VAD_WINDOW_SAMPLES = 512
+# Share of the real-time chunk rate a run has to reach to count as sustained
+MIN_REALTIME_RATIO = 0.9
+# Busy loop per chunk standing in for the rest of the pipeline, read by the workers
+CPU_MS_PER_CHUNK = float(os.getenv("BENCH_CPU_MS_PER_CHUNK", "1.0"))
+
+app = FastAPI()
+
+
+@app.websocket("/ws")
+async def session(websocket: WebSocket):
+    """Runs the per-session stand-in work on every chunk and echoes a JSON media event."""
+    from pipecat.frames.frames import OutputAudioRawFrame, StartFrame
+    from shared_vad import SharedSileroVADAnalyzer
+
+    await websocket.accept()
+    serializer = Base64AudioSerializer()
+    await serializer.setup(StartFrame(audio_in_sample_rate=SAMPLE_RATE))
+    vad = SharedSileroVADAnalyzer(sample_rate=SAMPLE_RATE)
+    pending = b""
+    try:
+        while True:
+            data = await websocket.receive_text()
+            frame = await serializer.deserialize(data)
+            pending += frame.audio
+            window_bytes = VAD_WINDOW_SAMPLES * 2
+            while len(pending) >= window_bytes:
+                vad.voice_confidence(pending[:window_bytes])
+                pending = pending[window_bytes:]
+
+            deadline = time.perf_counter() + CPU_MS_PER_CHUNK / 1000
+            while time.perf_counter() < deadline:
+                pass
+
+            reply = OutputAudioRawFrame(audio=frame.audio, sample_rate=SAMPLE_RATE, num_channels=1)
+            await websocket.send_text(await serializer.serialize(reply))
+    except WebSocketDisconnect:
+        pass
+
+
+def make_chunk() -> str:
+    samples = (np.random.default_rng(0).standard_normal(SAMPLE_RATE * CHUNK_MS // 1000) * 3000).astype(np.int16)
+    return base64.b64encode(samples.tobytes()).decode()
+
+
+async def run_client(url: str, duration: float, chunk: str, round_trips: List[float]) -> bool:
+    """Streams audio at real-time pace and records the round trip of every chunk."""
+    try:
+        async with websockets.connect(url, max_size=None) as ws:
+            start = time.monotonic()
+            sent = 0
+            while time.monotonic() - start < duration:
+                sent_at = time.monotonic()
+                await ws.send(chunk)
+                json.loads(await ws.recv())
+                round_trips.append(time.monotonic() - sent_at)
+                sent += 1
+                # Pace to real time
+                await asyncio.sleep(max(0.0, start + sent * CHUNK_MS / 1000 - time.monotonic()))
+        return True
+    except Exception:
+        return False
+
+
+async def run_load(url: str, sessions: int, duration: float) -> Dict:
+    """Runs `sessions` concurrent clients and summarizes their round trips."""
+    chunk = make_chunk()
+    round_trips: List[float] = []
+    # Ramp up over one second so connection setup doesn't skew the first chunks
+    tasks = []
+    for i in range(sessions):
+        tasks.append(asyncio.create_task(run_client(url, duration, chunk, round_trips)))
+        await asyncio.sleep(1.0 / sessions)
+    results = await asyncio.gather(*tasks)
+
+    round_trips.sort()
+    expected_chunks = sessions * duration * 1000 / CHUNK_MS
+    p95 = round_trips[int(len(round_trips) * 0.95)] * 1000 if round_trips else float("inf")
+    return {
+        "sessions": sessions,
+        "failed": results.count(False),
+        "chunks": len(round_trips),
+        "realtime_ratio": round(len(round_trips) / expected_chunks, 3),
+        "p50_ms": round(statistics.median(round_trips) * 1000, 2) if round_trips else None,
+        "p95_ms": round(p95, 2),
+    }
+
+
+def wait_for_port(port: int, timeout: float = 60.0):
+    """Waits until the workers accept WebSocket connections."""
+    async def probe():
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            try:
+                async with websockets.connect(f"ws://127.0.0.1:{port}/ws"):
+                    return
+            except OSError:
+                await asyncio.sleep(0.2)
+        raise TimeoutError("Workers did not start")
+
+    asyncio.run(probe())
+
+
+def bench_workers(workers: int, session_counts: List[int], duration: float, max_p95_ms: float) -> Dict:
+    """Starts `workers` worker processes and runs increasing session counts against them."""
+    supervisor = WorkerSupervisor("bench_workers:app", host="127.0.0.1", port=0, workers=workers)
+    supervisor.start()
+    try:
+        wait_for_port(supervisor.port)
+        url = f"ws://127.0.0.1:{supervisor.port}/ws"
+        runs = []
+        sustained = 0
+        for sessions in session_counts:
+            result = asyncio.run(run_load(url, sessions, duration))
+            result["sustained"] = (
+                result["failed"] == 0
+                and result["p95_ms"] <= max_p95_ms
+                and result["realtime_ratio"] >= MIN_REALTIME_RATIO
+            )
+            runs.append(result)
+            print(f"  workers={workers} {result}", flush=True)
+            if not result["sustained"]:
+                break
+            sustained = sessions
+        return {"workers": workers, "sustained_sessions": sustained, "runs": runs}
+    finally:
+        supervisor.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Multi-worker session load test")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, default_worker_count()],
+                        help="Worker counts to compare")
+    parser.add_argument("--sessions", type=int, nargs="+", default=[5, 10, 20, 40, 80, 160],
+                        help="Increasing concurrent session counts to try")
+    parser.add_argument("--duration", type=float, default=5.0, help="Seconds per run")
+    parser.add_argument("--max-p95-ms", type=float, default=100.0,
+                        help="Round trip p95 under which a session count counts as sustained")
+    parser.add_argument("--cpu-ms-per-chunk", type=float, default=CPU_MS_PER_CHUNK,
+                        help="Extra CPU per chunk standing in for the rest of the pipeline")
+    parser.add_argument("--output", help="Write the results as JSON to this file")
+    args = parser.parse_args()
+
+    # Inherited by the spawned workers
+    os.environ["BENCH_CPU_MS_PER_CHUNK"] = str(args.cpu_ms_per_chunk)
+
+    print(f"{default_worker_count()} cores available", flush=True)
+    results = []
+    for workers in args.workers:
+        results.append(bench_workers(workers, args.sessions, args.duration, args.max_p95_ms))
+
+    baseline = results[0]["sustained_sessions"] or 1
+    print(f"\n{'workers':>8} {'sessions':>9} {'scaling':>8}")
+    for result in results:
+        print(f"{result['workers']:>8} {result['sustained_sessions']:>9} "
+              f"{result['sustained_sessions'] / baseline:>7.2f}x")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,231 @@
+# // Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# // SPDX-License-Identifier: MIT-0
+
+"""
+AWS Credential Provider
+
+Caches temporary AWS credentials for the whole process and refreshes them in the background
+shortly before they expire. Sessions read an immutable snapshot with `current()`, so creating
+a session never waits on STS and never reads credentials from the process environment.
+
+Credentials come from boto3's default chain. Temporary ones (the ECS task role, an assumed
+role) are used as they are, since STS rejects GetSessionToken for them. Long-term keys are
+exchanged for a session token, and used directly while STS is unavailable.
+"""
+
+import asyncio
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, Optional
+
+import boto3
+from loguru import logger
+
+DEFAULT_DURATION_SECS = 3600
+DEFAULT_REFRESH_MARGIN_SECS = 300
+DEFAULT_RETRY_SECS = 30
+# Default chain credentials that don't say when they expire are read again after this long
+DEFAULT_CHAIN_RECHECK_SECS = 900
+
+
+@dataclass(frozen=True)
+class AWSCredentials:
+    """Immutable snapshot of a set of temporary AWS credentials."""
+
+    access_key_id: str
+    secret_access_key: str
+    # None for long-term keys
+    session_token: Optional[str]
+    expiration: datetime
+
+    @classmethod
+    def from_sts(cls, credentials: Dict[str, Any]) -> "AWSCredentials":
+        """Builds a snapshot from the `Credentials` member of an STS response.
+
+        Args:
+            credentials: Dict with AccessKeyId, SecretAccessKey, SessionToken and Expiration
+
+        Returns:
+            The credentials snapshot
+        """
+        expiration = credentials["Expiration"]
+        if expiration.tzinfo is None:
+            expiration = expiration.replace(tzinfo=timezone.utc)
+        return cls(
+            access_key_id=credentials["AccessKeyId"],
+            secret_access_key=credentials["SecretAccessKey"],
+            session_token=credentials["SessionToken"],
+            expiration=expiration,
+        )
+
+    def expires_in(self, now: Optional[datetime] = None) -> float:
+        """Returns the number of seconds until the credentials expire."""
+        now = now or datetime.now(timezone.utc)
+        return (self.expiration - now).total_seconds()
+
+    def __repr__(self) -> str:
+        # Keep secrets out of logs
+        return f"AWSCredentials(access_key_id={self.access_key_id!r}, expiration={self.expiration.isoformat()})"
+
+
+def create_sts_fetcher(
+    sts_client=None, duration_seconds: int = DEFAULT_DURATION_SECS
+) -> Callable[[], AWSCredentials]:
+    """Creates a blocking function that gets a new session token from STS.
+
+    Args:
+        sts_client: boto3 STS client, a default one is created if None
+        duration_seconds: Lifetime of the requested credentials
+
+    Returns:
+        A function returning fresh AWSCredentials
+    """
+    if sts_client is None:
+        sts_client = boto3.client("sts", region_name="us-east-1")
+
+    def fetch() -> AWSCredentials:
+        response = sts_client.get_session_token(DurationSeconds=duration_seconds)
+        return AWSCredentials.from_sts(response["Credentials"])
+
+    return fetch
+
+
+def create_default_fetcher(
+    session: Optional[boto3.Session] = None,
+    sts_client=None,
+    duration_seconds: int = DEFAULT_DURATION_SECS,
+) -> Callable[[], AWSCredentials]:
+    """Creates a blocking function returning credentials of boto3's default chain.
+
+    Args:
+        session: boto3 session whose credential chain is used, a default one if None
+        sts_client: boto3 STS client for GetSessionToken, created from the session if None
+        duration_seconds: Lifetime of session tokens requested for long-term keys
+
+    Returns:
+        A function returning fresh AWSCredentials
+    """
+    session = session or boto3.Session()
+    sts_fetch: Optional[Callable[[], AWSCredentials]] = None
+
+    def fetch() -> AWSCredentials:
+        nonlocal sts_fetch
+        resolved = session.get_credentials()
+        if resolved is None:
+            raise RuntimeError("No AWS credentials found in the default chain")
+        # Refreshable credentials renew themselves here when they are close to expiring
+        frozen = resolved.get_frozen_credentials()
+        now = datetime.now(timezone.utc)
+        if frozen.token:
+            expiration = getattr(resolved, "_expiry_time", None) or now + timedelta(seconds=DEFAULT_CHAIN_RECHECK_SECS)
+            return AWSCredentials(frozen.access_key, frozen.secret_key, frozen.token, expiration)
+
+        try:
+            if sts_fetch is None:
+                sts_fetch = create_sts_fetcher(
+                    sts_client or session.client("sts", region_name="us-east-1"), duration_seconds
+                )
+            return sts_fetch()
+        except Exception as e:
+            logger.warning(f"GetSessionToken failed, using long-term credentials until the next refresh: {e}")
+            # Already due, so the refresh loop asks STS again after its retry delay
+            return AWSCredentials(frozen.access_key, frozen.secret_key, None, now)
+
+    return fetch
+
+
+class CredentialProvider:
+    """Process-wide credential cache with background refresh.
+
+    The blocking fetch runs in a worker thread. The refresh loop wakes up
+    `refresh_margin_secs` before the current credentials expire. If a refresh
+    fails, it retries every `retry_secs` and keeps serving the cached
+    credentials until it succeeds.
+    """
+
+    def __init__(
+        self,
+        fetch: Optional[Callable[[], AWSCredentials]] = None,
+        refresh_margin_secs: float = DEFAULT_REFRESH_MARGIN_SECS,
+        retry_secs: float = DEFAULT_RETRY_SECS,
+    ):
+        """Initialize the provider.
+
+        Args:
+            fetch: Blocking function returning fresh credentials, the default chain by default
+            refresh_margin_secs: How long before expiration to refresh
+            retry_secs: Delay between attempts after a failed refresh
+        """
+        self._fetch = fetch or create_default_fetcher()
+        self._refresh_margin_secs = refresh_margin_secs
+        self._retry_secs = retry_secs
+        self._credentials: Optional[AWSCredentials] = None
+        self._refresh_task: Optional[asyncio.Task] = None
+        self._lock = asyncio.Lock()
+        self.refresh_count = 0
+        self.failure_count = 0
+
+    def current(self) -> AWSCredentials:
+        """Returns the cached credentials snapshot without blocking.
+
+        Raises:
+            RuntimeError: If the provider was never started
+        """
+        if self._credentials is None:
+            raise RuntimeError("Credentials have not been loaded, call start() first")
+        return self._credentials
+
+    async def refresh(self) -> AWSCredentials:
+        """Fetches new credentials and replaces the cached snapshot.
+
+        Returns:
+            The new credentials
+        """
+        async with self._lock:
+            credentials = await asyncio.to_thread(self._fetch)
+            self._credentials = credentials
+            self.refresh_count += 1
+            logger.info(f"AWS credentials refreshed, expire at {credentials.expiration.isoformat()}")
+            return credentials
+
+    async def start(self):
+        """Loads the initial credentials and starts the background refresh.
+
+        A failed first load doesn't fail startup, the refresh loop keeps retrying.
+        """
+        if self._credentials is None:
+            try:
+                await self.refresh()
+            except Exception as e:
+                self.failure_count += 1
+                logger.error(f"Error loading AWS credentials, retrying in the background: {e}")
+        if self._refresh_task is None:
+            self._refresh_task = asyncio.create_task(self._refresh_loop())
+
+    async def stop(self):
+        """Stops the background refresh."""
+        if self._refresh_task:
+            self._refresh_task.cancel()
+            try:
+                await self._refresh_task
+            except asyncio.CancelledError:
+                pass
+            self._refresh_task = None
+
+    def _seconds_until_refresh(self) -> float:
+        if self._credentials is None:
+            return self._retry_secs
+        return max(0.0, self._credentials.expires_in() - self._refresh_margin_secs)
+
+    async def _refresh_loop(self):
+        delay = self._seconds_until_refresh()
+        while True:
+            await asyncio.sleep(delay)
+            try:
+                await self.refresh()
+                # Never spin on credentials that expire within the refresh margin
+                delay = max(self._retry_secs, self._seconds_until_refresh())
+            except Exception as e:
+                self.failure_count += 1
+                logger.error(f"Error refreshing AWS credentials: {e}")
+                delay = self._retry_secs
@@ -1,8 +1,13 @@
 import os
+import threading
+import time
 from typing import Any, Dict, List, Optional
 import psycopg2
 from psycopg2.extras import RealDictCursor
 
+from metrics import POSTGRES_QUERY_SECONDS
+from turn_tracing import trace_span
+
 class PostgresDatabase:
     def __init__(self):
         """Initialize PostgreSQL database connection."""
@@ -15,6 +20,8 @@ class PostgresDatabase:
         }
         self.conn = None
         self.cursor = None
+        # Tool calls run on a thread pool, the connection and cursor are used by one query at a time
+        self._lock = threading.RLock()
 
     def connect(self) -> None:
         """Establish connection to the PostgreSQL database."""
@@ -42,23 +49,30 @@ class PostgresDatabase:
         Returns:
             List[Dict[str, Any]]: Query results as a list of dictionaries
         """
-        try:
-            if not self.conn or self.conn.closed:
-                self.connect()
+        with self._lock:
+            start = time.perf_counter()
+            try:
+                if not self.conn or self.conn.closed:
+                    self.connect()
 
-            self.cursor.execute(query, params)
-            
-            if query.strip().upper().startswith('SELECT'):
-                results = self.cursor.fetchall()
-                return [dict(row) for row in results]
-            else:
-                self.conn.commit()
-                return []
+                with trace_span("db.query"):
+                    self.cursor.execute(query, params)
 
-        except Exception as e:
-            if self.conn:
-                self.conn.rollback()
-            raise Exception(f"Error executing query: {str(e)}")
+                    if query.strip().upper().startswith('SELECT'):
+                        results = self.cursor.fetchall()
+                        rows = [dict(row) for row in results]
+                    else:
+                        self.conn.commit()
+                        rows = []
+
+                POSTGRES_QUERY_SECONDS.labels("ok").observe(time.perf_counter() - start)
+                return rows
+
+            except Exception as e:
+                POSTGRES_QUERY_SECONDS.labels("error").observe(time.perf_counter() - start)
+                if self.conn:
+                    self.conn.rollback()
+                raise Exception(f"Error executing query: {str(e)}")
 
     def get_schema(self) -> str:
         """
@@ -67,6 +81,10 @@ class PostgresDatabase:
         Returns:
             str: Database schema information
         """
+        with self._lock:
+            return self._get_schema()
+
+    def _get_schema(self) -> str:
         try:
             if not self.conn or self.conn.closed:
                 self.connect()
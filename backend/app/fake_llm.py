@@ -0,0 +1,291 @@
+# // Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# // SPDX-License-Identifier: MIT-0
+
+"""
+Fake Speech-to-Speech LLM Service
+
+Local stand-in for `AWSNovaSonicLLMService` for performance testing without Bedrock access.
+It sits at the same place in the pipeline and produces the same kind of frames, so the
+WebSocket transport, VAD, serializer, audio packing and tool executor can be load-tested offline
+(e.g. with load_generator.py):
+
+- consumes the caller's input audio
+- when the VAD reports the caller stopped speaking, pushes a transcription of the turn and,
+  after `ttfb_secs`, a synthetic spoken reply (a tone) paced at `real_time_factor`
+- every `tool_call_every` caller turns, calls `generate_sql_query` before answering
+- stops the reply and cancels pending tool calls when the caller interrupts
+
+Select it in main.py with LLM_SERVICE=fake. main.py then also swaps the SQL tool for
+`fake_sql_tool()`, which answers after a fixed delay, and skips the schema warm-up, so fake
+mode never reaches Bedrock or Postgres.
+"""
+
+import asyncio
+import time
+import uuid
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+import numpy as np
+from loguru import logger
+from pydantic import BaseModel
+
+from pipecat.frames.frames import (
+    CancelFrame,
+    EndFrame,
+    Frame,
+    FunctionCallFromLLM,
+    FunctionCallResultFrame,
+    InputAudioRawFrame,
+    LLMFullResponseEndFrame,
+    LLMFullResponseStartFrame,
+    StartInterruptionFrame,
+    TranscriptionFrame,
+    TTSAudioRawFrame,
+    TTSStartedFrame,
+    TTSStoppedFrame,
+    TTSTextFrame,
+    UserStartedSpeakingFrame,
+    UserStoppedSpeakingFrame,
+)
+from pipecat.processors.aggregators.llm_response import (
+    LLMAssistantAggregatorParams,
+    LLMAssistantContextAggregator,
+    LLMUserAggregatorParams,
+    LLMUserContextAggregator,
+)
+from pipecat.processors.aggregators.openai_llm_context import OpenAILLMContext, OpenAILLMContextFrame
+from pipecat.processors.frame_processor import FrameDirection
+from pipecat.services.llm_service import LLMService
+from pipecat.utils.time import time_now_iso8601
+
+SQL_TOOL_NAME = "generate_sql_query"
+DEFAULT_SQL_TOOL_SECS = 0.3
+
+
+def fake_sql_tool(latency_secs: float = DEFAULT_SQL_TOOL_SECS):
+    """Returns a blocking stand-in for the SQL tool, for the tool executor's thread pool.
+
+    Args:
+        latency_secs: How long each call blocks, like a Bedrock and Postgres round trip
+    """
+    def generate_sql_query(arguments: Dict) -> Dict:
+        time.sleep(latency_secs)
+        return {"response": f"There are 42 results for: {arguments.get('text', '')}"}
+
+    return generate_sql_query
+
+
+@dataclass
+class FakeContextAggregatorPair:
+    """User and assistant context aggregators of the fake service."""
+
+    _user: LLMUserContextAggregator
+    _assistant: LLMAssistantContextAggregator
+
+    def user(self) -> LLMUserContextAggregator:
+        return self._user
+
+    def assistant(self) -> LLMAssistantContextAggregator:
+        return self._assistant
+
+
+class FakeSpeechLLMService(LLMService):
+    """Speech-to-speech LLM service answering every caller turn with synthetic audio."""
+
+    class InputParams(BaseModel):
+        """Behaviour of the fake service.
+
+        Parameters:
+            sample_rate: Sample rate of the generated audio
+            ttfb_secs: Time from the end of a caller turn to the first reply audio
+            real_time_factor: Generation time per second of reply audio, 1.0 streams in real
+                time, 0.5 twice as fast
+            response_secs: Length of every spoken reply
+            chunk_ms: Duration of each generated audio frame
+            tone_hz: Frequency of the generated tone
+            tool_call_every: Call generate_sql_query on every Nth caller turn, 0 never
+            tool_question: Question passed to generate_sql_query
+            tool_timeout_secs: How long to wait for a tool result before answering anyway
+            response_text: Text pushed along with every reply, for the transcript
+        """
+
+        sample_rate: int = 16000
+        ttfb_secs: float = 0.5
+        real_time_factor: float = 1.0
+        response_secs: float = 3.0
+        chunk_ms: int = 40
+        tone_hz: float = 250.0
+        tool_call_every: int = 0
+        tool_question: str = "How many customers placed an order last month?"
+        tool_timeout_secs: float = 30.0
+        response_text: str = "This is a synthetic reply from the fake speech service."
+
+    # Same attribute as AWSNovaSonicLLMService, the fake needs no trigger instruction
+    AWAIT_TRIGGER_ASSISTANT_RESPONSE_INSTRUCTION = ""
+
+    def __init__(self, params: Optional[InputParams] = None, **kwargs):
+        """Initialize the service.
+
+        Args:
+            params: Behaviour of the fake service, defaults to InputParams()
+            **kwargs: Passed to LLMService
+        """
+        super().__init__(**kwargs)
+        self._params = params or FakeSpeechLLMService.InputParams()
+        self._context: Optional[OpenAILLMContext] = None
+        self._reply_task: Optional[asyncio.Task] = None
+        self._tool_results: Dict[str, asyncio.Future] = {}
+        self._turn_audio_bytes = 0
+        self._chunk = self._tone_chunk()
+
+        self.turns = 0
+        self.replies = 0
+        self.interrupted = 0
+        self.tool_calls = 0
+        self.input_audio_bytes = 0
+
+    def _tone_chunk(self) -> bytes:
+        params = self._params
+        samples = params.sample_rate * params.chunk_ms // 1000
+        t = np.arange(samples) / params.sample_rate
+        return (4000 * np.sin(2 * np.pi * params.tone_hz * t)).astype("<i2").tobytes()
+
+    def create_context_aggregator(
+        self,
+        context: OpenAILLMContext,
+        *,
+        user_params: LLMUserAggregatorParams = LLMUserAggregatorParams(),
+        assistant_params: LLMAssistantAggregatorParams = LLMAssistantAggregatorParams(),
+    ) -> FakeContextAggregatorPair:
+        context.set_llm_adapter(self.get_llm_adapter())
+        self._context = context
+        return FakeContextAggregatorPair(
+            _user=LLMUserContextAggregator(context, params=user_params),
+            _assistant=LLMAssistantContextAggregator(context, params=assistant_params),
+        )
+
+    async def trigger_assistant_response(self):
+        """Starts a reply without a caller turn, like the greeting of the real service."""
+        await self._start_reply(tool_call=False)
+
+    async def process_frame(self, frame: Frame, direction: FrameDirection):
+        """Consumes caller audio and answers when the caller stops speaking.
+
+        Args:
+            frame: The frame to process
+            direction: The direction of frame flow in the pipeline
+        """
+        await super().process_frame(frame, direction)
+
+        if isinstance(frame, InputAudioRawFrame):
+            # Sent to the model, not passed on
+            self.input_audio_bytes += len(frame.audio)
+            self._turn_audio_bytes += len(frame.audio)
+        elif isinstance(frame, OpenAILLMContextFrame):
+            self._context = frame.context
+        elif isinstance(frame, StartInterruptionFrame):
+            await self._interrupt()
+            await self.push_frame(frame, direction)
+        elif isinstance(frame, UserStartedSpeakingFrame):
+            self._turn_audio_bytes = 0
+            await self.push_frame(frame, direction)
+        elif isinstance(frame, UserStoppedSpeakingFrame):
+            await self.push_frame(frame, direction)
+            await self._on_turn_end()
+        elif isinstance(frame, (EndFrame, CancelFrame)):
+            await self._stop_reply()
+            await self.push_frame(frame, direction)
+        else:
+            await self.push_frame(frame, direction)
+
+    async def push_frame(self, frame: Frame, direction: FrameDirection = FrameDirection.DOWNSTREAM):
+        # Tool results are pushed by LLMService itself, pick them up on the way out
+        if isinstance(frame, FunctionCallResultFrame) and direction == FrameDirection.DOWNSTREAM:
+            future = self._tool_results.pop(frame.tool_call_id, None)
+            if future and not future.done():
+                future.set_result(frame.result)
+        await super().push_frame(frame, direction)
+
+    async def _on_turn_end(self):
+        self.turns += 1
+        secs = self._turn_audio_bytes / (2 * self._params.sample_rate)
+        self._turn_audio_bytes = 0
+        await self.push_frame(TranscriptionFrame(
+            text=f"[caller turn {self.turns}, {secs:.1f}s of audio]",
+            user_id="",
+            timestamp=time_now_iso8601(),
+        ))
+        every = self._params.tool_call_every
+        await self._start_reply(tool_call=bool(every) and self.turns % every == 0)
+
+    async def _start_reply(self, tool_call: bool):
+        await self._stop_reply()
+        self._reply_task = self.create_task(self._reply(tool_call))
+
+    async def _stop_reply(self):
+        if self._reply_task:
+            await self.cancel_task(self._reply_task)
+            self._reply_task = None
+
+    async def _interrupt(self):
+        if self._reply_task and not self._reply_task.done():
+            self.interrupted += 1
+        await self._stop_reply()
+        for future in self._tool_results.values():
+            future.cancel()
+        self._tool_results.clear()
+
+    async def _call_tool(self):
+        self.tool_calls += 1
+        tool_call_id = uuid.uuid4().hex
+        future = asyncio.get_running_loop().create_future()
+        self._tool_results[tool_call_id] = future
+        await self.run_function_calls([
+            FunctionCallFromLLM(
+                function_name=SQL_TOOL_NAME,
+                tool_call_id=tool_call_id,
+                arguments={"text": self._params.tool_question},
+                context=self._context,
+            )
+        ])
+        try:
+            return await asyncio.wait_for(future, self._params.tool_timeout_secs)
+        except asyncio.TimeoutError:
+            logger.warning(f"{self}: no result from {SQL_TOOL_NAME} after {self._params.tool_timeout_secs}s")
+            return None
+        finally:
+            self._tool_results.pop(tool_call_id, None)
+
+    async def _reply(self, tool_call: bool):
+        params = self._params
+        await self.start_ttfb_metrics()
+        if tool_call:
+            await self._call_tool()
+        await asyncio.sleep(params.ttfb_secs)
+        await self.stop_ttfb_metrics()
+
+        await self.push_frame(LLMFullResponseStartFrame())
+        await self.push_frame(TTSStartedFrame())
+        await self.push_frame(TTSTextFrame(params.response_text))
+
+        chunk_secs = params.chunk_ms / 1000
+        chunks = max(1, round(params.response_secs / chunk_secs))
+        start = time.monotonic()
+        for i in range(chunks):
+            await self.push_frame(TTSAudioRawFrame(audio=self._chunk, sample_rate=params.sample_rate, num_channels=1))
+            # Absolute schedule, so slow pushes don't stretch the reply
+            await asyncio.sleep(max(0.0, start + (i + 1) * chunk_secs * params.real_time_factor - time.monotonic()))
+
+        await self.push_frame(TTSStoppedFrame())
+        await self.push_frame(LLMFullResponseEndFrame())
+        self.replies += 1
+
+    def stats(self) -> dict:
+        return {
+            "turns": self.turns,
+            "replies": self.replies,
+            "interrupted": self.interrupted,
+            "tool_calls": self.tool_calls,
+            "input_audio_bytes": self.input_audio_bytes,
+        }
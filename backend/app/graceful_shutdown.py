@@ -0,0 +1,59 @@
+# // Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# // SPDX-License-Identifier: MIT-0
+
+"""
+Graceful Shutdown
+
+uvicorn reacts to SIGTERM by closing every open WebSocket right away, which cuts live calls
+when ECS stops a task during a deploy. `DrainingServer` drains first: on SIGTERM it calls the
+session manager's `drain()`, and only then lets uvicorn shut down.
+
+The session manager is looked up on the app's state (`app.state.session_manager`). A second
+SIGTERM or a SIGINT skips the drain.
+"""
+
+import asyncio
+import signal
+from typing import Optional
+
+import uvicorn
+from loguru import logger
+from uvicorn.importer import import_from_string
+
+DEFAULT_DRAIN_TIMEOUT_SECS = 100.0
+
+
+class DrainingServer(uvicorn.Server):
+    """uvicorn server that drains sessions on SIGTERM before exiting."""
+
+    def __init__(self, config: uvicorn.Config, drain_timeout_secs: float = DEFAULT_DRAIN_TIMEOUT_SECS):
+        """Initialize the server.
+
+        Args:
+            config: uvicorn configuration
+            drain_timeout_secs: How long active sessions may keep running after SIGTERM
+        """
+        super().__init__(config)
+        self.drain_timeout_secs = drain_timeout_secs
+        self._drain_task: Optional[asyncio.Task] = None
+
+    def session_manager(self):
+        """Returns the session manager stored on the app's state, if any."""
+        app = self.config.app
+        if isinstance(app, str):
+            app = import_from_string(app)
+        state = getattr(app, "state", None)
+        return getattr(state, "session_manager", None)
+
+    def handle_exit(self, sig: int, frame) -> None:
+        manager = self.session_manager()
+        if sig == signal.SIGTERM and self._drain_task is None and manager is not None:
+            logger.info("SIGTERM received, draining sessions before shutdown")
+            # Starting the drain right away fails readiness before the next connection is accepted
+            self._drain_task = manager.start_drain(self.drain_timeout_secs)
+            self._drain_task.add_done_callback(self._exit_after_drain)
+            return
+        super().handle_exit(sig, frame)
+
+    def _exit_after_drain(self, task: asyncio.Task):
+        self.should_exit = True
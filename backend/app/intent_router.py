@@ -0,0 +1,458 @@
+# // Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# // SPDX-License-Identifier: MIT-0
+
+"""
+Intent Router
+
+Answers the handful of questions most callers ask (order status, recent payments, totals per
+customer, failed payments, ...) from a catalog of parameterized SQL templates for the
+customers/orders/payments schema, skipping the Claude SQL generation round trip.
+
+A question is matched in three steps:
+1. Slots are extracted with regexes: order ids, emails, statuses, payment methods, periods
+   ("yesterday", "last 7 days", "in March") and result limits ("top 5").
+2. Every remaining word has to be known to the catalog. A word the router doesn't understand
+   ("how many orders did John place") might change the meaning, so the question goes to
+   the LLM instead.
+3. Templates are scored on their keywords. The best one has to take every extracted slot and
+   beat the runner-up by a margin, otherwise the LLM decides.
+
+Templates render to SQL with psycopg2 placeholders and a parameter dict, so slot values are
+never spliced into the SQL text.
+"""
+
+import calendar
+import re
+import threading
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, FrozenSet, List, Optional, Tuple
+
+from metrics import INTENT_ROUTES
+from semantic_cache import STOPWORDS, parse_schema, tokenize, verify_sql
+from sql_cache import normalize_question
+
+# Score the best template needs over the runner-up
+DEFAULT_MARGIN = 0.5
+DEFAULT_LIMIT = 5
+MAX_LIMIT = 50
+
+ORDER_STATUSES = frozenset({"pending", "processing", "completed", "cancelled"})
+PAYMENT_STATUSES = frozenset({"success", "pending", "failed"})
+
+# Words that don't change which query answers the question
+GENERAL_WORDS = STOPWORDS | frozenset(tokenize("""
+    how what what's when where many much was were did made make place placed receive received got
+    had there so far right now currently ever been being new time
+"""))
+
+_NUMBER_WORDS = {
+    "one": "1", "two": "2", "three": "3", "four": "4", "five": "5",
+    "six": "6", "seven": "7", "eight": "8", "nine": "9", "ten": "10",
+}
+_NUMBER_WORD = re.compile(r"\b(" + "|".join(_NUMBER_WORDS) + r")\b")
+
+_ORDER_ID = re.compile(r"\border\s+(?:number\s+|no\.?\s+|id\s+|#\s*)?(\d+)\b")
+_EMAIL = re.compile(r"\b[\w.+-]+@[\w-]+(?:\.[\w-]+)+\b")
+_STATUS = re.compile(
+    r"\b(pending|processing|completed?|cancell?ed|failed|failures?|declined|successful|succeeded|success)\b"
+)
+_STATUS_VALUES = {
+    "complete": "completed", "completed": "completed", "canceled": "cancelled", "cancelled": "cancelled",
+    "failure": "failed", "failures": "failed", "declined": "failed",
+    "successful": "success", "succeeded": "success",
+}
+_PAYMENT_METHOD = re.compile(
+    r"\b(?:(?:by|via|with|using)\s+)?"
+    r"(credit(?:\s+cards?)?|debit(?:\s+cards?)?|bank\s+transfers?|wire\s+transfers?|(?:digital\s+)?wallets?)\b"
+)
+_PERIOD_RELATIVE = re.compile(r"\b(?:in\s+)?(?:the\s+)?(?:last|past|previous)\s+(\d+)\s+(day|week|month)s?\b")
+_PERIOD_NAMED = re.compile(r"\b(?:for\s+|in\s+|during\s+)?(today|yesterday|(?:this|last|previous)\s+(?:week|month|year))\b")
+# "may" is only a month after "in"/"during" or before a year, not in "orders may be pending"
+_MONTH_NAMES = "|".join(m.lower() for m in calendar.month_name[1:] if m != "May")
+_PERIOD_MONTH = re.compile(
+    r"\b(?:in\s+|during\s+)?(" + _MONTH_NAMES + r"|(?<=\bin )may|(?<=\bduring )may|may(?=\s+\d{4}\b))"
+    r"(?:\s+(\d{4}))?\b"
+)
+_LIMIT = re.compile(r"\b(?:top|last|latest|first|recent)\s+(\d+)\b|\b(\d+)\s+(?:most\s+)?(?:recent|latest|newest)\b")
+
+
+@dataclass
+class Slots:
+    """Values extracted from a question."""
+
+    values: Dict[str, Any] = field(default_factory=dict)
+    # Two different statuses or similar, too ambiguous for a template
+    conflict: bool = False
+
+
+def _set(slots: Slots, name: str, value: Any):
+    if name in slots.values and slots.values[name] != value:
+        slots.conflict = True
+    slots.values[name] = value
+
+
+def _day(now: datetime) -> datetime:
+    return now.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def _add_months(day: datetime, months: int) -> datetime:
+    month = day.month - 1 + months
+    return day.replace(year=day.year + month // 12, month=month % 12 + 1, day=1)
+
+
+def _named_period(name: str, now: datetime) -> Tuple[datetime, datetime]:
+    today = _day(now)
+    if name == "today":
+        return today, today + timedelta(days=1)
+    if name == "yesterday":
+        return today - timedelta(days=1), today
+    which, unit = name.split()
+    back = 0 if which == "this" else 1
+    if unit == "week":
+        start = today - timedelta(days=today.weekday() + 7 * back)
+        return start, start + timedelta(days=7)
+    if unit == "month":
+        start = _add_months(today.replace(day=1), -back)
+        return start, _add_months(start, 1)
+    start = today.replace(month=1, day=1, year=today.year - back)
+    return start, start.replace(year=start.year + 1)
+
+
+def extract_slots(text: str, now: datetime) -> Tuple[Slots, str]:
+    """Extracts slot values from a normalized question.
+
+    Args:
+        text: Question from normalize_question()
+        now: Current time, periods are relative to it
+
+    Returns:
+        The slots and the question with the slot phrases removed
+    """
+    slots = Slots()
+    text = _NUMBER_WORD.sub(lambda m: _NUMBER_WORDS[m.group(1)], text)
+
+    def take(pattern: re.Pattern, handle: Callable[[re.Match], None]):
+        nonlocal text
+        for match in pattern.finditer(text):
+            handle(match)
+        text = pattern.sub(" ", text)
+
+    def relative(match: re.Match):
+        count, unit = int(match.group(1)), match.group(2)
+        today = _day(now)
+        start = _add_months(today, -count).replace(day=min(today.day, 28)) if unit == "month" else (
+            today - timedelta(days=count * (7 if unit == "week" else 1))
+        )
+        _set(slots, "period", (start, today + timedelta(days=1)))
+
+    def month(match: re.Match):
+        number = list(calendar.month_name).index(match.group(1).capitalize())
+        year = int(match.group(2)) if match.group(2) else now.year - (number > now.month)
+        start = datetime(year, number, 1)
+        _set(slots, "period", (start, _add_months(start, 1)))
+
+    def method(match: re.Match):
+        word = match.group(1).split()[0]
+        value = {"credit": "credit_card", "debit": "debit_card", "bank": "bank_transfer", "wire": "bank_transfer"}
+        _set(slots, "payment_method", value.get(word, "digital_wallet"))
+
+    take(_EMAIL, lambda m: _set(slots, "email", m.group(0)))
+    take(_ORDER_ID, lambda m: _set(slots, "order_id", int(m.group(1))))
+    take(_PERIOD_RELATIVE, relative)
+    take(_PERIOD_NAMED, lambda m: _set(slots, "period", _named_period(m.group(1), now)))
+    take(_PERIOD_MONTH, month)
+    take(_LIMIT, lambda m: _set(slots, "limit", min(int(m.group(1) or m.group(2)), MAX_LIMIT)))
+    take(_PAYMENT_METHOD, method)
+    take(_STATUS, lambda m: _set(slots, "status", _STATUS_VALUES.get(m.group(1), m.group(1))))
+    return slots, text
+
+
+@dataclass(frozen=True)
+class SQLTemplate:
+    """A parameterized query answering one kind of question.
+
+    `conditions` maps the slots the template takes to their WHERE condition. The "period"
+    condition uses %(since)s and %(until)s, "limit" goes into `tail` and has no condition.
+    A template with a limit only answers questions giving one ("top 10") or using one of its
+    `limit_words` ("latest orders"), which then get the default limit. Other questions would
+    silently lose rows, so they go to the LLM.
+    """
+
+    intent: str
+    select: str
+    required: Tuple[FrozenSet[str], ...]
+    conditions: Dict[str, Optional[str]] = field(default_factory=dict)
+    keywords: FrozenSet[str] = frozenset()
+    excluded: FrozenSet[str] = frozenset()
+    required_slots: FrozenSet[str] = frozenset()
+    defaults: Dict[str, Any] = field(default_factory=dict)
+    limit_words: FrozenSet[str] = frozenset()
+    tail: str = ""
+
+    @property
+    def words(self) -> FrozenSet[str]:
+        return self.keywords.union(self.limit_words, *self.required)
+
+    def _slot_name(self, name: str, value: Any) -> Optional[str]:
+        # Statuses go to whichever status column the template filters on
+        if name != "status":
+            return name if name in self.conditions else None
+        if "order_status" in self.conditions and value in ORDER_STATUSES:
+            return "order_status"
+        if "payment_status" in self.conditions and value in PAYMENT_STATUSES:
+            return "payment_status"
+        return None
+
+    def score(self, tokens: FrozenSet[str], slots: Slots) -> Optional[float]:
+        """Returns how well the template fits, None if it can't answer the question."""
+        if tokens & self.excluded or not all(group & tokens for group in self.required):
+            return None
+        if any(self._slot_name(name, value) is None for name, value in slots.values.items()):
+            return None
+        if self.required_slots - slots.values.keys():
+            return None
+        if "limit" in self.conditions and "limit" not in slots.values and not tokens & self.limit_words:
+            return None
+        return len(self.required) + 0.5 * len(self.keywords & tokens)
+
+    def render(self, slots: Slots) -> Tuple[str, Dict[str, Any]]:
+        """Returns the SQL and its parameters for the extracted slots."""
+        values = dict(self.defaults)
+        values.update((self._slot_name(name, value), value) for name, value in slots.values.items())
+        conditions = [condition for name, condition in self.conditions.items() if condition and name in values]
+        params = {name: value for name, value in values.items() if name != "period"}
+        if "period" in values:
+            params["since"], params["until"] = values["period"]
+        sql = self.select
+        if conditions:
+            sql += " WHERE " + " AND ".join(conditions)
+        if self.tail:
+            sql += " " + self.tail
+        return sql, params
+
+
+def _words(text: str) -> FrozenSet[str]:
+    # Stemmed like the questions they are compared with
+    return frozenset(tokenize(text))
+
+
+GROUPING = _words("by per each breakdown")
+AGGREGATES = _words("count sum average max min")
+LISTING = _words("recent latest last newest")
+RANKING = _words("top most best biggest")
+
+DEFAULT_TEMPLATES = (
+    SQLTemplate(
+        intent="order_status",
+        select="SELECT order_id, status, total_amount FROM orders",
+        # "order" is part of the order id slot
+        required=(),
+        keywords=_words("status state"),
+        conditions={"order_id": "order_id = %(order_id)s"},
+        required_slots=frozenset({"order_id"}),
+    ),
+    SQLTemplate(
+        intent="order_count",
+        select="SELECT COUNT(*) AS order_count FROM orders",
+        required=(_words("order"), _words("count")),
+        excluded=GROUPING | _words("customer payment"),
+        conditions={
+            "order_status": "status = %(order_status)s",
+            "period": "order_date >= %(since)s AND order_date < %(until)s",
+        },
+    ),
+    SQLTemplate(
+        intent="orders_by_status",
+        select="SELECT status, COUNT(*) AS orders FROM orders",
+        required=(_words("order"), _words("status"), GROUPING),
+        keywords=_words("count"),
+        conditions={"period": "order_date >= %(since)s AND order_date < %(until)s"},
+        tail="GROUP BY status ORDER BY orders DESC",
+    ),
+    SQLTemplate(
+        intent="recent_orders",
+        select="SELECT order_id, status, total_amount FROM orders",
+        required=(_words("order"),),
+        keywords=LISTING,
+        excluded=GROUPING | AGGREGATES | _words("customer payment status"),
+        conditions={
+            "order_status": "status = %(order_status)s",
+            "period": "order_date >= %(since)s AND order_date < %(until)s",
+            "limit": None,
+        },
+        defaults={"limit": DEFAULT_LIMIT},
+        limit_words=LISTING,
+        tail="ORDER BY order_date DESC LIMIT %(limit)s",
+    ),
+    SQLTemplate(
+        intent="payment_count",
+        select="SELECT COUNT(*) AS payment_count FROM payments",
+        required=(_words("payment"), _words("count")),
+        excluded=GROUPING | _words("customer order"),
+        conditions={
+            "payment_status": "status = %(payment_status)s",
+            "payment_method": "payment_method = %(payment_method)s",
+            "period": "payment_date >= %(since)s AND payment_date < %(until)s",
+        },
+    ),
+    SQLTemplate(
+        intent="recent_payments",
+        select="SELECT amount, payment_method, status FROM payments",
+        required=(_words("payment"),),
+        keywords=LISTING,
+        excluded=GROUPING | AGGREGATES | _words("customer order"),
+        conditions={
+            "payment_status": "status = %(payment_status)s",
+            "payment_method": "payment_method = %(payment_method)s",
+            "period": "payment_date >= %(since)s AND payment_date < %(until)s",
+            "limit": None,
+        },
+        defaults={"limit": DEFAULT_LIMIT},
+        limit_words=LISTING,
+        tail="ORDER BY payment_date DESC LIMIT %(limit)s",
+    ),
+    SQLTemplate(
+        intent="payment_total",
+        select="SELECT COALESCE(SUM(amount), 0) AS total_amount FROM payments",
+        required=(_words("payment"), _words("sum")),
+        keywords=_words("amount"),
+        excluded=GROUPING | _words("customer order"),
+        conditions={
+            "payment_status": "status = %(payment_status)s",
+            "payment_method": "payment_method = %(payment_method)s",
+            "period": "payment_date >= %(since)s AND payment_date < %(until)s",
+        },
+        # Only money that came in
+        defaults={"payment_status": "success"},
+    ),
+    SQLTemplate(
+        intent="customer_totals",
+        select=(
+            "SELECT c.first_name, c.last_name, SUM(o.total_amount) AS total_spent "
+            "FROM customers c JOIN orders o ON o.customer_id = c.customer_id"
+        ),
+        required=(_words("customer"), _words("sum spent spend spending"), GROUPING | _words("most")),
+        keywords=_words("order amount"),
+        excluded=_words("payment"),
+        conditions={
+            "order_status": "o.status = %(order_status)s",
+            "period": "o.order_date >= %(since)s AND o.order_date < %(until)s",
+            "limit": None,
+        },
+        defaults={"limit": DEFAULT_LIMIT},
+        limit_words=RANKING,
+        tail="GROUP BY c.customer_id, c.first_name, c.last_name ORDER BY total_spent DESC LIMIT %(limit)s",
+    ),
+    SQLTemplate(
+        intent="customer_spend",
+        select=(
+            "SELECT COALESCE(SUM(o.total_amount), 0) AS total_spent "
+            "FROM customers c JOIN orders o ON o.customer_id = c.customer_id"
+        ),
+        required=(_words("sum spent spend spending"),),
+        keywords=_words("customer order amount"),
+        excluded=GROUPING | _words("payment"),
+        conditions={
+            "email": "c.email = %(email)s",
+            "order_status": "o.status = %(order_status)s",
+            "period": "o.order_date >= %(since)s AND o.order_date < %(until)s",
+        },
+        required_slots=frozenset({"email"}),
+    ),
+    SQLTemplate(
+        intent="customer_count",
+        select="SELECT COUNT(*) AS customer_count FROM customers",
+        required=(_words("customer"), _words("count")),
+        keywords=_words("new signed sign up joined registered"),
+        excluded=GROUPING | _words("order payment"),
+        conditions={"period": "created_at >= %(since)s AND created_at < %(until)s"},
+    ),
+)
+
+_PLACEHOLDER = re.compile(r"%\(\w+\)s")
+
+
+@dataclass(frozen=True)
+class IntentMatch:
+    """A question answered by a template."""
+
+    intent: str
+    sql: str
+    params: Dict[str, Any]
+    score: float
+
+
+class IntentRouter:
+    """Routes common questions to SQL templates, the rest to LLM SQL generation."""
+
+    def __init__(
+        self,
+        templates: Tuple[SQLTemplate, ...] = DEFAULT_TEMPLATES,
+        margin: float = DEFAULT_MARGIN,
+        clock: Callable[[], datetime] = datetime.now,
+    ):
+        """Initialize the router.
+
+        Args:
+            templates: Template catalog
+            margin: Score the best template needs over the runner-up
+            clock: Current local time, replaceable in tests
+        """
+        self.templates = templates
+        self.margin = margin
+        self._clock = clock
+        self.vocabulary = GENERAL_WORDS.union(*(template.words for template in templates))
+        self._lock = threading.Lock()
+        self.routed: Dict[str, int] = {}
+        self.fallbacks = 0
+
+    def route(self, question: str, schema: Optional[str] = None) -> Optional[IntentMatch]:
+        """Returns the template query answering a question, None when the LLM should.
+
+        Args:
+            question: The question as asked
+            schema: Schema description the query has to fit, None skips the check
+        """
+        match = self.match(question, schema)
+        with self._lock:
+            if match is None:
+                self.fallbacks += 1
+            else:
+                self.routed[match.intent] = self.routed.get(match.intent, 0) + 1
+        INTENT_ROUTES.labels(match.intent if match else "llm").inc()
+        return match
+
+    def match(self, question: str, schema: Optional[str] = None) -> Optional[IntentMatch]:
+        """Like route(), without counting the result."""
+        slots, rest = extract_slots(normalize_question(question), self._clock())
+        tokens = frozenset(tokenize(rest))
+        if slots.conflict or not tokens or tokens - self.vocabulary:
+            return None
+
+        scored: List[Tuple[float, SQLTemplate]] = []
+        for template in self.templates:
+            score = template.score(tokens, slots)
+            if score is not None:
+                scored.append((score, template))
+        if not scored:
+            return None
+        scored.sort(key=lambda item: item[0], reverse=True)
+        score, template = scored[0]
+        if len(scored) > 1 and score - scored[1][0] < self.margin:
+            return None
+
+        sql, params = template.render(slots)
+        if schema is not None and not verify_sql(_PLACEHOLDER.sub("NULL", sql), parse_schema(schema)):
+            return None
+        return IntentMatch(template.intent, sql, params, score)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            routed = sum(self.routed.values())
+            total = routed + self.fallbacks
+            return {
+                "routed": dict(self.routed),
+                "fallbacks": self.fallbacks,
+                "hit_rate": round(routed / total, 3) if total else 0.0,
+            }
@@ -0,0 +1,137 @@
+# // Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# // SPDX-License-Identifier: MIT-0
+
+"""
+Inbound Audio Jitter Buffer
+
+Clients send microphone audio in whatever chunk size they produce (480 samples from the test
+client, worklet-sized buffers from browsers) and the network delivers it in bursts. This module
+provides a per-session jitter buffer that re-slices inbound PCM into fixed-duration frames and
+holds a small, bounded backlog so frames can be released to the VAD and the LLM at a steady
+cadence.
+
+The buffer waits until `target_ms` of audio is queued before releasing frames, so short network
+gaps are absorbed. If more than `max_ms` of audio piles up, the oldest frames are dropped to keep
+latency bounded.
+"""
+
+from collections import deque
+from typing import Dict, Optional
+
+
+class InboundJitterBuffer:
+    """Re-slices inbound PCM into fixed-size frames and tracks buffer health.
+
+    Counters:
+        depth: Number of complete frames waiting to be released
+        underruns: Times the buffer ran dry while releasing frames
+        overruns: Frames dropped because the backlog exceeded max_ms
+    """
+
+    def __init__(
+        self,
+        sample_rate: int,
+        frame_ms: int = 20,
+        target_ms: int = 40,
+        max_ms: int = 200,
+        num_channels: int = 1,
+    ):
+        """Initialize the jitter buffer.
+
+        Args:
+            sample_rate: Sample rate of the inbound 16-bit PCM audio
+            frame_ms: Duration of each released frame in milliseconds
+            target_ms: Audio to accumulate before releasing frames
+            max_ms: Maximum buffered audio before the oldest frames are dropped
+            num_channels: Number of audio channels
+        """
+        self.sample_rate = sample_rate
+        self.frame_ms = frame_ms
+        self.num_channels = num_channels
+        self.frame_bytes = sample_rate * frame_ms // 1000 * 2 * num_channels
+        self._target_frames = max(target_ms // frame_ms, 1)
+        self._max_frames = max(max_ms // frame_ms, self._target_frames)
+
+        self._partial = bytearray()
+        self._frames = deque()
+        self._playing = False
+
+        self.underruns = 0
+        self.overruns = 0
+        self.frames_in = 0
+        self.frames_out = 0
+
+    @property
+    def depth(self) -> int:
+        """Gets the number of complete frames waiting to be released."""
+        return len(self._frames)
+
+    @property
+    def depth_ms(self) -> int:
+        """Gets the buffered audio duration in milliseconds."""
+        return len(self._frames) * self.frame_ms
+
+    def push(self, audio: bytes):
+        """Adds inbound audio, slicing it into complete frames.
+
+        Args:
+            audio: Raw 16-bit PCM audio of any length
+        """
+        frame_bytes = self.frame_bytes
+        if not self._partial and len(audio) == frame_bytes:
+            # Already the right size, keep the buffer as-is
+            self._frames.append(audio)
+            self.frames_in += 1
+        else:
+            self._partial.extend(audio)
+            offset = 0
+            while len(self._partial) - offset >= frame_bytes:
+                self._frames.append(bytes(self._partial[offset:offset + frame_bytes]))
+                offset += frame_bytes
+                self.frames_in += 1
+            del self._partial[:offset]
+
+        while len(self._frames) > self._max_frames:
+            self._frames.popleft()
+            self.overruns += 1
+
+    def pop(self) -> Optional[bytes]:
+        """Releases the next frame, if one is due.
+
+        Returns:
+            The next fixed-size frame, or None while the buffer is filling up
+        """
+        if not self._playing:
+            if len(self._frames) < self._target_frames:
+                return None
+            self._playing = True
+
+        if not self._frames:
+            # Ran dry, wait until the target depth is reached again
+            self._playing = False
+            self.underruns += 1
+            return None
+
+        self.frames_out += 1
+        return self._frames.popleft()
+
+    def reset(self):
+        """Drops all buffered audio."""
+        self._partial.clear()
+        self._frames.clear()
+        self._playing = False
+
+    def stats(self) -> Dict[str, int]:
+        """Gets a snapshot of the buffer counters.
+
+        Returns:
+            Dictionary with depth, underrun, overrun and frame counters
+        """
+        return {
+            "depth": self.depth,
+            "depth_ms": self.depth_ms,
+            "underruns": self.underruns,
+            "overruns": self.overruns,
+            "frames_in": self.frames_in,
+            "frames_out": self.frames_out,
+        }
@@ -0,0 +1,487 @@
+# // Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# // SPDX-License-Identifier: MIT-0
+
+"""
+Headless Load Generator
+
+Opens many concurrent caller sessions against the WebSocket server, without a microphone. Each
+session reuses the protocol handling of the test client (`AudioClient` in test.py) and streams
+16 kHz mono 16-bit audio from WAV or raw PCM files at real-time pace, following a talk/silence
+pattern:
+
+    talk (talk_secs) -> silence (silence_secs) -> talk -> ... for `turns` turns
+
+With `--barge-in-ms` the caller starts the next turn that long after the bot starts answering,
+instead of waiting for the silence to end, to measure how fast the server interrupts the bot.
+
+Sessions arrive at `--arrival-rate` per second (evenly spaced, or Poisson with `--poisson`),
+so the concurrency ramps up to roughly arrival rate x session length. Per session it records:
+
+- connect_ms: TCP + WebSocket handshake
+- first_audio_ms: connected to first bot audio
+- response_ms: end of each caller turn to the first bot audio of the reply
+- barge_in_ms: caller speech during bot audio to the server's `stop` event
+- frames_dropped: caller chunks skipped because the sender fell behind real time
+- playout_underruns: bot audio arriving after the previous audio had finished playing
+
+The summary report (p50/p95/p99 per metric, rejected sessions, peak concurrency) is what we
+size the ECS desired_count and task CPU/memory with.
+
+Usage:
+    python load_generator.py --audio caller.wav --sessions 200 --arrival-rate 5 --turns 3
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import time
+import wave
+from dataclasses import asdict, dataclass, field
+from typing import Dict, List, Optional
+
+import websockets
+
+from test import API_KEY, SAMPLE_RATE, AudioClient
+from turn_tracing import PERCENTILES, percentile
+
+# Bot audio arriving later than this after the previous audio finished starts a new utterance
+UTTERANCE_GAP_SECS = 0.5
+# The bot counts as speaking until its audio has played out, plus this much network jitter
+PLAYOUT_SLACK_SECS = 0.1
+# WebSocket close code of sessions turned away by admission control
+TRY_AGAIN_LATER = 1013
+
+
+def load_audio(path: str) -> bytes:
+    """Loads caller audio from a WAV file or a raw PCM file.
+
+    Args:
+        path: 16 kHz mono 16-bit WAV file, or raw little-endian 16-bit PCM at 16 kHz
+
+    Returns:
+        The PCM samples
+
+    Raises:
+        ValueError: If a WAV file has another format
+    """
+    if path.lower().endswith(".wav"):
+        with wave.open(path, "rb") as f:
+            if (f.getframerate(), f.getnchannels(), f.getsampwidth()) != (SAMPLE_RATE, 1, 2):
+                raise ValueError(
+                    f"{path}: expected {SAMPLE_RATE} Hz mono 16-bit audio, got {f.getframerate()} Hz, "
+                    f"{f.getnchannels()} channels, {8 * f.getsampwidth()}-bit"
+                )
+            return f.readframes(f.getnframes())
+    with open(path, "rb") as f:
+        return f.read()
+
+
+@dataclass
+class TalkPattern:
+    """Talk/silence pattern every simulated caller follows."""
+
+    turns: int = 3
+    talk_secs: float = 3.0
+    silence_secs: float = 5.0
+    # Segments are stretched or shortened randomly by up to this fraction
+    jitter: float = 0.2
+    # Start the next turn this long after the bot starts answering, None waits for the silence
+    barge_in_ms: Optional[float] = None
+    # Time to keep listening after the last turn
+    tail_secs: float = 3.0
+
+
+@dataclass
+class SessionResult:
+    """Measurements of one simulated session."""
+
+    session: int
+    started_at: float
+    connect_ms: Optional[float] = None
+    first_audio_ms: Optional[float] = None
+    response_ms: List[float] = field(default_factory=list)
+    barge_in_ms: List[float] = field(default_factory=list)
+    barge_in_missed: int = 0
+    frames_sent: int = 0
+    frames_dropped: int = 0
+    audio_received_bytes: int = 0
+    playout_underruns: int = 0
+    close_code: Optional[int] = None
+    error: Optional[str] = None
+    duration_secs: float = 0.0
+
+
+class LoadClient(AudioClient):
+    """Headless `AudioClient` that streams a file following a talk pattern and records timings."""
+
+    def __init__(
+        self,
+        websocket_url: str,
+        session: int,
+        audio: bytes,
+        pattern: TalkPattern,
+        rng: Optional[random.Random] = None,
+        api_key: str = API_KEY,
+        binary: bool = False,
+        started_at: float = 0.0,
+    ):
+        """Initialize the client.
+
+        Args:
+            websocket_url: WebSocket server URL to connect to
+            session: Number of the session, used in the report
+            audio: Caller audio, looped over the talk segments
+            pattern: Talk/silence pattern to follow
+            rng: Random source for the segment jitter
+            api_key: API key offered as WebSocket subprotocol
+            binary: Send and receive raw PCM binary frames instead of base64 text
+            started_at: Start time relative to the load run, for the report
+        """
+        super().__init__(websocket_url, api_key=api_key, binary=binary)
+        # Whole chunks only, so looping the clip keeps chunks aligned
+        self.clip = audio[: len(audio) - len(audio) % self.chunk_bytes] or bytes(self.chunk_bytes)
+        self.pattern = pattern
+        self.rng = rng or random.Random()
+        self.result = SessionResult(session=session, started_at=round(started_at, 3))
+
+        self.chunk_secs = self.CHUNK / self.RATE
+        self._silence = bytes(self.chunk_bytes)
+        self._audio_offset = 0
+        self._segments = self._plan_segments()
+        self._talking = False
+        self._remaining = 0
+        self._connected_at = 0.0
+        self._speech_ended_at: Optional[float] = None
+        self._bot_speech_started_at: Optional[float] = None
+        self._barge_in_at: Optional[float] = None
+        self._playout_end: Optional[float] = None
+
+    def _plan_segments(self) -> List[tuple]:
+        segments = []
+        for _ in range(self.pattern.turns):
+            segments.append((True, self._jittered(self.pattern.talk_secs)))
+            segments.append((False, self._jittered(self.pattern.silence_secs)))
+        return segments
+
+    def _jittered(self, secs: float) -> int:
+        secs *= 1 + self.rng.uniform(-self.pattern.jitter, self.pattern.jitter)
+        return max(1, round(secs / self.chunk_secs))
+
+    def open_audio(self):
+        pass
+
+    def close_audio(self):
+        pass
+
+    def _next_segment(self, now: float) -> bool:
+        if self._talking:
+            # The caller's turn is over, the bot should answer now
+            self._speech_ended_at = now
+            self._bot_speech_started_at = None
+            if self._barge_in_at is not None:
+                self.result.barge_in_missed += 1
+                self._barge_in_at = None
+        if not self._segments:
+            return False
+        self._talking, self._remaining = self._segments.pop(0)
+        if self._talking and self._bot_speaking(now):
+            # Talking over the bot, the server should interrupt it
+            self._barge_in_at = now
+        return True
+
+    def _bot_speaking(self, now: float) -> bool:
+        return self._playout_end is not None and now < self._playout_end + PLAYOUT_SLACK_SECS
+
+    def _should_barge_in(self, now: float) -> bool:
+        barge_in_ms = self.pattern.barge_in_ms
+        return (
+            barge_in_ms is not None
+            and not self._talking
+            and bool(self._segments)
+            and self._bot_speech_started_at is not None
+            and (now - self._bot_speech_started_at) * 1000 >= barge_in_ms
+        )
+
+    async def read_chunk(self):
+        now = time.monotonic()
+        if self._should_barge_in(now):
+            self._remaining = 0
+        while self._remaining == 0:
+            if not self._next_segment(now):
+                return None
+        self._remaining -= 1
+
+        if not self._talking:
+            return self._silence
+        chunk = self.clip[self._audio_offset:self._audio_offset + self.chunk_bytes]
+        self._audio_offset = (self._audio_offset + self.chunk_bytes) % len(self.clip)
+        return chunk
+
+    def on_audio(self, audio_data):
+        now = time.monotonic()
+        result = self.result
+        result.audio_received_bytes += len(audio_data)
+        if result.first_audio_ms is None:
+            result.first_audio_ms = round((now - self._connected_at) * 1000, 1)
+
+        if self._playout_end is None or now - self._playout_end > UTTERANCE_GAP_SECS:
+            self._bot_speech_started_at = now
+            self._playout_end = now
+        elif now > self._playout_end:
+            # The previous audio already finished playing, the caller heard a gap
+            result.playout_underruns += 1
+            self._playout_end = now
+        self._playout_end += len(audio_data) / (2 * self.RATE)
+
+        if self._speech_ended_at is not None:
+            result.response_ms.append(round((now - self._speech_ended_at) * 1000, 1))
+            self._speech_ended_at = None
+
+    def on_interruption(self):
+        now = time.monotonic()
+        if self._barge_in_at is not None:
+            self.result.barge_in_ms.append(round((now - self._barge_in_at) * 1000, 1))
+            self._barge_in_at = None
+        # Queued bot audio is dropped on interruption
+        self._playout_end = None
+        self._bot_speech_started_at = None
+
+    async def process_server_messages(self, websocket):
+        try:
+            async for message in websocket:
+                self.handle_message(message)
+        except websockets.exceptions.ConnectionClosed:
+            pass
+
+    async def send_audio(self, websocket):
+        """Sends the talk pattern at real-time pace.
+
+        Chunks are sent on a fixed schedule. When the sender falls more than a chunk behind,
+        the late chunks are skipped and counted as dropped, like a phone network would.
+        """
+        next_at = time.monotonic()
+        while True:
+            data = await self.read_chunk()
+            if data is None:
+                return
+            now = time.monotonic()
+            if now - next_at > self.chunk_secs:
+                self.result.frames_dropped += 1
+            else:
+                await websocket.send(self.encode_chunk(data))
+                self.result.frames_sent += 1
+            next_at += self.chunk_secs
+            await asyncio.sleep(max(0.0, next_at - time.monotonic()))
+
+    async def run(self) -> SessionResult:
+        """Runs the session and returns its measurements."""
+        result = self.result
+        start = time.monotonic()
+        websocket = None
+        try:
+            async with self.connect() as websocket:
+                self._connected_at = time.monotonic()
+                result.connect_ms = round((self._connected_at - start) * 1000, 1)
+                receiver = asyncio.create_task(self.process_server_messages(websocket))
+                try:
+                    await self.send_audio(websocket)
+                    await asyncio.wait_for(asyncio.shield(receiver), self.pattern.tail_secs)
+                except asyncio.TimeoutError:
+                    pass
+                finally:
+                    await websocket.close()
+                    await receiver
+        except websockets.exceptions.ConnectionClosed:
+            # Closed by the server while sending, e.g. rejected by admission control
+            pass
+        except Exception as e:
+            result.error = f"{type(e).__name__}: {e}"
+        if websocket is not None:
+            result.close_code = websocket.close_code
+        result.duration_secs = round(time.monotonic() - start, 2)
+        return result
+
+
+def metric_stats(values: List[float]) -> Dict[str, float]:
+    """Returns count, p50/p95/p99 and max of a list of milliseconds."""
+    if not values:
+        return {"count": 0}
+    values = sorted(values)
+    stats = {"count": len(values)}
+    stats.update({f"p{pct}": percentile(values, pct) for pct in PERCENTILES})
+    stats["max"] = values[-1]
+    return stats
+
+
+def summarize(results: List[SessionResult], wall_secs: float, peak_concurrent: int) -> Dict:
+    """Builds the summary report of a load run.
+
+    Args:
+        results: Measurements of every session
+        wall_secs: Duration of the whole run
+        peak_concurrent: Highest number of sessions connected at once
+
+    Returns:
+        The report as a dict
+    """
+    rejected = [r for r in results if r.close_code == TRY_AGAIN_LATER]
+    failed = [r for r in results if r.error or r.connect_ms is None]
+    frames_sent = sum(r.frames_sent for r in results)
+    frames_dropped = sum(r.frames_dropped for r in results)
+    return {
+        "sessions": len(results),
+        "completed": len(results) - len(rejected) - len(failed),
+        "rejected": len(rejected),
+        "failed": len(failed),
+        "errors": sorted({r.error for r in failed if r.error}),
+        "peak_concurrent": peak_concurrent,
+        "wall_secs": round(wall_secs, 1),
+        "connect_ms": metric_stats([r.connect_ms for r in results if r.connect_ms is not None]),
+        "first_audio_ms": metric_stats([r.first_audio_ms for r in results if r.first_audio_ms is not None]),
+        "response_ms": metric_stats([ms for r in results for ms in r.response_ms]),
+        "barge_in_ms": metric_stats([ms for r in results for ms in r.barge_in_ms]),
+        "barge_in_missed": sum(r.barge_in_missed for r in results),
+        "frames_sent": frames_sent,
+        "frames_dropped": frames_dropped,
+        "drop_rate": round(frames_dropped / max(1, frames_sent + frames_dropped), 4),
+        "playout_underruns": sum(r.playout_underruns for r in results),
+        "sessions_without_audio": sum(1 for r in results if r.connect_ms is not None and r.first_audio_ms is None),
+    }
+
+
+def format_report(summary: Dict) -> str:
+    """Returns the summary report as text."""
+    lines = [
+        f"Sessions: {summary['sessions']} ({summary['completed']} completed, {summary['rejected']} rejected, "
+        f"{summary['failed']} failed), peak {summary['peak_concurrent']} concurrent, {summary['wall_secs']}s",
+        f"{'metric':<16} {'count':>6} {'p50':>9} {'p95':>9} {'p99':>9} {'max':>9}",
+    ]
+    for name in ("connect_ms", "first_audio_ms", "response_ms", "barge_in_ms"):
+        stats = summary[name]
+        if stats["count"]:
+            lines.append(
+                f"{name:<16} {stats['count']:>6} {stats['p50']:>9.1f} {stats['p95']:>9.1f} "
+                f"{stats['p99']:>9.1f} {stats['max']:>9.1f}"
+            )
+        else:
+            lines.append(f"{name:<16} {0:>6}")
+    lines.append(
+        f"Frames sent {summary['frames_sent']}, dropped {summary['frames_dropped']} ({100 * summary['drop_rate']:.2f}%), "
+        f"playout underruns {summary['playout_underruns']}, missed barge-ins {summary['barge_in_missed']}, "
+        f"sessions without bot audio {summary['sessions_without_audio']}"
+    )
+    for error in summary["errors"]:
+        lines.append(f"Error: {error}")
+    return "\n".join(lines)
+
+
+async def run_load(
+    url: str,
+    clips: List[bytes],
+    sessions: int,
+    arrival_rate: float,
+    pattern: TalkPattern,
+    poisson: bool = False,
+    binary: bool = False,
+    api_key: str = API_KEY,
+    seed: Optional[int] = None,
+) -> Dict:
+    """Runs a load test and returns the summary report with the per-session results.
+
+    Args:
+        url: WebSocket server URL
+        clips: Caller audio clips, assigned to sessions round robin
+        sessions: Number of sessions to start
+        arrival_rate: New sessions per second
+        pattern: Talk/silence pattern of every session
+        poisson: Use exponential inter-arrival times instead of an even spacing
+        binary: Use raw PCM binary frames instead of base64 text
+        api_key: API key offered as WebSocket subprotocol
+        seed: Seed for the arrival times and segment jitter
+    """
+    rng = random.Random(seed)
+    active = 0
+    peak = 0
+    start = time.monotonic()
+
+    async def run_session(session: int):
+        nonlocal active, peak
+        client = LoadClient(
+            url,
+            session,
+            clips[session % len(clips)],
+            pattern,
+            rng=random.Random(rng.random()),
+            api_key=api_key,
+            binary=binary,
+            started_at=time.monotonic() - start,
+        )
+        active += 1
+        peak = max(peak, active)
+        try:
+            return await client.run()
+        finally:
+            active -= 1
+
+    tasks = []
+    for session in range(sessions):
+        tasks.append(asyncio.create_task(run_session(session)))
+        if session < sessions - 1:
+            await asyncio.sleep(rng.expovariate(arrival_rate) if poisson else 1 / arrival_rate)
+    results = await asyncio.gather(*tasks)
+
+    summary = summarize(results, time.monotonic() - start, peak)
+    summary["results"] = [asdict(r) for r in results]
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless concurrent caller load generator")
+    parser.add_argument("--url", default="ws://localhost:8000/ws", help="WebSocket server URL")
+    parser.add_argument("--audio", nargs="+", required=True,
+                        help="Caller audio, 16 kHz mono 16-bit WAV or raw PCM files")
+    parser.add_argument("--sessions", type=int, default=10, help="Number of sessions to start")
+    parser.add_argument("--arrival-rate", type=float, default=1.0, help="New sessions per second")
+    parser.add_argument("--poisson", action="store_true", help="Poisson arrivals instead of evenly spaced")
+    parser.add_argument("--turns", type=int, default=3, help="Caller turns per session")
+    parser.add_argument("--talk-secs", type=float, default=3.0, help="Length of a caller turn")
+    parser.add_argument("--silence-secs", type=float, default=5.0, help="Silence after a caller turn")
+    parser.add_argument("--jitter", type=float, default=0.2, help="Random variation of the segment lengths")
+    parser.add_argument("--barge-in-ms", type=float,
+                        help="Start the next turn this long after the bot starts answering")
+    parser.add_argument("--tail-secs", type=float, default=3.0, help="Listening time after the last turn")
+    parser.add_argument("--binary", action="store_true", help="Use raw PCM binary frames")
+    parser.add_argument("--api-key", default=API_KEY, help="API key offered as WebSocket subprotocol")
+    parser.add_argument("--seed", type=int, help="Random seed for reproducible runs")
+    parser.add_argument("--output", help="Write the report and per-session results as JSON to this file")
+    args = parser.parse_args()
+
+    pattern = TalkPattern(
+        turns=args.turns,
+        talk_secs=args.talk_secs,
+        silence_secs=args.silence_secs,
+        jitter=args.jitter,
+        barge_in_ms=args.barge_in_ms,
+        tail_secs=args.tail_secs,
+    )
+    clips = [load_audio(path) for path in args.audio]
+    report = asyncio.run(run_load(
+        args.url,
+        clips,
+        args.sessions,
+        args.arrival_rate,
+        pattern,
+        poisson=args.poisson,
+        binary=args.binary,
+        api_key=args.api_key,
+        seed=args.seed,
+    ))
+    print(format_report(report))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
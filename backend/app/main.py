@@ -13,19 +13,58 @@ Key Components:
 - Audio processing pipeline with VAD (Voice Activity Detection)
 - Integration with AWS Nova Sonic LLM service
 - Context management for conversation history
-- Credential management for AWS services
+- Credential management for AWS services (cached default chain or STS credentials, refreshed in the background)
 
 Dependencies:
 - FastAPI for WebSocket server
 - Pipecat for audio processing pipeline
 - AWS Bedrock for LLM services
-- Silero VAD for voice activity detection
+- Silero VAD for voice activity detection (one model shared by all sessions)
 
 Environment Variables:
 - AWS_CONTAINER_CREDENTIALS_RELATIVE_URI: URI for AWS container credentials
 - AWS_ACCESS_KEY_ID: AWS access key
 - AWS_SECRET_ACCESS_KEY: AWS secret key
 - AWS_SESSION_TOKEN: AWS session token
+- PROMPT_PATH: System prompt file (defaults to prompt.txt next to this module)
+- MAX_SESSIONS: Concurrent sessions per worker process before new callers are queued or rejected
+- SESSION_QUEUE_TIMEOUT_SECS: How long a caller waits for a free session slot
+- MAX_LOOP_LAG_MS / MAX_MEMORY_MB: Event loop lag and memory above which new callers are rejected
+- TURN_TRACE_PATH / TURN_TRACE_MAX_MB: JSON lines file for per-turn latency traces (default empty,
+  disabled) and the size at which it is rotated to <path>.1 (default 100)
+- TRANSCRIPT_STORE: Transcript store, sqlite:<file> (default sqlite:transcripts.db) or jsonl:<directory>
+- WEB_CONCURRENCY: Number of worker processes (default 1, 0 for one per core). With several
+  workers /metrics returns the samples of all of them, labelled with the worker pid, and
+  POST /admin/drain on any of them drains all
+- DRAIN_TIMEOUT_SECS: How long active sessions may keep running after SIGTERM (default 100)
+- AUDIO_PACKET_MS: Duration of the bot audio packets sent to clients that don't ask for one (default 40)
+- JITTER_BUFFER_FRAME_MS / JITTER_BUFFER_TARGET_MS / JITTER_BUFFER_MAX_MS: Frame size (0 pushes
+  client audio as it arrives), playout delay and maximum depth of the inbound jitter buffer
+  (defaults 20, 40 and 200)
+- TOOL_WORKERS: Threads running blocking tool calls, shared by all sessions (default 8)
+- SQL_TOOL_TIMEOUT_SECS / SQL_TOOL_MAX_CONCURRENCY: Timeout of a SQL tool call and the number of
+  SQL tool calls running at once across all sessions (defaults 30 and 4)
+- LLM_SERVICE: "nova-sonic" (default) or "fake" for the offline stand-in in fake_llm.py. The fake
+  service also answers SQL tool calls with a stub and skips the schema warm-up, so it needs
+  neither AWS nor Postgres
+- FAKE_LLM_TTFB_MS / FAKE_LLM_REAL_TIME_FACTOR / FAKE_LLM_RESPONSE_SECS / FAKE_LLM_TOOL_CALL_EVERY:
+  Reply latency, pacing, length and tool call schedule of the fake LLM service
+- FAKE_SQL_TOOL_MS: How long the stub SQL tool of the fake service takes (default 300)
+- SQL_CACHE_MAX_ENTRIES / SQL_CACHE_TTL_SECS: Size (0 disables) and lifetime of the generated SQL cache
+- SQL_SEMANTIC_CACHE_MAX_ENTRIES / SQL_SEMANTIC_CACHE_TTL_SECS / SQL_SEMANTIC_CACHE_THRESHOLD: Size
+  (0 disables), lifetime and cosine similarity threshold of the cache reusing SQL of similar questions
+- BEDROCK_MAX_CONNECTIONS / BEDROCK_MAX_ATTEMPTS / BEDROCK_LATENCY_BUDGET_SECS: Connection pool size,
+  attempts per call and time after which calls are not retried for the shared Bedrock client
+- LOCAL_RESULT_SUMMARIES: Describe common query results with templates instead of a second Claude
+  call (default true)
+- LIVE_SCHEMA: Describe the live database in the SQL generation prompt instead of the built-in
+  schema (default true)
+- SCHEMA_CHECK_INTERVAL_SECS: How often the live schema's catalog fingerprint is checked for
+  changes (default 30)
+- SCHEMA_PRUNING: Send only the tables a question needs with the SQL generation prompt, falling
+  back to the full schema when unsure (default true)
+- INTENT_ROUTER: Answer common questions from parameterized SQL templates instead of generating
+  SQL with Claude (default true)
 """
 
 import asyncio
@@ -34,11 +73,16 @@ import base64
 import traceback
 import boto3
 import os
+import time
+from contextlib import asynccontextmanager
 from datetime import datetime
 from pathlib import Path
+from typing import Optional
 
 import httpx
+from loguru import logger
 from fastapi import FastAPI, WebSocket, Request, Response
+from fastapi.responses import JSONResponse
 import uvicorn
 
 from pipecat.adapters.schemas.function_schema import FunctionSchema
@@ -57,33 +101,133 @@ from pipecat.serializers.plivo import PlivoFrameSerializer
 from pipecat.processors.logger import FrameLogger
 from pipecat.processors.transcript_processor import TranscriptProcessor
 
-from app.aws_client_assume import get_session_token
+from audio_packetizer import AudioTailPadder, packet_ms_from_subprotocols
 from base64_serializer import Base64AudioSerializer
-from sql_generator import SQLQueryGenerator
+from bedrock_client import BedrockRuntimeClient
+from credential_provider import CredentialProvider
+from database import PostgresDatabase
+from fake_llm import FakeSpeechLLMService, fake_sql_tool
+from graceful_shutdown import DrainingServer
+from intent_router import IntentRouter
+from metrics import (
+    ACTIVE_SESSIONS,
+    DRAINING,
+    SESSION_SETUP_SECONDS,
+    SESSIONS,
+    SQL_CACHE_ENTRIES,
+    SQL_SEMANTIC_CACHE_ENTRIES,
+    PipelineMetricsCollector,
+    metrics_router,
+)
+from session_timing import FirstAudioTimer
+from session_manager import TRY_AGAIN_LATER, AdmissionRejected, SessionManager
+from result_summarizer import ResultSummarizer
+from schema_cache import SchemaCache
+from schema_pruning import SchemaPruner
+from semantic_cache import SemanticSQLCache
+from sql_cache import SQLCache
+from shared_vad import SharedSileroVADAnalyzer, SileroModelRegistry
+from tool_executor import ToolExecutor
+from transcript_sink import TranscriptRecord, TranscriptSink, create_store
+from turn_tracing import LatencySummary, TraceWriter, TurnTracer
+from worker_supervisor import WorkerSupervisor, default_worker_count, shared_path
+from websocket_transport import AudioWebsocketParams, AudioWebsocketTransport
+from sql_generator import DEFAULT_SCHEMA, SQLQueryGenerator
 
 SAMPLE_RATE = 16000
-sql_generator = SQLQueryGenerator()
+AUDIO_PACKET_MS = int(os.getenv("AUDIO_PACKET_MS", "40"))
+# Inbound jitter buffer, set JITTER_BUFFER_FRAME_MS=0 to push client audio as it arrives
+JITTER_BUFFER_FRAME_MS = int(os.getenv("JITTER_BUFFER_FRAME_MS", "20"))
+JITTER_BUFFER_TARGET_MS = int(os.getenv("JITTER_BUFFER_TARGET_MS", "40"))
+JITTER_BUFFER_MAX_MS = int(os.getenv("JITTER_BUFFER_MAX_MS", "200"))
+# Number of worker processes, 0 means one per available core
+WEB_CONCURRENCY = int(os.getenv("WEB_CONCURRENCY", "1")) or default_worker_count()
+# Admission control, limits apply per worker process
+MAX_SESSIONS = int(os.getenv("MAX_SESSIONS", "20"))
+SESSION_QUEUE_TIMEOUT_SECS = float(os.getenv("SESSION_QUEUE_TIMEOUT_SECS", "2"))
+MAX_LOOP_LAG_MS = float(os.getenv("MAX_LOOP_LAG_MS", "200"))
+MAX_MEMORY_MB = float(os.getenv("MAX_MEMORY_MB", "0")) or None
+# Keep below the ECS stop timeout so cancelled sessions can still close before SIGKILL
+DRAIN_TIMEOUT_SECS = float(os.getenv("DRAIN_TIMEOUT_SECS", "100"))
+# "fake" swaps Nova Sonic for a local stand-in, so the rest of the stack can be tested offline
+LLM_SERVICE = os.getenv("LLM_SERVICE", "nova-sonic")
+FAKE_LLM_TTFB_MS = float(os.getenv("FAKE_LLM_TTFB_MS", "500"))
+FAKE_LLM_REAL_TIME_FACTOR = float(os.getenv("FAKE_LLM_REAL_TIME_FACTOR", "1.0"))
+FAKE_LLM_RESPONSE_SECS = float(os.getenv("FAKE_LLM_RESPONSE_SECS", "3"))
+FAKE_LLM_TOOL_CALL_EVERY = int(os.getenv("FAKE_LLM_TOOL_CALL_EVERY", "0"))
+FAKE_SQL_TOOL_MS = float(os.getenv("FAKE_SQL_TOOL_MS", "300"))
+# Per-turn latency traces are appended here as JSON lines, empty disables writing
+TURN_TRACE_PATH = os.getenv("TURN_TRACE_PATH", "")
+TURN_TRACE_MAX_MB = float(os.getenv("TURN_TRACE_MAX_MB", "100"))
+# Transcript store, "sqlite:<file>" or "jsonl:<directory>"
+TRANSCRIPT_STORE = os.getenv("TRANSCRIPT_STORE", "sqlite:transcripts.db")
+TOOL_WORKERS = int(os.getenv("TOOL_WORKERS", "8"))
+SQL_TOOL_TIMEOUT_SECS = float(os.getenv("SQL_TOOL_TIMEOUT_SECS", "30"))
+SQL_TOOL_MAX_CONCURRENCY = int(os.getenv("SQL_TOOL_MAX_CONCURRENCY", "4"))
+# Generated SQL is cached per normalized question and schema, 0 entries disables the cache
+SQL_CACHE_MAX_ENTRIES = int(os.getenv("SQL_CACHE_MAX_ENTRIES", "1024"))
+SQL_CACHE_TTL_SECS = float(os.getenv("SQL_CACHE_TTL_SECS", "3600"))
+# Similar questions ("count the pending orders") reuse SQL when the exact cache misses
+SQL_SEMANTIC_CACHE_MAX_ENTRIES = int(os.getenv("SQL_SEMANTIC_CACHE_MAX_ENTRIES", "50000"))
+SQL_SEMANTIC_CACHE_TTL_SECS = float(os.getenv("SQL_SEMANTIC_CACHE_TTL_SECS", "86400"))
+SQL_SEMANTIC_CACHE_THRESHOLD = float(os.getenv("SQL_SEMANTIC_CACHE_THRESHOLD", "0.85"))
+# Shared by every session's tool calls, size the pool for the concurrent calls
+BEDROCK_MAX_CONNECTIONS = int(os.getenv("BEDROCK_MAX_CONNECTIONS", "50"))
+BEDROCK_MAX_ATTEMPTS = int(os.getenv("BEDROCK_MAX_ATTEMPTS", "3"))
+BEDROCK_LATENCY_BUDGET_SECS = float(os.getenv("BEDROCK_LATENCY_BUDGET_SECS", "25"))
+LOCAL_RESULT_SUMMARIES = os.getenv("LOCAL_RESULT_SUMMARIES", "true").lower() == "true"
+LIVE_SCHEMA = os.getenv("LIVE_SCHEMA", "true").lower() == "true"
+SCHEMA_CHECK_INTERVAL_SECS = float(os.getenv("SCHEMA_CHECK_INTERVAL_SECS", "30"))
+SCHEMA_PRUNING = os.getenv("SCHEMA_PRUNING", "true").lower() == "true"
+INTENT_ROUTER = os.getenv("INTENT_ROUTER", "true").lower() == "true"
+PROMPT_PATH = os.getenv("PROMPT_PATH", str(Path(__file__).parent / "prompt.txt"))
+sql_cache = SQLCache(max_entries=SQL_CACHE_MAX_ENTRIES, ttl_secs=SQL_CACHE_TTL_SECS) if SQL_CACHE_MAX_ENTRIES else None
+semantic_sql_cache = SemanticSQLCache(
+    threshold=SQL_SEMANTIC_CACHE_THRESHOLD,
+    max_entries=SQL_SEMANTIC_CACHE_MAX_ENTRIES,
+    ttl_secs=SQL_SEMANTIC_CACHE_TTL_SECS,
+) if SQL_SEMANTIC_CACHE_MAX_ENTRIES else None
+result_summarizer = ResultSummarizer() if LOCAL_RESULT_SUMMARIES else None
+intent_router = IntentRouter() if INTENT_ROUTER else None
+# Own connection, fingerprint checks don't wait for tool queries
+schema_cache = SchemaCache(
+    PostgresDatabase(), check_interval_secs=SCHEMA_CHECK_INTERVAL_SECS, fallback=DEFAULT_SCHEMA
+) if LIVE_SCHEMA else None
+schema_pruner = SchemaPruner() if SCHEMA_PRUNING else None
+bedrock_client = BedrockRuntimeClient(
+    max_connections=BEDROCK_MAX_CONNECTIONS,
+    max_attempts=BEDROCK_MAX_ATTEMPTS,
+    latency_budget_secs=BEDROCK_LATENCY_BUDGET_SECS,
+)
+sql_generator = SQLQueryGenerator(
+    cache=sql_cache,
+    semantic_cache=semantic_sql_cache,
+    summarizer=result_summarizer,
+    bedrock=bedrock_client,
+    router=intent_router,
+    schema_cache=schema_cache,
+    pruner=schema_pruner,
+)
+SQL_CACHE_ENTRIES.set_function(lambda: len(sql_cache) if sql_cache else 0)
+SQL_SEMANTIC_CACHE_ENTRIES.set_function(lambda: len(semantic_sql_cache) if semantic_sql_cache else 0)
+credential_provider = CredentialProvider()
+session_manager = SessionManager(
+    max_sessions=MAX_SESSIONS,
+    queue_timeout_secs=SESSION_QUEUE_TIMEOUT_SECS,
+    max_loop_lag_ms=MAX_LOOP_LAG_MS,
+    max_memory_mb=MAX_MEMORY_MB,
+    # With several workers, a drain requested from one of them drains all
+    drain_flag_path=shared_path("drain"),
+)
+ACTIVE_SESSIONS.set_function(lambda: len(session_manager.active))
+DRAINING.set_function(lambda: int(session_manager.draining))
 API_KEY = "Your-own-long-secret-text-to-access-the-api"
 
-def update_dredentials():
-    """
-    Updates AWS credentials by fetching from ECS container metadata endpoint.
-    Used in containerized environments to maintain fresh credentials.
-    """
-    try:
-
-        access_id, secret_key, token = get_session_token()
-
-        os.environ["AWS_ACCESS_KEY_ID"] = access_id
-        os.environ["AWS_SECRET_ACCESS_KEY"] = secret_key
-        os.environ["AWS_SESSION_TOKEN"] = token
-
-        print("AWS credentials refreshed successfully", flush=True)
-
-        return access_id, secret_key, token
-
-    except Exception as e:
-        print(f"Error refreshing credentials: {str(e)}", flush=True)
+# Process-wide state loaded once by warm_up()
+system_instruction = None
+trace_writer = None
+transcript_sink = None
+latency_summary = LatencySummary()
 
 # async def get_balance_from_api(params: FunctionCallParams):
 #     if params.arguments["username"] == 'suresh':
@@ -109,24 +253,20 @@ def update_dredentials():
 #             }
 #         )
 
-async def generate_sql_query(params: FunctionCallParams):
+def generate_sql_query(arguments: dict) -> dict:
     """
     Generate SQL query from natural language text using Claude 3.5 Sonnet V2.
+    Blocking, runs on the tool executor's thread pool.
     """
-    try:
-        text = params.arguments["text"]
-        print("Text by User", text)
-        schema = params.arguments.get("schema")
+    text = arguments["text"]
+    print("Text by User", text)
+    schema = arguments.get("schema")
 
-        query = sql_generator.generate_query(text, schema)
+    query = sql_generator.generate_query(text, schema)
 
-        if query:
-            await params.result_callback({"response": query})
-        else:
-            await params.result_callback({"error": "Generated query appears invalid"})
-
-    except Exception as e:
-        await params.result_callback({"error": str(e)})
+    if query:
+        return {"response": query}
+    return {"error": "Generated query appears invalid"}
 
 
 # weather_function = FunctionSchema(
@@ -165,60 +305,140 @@ sql_function = FunctionSchema(
 # tools = ToolsSchema(standard_tools=[weather_function, sql_function])
 tools = ToolsSchema(standard_tools=[sql_function])
 
-async def setup(websocket: WebSocket):
+# Tool handlers run on a bounded pool shared by all sessions, away from the event loop
+tool_executor = ToolExecutor(max_workers=TOOL_WORKERS)
+tool_executor.register(
+    "generate_sql_query",
+    fake_sql_tool(FAKE_SQL_TOOL_MS / 1000) if LLM_SERVICE == "fake" else generate_sql_query,
+    timeout_secs=SQL_TOOL_TIMEOUT_SECS,
+    max_concurrency=SQL_TOOL_MAX_CONCURRENCY,
+)
+
+def load_system_instruction(path: str = PROMPT_PATH) -> str:
+    """
+    Reads the system prompt and appends the Nova Sonic trigger instruction.
+    """
+    with open(path) as f:
+        prompt_text = f.read()
+
+    return prompt_text + f"\n{AWSNovaSonicLLMService.AWAIT_TRIGGER_ASSISTANT_RESPONSE_INSTRUCTION}"
+
+async def warm_up():
+    """
+    Loads everything sessions share once per process, before the server accepts connections:
+    the system instruction, AWS credentials (refreshed in the background from here on), the
+    Silero VAD model and the live database schema.
+    """
+    global system_instruction, trace_writer, transcript_sink
+
+    start = time.monotonic()
+
+    if TURN_TRACE_PATH:
+        trace_writer = TraceWriter(TURN_TRACE_PATH, max_bytes=int(TURN_TRACE_MAX_MB * 1024 * 1024))
+
+    transcript_sink = TranscriptSink(create_store(TRANSCRIPT_STORE))
+    await transcript_sink.start()
+
+    system_instruction = load_system_instruction()
+    print("System instruction: ", system_instruction)
+
+    if LLM_SERVICE != "fake":
+        await credential_provider.start()
+    # Blocks on model loading, keep it off the event loop
+    await asyncio.to_thread(SileroModelRegistry.get_session)
+    if schema_cache and LLM_SERVICE != "fake":
+        # Failures are logged, questions use the built-in schema until the database is readable
+        await asyncio.to_thread(schema_cache.get)
+
+    print(f"Warm-up finished in {(time.monotonic() - start) * 1000:.0f} ms", flush=True)
+
+def create_llm_service():
+    """
+    Creates the speech-to-speech LLM service selected by LLM_SERVICE.
+    """
+    if LLM_SERVICE == "fake":
+        return FakeSpeechLLMService(params=FakeSpeechLLMService.InputParams(
+            sample_rate=SAMPLE_RATE,
+            ttfb_secs=FAKE_LLM_TTFB_MS / 1000,
+            real_time_factor=FAKE_LLM_REAL_TIME_FACTOR,
+            response_secs=FAKE_LLM_RESPONSE_SECS,
+            tool_call_every=FAKE_LLM_TOOL_CALL_EVERY,
+            tool_timeout_secs=SQL_TOOL_TIMEOUT_SECS,
+        ))
+
+    # Snapshot of the cached credentials, setup never waits on STS
+    credentials = credential_provider.current()
+
+    # Configure AWS Nova Sonic parameters
+    params = Params()
+    params.input_sample_rate = SAMPLE_RATE
+    params.output_sample_rate = SAMPLE_RATE
+
+    return AWSNovaSonicLLMService(
+        secret_access_key=credentials.secret_access_key,
+        access_key_id=credentials.access_key_id,
+        session_token=credentials.session_token,
+        region='us-east-1',
+        voice_id="tiffany",  # Available voices: matthew, tiffany, amy
+        params=params
+    )
+
+async def setup(
+    websocket: WebSocket,
+    serializer_params: Optional[Base64AudioSerializer.InputParams] = None,
+    packet_ms: int = AUDIO_PACKET_MS,
+    accepted_at: Optional[float] = None,
+    session_id: Optional[str] = None,
+):
     """
     Sets up the audio processing pipeline and WebSocket connection.
+    Only session-scoped objects are created here, shared resources come from warm_up().
     
     Args:
         websocket: The WebSocket connection to set up
+        serializer_params: Audio wire format negotiated with the client
+        packet_ms: Duration of each outgoing bot audio packet in milliseconds
+        accepted_at: time.monotonic() of the WebSocket accept, used for latency logging
+        session_id: Identifier of the session assigned by the session manager
 
     Configures:
     - Audio transport with VAD and transcription
-    - AWS Nova Sonic LLM service
+    - AWS Nova Sonic LLM service (or the fake stand-in, see LLM_SERVICE)
     - Context management
     - Event handlers for client connection/disconnection
     """
-    update_dredentials()
-
-    prompt_text = None
-
-    with open("/home/pulkitaa/Desktop/AWS PACE/virtual-assistant/backend/app/prompt.txt") as f:
-        prompt_text = f.read()
+    if accepted_at is None:
+        accepted_at = time.monotonic()
+    if session_id is None:
+        session_id = f"session-{os.getpid()}-{id(websocket):x}"
 
-    system_instruction = prompt_text + f"\n{AWSNovaSonicLLMService.AWAIT_TRIGGER_ASSISTANT_RESPONSE_INSTRUCTION}"
-
-    print("System instruction: ", system_instruction)
+    tracer = TurnTracer(session_id, trace_writer, latency_summary)
 
     # Configure WebSocket transport with audio processing capabilities
-    transport = FastAPIWebsocketTransport(websocket, FastAPIWebsocketParams(
-        serializer=Base64AudioSerializer(),
+    transport = AudioWebsocketTransport(websocket, AudioWebsocketParams(
+        serializer=Base64AudioSerializer(serializer_params, on_audio_serialized=tracer.on_media_serialized),
         audio_in_enabled=True,
         audio_out_enabled=True,
+        audio_out_10ms_chunks=packet_ms // 10,
         add_wav_header=False,
-        vad_analyzer=SileroVADAnalyzer(
+        vad_analyzer=SharedSileroVADAnalyzer(
             params=VADParams(stop_secs=0.5)
         ),
-        transcription_enabled=True
+        transcription_enabled=True,
+        jitter_buffer_frame_ms=JITTER_BUFFER_FRAME_MS or None,
+        jitter_buffer_target_ms=JITTER_BUFFER_TARGET_MS,
+        jitter_buffer_max_ms=JITTER_BUFFER_MAX_MS,
     ))
 
-    # Configure AWS Nova Sonic parameters
-    params = Params()
-    params.input_sample_rate = SAMPLE_RATE
-    params.output_sample_rate = SAMPLE_RATE
-
     # Initialize LLM service
-    llm = AWSNovaSonicLLMService(
-        secret_access_key=os.environ["AWS_SECRET_ACCESS_KEY"],
-        access_key_id=os.environ["AWS_ACCESS_KEY_ID"],
-        session_token=os.environ["AWS_SESSION_TOKEN"],
-        region='us-east-1',
-        voice_id="tiffany",  # Available voices: matthew, tiffany, amy
-        params=params
-    )
+    llm = create_llm_service()
 
     # Register function for function calls
     # llm.register_function("get_balance", get_balance_from_api)
-    llm.register_function("generate_sql_query", generate_sql_query)
+    llm.register_function(
+        "generate_sql_query",
+        tracer.wrap_tool("generate_sql_query", tool_executor.handler("generate_sql_query")),
+    )
 
     # Set up conversation context
     context = OpenAILLMContext(
@@ -236,12 +456,18 @@ async def setup(websocket: WebSocket):
     pipeline = Pipeline(
         [
             transport.input(),  # Transport user input
+            tracer.processor("input"),  # Turn tracing: VAD stop starts a turn
             context_aggregator.user(),
             llm, 
+            tracer.processor("llm"),  # Turn tracing: first LLM output
+            AudioTailPadder(packet_ms=packet_ms),  # Pad the end of each turn to a full packet
             transport.output(),  # Transport bot output
+            FirstAudioTimer(accepted_at, session_id),  # Log accept-to-first-audio latency
+            tracer.processor("output"),  # Turn tracing: first bot audio out
             transcript.user(),
             transcript.assistant(), 
             context_aggregator.assistant(),
+            PipelineMetricsCollector(),  # Export Pipecat metrics frames on /metrics
         ]
     )
 
@@ -256,6 +482,8 @@ async def setup(websocket: WebSocket):
             audio_out_sample_rate=SAMPLE_RATE
         ),
     )
+    # Lets a drain cancel the session once its deadline has passed
+    session_manager.register_task(session_id, task)
 
     @transport.event_handler("on_client_connected")
     async def on_client_connected(transport, client):
@@ -272,21 +500,87 @@ async def setup(websocket: WebSocket):
 
     @transcript.event_handler("on_transcript_update")
     async def handle_transcript_update(processor, frame):
-        """Logs transcript updates with timestamps."""
+        """Queues transcript updates for the background transcript writer."""
         for message in frame.messages:
-            print(f"Transcript: [{message.timestamp}] {message.role}: {message.content}")
+            transcript_sink.put(TranscriptRecord(
+                session_id=session_id,
+                role=message.role,
+                content=message.content,
+                timestamp=message.timestamp,
+            ))
+
+    setup_secs = time.monotonic() - accepted_at
+    SESSION_SETUP_SECONDS.observe(setup_secs)
+    print(f"Session setup took {setup_secs * 1000:.0f} ms", flush=True)
 
     runner = PipelineRunner(handle_sigint=False, force_gc=True)
     await runner.run(task)
 
+    tracer.finish_turn()
+    logger.debug(f"Turn latency summary (ms):\n{latency_summary.format()}")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Warms up shared resources before the server starts accepting connections."""
+    await warm_up()
+    await session_manager.start()
+    yield
+    await session_manager.stop()
+    await credential_provider.stop()
+    tool_executor.shutdown()
+    bedrock_client.close()
+    if trace_writer:
+        trace_writer.close()
+    await transcript_sink.stop()
+
 # Initialize FastAPI application
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
+app.include_router(metrics_router)
+# Looked up by DrainingServer on SIGTERM
+app.state.session_manager = session_manager
 
 @app.get('/health')
 async def health(request: Request):
     """Health check endpoint."""
     return 'ok'
 
+@app.get('/ready')
+async def ready(request: Request):
+    """
+    Readiness endpoint reporting session capacity.
+    Returns 503 while the process would turn new sessions away.
+    """
+    capacity = session_manager.capacity()
+    return JSONResponse(capacity, status_code=200 if capacity["accepting"] else 503)
+
+@app.post('/admin/drain')
+async def drain(request: Request):
+    """
+    Starts draining this process and every other worker: readiness fails, new sessions are
+    rejected and active ones get DRAIN_TIMEOUT_SECS to finish before they are cancelled.
+    """
+    if request.headers.get('x-api-key') != API_KEY:
+        return JSONResponse({"error": "forbidden"}, status_code=403)
+    session_manager.request_drain(DRAIN_TIMEOUT_SECS)
+    return JSONResponse(session_manager.capacity(), status_code=202)
+
+@app.get('/admin/sql-stats')
+async def sql_stats(request: Request):
+    """
+    Reports how often questions were answered by SQL templates, how often generated SQL
+    came from the caches and how often result summaries needed the Claude fallback.
+    """
+    if request.headers.get('x-api-key') != API_KEY:
+        return JSONResponse({"error": "forbidden"}, status_code=403)
+    return JSONResponse({
+        "sql_cache": sql_cache.stats() if sql_cache else None,
+        "semantic_sql_cache": semantic_sql_cache.stats() if semantic_sql_cache else None,
+        "result_summaries": result_summarizer.stats() if result_summarizer else None,
+        "intent_router": intent_router.stats() if intent_router else None,
+        "schema_cache": schema_cache.stats() if schema_cache else None,
+        "schema_pruning": schema_pruner.stats() if schema_pruner else None,
+    })
+
 @app.websocket("/ws")
 async def websocket_endpoint(websocket: WebSocket):
     """
@@ -296,20 +590,40 @@ async def websocket_endpoint(websocket: WebSocket):
     protocol = websocket.headers.get('sec-websocket-protocol')
     print('protocol ', protocol)
 
+    # Clients offering BINARY_AUDIO_PROTOCOL next to the API key get raw PCM binary audio
+    serializer_params = Base64AudioSerializer.InputParams.from_subprotocols(protocol)
+    packet_ms = packet_ms_from_subprotocols(protocol, AUDIO_PACKET_MS)
+
     await websocket.accept(subprotocol=API_KEY)
-    await setup(websocket)
+    accepted_at = time.monotonic()
+
+    try:
+        async with session_manager.admit() as session_id:
+            SESSIONS.labels("admitted").inc()
+            await setup(websocket, serializer_params, packet_ms, accepted_at=accepted_at, session_id=session_id)
+    except AdmissionRejected as e:
+        SESSIONS.labels("rejected").inc()
+        # Over capacity, tell the client to retry (against another task)
+        await websocket.close(code=TRY_AGAIN_LATER, reason=e.reason)
 
 # Configure and start uvicorn server
-server = uvicorn.Server(uvicorn.Config(
+server = DrainingServer(uvicorn.Config(
     app=app,
     host='0.0.0.0',
     port=8000,
     log_level="error"
-))
+), drain_timeout_secs=DRAIN_TIMEOUT_SECS)
 
 async def serve():
     """Starts the FastAPI server."""
     await server.serve()
 
-# Run the server
-asyncio.run(serve())
+# Run the server, WEB_CONCURRENCY > 1 starts one worker process per session shard
+if __name__ == "__main__":
+    if WEB_CONCURRENCY > 1:
+        WorkerSupervisor(
+            "main:app", host='0.0.0.0', port=8000, workers=WEB_CONCURRENCY, drain_timeout_secs=DRAIN_TIMEOUT_SECS
+        ).run()
+    else:
+        asyncio.run(serve())
+
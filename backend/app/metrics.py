@@ -0,0 +1,449 @@
+# // Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# // SPDX-License-Identifier: MIT-0
+
+"""
+Metrics
+
+Small in-process counters, gauges and histograms served in the Prometheus text format on
+GET /metrics. Recording is meant for the audio hot path: a labelled child is resolved once and
+kept, after which an update is one uncontended lock and an addition.
+
+Every worker process records its own metrics. When the app runs in several workers (see
+worker_supervisor.py), each worker writes a snapshot of its registry to a directory shared
+with the others every few seconds, and a scrape of any worker returns the samples of all of
+them with a `worker` label holding the worker's pid. Sum over the label (e.g.
+`sum without (worker) (...)`) for service-wide values; samples of other workers can be up to
+SNAPSHOT_INTERVAL_SECS old.
+
+The metrics of the voice backend are defined at the bottom of this module. `PipelineMetricsCollector`
+turns Pipecat's MetricsFrames (TTFB, processing time, token usage) into metrics.
+"""
+
+import glob
+import json
+import os
+import re
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from fastapi import APIRouter, Response
+from loguru import logger
+
+from pipecat.frames.frames import Frame, MetricsFrame
+from pipecat.metrics.metrics import LLMUsageMetricsData, ProcessingMetricsData, TTFBMetricsData
+from pipecat.processors.frame_processor import FrameDirection, FrameProcessor
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+FAST_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05)
+SNAPSHOT_INTERVAL_SECS = 5.0
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = list(zip(names, values))
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(str(value))}"' for name, value in pairs) + "}"
+
+
+def _with_label(line: str, label: str) -> str:
+    # name{a="b"} 1 -> name{label,a="b"} 1, and name 1 -> name{label} 1
+    end = line.find(" ")
+    brace = line.find("{", 0, end)
+    if brace >= 0:
+        return f"{line[:brace + 1]}{label},{line[brace + 1:]}"
+    return f"{line[:end]}{{{label}}}{line[end:]}"
+
+
+def snapshot_path(directory: str, worker: str) -> str:
+    """Returns the file a worker writes its metrics snapshot to."""
+    return os.path.join(directory, f"{worker}.json")
+
+
+class _Metric:
+    """Base class of a metric family with optional labels."""
+
+    type_name = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (), registry=None):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], object] = {}
+        self._lock = threading.Lock()
+        if not self.labelnames:
+            self._children[()] = self._create_child()
+        (registry if registry is not None else REGISTRY).register(self)
+
+    def _create_child(self):
+        raise NotImplementedError
+
+    def labels(self, *values: str):
+        """Returns the child for the label values, keep it to skip the lookup on hot paths."""
+        if len(values) != len(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}")
+        key = tuple(str(value) for value in values)
+        child = self._children.get(key)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(key, self._create_child())
+        return child
+
+    def _unlabelled(self):
+        if self.labelnames:
+            raise ValueError(f"{self.name} has labels, use labels() first")
+        return self._children[()]
+
+    def collect(self) -> List[str]:
+        """Returns the exposition lines of this family."""
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type_name}"]
+        for key, child in list(self._children.items()):
+            lines.extend(self._collect_child(key, child))
+        return lines
+
+    def _collect_child(self, key, child) -> List[str]:
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(child.get())}"]
+
+
+class _CounterChild:
+    def __init__(self):
+        self._value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0):
+        with self._lock:
+            self._value += amount
+
+    def get(self) -> float:
+        return self._value
+
+
+class Counter(_Metric):
+    """Monotonically increasing counter."""
+
+    type_name = "counter"
+
+    def _create_child(self):
+        return _CounterChild()
+
+    def inc(self, amount: float = 1.0):
+        self._unlabelled().inc(amount)
+
+
+class _GaugeChild:
+    def __init__(self):
+        self._value = 0.0
+        self._function: Optional[Callable[[], float]] = None
+        self._lock = threading.Lock()
+
+    def set(self, value: float):
+        self._value = value
+
+    def inc(self, amount: float = 1.0):
+        with self._lock:
+            self._value += amount
+
+    def dec(self, amount: float = 1.0):
+        self.inc(-amount)
+
+    def set_function(self, function: Callable[[], float]):
+        """Reads the value from `function` at scrape time."""
+        self._function = function
+
+    def get(self) -> float:
+        return self._function() if self._function else self._value
+
+
+class Gauge(_Metric):
+    """Value that can go up and down."""
+
+    type_name = "gauge"
+
+    def _create_child(self):
+        return _GaugeChild()
+
+    def set(self, value: float):
+        self._unlabelled().set(value)
+
+    def inc(self, amount: float = 1.0):
+        self._unlabelled().inc(amount)
+
+    def dec(self, amount: float = 1.0):
+        self._unlabelled().dec(amount)
+
+    def set_function(self, function: Callable[[], float]):
+        self._unlabelled().set_function(function)
+
+
+class _HistogramChild:
+    def __init__(self, upper_bounds: Tuple[float, ...]):
+        self._upper_bounds = upper_bounds
+        # Per-bucket counts, made cumulative at scrape time
+        self._counts = [0] * (len(upper_bounds) + 1)
+        self._sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        index = bisect_left(self._upper_bounds, value)
+        with self._lock:
+            self._counts[index] += 1
+            self._sum += value
+
+    @contextmanager
+    def time(self):
+        """Observes the duration of the block in seconds."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start)
+
+    def snapshot(self) -> Tuple[List[int], float]:
+        with self._lock:
+            return list(self._counts), self._sum
+
+
+class Histogram(_Metric):
+    """Distribution of observed values in fixed buckets."""
+
+    type_name = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS,
+        registry=None,
+    ):
+        self.upper_bounds = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames, registry)
+
+    def _create_child(self):
+        return _HistogramChild(self.upper_bounds)
+
+    def observe(self, value: float):
+        self._unlabelled().observe(value)
+
+    def time(self):
+        return self._unlabelled().time()
+
+    def _collect_child(self, key, child) -> List[str]:
+        counts, total = child.snapshot()
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.upper_bounds + (float("inf"),), counts):
+            cumulative += count
+            labels = _format_labels(self.labelnames, key, ("le", _format_value(bound)))
+            lines.append(f"{self.name}_bucket{labels} {cumulative}")
+        labels = _format_labels(self.labelnames, key)
+        lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+        lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    """Collection of metric families rendered together."""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._directory: Optional[str] = None
+        self._worker = ""
+
+    def register(self, metric: _Metric):
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} is already registered")
+        self._metrics[metric.name] = metric
+
+    def share(self, directory: str, worker: str, interval_secs: Optional[float] = SNAPSHOT_INTERVAL_SECS):
+        """Shares this registry with the other worker processes using `directory`.
+
+        Args:
+            directory: Directory all workers write their snapshots to
+            worker: Value of the worker label of this process's samples
+            interval_secs: How often the snapshot is rewritten, None only writes it on scrapes
+        """
+        self._directory = directory
+        self._worker = worker
+        self.write_snapshot()
+        if interval_secs:
+            threading.Thread(
+                target=self._write_snapshots, args=(interval_secs,), name="metrics-snapshot", daemon=True
+            ).start()
+
+    def _write_snapshots(self, interval_secs: float):
+        while True:
+            time.sleep(interval_secs)
+            try:
+                self.write_snapshot()
+            except OSError as e:
+                # The supervisor removed the directory while shutting down
+                if not os.path.isdir(self._directory):
+                    return
+                logger.warning(f"Failed to write metrics snapshot: {e}")
+
+    def _families(self, label: Optional[str] = None) -> List[list]:
+        families = []
+        for metric in list(self._metrics.values()):
+            lines = metric.collect()
+            samples = lines[2:] if label is None else [_with_label(line, label) for line in lines[2:]]
+            families.append([metric.name, lines[:2], samples])
+        return families
+
+    def write_snapshot(self):
+        """Writes the current values of this worker's metrics to the shared directory."""
+        path = snapshot_path(self._directory, self._worker)
+        with open(path + ".tmp", "w") as f:
+            json.dump(self._families(f'worker="{_escape(self._worker)}"'), f)
+        os.replace(path + ".tmp", path)
+
+    def _read_snapshots(self) -> List[List[list]]:
+        snapshots = []
+        for path in sorted(glob.glob(os.path.join(self._directory, "*.json"))):
+            try:
+                with open(path) as f:
+                    snapshots.append(json.load(f))
+            except (OSError, ValueError):
+                # The worker exited and its snapshot was removed
+                continue
+        return snapshots
+
+    def render(self) -> str:
+        """Returns all metrics in the Prometheus text exposition format."""
+        if self._directory is None:
+            snapshots = [self._families()]
+        else:
+            # Scrapes see this worker's latest values and the last snapshot of the others
+            self.write_snapshot()
+            snapshots = self._read_snapshots()
+
+        # Families in registration order, each with the samples of every worker
+        merged: Dict[str, Tuple[List[str], List[str]]] = {}
+        for snapshot in snapshots:
+            for name, header, samples in snapshot:
+                merged.setdefault(name, (header, []))[1].extend(samples)
+        lines = []
+        for header, samples in merged.values():
+            lines.extend(header)
+            lines.extend(samples)
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+metrics_router = APIRouter()
+
+
+@metrics_router.get("/metrics")
+async def metrics():
+    """Prometheus scrape endpoint."""
+    return Response(REGISTRY.render(), headers={"Content-Type": CONTENT_TYPE})
+
+
+# Metrics of the voice backend
+
+ACTIVE_SESSIONS = Gauge("voice_active_sessions", "WebSocket sessions currently running")
+DRAINING = Gauge("voice_draining", "1 while the process is draining sessions before shutdown")
+SESSIONS = Counter("voice_sessions_total", "WebSocket sessions by admission outcome", ["outcome"])
+SESSION_SETUP_SECONDS = Histogram("voice_session_setup_seconds", "Time from WebSocket accept to pipeline start")
+FIRST_AUDIO_SECONDS = Histogram("voice_first_audio_seconds", "Time from WebSocket accept to the first bot audio")
+SERIALIZER_FRAMES = Counter("voice_serializer_frames_total", "Audio frames through the serializer", ["direction"])
+SERIALIZER_BYTES = Counter("voice_serializer_bytes_total", "Wire bytes through the serializer", ["direction"])
+JITTER_BUFFER_UNDERRUNS = Counter("voice_jitter_buffer_underruns_total", "Times an inbound jitter buffer ran dry")
+JITTER_BUFFER_OVERRUNS = Counter(
+    "voice_jitter_buffer_overruns_total", "Inbound audio frames dropped because a jitter buffer was full"
+)
+JITTER_BUFFER_DEPTH_SECONDS = Histogram(
+    "voice_jitter_buffer_depth_seconds", "Inbound jitter buffer depth when a frame is released",
+    buckets=(0.0, 0.02, 0.04, 0.06, 0.08, 0.1, 0.15, 0.2, 0.3),
+)
+VAD_INFERENCE_SECONDS = Histogram("voice_vad_inference_seconds", "Silero VAD inference time", buckets=FAST_BUCKETS)
+BEDROCK_INVOKE_SECONDS = Histogram(
+    "voice_bedrock_invoke_seconds", "Bedrock invoke_model latency", ["operation", "outcome"]
+)
+BEDROCK_RETRIES = Counter("voice_bedrock_retries_total", "Bedrock calls retried by error", ["operation", "error"])
+POSTGRES_QUERY_SECONDS = Histogram("voice_postgres_query_seconds", "Postgres query latency", ["outcome"])
+SQL_CACHE_LOOKUPS = Counter("voice_sql_cache_lookups_total", "Generated SQL cache lookups by result", ["result"])
+SQL_CACHE_ENTRIES = Gauge("voice_sql_cache_entries", "Entries in the generated SQL cache")
+SQL_SEMANTIC_CACHE_LOOKUPS = Counter(
+    "voice_sql_semantic_cache_lookups_total", "Semantic SQL cache lookups by result", ["result"]
+)
+SQL_SEMANTIC_CACHE_SECONDS = Histogram(
+    "voice_sql_semantic_cache_seconds", "Semantic SQL cache lookup time", buckets=FAST_BUCKETS
+)
+SQL_SEMANTIC_CACHE_ENTRIES = Gauge("voice_sql_semantic_cache_entries", "Entries in the semantic SQL cache")
+RESULT_SUMMARIES = Counter(
+    "voice_result_summaries_total", "Query result summaries by result shape and path (local or llm)", ["shape", "path"]
+)
+SCHEMA_CACHE_CHECKS = Counter(
+    "voice_schema_cache_checks_total", "Live schema fingerprint checks by result (unchanged, changed, error)", ["result"]
+)
+SCHEMA_PRUNING = Counter(
+    "voice_schema_pruning_total", "SQL prompts by schema pruning result (pruned, full schema reason, retried)", ["result"]
+)
+SCHEMA_PROMPT_TOKENS_SAVED = Counter(
+    "voice_schema_prompt_tokens_saved_total", "Estimated SQL prompt tokens saved by schema pruning"
+)
+INTENT_ROUTES = Counter(
+    "voice_intent_routes_total", "Questions answered by SQL template intent, llm for generated SQL", ["intent"]
+)
+TOOL_CALL_SECONDS = Histogram("voice_tool_call_seconds", "LLM tool call duration", ["tool", "outcome"])
+PIPELINE_TTFB_SECONDS = Histogram("voice_pipeline_ttfb_seconds", "Time to first byte per processor", ["processor"])
+PIPELINE_PROCESSING_SECONDS = Histogram(
+    "voice_pipeline_processing_seconds", "Processing time per processor", ["processor"]
+)
+LLM_TOKENS = Counter("voice_llm_tokens_total", "LLM tokens used", ["processor", "kind"])
+
+_INSTANCE_SUFFIX = re.compile(r"#\d+$")
+
+
+def processor_label(name: str) -> str:
+    """Strips the per-instance suffix (e.g. "#12") so labels don't grow with every session."""
+    return _INSTANCE_SUFFIX.sub("", name)
+
+
+class PipelineMetricsCollector(FrameProcessor):
+    """Records the MetricsFrames Pipecat emits when metrics are enabled on the PipelineTask.
+
+    Place it at the end of the pipeline; it sees the metrics of every processor before it.
+    """
+
+    async def process_frame(self, frame: Frame, direction: FrameDirection):
+        """Records MetricsFrames and passes every frame through.
+
+        Args:
+            frame: The frame to process
+            direction: The direction of frame flow in the pipeline
+        """
+        await super().process_frame(frame, direction)
+
+        if isinstance(frame, MetricsFrame):
+            for data in frame.data:
+                processor = processor_label(data.processor)
+                if isinstance(data, TTFBMetricsData):
+                    PIPELINE_TTFB_SECONDS.labels(processor).observe(data.value)
+                elif isinstance(data, ProcessingMetricsData):
+                    PIPELINE_PROCESSING_SECONDS.labels(processor).observe(data.value)
+                elif isinstance(data, LLMUsageMetricsData):
+                    LLM_TOKENS.labels(processor, "prompt").inc(data.value.prompt_tokens)
+                    LLM_TOKENS.labels(processor, "completion").inc(data.value.completion_tokens)
+
+        await self.push_frame(frame, direction)
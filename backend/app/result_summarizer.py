@@ -0,0 +1,252 @@
+# // Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# // SPDX-License-Identifier: MIT-0
+
+"""
+Result Summarizer
+
+Turns SQL query results into the one spoken sentence the LLM tool returns. Most questions
+produce results that templates describe as well as a model does:
+
+- empty: "I didn't find any matching orders."
+- scalar: "There are 12 matching orders." / "The total amount is $1,520.75."
+- single row: "The first name is Jane, the last name is Doe and the email is jane@example.com."
+- small list: "I found 3 customers: Jane Doe, John Smith and Ana Lee."
+- grouped counts: "By status: pending 12, completed 30 and cancelled 4."
+- writes (INSERT, UPDATE, DELETE): "Done, the database was updated."
+
+Those are answered locally, saving the second Bedrock round trip per tool call. Anything
+else (wide rows, long lists, nested values) goes to the LLM fallback, and the share of
+fallbacks is counted per result shape. Sentences naming what was found take the noun from the
+query's FROM table, so queries where that noun would be wrong also go to the fallback: the
+first FROM is inside a function call (EXTRACT(MONTH FROM order_date)), or a count isn't of the
+table's rows (COUNT(DISTINCT customer_id) FROM orders).
+"""
+
+import datetime
+import re
+import threading
+from decimal import Decimal
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from metrics import RESULT_SUMMARIES
+
+# Largest results described locally
+MAX_LIST_ROWS = 5
+MAX_LIST_COLUMNS = 3
+MAX_ROW_COLUMNS = 6
+MAX_GROUPS = 10
+
+MONEY_WORDS = ("amount", "price", "revenue", "spent", "paid", "cost", "sales", "balance")
+COUNT_WORDS = ("count", "number", "how many", "total orders", "total customers", "total payments")
+AGGREGATE_LABELS = {"sum": "total", "avg": "average", "max": "highest", "min": "lowest", "count": "count"}
+
+_AGGREGATE = re.compile(r"\b(sum|avg|max|min|count)\s*\(\s*(?:distinct\s+)?(?:\w+\.)?(\w+|\*)\s*\)", re.IGNORECASE)
+_FROM_TABLE = re.compile(r"\bfrom\s+(?:\w+\.)?([a-z_]\w*)", re.IGNORECASE)
+_WRITE = re.compile(r"^\s*(insert|update|delete)\b", re.IGNORECASE)
+# Column names Postgres makes up for unnamed expressions
+_GENERIC_COLUMNS = {"?column?", "sum", "avg", "max", "min", "count", "coalesce", "round", "case"}
+
+
+def humanize(column: str) -> str:
+    """Turns a column name into words: "total_amount" -> "total amount"."""
+    return column.replace("_", " ").strip().lower()
+
+
+def singular(noun: str) -> str:
+    if noun.endswith("ies"):
+        return noun[:-3] + "y"
+    if noun.endswith("s") and not noun.endswith("ss"):
+        return noun[:-1]
+    return noun
+
+
+def plural(noun: str, count: int) -> str:
+    noun = singular(noun)
+    if count == 1:
+        return noun
+    if noun.endswith("y") and noun[-2:-1] not in "aeiou":
+        return noun[:-1] + "ies"
+    return noun + "s"
+
+
+def join_words(items: Sequence[str]) -> str:
+    """Joins items as in a sentence: "a", "a and b", "a, b and c"."""
+    if len(items) < 2:
+        return "".join(items)
+    return ", ".join(items[:-1]) + " and " + items[-1]
+
+
+def format_value(value: Any, column: str = "") -> str:
+    """Formats a result value for speech, dollars for money-like columns."""
+    if value is None:
+        return "none"
+    if isinstance(value, bool):
+        return "yes" if value else "no"
+    if isinstance(value, datetime.datetime):
+        text = f"{value:%B} {value.day}, {value.year}"
+        return text if (value.hour, value.minute) == (0, 0) else f"{text} at {value:%H:%M}"
+    if isinstance(value, datetime.date):
+        return f"{value:%B} {value.day}, {value.year}"
+    if isinstance(value, (int, float, Decimal)):
+        if any(word in column.lower() for word in MONEY_WORDS):
+            return f"${value:,.2f}"
+        if value == int(value):
+            return f"{int(value):,}"
+        return f"{float(value):,.2f}"
+    return str(value)
+
+
+def _is_number(value: Any) -> bool:
+    return isinstance(value, (int, float, Decimal)) and not isinstance(value, bool)
+
+
+def _is_scalar(value: Any) -> bool:
+    return value is None or isinstance(value, (str, int, float, Decimal, datetime.date, bool))
+
+
+class ResultSummarizer:
+    """Summarizes query results with templates, falling back to the LLM for complex ones."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.local: Dict[str, int] = {}
+        self.fallbacks: Dict[str, int] = {}
+
+    def summarize(
+        self,
+        question: str,
+        query: str,
+        rows: List[Dict[str, Any]],
+        fallback: Callable[[], str],
+    ) -> str:
+        """Returns a one sentence summary of a query result.
+
+        Args:
+            question: The question the query answers
+            query: The SQL query that was run
+            rows: Query result rows
+            fallback: Blocking function asking the LLM for a summary, for results the
+                templates don't cover
+
+        Returns:
+            The summary sentence
+        """
+        shape, summary = self.describe(question, query, rows)
+        with self._lock:
+            counts = self.local if summary is not None else self.fallbacks
+            counts[shape] = counts.get(shape, 0) + 1
+        RESULT_SUMMARIES.labels(shape, "local" if summary is not None else "llm").inc()
+        return summary if summary is not None else fallback()
+
+    def describe(self, question: str, query: str, rows: List[Dict[str, Any]]) -> Tuple[str, Optional[str]]:
+        """Returns the shape of a result and its summary, None when it needs the LLM."""
+        if _WRITE.match(query):
+            # Writes return no rows, which doesn't mean nothing was found
+            return "write", "Done, the database was updated."
+        table = self._table(query)
+        subject = humanize(table) if table else None
+        if not rows:
+            return "empty", f"I didn't find any matching {subject or 'results'}."
+
+        columns = list(rows[0].keys())
+        if not all(_is_scalar(value) for row in rows for value in row.values()):
+            return "complex", None
+
+        if len(rows) == 1 and len(columns) == 1:
+            return "scalar", self._scalar(question, query, table, columns[0], rows[0][columns[0]])
+        if self._is_grouped_count(rows, columns):
+            return "grouped", self._grouped(columns, rows)
+        if len(rows) == 1:
+            if len(columns) > MAX_ROW_COLUMNS:
+                return "single_row", None
+            return "single_row", self._row(query, rows[0])
+        if len(rows) <= MAX_LIST_ROWS and len(columns) <= MAX_LIST_COLUMNS:
+            return "list", self._list(subject, columns, rows) if subject else None
+        return "complex", None
+
+    @staticmethod
+    def _table(query: str) -> Optional[str]:
+        """Returns the table of the query's first FROM, None if that FROM is inside parentheses."""
+        match = _FROM_TABLE.search(query)
+        if not match:
+            return None
+        before = query[:match.start()]
+        # EXTRACT(MONTH FROM order_date) or a subquery, not the table the rows come from
+        if before.count("(") > before.count(")"):
+            return None
+        return match.group(1)
+
+    def _label(self, query: str, column: str) -> str:
+        """Names a column, describing aggregates Postgres left unnamed: SUM(amount) -> "total amount"."""
+        if column.lower() not in _GENERIC_COLUMNS:
+            return humanize(column)
+        match = _AGGREGATE.search(query)
+        if not match:
+            return "result"
+        function, argument = match.group(1).lower(), match.group(2)
+        label = AGGREGATE_LABELS[function]
+        return label if argument == "*" else f"{label} {humanize(argument)}"
+
+    def _scalar(self, question: str, query: str, table: Optional[str], column: str, value: Any) -> Optional[str]:
+        label = self._label(query, column)
+        counted = "count" in label.split() or label.startswith("number of") or (
+            label == "result" and any(word in question.lower() for word in COUNT_WORDS)
+        )
+        if _is_number(value) and counted:
+            if table is None or not self._counts_rows(query, table):
+                return None
+            count = int(value)
+            verb = "is" if count == 1 else "are"
+            return f"There {verb} {format_value(count)} matching {plural(humanize(table), count)}."
+        return f"The {label} is {format_value(value, label)}."
+
+    @staticmethod
+    def _counts_rows(query: str, table: str) -> bool:
+        """Whether the query's COUNT counts rows of the table: COUNT(*) or COUNT of its key."""
+        for match in _AGGREGATE.finditer(query):
+            if match.group(1).lower() != "count":
+                continue
+            # COUNT(DISTINCT customer_id) FROM orders counts customers, not orders
+            distinct = "distinct" in match.group(0).lower()
+            argument = match.group(2).lower()
+            return argument == "*" or (not distinct and argument in ("id", f"{singular(table.lower())}_id"))
+        return True
+
+    @staticmethod
+    def _is_grouped_count(rows: List[Dict[str, Any]], columns: List[str]) -> bool:
+        # A label column and a number per group, like GROUP BY status with COUNT(*)
+        return (
+            len(columns) == 2
+            and 1 < len(rows) <= MAX_GROUPS
+            and all(isinstance(row[columns[0]], str) and _is_number(row[columns[1]]) for row in rows)
+        )
+
+    def _grouped(self, columns: List[str], rows: List[Dict[str, Any]]) -> str:
+        group, value = columns
+        parts = [f"{humanize(str(row[group]))} {format_value(row[value], value)}" for row in rows]
+        return f"By {humanize(group)}: {join_words(parts)}."
+
+    def _row(self, query: str, row: Dict[str, Any]) -> str:
+        parts = [f"the {self._label(query, column)} is {format_value(value, column)}" for column, value in row.items()]
+        sentence = join_words(parts)
+        return sentence[0].upper() + sentence[1:] + "."
+
+    def _list(self, subject: str, columns: List[str], rows: List[Dict[str, Any]]) -> str:
+        items = []
+        for row in rows:
+            values = [format_value(row[column], column) for column in columns]
+            # Names read better together: "Jane Doe" rather than "Jane, Doe"
+            if len(columns) >= 2 and columns[0].endswith("first_name") and columns[1].endswith("last_name"):
+                values[:2] = [f"{values[0]} {values[1]}"]
+            items.append(values[0] if len(values) == 1 else f"{values[0]} ({', '.join(values[1:])})")
+        return f"I found {len(rows)} {plural(subject, len(rows))}: {join_words(items)}."
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            local = sum(self.local.values())
+            fallbacks = sum(self.fallbacks.values())
+            return {
+                "local": dict(self.local),
+                "fallbacks": dict(self.fallbacks),
+                "fallback_rate": round(fallbacks / (local + fallbacks), 3) if local + fallbacks else 0.0,
+            }
@@ -0,0 +1,334 @@
+# // Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# // SPDX-License-Identifier: MIT-0
+
+"""
+Schema Cache
+
+Keeps the schema description of the SQL generation prompt in sync with the live database.
+
+The database is introspected once (information_schema columns, keys, foreign keys, CHECK and
+enum values, row count estimates) and rendered into the compact "1. ORDERS Table:" format the
+prompt, the semantic cache and the intent router understand. After that, a call is a string
+lookup. At most every `check_interval_secs` one cheap query hashes the catalog entries the
+rendering depends on, and only a changed fingerprint introspects again.
+
+Value hints come from CHECK (col IN (...)) constraints, enum types and, for text columns
+without either, from planner statistics when ANALYZE saw only a few distinct values.
+"""
+
+import re
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from loguru import logger
+
+from metrics import SCHEMA_CACHE_CHECKS
+
+DEFAULT_CHECK_INTERVAL_SECS = 30.0
+# Columns with more distinct values than this get no value hint
+MAX_VALUE_HINTS = 10
+
+# One row, changes whenever a table, column, type, constraint or enum label does
+FINGERPRINT_QUERY = """
+    SELECT md5(coalesce(string_agg(entry, ',' ORDER BY entry), '')) AS fingerprint FROM (
+        SELECT c.relname || '.' || a.attname || ':' || format_type(a.atttypid, a.atttypmod) AS entry
+        FROM pg_attribute a
+        JOIN pg_class c ON c.oid = a.attrelid
+        JOIN pg_namespace n ON n.oid = c.relnamespace
+        WHERE n.nspname = %(schema)s AND c.relkind IN ('r', 'p') AND a.attnum > 0 AND NOT a.attisdropped
+        UNION ALL
+        SELECT c.relname || ':' || con.conname || ':' || pg_get_constraintdef(con.oid)
+        FROM pg_constraint con
+        JOIN pg_class c ON c.oid = con.conrelid
+        JOIN pg_namespace n ON n.oid = c.relnamespace
+        WHERE n.nspname = %(schema)s
+        UNION ALL
+        SELECT t.typname || ':' || e.enumlabel
+        FROM pg_enum e
+        JOIN pg_type t ON t.oid = e.enumtypid
+        JOIN pg_namespace n ON n.oid = t.typnamespace
+        WHERE n.nspname = %(schema)s
+    ) entries
+"""
+
+COLUMNS_QUERY = """
+    SELECT c.table_name, c.column_name, c.data_type, c.udt_name, c.character_maximum_length,
+           c.numeric_precision, c.numeric_scale, c.column_default
+    FROM information_schema.columns c
+    JOIN information_schema.tables t ON t.table_schema = c.table_schema AND t.table_name = c.table_name
+    WHERE c.table_schema = %(schema)s AND t.table_type = 'BASE TABLE'
+    ORDER BY c.table_name, c.ordinal_position
+"""
+
+CONSTRAINTS_QUERY = """
+    SELECT c.relname AS table_name, con.contype AS kind, pg_get_constraintdef(con.oid) AS definition,
+           ARRAY(
+               SELECT a.attname::text FROM pg_attribute a
+               WHERE a.attrelid = con.conrelid AND a.attnum = ANY(con.conkey)
+           ) AS columns,
+           ref.relname::text AS referenced_table
+    FROM pg_constraint con
+    JOIN pg_class c ON c.oid = con.conrelid
+    JOIN pg_namespace n ON n.oid = c.relnamespace
+    LEFT JOIN pg_class ref ON ref.oid = con.confrelid
+    WHERE n.nspname = %(schema)s AND con.contype IN ('p', 'u', 'f', 'c')
+    ORDER BY c.relname, con.conname
+"""
+
+ENUMS_QUERY = """
+    SELECT t.typname::text AS type_name, e.enumlabel AS label
+    FROM pg_enum e
+    JOIN pg_type t ON t.oid = e.enumtypid
+    JOIN pg_namespace n ON n.oid = t.typnamespace
+    WHERE n.nspname = %(schema)s
+    ORDER BY t.typname, e.enumsortorder
+"""
+
+ROW_ESTIMATES_QUERY = """
+    SELECT c.relname::text AS table_name, c.reltuples::bigint AS row_estimate
+    FROM pg_class c
+    JOIN pg_namespace n ON n.oid = c.relnamespace
+    WHERE n.nspname = %(schema)s AND c.relkind IN ('r', 'p')
+"""
+
+# Positive n_distinct is a count, the most common values then list all of them
+VALUE_STATS_QUERY = """
+    SELECT tablename::text AS table_name, attname::text AS column_name,
+           most_common_vals::text::text[] AS common_values, n_distinct
+    FROM pg_stats
+    WHERE schemaname = %(schema)s AND n_distinct > 0 AND n_distinct <= %(max_values)s
+"""
+
+_CHECK_VALUES = re.compile(r"=\s*ANY\b|\bIN\s*\(", re.IGNORECASE)
+_STRING_LITERAL = re.compile(r"'((?:[^']|'')*)'")
+_TYPE_NAMES = {
+    "character varying": "VARCHAR",
+    "character": "CHAR",
+    "timestamp without time zone": "TIMESTAMP",
+    "timestamp with time zone": "TIMESTAMPTZ",
+    "time without time zone": "TIME",
+    "double precision": "DOUBLE PRECISION",
+    "numeric": "DECIMAL",
+}
+
+
+@dataclass
+class Column:
+    name: str
+    type: str
+    primary_key: bool = False
+    unique: bool = False
+    references: Optional[str] = None
+    values: Tuple[str, ...] = ()
+
+
+@dataclass
+class Table:
+    name: str
+    columns: List[Column] = field(default_factory=list)
+    row_estimate: int = -1
+    # Keys over more than one column
+    composite_keys: List[str] = field(default_factory=list)
+
+    def column(self, name: str) -> Optional[Column]:
+        return next((column for column in self.columns if column.name == name), None)
+
+
+def column_type(row: Dict[str, Any]) -> str:
+    """Renders an information_schema.columns row's type the way the prompt spells it."""
+    data_type = row["data_type"]
+    if data_type == "USER-DEFINED":
+        return row["udt_name"].upper()
+    if data_type == "ARRAY":
+        return row["udt_name"].lstrip("_").upper() + "[]"
+    name = _TYPE_NAMES.get(data_type, data_type.upper())
+    if data_type in ("integer", "bigint") and str(row.get("column_default") or "").startswith("nextval("):
+        return "SERIAL" if data_type == "integer" else "BIGSERIAL"
+    if row.get("character_maximum_length"):
+        return f"{name}({row['character_maximum_length']})"
+    if data_type == "numeric" and row.get("numeric_precision"):
+        return f"{name}({row['numeric_precision']},{row.get('numeric_scale') or 0})"
+    return name
+
+
+def check_values(definition: str) -> Tuple[str, ...]:
+    """Returns the allowed values of a CHECK (col IN ('a', 'b')) constraint, () for other checks."""
+    if not _CHECK_VALUES.search(definition):
+        return ()
+    return tuple(value.replace("''", "'") for value in _STRING_LITERAL.findall(definition))
+
+
+def round_estimate(rows: int) -> str:
+    """Rounds a row estimate to two significant digits, "~12,000"."""
+    if rows < 100:
+        return f"~{rows}"
+    digits = len(str(rows)) - 2
+    return f"~{round(rows, -digits):,}"
+
+
+def _is_text(type_name: str) -> bool:
+    return type_name.startswith(("VARCHAR", "CHAR", "TEXT"))
+
+
+def introspect(db: Any, schema_name: str = "public", max_values: int = MAX_VALUE_HINTS) -> List[Table]:
+    """Reads the tables of a database schema.
+
+    Args:
+        db: Database with execute_query(query, params), like PostgresDatabase
+        schema_name: Postgres schema to describe
+        max_values: Most distinct values a column can have to get a value hint from statistics
+    """
+    params = {"schema": schema_name, "max_values": max_values}
+    tables: Dict[str, Table] = {}
+    for row in db.execute_query(COLUMNS_QUERY, params):
+        table = tables.setdefault(row["table_name"], Table(row["table_name"]))
+        table.columns.append(Column(row["column_name"], column_type(row)))
+
+    enums: Dict[str, List[str]] = {}
+    for row in db.execute_query(ENUMS_QUERY, params):
+        enums.setdefault(row["type_name"].upper(), []).append(row["label"])
+    for table in tables.values():
+        for column in table.columns:
+            if column.type in enums:
+                column.values = tuple(enums[column.type])
+
+    for row in db.execute_query(CONSTRAINTS_QUERY, params):
+        table = tables.get(row["table_name"])
+        columns = [table.column(name) for name in row["columns"]] if table else []
+        if not columns or None in columns:
+            continue
+        kind = row["kind"]
+        if kind in ("p", "u") and len(columns) > 1:
+            label = "primary key" if kind == "p" else "unique"
+            table.composite_keys.append(f"{label} ({', '.join(column.name for column in columns)})")
+        elif kind == "p":
+            columns[0].primary_key = True
+        elif kind == "u":
+            columns[0].unique = True
+        elif kind == "f" and len(columns) == 1:
+            columns[0].references = row["referenced_table"]
+        elif kind == "c" and len(columns) == 1:
+            columns[0].values = columns[0].values or check_values(row["definition"])
+
+    for row in db.execute_query(ROW_ESTIMATES_QUERY, params):
+        if row["table_name"] in tables:
+            tables[row["table_name"]].row_estimate = int(row["row_estimate"])
+
+    for row in db.execute_query(VALUE_STATS_QUERY, params):
+        table = tables.get(row["table_name"])
+        column = table.column(row["column_name"]) if table else None
+        values = row["common_values"] or []
+        # Statistics are a sample, only trust them when they saw every distinct value
+        if column and not column.values and len(values) == int(row["n_distinct"]) and _is_text(column.type):
+            column.values = tuple(values)
+    return sorted(tables.values(), key=lambda table: table.name)
+
+
+def render_schema(tables: List[Table]) -> str:
+    """Renders tables in the schema format of the SQL generation prompt."""
+    lines = ["Database Schema:"]
+    for number, table in enumerate(tables, start=1):
+        rows = f" {round_estimate(table.row_estimate)} rows" if table.row_estimate >= 0 else ""
+        lines.append(f"{number}. {table.name.upper()} Table:{rows}")
+        for column in table.columns:
+            details = column.type
+            if column.primary_key:
+                details += " PRIMARY KEY"
+            if column.unique:
+                details += ", UNIQUE"
+            if column.references:
+                details += f", FK -> {column.references}"
+            line = f"   - {column.name} ({details})"
+            if column.values:
+                line += f" [valid values: {', '.join(column.values)}]"
+            lines.append(line)
+        lines.extend(f"   {key}" for key in table.composite_keys)
+    return "\n".join(lines) + "\n"
+
+
+class SchemaCache:
+    """Schema description of the live database, re-read only when the catalog changes."""
+
+    def __init__(
+        self,
+        db: Any,
+        schema_name: str = "public",
+        check_interval_secs: float = DEFAULT_CHECK_INTERVAL_SECS,
+        fallback: Optional[str] = None,
+        max_values: int = MAX_VALUE_HINTS,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """Initialize the cache.
+
+        Args:
+            db: Database with execute_query(query, params), like PostgresDatabase
+            schema_name: Postgres schema to describe
+            check_interval_secs: How long a description is served before the fingerprint is
+                checked again, 0 checks on every call
+            fallback: Description to serve while the database can't be introspected
+            max_values: Most distinct values a column can have to get a value hint from statistics
+        """
+        self.db = db
+        self.schema_name = schema_name
+        self.check_interval_secs = check_interval_secs
+        self.fallback = fallback
+        self.max_values = max_values
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._schema: Optional[str] = None
+        self._fingerprint: Optional[str] = None
+        self._checked_at: Optional[float] = None
+        self.checks = 0
+        self.refreshes = 0
+        self.errors = 0
+
+    def get(self) -> Optional[str]:
+        """Returns the schema description, `fallback` if the database was never readable."""
+        checked_at = self._checked_at
+        if checked_at is not None and self._clock() - checked_at < self.check_interval_secs:
+            return self._schema or self.fallback
+        # Only one caller checks, the others keep using the description they have
+        if not self._lock.acquire(blocking=self._schema is None):
+            return self._schema
+        try:
+            if self._checked_at == checked_at:
+                self._check()
+        finally:
+            self._lock.release()
+        return self._schema or self.fallback
+
+    def invalidate(self):
+        """Makes the next get() check the fingerprint."""
+        self._checked_at = None
+
+    def _check(self):
+        params = {"schema": self.schema_name}
+        try:
+            fingerprint = self.db.execute_query(FINGERPRINT_QUERY, params)[0]["fingerprint"]
+            self.checks += 1
+            if fingerprint != self._fingerprint or self._schema is None:
+                tables = introspect(self.db, self.schema_name, self.max_values)
+                self._schema = render_schema(tables) if tables else None
+                self._fingerprint = fingerprint
+                self.refreshes += 1
+                SCHEMA_CACHE_CHECKS.labels("changed").inc()
+                logger.info(f"Schema cache: {len(tables)} tables read, fingerprint {fingerprint}")
+            else:
+                SCHEMA_CACHE_CHECKS.labels("unchanged").inc()
+        except Exception as e:
+            # Keep serving the last description, the next check is one interval away
+            self.errors += 1
+            SCHEMA_CACHE_CHECKS.labels("error").inc()
+            logger.warning(f"Schema cache: keeping the current schema, introspection failed: {e}")
+        self._checked_at = self._clock()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "fingerprint": self._fingerprint,
+            "live": self._schema is not None,
+            "checks": self.checks,
+            "refreshes": self.refreshes,
+            "errors": self.errors,
+        }
@@ -0,0 +1,322 @@
+# // Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# // SPDX-License-Identifier: MIT-0
+
+"""
+Schema Pruning
+
+Cuts the schema description sent with a SQL generation prompt down to the tables a question
+needs, so prompt tokens (and Bedrock latency and cost) stop growing with every table added to
+the database.
+
+Each schema description gets an index, built once and cached: table names, column names and
+"[valid values: ...]" words mapped to the tables they belong to, plus a few domain synonyms
+("spent" -> amount). Questions are tokenized like in the semantic cache, so plurals and
+paraphrases ("clients", "transactions") land on the same words.
+
+- A table is picked when the question names it, or uses a column or value word only it has
+- A word several tables share ("status", "pending") adds nothing when a picked table has it,
+  otherwise the tables with it closest to the picked ones in the foreign key graph
+- Tables on the foreign key paths between picked tables are added, so the joins stay possible
+- Wide tables keep their key, foreign key, name, date and matched columns only
+
+The full schema is used when nothing matches, when the picked tables can't be joined, or when
+pruning would keep every table anyway. SQLQueryGenerator also asks again with the full schema
+when the SQL from a pruned prompt references something the pruned schema doesn't have.
+"""
+
+import re
+import threading
+from collections import deque
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Dict, FrozenSet, List, Optional, Set, Tuple
+
+from metrics import SCHEMA_PROMPT_TOKENS_SAVED, SCHEMA_PRUNING
+from semantic_cache import GUARD_WORDS, STOPWORDS, stem, tokenize
+
+# Tables with more columns than this get their columns pruned too
+DEFAULT_MAX_COLUMNS = 12
+# A column or value word doesn't pick a table further than this from the tables the question names
+MAX_COLUMN_HOPS = 2
+
+# Question words that stand for table or column words of the schema
+DOMAIN_SYNONYMS = {
+    "spent": ("amount",), "spend": ("amount",), "spending": ("amount",), "revenue": ("amount",),
+    "money": ("amount",), "value": ("amount",), "cost": ("amount",), "price": ("amount",),
+    "paid": ("payment",), "pay": ("payment",),
+    "bought": ("order", "product"), "buy": ("order", "product"), "placed": ("order",), "ordered": ("order",),
+    "sold": ("item",), "selling": ("item",), "sell": ("item",),
+    "signed": ("customer",), "joined": ("customer",), "registered": ("customer",), "who": ("customer",),
+    "mail": ("email",), "when": ("date",),
+}
+
+_TABLE_HEADER = re.compile(r"^\s*(?:\d+\.\s*)?([A-Za-z_]\w*)\s+Table\s*:(.*)$")
+_COLUMN = re.compile(r"^\s*-\s*([A-Za-z_]\w*)\s*\((.*)$")
+_REFERENCE = re.compile(r"\b(?:FK\s*->|REFERENCES)\s*([A-Za-z_]\w*)", re.IGNORECASE)
+_VALID_VALUES = re.compile(r"valid values:\s*([^\]\n]+)", re.IGNORECASE)
+# Kept in wide tables, these are needed by most answers
+_ALWAYS_KEPT = re.compile(r"(?:^|_)(?:id|name|date|at)$")
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough prompt token count, about four characters per token for English and SQL."""
+    return (len(text) + 3) // 4
+
+
+def _words(name: str) -> List[str]:
+    return [stem(word) for word in name.lower().split("_") if word]
+
+
+@dataclass
+class SchemaTable:
+    name: str
+    header: str
+    # Column name to its line, in schema order
+    columns: Dict[str, str] = field(default_factory=dict)
+    # Lines under the table that aren't columns ("primary key (a, b)")
+    other_lines: List[str] = field(default_factory=list)
+    references: Dict[str, str] = field(default_factory=dict)
+    keys: Set[str] = field(default_factory=set)
+
+
+@dataclass
+class SchemaIndex:
+    """Tables of a schema description and the words that point at them."""
+
+    tables: Dict[str, SchemaTable]
+    # Word to the tables it names
+    table_words: Dict[str, FrozenSet[str]]
+    # Word to the (table, column) pairs whose column name or values contain it
+    column_words: Dict[str, FrozenSet[Tuple[str, str]]]
+    # Undirected foreign key graph
+    neighbors: Dict[str, FrozenSet[str]]
+
+    def distances(self, sources: FrozenSet[str]) -> Dict[str, int]:
+        """Foreign key hops from the nearest source table to every reachable table."""
+        distance = {table: 0 for table in sources}
+        queue = deque(sources)
+        while queue:
+            table = queue.popleft()
+            for neighbor in self.neighbors.get(table, ()):
+                if neighbor not in distance:
+                    distance[neighbor] = distance[table] + 1
+                    queue.append(neighbor)
+        return distance
+
+    def path(self, start: str, goal: str) -> Optional[List[str]]:
+        """Shortest foreign key path between two tables, None if they aren't connected."""
+        previous: Dict[str, Optional[str]] = {start: None}
+        queue = deque([start])
+        while queue:
+            table = queue.popleft()
+            if table == goal:
+                path = []
+                while table is not None:
+                    path.append(table)
+                    table = previous[table]
+                return path[::-1]
+            for neighbor in self.neighbors.get(table, ()):
+                if neighbor not in previous:
+                    previous[neighbor] = table
+                    queue.append(neighbor)
+        return None
+
+
+@lru_cache(maxsize=16)
+def build_index(schema: str) -> SchemaIndex:
+    """Parses a schema description in the SQL generation prompt format and indexes its words."""
+    tables: Dict[str, SchemaTable] = {}
+    table: Optional[SchemaTable] = None
+    for line in schema.splitlines():
+        header = _TABLE_HEADER.match(line)
+        if header:
+            table = tables.setdefault(header.group(1).lower(), SchemaTable(header.group(1).lower(), line.strip()))
+            continue
+        column = _COLUMN.match(line)
+        if table is None or not line.strip():
+            continue
+        if column is None:
+            table.other_lines.append(line.strip())
+            continue
+        name, details = column.group(1).lower(), column.group(2)
+        table.columns[name] = line.strip()
+        reference = _REFERENCE.search(details)
+        if reference:
+            table.references[name] = reference.group(1).lower()
+        if "PRIMARY KEY" in details.upper() or reference:
+            table.keys.add(name)
+
+    table_words: Dict[str, Set[str]] = {}
+    column_words: Dict[str, Set[Tuple[str, str]]] = {}
+    neighbors: Dict[str, Set[str]] = {name: set() for name in tables}
+    for name, table in tables.items():
+        # "order_items" is named by "item", "order" names the orders table
+        words = _words(name)
+        table_words.setdefault(words[-1], set()).add(name)
+        table_words.setdefault(" ".join(words), set()).add(name)
+        for column, line in table.columns.items():
+            if column in table.keys:
+                continue
+            terms = set(_words(column)) - set(words)
+            values = _VALID_VALUES.search(line)
+            if values:
+                for value in values.group(1).split(","):
+                    terms.update(_words(value.strip()))
+            for term in terms:
+                column_words.setdefault(term, set()).add((name, column))
+        for target in table.references.values():
+            if target in neighbors:
+                neighbors[name].add(target)
+                neighbors[target].add(name)
+
+    return SchemaIndex(
+        tables=tables,
+        table_words={word: frozenset(names) for word, names in table_words.items()},
+        column_words={word: frozenset(pairs) for word, pairs in column_words.items()},
+        neighbors={name: frozenset(adjacent) for name, adjacent in neighbors.items()},
+    )
+
+
+@dataclass(frozen=True)
+class SchemaSelection:
+    """The schema description to prompt with for one question."""
+
+    schema: str
+    tables: Tuple[str, ...]
+    # True when this is the full schema, `reason` says why
+    full: bool
+    reason: str
+    tokens_saved: int = 0
+
+
+def question_words(question: str) -> List[str]:
+    """Stemmed question words with domain synonyms added, emails stand for the email column."""
+    words = []
+    for token in tokenize(question):
+        if "@" in token:
+            words.append("email")
+        elif token not in STOPWORDS or token in DOMAIN_SYNONYMS:
+            words.append(token)
+            words.extend(DOMAIN_SYNONYMS.get(token, ()))
+    # Two word table names, "order items"
+    words.extend(f"{left} {right}" for left, right in zip(words, words[1:]))
+    return words
+
+
+class SchemaPruner:
+    """Picks the part of a schema description a question needs."""
+
+    def __init__(self, max_columns: int = DEFAULT_MAX_COLUMNS):
+        """Initialize the pruner.
+
+        Args:
+            max_columns: Tables with more columns than this get their columns pruned too
+        """
+        self.max_columns = max_columns
+        self._lock = threading.Lock()
+        self.results: Dict[str, int] = {}
+        self.tokens_saved = 0
+        self.retries = 0
+
+    def select(self, question: str, schema: str) -> SchemaSelection:
+        """Returns the schema description to prompt with for a question."""
+        selection = self._select(question, schema)
+        result = "pruned" if not selection.full else selection.reason
+        with self._lock:
+            self.results[result] = self.results.get(result, 0) + 1
+            self.tokens_saved += selection.tokens_saved
+        SCHEMA_PRUNING.labels(result).inc()
+        SCHEMA_PROMPT_TOKENS_SAVED.inc(selection.tokens_saved)
+        return selection
+
+    def record_retry(self, selection: SchemaSelection):
+        """Counts a pruned prompt that had to be asked again with the full schema."""
+        with self._lock:
+            self.retries += 1
+            self.tokens_saved -= selection.tokens_saved
+        SCHEMA_PRUNING.labels("retried").inc()
+
+    def _select(self, question: str, schema: str) -> SchemaSelection:
+        index = build_index(schema)
+        if not index.tables:
+            return SchemaSelection(schema, (), True, "unparsed")
+
+        words = question_words(question)
+        named: Set[str] = set()
+        matched_columns: Set[Tuple[str, str]] = set()
+        unique: Set[str] = set()
+        shared: List[FrozenSet[Tuple[str, str]]] = []
+        for word in words:
+            named.update(index.table_words.get(word, ()))
+            # "last 5 orders" is no reason to pick last_name
+            pairs = index.column_words.get(word) if word not in GUARD_WORDS else None
+            if pairs:
+                matched_columns.update(pairs)
+                tables = {table for table, _ in pairs}
+                if len(tables) == 1:
+                    unique.update(tables)
+                else:
+                    shared.append(pairs)
+
+        # Column and value words are weaker than table names, "low" in "products low on stock"
+        # shouldn't pull in a ticket priority three joins away
+        picked = set(named)
+        distance = index.distances(frozenset(named)) if named else {}
+        picked.update(table for table in unique if not named or distance.get(table, MAX_COLUMN_HOPS + 1) <= MAX_COLUMN_HOPS)
+
+        # Shared words pick the closest tables having them, when no picked table does
+        for pairs in shared:
+            having = {table for table, _ in pairs}
+            if picked & having:
+                continue
+            distance = index.distances(frozenset(picked)) if picked else {}
+            closest = min((distance.get(table, len(index.tables)) for table in having), default=0)
+            picked.update(table for table in having if distance.get(table, len(index.tables)) == closest)
+        if not picked:
+            return SchemaSelection(schema, (), True, "no_match")
+
+        # Join paths between the picked tables
+        ordered = sorted(picked)
+        tables = set(ordered)
+        for other in ordered[1:]:
+            path = index.path(ordered[0], other)
+            if path is None:
+                return SchemaSelection(schema, tuple(ordered), True, "not_joinable")
+            tables.update(path)
+        if len(tables) == len(index.tables):
+            return SchemaSelection(schema, tuple(sorted(tables)), True, "all_tables")
+
+        pruned = self._render(index, tables, picked, matched_columns)
+        saved = max(estimate_tokens(schema) - estimate_tokens(pruned), 0)
+        return SchemaSelection(pruned, tuple(sorted(tables)), False, "pruned", saved)
+
+    def _render(self, index: SchemaIndex, tables: Set[str], picked: Set[str],
+                matched_columns: Set[Tuple[str, str]]) -> str:
+        lines = ["Database Schema:"]
+        # Schema order, renumbered
+        for number, name in enumerate((name for name in index.tables if name in tables), start=1):
+            table = index.tables[name]
+            lines.append(_TABLE_HEADER.sub(lambda m: f"{number}. {m.group(1)} Table:{m.group(2)}", table.header))
+            wide = len(table.columns) > self.max_columns
+            for column, line in table.columns.items():
+                keep = (
+                    not wide
+                    or column in table.keys
+                    or (name, column) in matched_columns
+                    or (name in picked and _ALWAYS_KEPT.search(column))
+                )
+                if keep:
+                    lines.append(f"   {line}")
+            lines.extend(f"   {line}" for line in table.other_lines)
+        return "\n".join(lines) + "\n"
+
+    def stats(self) -> Dict:
+        with self._lock:
+            total = sum(self.results.values())
+            pruned = self.results.get("pruned", 0)
+            return {
+                "results": dict(self.results),
+                "pruned_rate": round(pruned / total, 3) if total else 0.0,
+                "full_schema_retries": self.retries,
+                "prompt_tokens_saved": self.tokens_saved,
+            }
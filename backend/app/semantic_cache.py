@@ -0,0 +1,543 @@
+# // Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# // SPDX-License-Identifier: MIT-0
+
+"""
+Semantic SQL Cache
+
+Spoken questions rarely repeat word for word ("how many orders are pending" vs "count the
+pending orders"), so the exact-match cache in sql_cache.py misses most reuse. This cache finds
+a previously answered question that means the same thing and reuses its SQL.
+
+Questions are turned into sparse TF-IDF vectors of hashed word n-grams (stemmed unigrams and
+unordered word pairs), computed locally on the CPU. The vectors of all cached questions live
+in an inverted index made of flat NumPy arrays sorted by feature hash. A lookup gathers the
+posting slices of the question's features and sums them per entry with one `np.bincount`, so
+only entries sharing a feature with the question are touched. New entries go to a small delta
+index; the main index and the IDF table are rebuilt once the delta reaches an eighth of it, so
+adding stays cheap as the cache grows.
+
+A candidate above the similarity threshold is only reused when:
+- both questions carry the same "slot" words: numbers, status values from the schema, and
+  words that change the query such as "last", "top", "average" or "not", so "pending orders"
+  never reuses the SQL of "completed orders"
+- every string literal of the cached SQL that was taken from the cached question (a name, a
+  city, an email) also appears in the new question, so "orders of John Smith" never reuses
+  the SQL of "orders of Jane Smith" however similar the rest is
+- the cached SQL only references tables and columns of the current schema
+"""
+
+import hashlib
+import math
+import re
+import threading
+import time
+import zlib
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Dict, FrozenSet, List, Optional, Tuple
+
+import numpy as np
+
+from metrics import SQL_SEMANTIC_CACHE_LOOKUPS, SQL_SEMANTIC_CACHE_SECONDS
+from sql_cache import normalize_question
+
+DEFAULT_THRESHOLD = 0.85
+DEFAULT_MAX_ENTRIES = 50000
+DEFAULT_TTL_SECS = 24 * 3600.0
+# Entries scored outside the index before it is rebuilt
+DEFAULT_REBUILD_EVERY = 64
+# Weight of an unordered word pair relative to a single word
+PAIR_WEIGHT = 0.5
+
+_HITS = SQL_SEMANTIC_CACHE_LOOKUPS.labels("hit")
+_MISSES = SQL_SEMANTIC_CACHE_LOOKUPS.labels("miss")
+_REJECTED = SQL_SEMANTIC_CACHE_LOOKUPS.labels("rejected")
+
+STOPWORDS = frozenset("""
+    a an and any are as at be been by can could did do does for from give get has have i in is
+    it its let list me my of on or our please show tell than that the their them there these
+    they this those to us was we were what whats which who whose will with would you your
+    all each every find display see know want need like just
+""".split()) - {"this"}
+
+# Words that change the meaning of a query even when the rest matches
+GUARD_WORDS = frozenset("""
+    today yesterday tomorrow day week month year quarter hour minute
+    last this next previous current past recent latest oldest newest earliest
+    first top bottom most least highest lowest largest smallest biggest
+    more less greater fewer above below over under before after since between
+    not no never without except exclude excluding
+    count sum average avg mean minimum maximum min max
+    ascending descending asc desc
+    january february march april may june july august september october november december
+    monday tuesday wednesday thursday friday saturday sunday
+""".split())
+
+# Phrase rewrites applied before tokenizing, so common paraphrases share features
+SYNONYMS = tuple((re.compile(pattern), replacement) for pattern, replacement in (
+    (r"\btotal number of\b", "count"),
+    (r"\bhow many\b", "count"),
+    (r"\bnumber of\b", "count"),
+    (r"\bhow much\b", "sum"),
+    (r"\btotal\b", "sum"),
+    (r"\baverage\b|\bmean\b|\bavg\b", "average"),
+    (r"\bmaximum\b|\bhighest\b|\blargest\b|\bbiggest\b", "max"),
+    (r"\bminimum\b|\blowest\b|\bsmallest\b", "min"),
+    (r"\bclients?\b|\bbuyers?\b", "customer"),
+    (r"\bpurchases?\b", "order"),
+    (r"\btransactions?\b", "payment"),
+    (r"\bcanceled\b", "cancelled"),
+))
+
+_WORD = re.compile(r"[a-z0-9_@.']+")
+_LITERAL_VALUE = re.compile(r"'((?:[^']|'')*)'")
+_NUMBER = re.compile(r"^\d+(?:\.\d+)?$")
+
+
+def stem(word: str) -> str:
+    """Very light stemming: plural "s" and "es" endings."""
+    if len(word) > 4 and word.endswith("ies"):
+        return word[:-3] + "y"
+    if len(word) > 3 and word.endswith("s") and not word.endswith("ss"):
+        return word[:-1]
+    return word
+
+
+def tokenize(question: str) -> List[str]:
+    """Returns the stemmed words of a question, stop words included."""
+    text = normalize_question(question)
+    for pattern, replacement in SYNONYMS:
+        text = pattern.sub(replacement, text)
+    return [stem(word.strip(".'")) for word in _WORD.findall(text) if word.strip(".'")]
+
+
+def _feature(token: str) -> int:
+    return zlib.crc32(token.encode("utf-8"))
+
+
+def question_features(tokens: List[str]) -> Dict[int, float]:
+    """Returns the hashed n-gram term weights (sublinear TF) of a tokenized question."""
+    words = [word for word in tokens if word not in STOPWORDS]
+    counts: Dict[str, float] = {}
+    for word in words:
+        counts[word] = counts.get(word, 0.0) + 1.0
+    for left, right in zip(words, words[1:]):
+        pair = " ".join(sorted((left, right)))
+        counts[pair] = counts.get(pair, 0.0) + PAIR_WEIGHT
+    features: Dict[int, float] = {}
+    for term, count in counts.items():
+        weight = PAIR_WEIGHT if " " in term else 1.0
+        features[_feature(term)] = weight * (1.0 + math.log(count / weight))
+    return features
+
+
+def question_slots(tokens: List[str], values: FrozenSet[str]) -> FrozenSet[str]:
+    """Returns the words of a question that must match exactly for SQL to be reused."""
+    return frozenset(
+        token for token in tokens
+        if token in GUARD_WORDS or token in values or _NUMBER.match(token) or "@" in token
+    )
+
+
+def question_literals(sql: str, tokens: List[str]) -> Tuple[FrozenSet[str], ...]:
+    """Returns the words of the SQL's string literals that come from the tokenized question.
+
+    Literals the question doesn't contain, like a status filled in by the model or a date, are
+    left out. The words of each returned literal must all be in a question reusing the SQL.
+    """
+    words = set(tokens)
+    literals = []
+    for literal in _LITERAL_VALUE.findall(sql):
+        # LIKE wildcards and underscores of enumerated values ("credit_card") separate words
+        literal_words = frozenset(tokenize(literal.replace("''", "'").replace("%", " ").replace("_", " ")))
+        if literal_words and literal_words <= words:
+            literals.append(literal_words)
+    return tuple(literals)
+
+
+@dataclass(frozen=True)
+class SchemaInfo:
+    """Tables, columns and enumerated values of a schema description."""
+
+    tables: Dict[str, FrozenSet[str]]
+    values: FrozenSet[str]
+
+    @property
+    def columns(self) -> FrozenSet[str]:
+        return frozenset(column for columns in self.tables.values() for column in columns)
+
+
+_TABLE_HEADER = re.compile(r"^\s*(?:\d+\.\s*)?([A-Za-z_]\w*)\s+Table\s*:", re.MULTILINE)
+_COLUMN_LINE = re.compile(r"^\s*-\s*([A-Za-z_]\w*)\s*\(", re.MULTILINE)
+_VALID_VALUES = re.compile(r"valid values:\s*([^\]\n]+)", re.IGNORECASE)
+
+
+@lru_cache(maxsize=16)
+def parse_schema(schema: str) -> SchemaInfo:
+    """Parses the schema description used in the SQL generation prompt.
+
+    Tables are lines like "1. CUSTOMERS Table:", columns are "- column_name (TYPE)" lines below
+    them, and "[valid values: a, b]" lists enumerated values.
+    """
+    tables: Dict[str, FrozenSet[str]] = {}
+    headers = list(_TABLE_HEADER.finditer(schema))
+    for i, header in enumerate(headers):
+        end = headers[i + 1].start() if i + 1 < len(headers) else len(schema)
+        body = schema[header.end():end]
+        tables[header.group(1).lower()] = frozenset(name.lower() for name in _COLUMN_LINE.findall(body))
+    values = frozenset(
+        stem(value.strip().lower())
+        for match in _VALID_VALUES.findall(schema)
+        for value in match.split(",")
+        if value.strip()
+    )
+    return SchemaInfo(tables=tables, values=values)
+
+
+SQL_KEYWORDS = frozenset("""
+    select from where and or not in is null as on join left right inner outer full cross natural
+    using group by order having limit offset fetch distinct asc desc nulls first last case when
+    then else end between like ilike similar exists union intersect except all any some with
+    recursive interval current_date current_time current_timestamp localtimestamp true false
+    date time timestamp timestamptz day days month months year years week weeks hour hours
+    minute minutes second seconds quarter dow doy epoch zone at filter over partition rows range
+    preceding following unbounded row only insert into values update set delete returning
+    numeric integer int bigint smallint decimal real double precision float text varchar char
+    character boolean bool serial
+""".split())
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_LINE_COMMENT = re.compile(r"--[^\n]*")
+_TABLE_REF = re.compile(r"\b(?:from|join|into|update)\s+([a-z_][\w.]*)(?:\s+(?:as\s+)?([a-z_]\w*))?")
+_CTE_NAME = re.compile(r"(?:\bwith(?:\s+recursive)?|,)\s*([a-z_]\w*)\s+as\s*\(")
+_FROM_SUBQUERY = re.compile(r"\b(?:from|join)\s*\(")
+_ALIAS = re.compile(r"\bas\s+([a-z_]\w*)")
+_QUALIFIED = re.compile(r"\b([a-z_]\w*)\.([a-z_]\w*|\*)")
+_IDENTIFIER = re.compile(r"\b([a-z_]\w*)\b(\s*\()?")
+
+
+def verify_sql(sql: str, schema: SchemaInfo) -> bool:
+    """Checks that a query only references tables and columns of the schema.
+
+    Unknown identifiers fail the check, so anything this parser doesn't understand is
+    regenerated rather than reused.
+    """
+    text = _LINE_COMMENT.sub(" ", sql.lower())
+    text = _STRING_LITERAL.sub("''", text).replace('"', "")
+
+    derived = set(_CTE_NAME.findall(text))
+    aliases: Dict[str, Optional[str]] = {}
+    for table, alias in _TABLE_REF.findall(text):
+        table = table.split(".")[-1]
+        if table in schema.columns:
+            # EXTRACT(MONTH FROM order_date)
+            continue
+        if table not in schema.tables and table not in derived:
+            return False
+        aliases[table] = table
+        if alias and alias not in SQL_KEYWORDS:
+            aliases[alias] = table
+    # Derived tables "(SELECT ...) AS t" and output column aliases
+    for alias in _ALIAS.findall(text):
+        aliases.setdefault(alias, None)
+    for name in derived:
+        aliases[name] = None
+
+    for qualifier, column in _QUALIFIED.findall(text):
+        if qualifier not in aliases:
+            return False
+        table = aliases[qualifier]
+        if table is not None and column != "*" and column not in schema.tables.get(table, ()):
+            return False
+
+    # Bare columns must belong to a table in the query, any table when it selects from a derived one
+    referenced = {table for table in aliases.values() if table in schema.tables}
+    from_subquery = derived or _FROM_SUBQUERY.search(text)
+    columns = schema.columns if from_subquery else frozenset().union(
+        *(schema.tables[table] for table in referenced)
+    )
+    for name, call in _IDENTIFIER.findall(_QUALIFIED.sub(" ", text)):
+        if call or name in SQL_KEYWORDS or name in aliases or name in columns:
+            continue
+        return False
+    return True
+
+
+def _slot_hash(slots: FrozenSet[str]) -> int:
+    digest = hashlib.blake2b("\x00".join(sorted(slots)).encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "little", signed=True)
+
+
+class _PostingIndex:
+    """Inverted index over a contiguous range of entries, postings sorted by feature hash."""
+
+    def __init__(
+        self,
+        first_row: int,
+        lengths: np.ndarray,
+        postings: np.ndarray,
+        weights: np.ndarray,
+        slots: List[int],
+        created: List[float],
+        alive: List[bool],
+    ):
+        count = len(lengths)
+        rows = np.repeat(np.arange(count, dtype=np.int32), lengths)
+        norms = np.sqrt(np.bincount(rows, weights=weights.astype(np.float64) ** 2, minlength=count))
+        weights = (weights / norms[rows]).astype(np.float32)
+        order = np.argsort(postings, kind="stable")
+        self.first_row = first_row
+        self.postings = postings[order]
+        self.rows = rows[order]
+        self.weights = weights[order]
+        self.slots = np.array(slots, dtype=np.int64)
+        self.created = np.array(created, dtype=np.float64)
+        self.alive = np.array(alive, dtype=bool)
+
+    def __len__(self) -> int:
+        return len(self.slots)
+
+    def best(self, feature_ids: np.ndarray, query: np.ndarray, slots: int, oldest: float) -> Tuple[Optional[int], float]:
+        """Returns the most similar live entry with the same slots and its cosine similarity."""
+        starts = np.searchsorted(self.postings, feature_ids, side="left")
+        ends = np.searchsorted(self.postings, feature_ids, side="right")
+        lengths = ends - starts
+        if not lengths.any():
+            return None, 0.0
+        index = np.concatenate([np.arange(start, end) for start, end in zip(starts, ends) if end > start])
+        scores = np.bincount(
+            self.rows[index],
+            weights=self.weights[index] * np.repeat(query, lengths),
+            minlength=len(self),
+        )
+        scores[~((self.slots == slots) & self.alive & (self.created > oldest))] = 0.0
+        row = int(np.argmax(scores))
+        if scores[row] <= 0:
+            return None, 0.0
+        return self.first_row + row, float(scores[row])
+
+
+class SemanticSQLCache:
+    """Nearest-neighbour cache of generated SQL over TF-IDF vectors of the questions."""
+
+    def __init__(
+        self,
+        threshold: float = DEFAULT_THRESHOLD,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        ttl_secs: float = DEFAULT_TTL_SECS,
+        rebuild_every: int = DEFAULT_REBUILD_EVERY,
+        clock=time.monotonic,
+    ):
+        """Initialize the cache.
+
+        Args:
+            threshold: Cosine similarity a cached question needs to be reused
+            max_entries: Entries kept before the least recently used one is evicted
+            ttl_secs: How long an entry is reused after it was stored
+            rebuild_every: Minimum number of new entries before the main index is rebuilt
+            clock: Time source, replaceable in tests
+        """
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.ttl_secs = ttl_secs
+        self.rebuild_every = rebuild_every
+        self._clock = clock
+        self._lock = threading.Lock()
+
+        # Per entry, the position is the entry's row
+        self._questions: List[str] = []
+        self._sql: List[str] = []
+        self._slots: List[int] = []
+        self._literals: List[Tuple[FrozenSet[str], ...]] = []
+        self._feature_ids: List[np.ndarray] = []
+        self._term_weights: List[np.ndarray] = []
+        self._created: List[float] = []
+        self._last_used: List[float] = []
+        self._alive: List[bool] = []
+        self._live = 0
+
+        # Main index over rows [0, _built), delta index over the rows added since
+        self._built = 0
+        self._main: Optional[_PostingIndex] = None
+        self._delta: Optional[_PostingIndex] = None
+        self._vocabulary = np.zeros(0, dtype=np.int64)
+        self._idf = np.zeros(0, dtype=np.float32)
+        self._idf_unseen = 1.0
+
+        self.hits = 0
+        self.misses = 0
+        self.rejected = 0
+        self.evictions = 0
+        self.rebuilds = 0
+
+    def __len__(self) -> int:
+        return self._live
+
+    def add(self, question: str, sql: str, schema: str):
+        """Stores the SQL generated for a question.
+
+        Args:
+            question: The question as asked
+            sql: SQL generated for it
+            schema: Schema description the SQL was generated against
+        """
+        tokens = tokenize(question)
+        features = question_features(tokens)
+        if not features:
+            return
+        slots = _slot_hash(question_slots(tokens, parse_schema(schema).values))
+        with self._lock:
+            now = self._clock()
+            while self._live >= self.max_entries:
+                self._evict_least_recently_used()
+            self._questions.append(question)
+            self._sql.append(sql)
+            self._slots.append(slots)
+            self._literals.append(question_literals(sql, tokens))
+            self._feature_ids.append(np.fromiter(features.keys(), dtype=np.int64, count=len(features)))
+            self._term_weights.append(np.fromiter(features.values(), dtype=np.float32, count=len(features)))
+            self._created.append(now)
+            self._last_used.append(now)
+            self._alive.append(True)
+            self._live += 1
+            self._delta = None
+            if len(self._questions) - self._built >= max(self.rebuild_every, self._built // 8):
+                self._rebuild()
+
+    def lookup(self, question: str, schema: str) -> Optional[str]:
+        """Returns cached SQL for a question meaning the same thing, or None.
+
+        Args:
+            question: The question as asked
+            schema: Current schema description, the cached SQL must fit it
+        """
+        start = time.perf_counter()
+        info = parse_schema(schema)
+        tokens = tokenize(question)
+        features = question_features(tokens)
+        slots = _slot_hash(question_slots(tokens, info.values))
+        result = None
+        with self._lock:
+            row, score = self._nearest(features, slots)
+            if row is None or score < self.threshold:
+                self.misses += 1
+                _MISSES.inc()
+            elif not all(literal <= set(tokens) for literal in self._literals[row]):
+                # Asks about another name or place, the entry stays for its own question
+                self.rejected += 1
+                _REJECTED.inc()
+            elif not verify_sql(self._sql[row], info):
+                # Written against another schema, drop it
+                self._remove(row)
+                self.rejected += 1
+                _REJECTED.inc()
+            else:
+                self._last_used[row] = self._clock()
+                self.hits += 1
+                _HITS.inc()
+                result = self._sql[row]
+        SQL_SEMANTIC_CACHE_SECONDS.observe(time.perf_counter() - start)
+        return result
+
+    def nearest(self, question: str, schema: str) -> Tuple[Optional[str], float]:
+        """Returns the most similar cached question with matching slots and its similarity."""
+        tokens = tokenize(question)
+        slots = _slot_hash(question_slots(tokens, parse_schema(schema).values))
+        with self._lock:
+            row, score = self._nearest(question_features(tokens), slots)
+            return (self._questions[row] if row is not None else None), score
+
+    def _idf_of(self, feature_ids: np.ndarray) -> np.ndarray:
+        # Features the main index hasn't seen get the highest IDF
+        if not len(self._vocabulary):
+            return np.full(len(feature_ids), self._idf_unseen, dtype=np.float32)
+        positions = np.minimum(np.searchsorted(self._vocabulary, feature_ids), len(self._vocabulary) - 1)
+        known = self._vocabulary[positions] == feature_ids
+        return np.where(known, self._idf[positions], self._idf_unseen).astype(np.float32)
+
+    def _nearest(self, features: Dict[int, float], slots: int) -> Tuple[Optional[int], float]:
+        # Called with the lock held
+        if not features or not self._live:
+            return None, 0.0
+        feature_ids = np.fromiter(features.keys(), dtype=np.int64, count=len(features))
+        query = np.fromiter(features.values(), dtype=np.float32, count=len(features)) * self._idf_of(feature_ids)
+        query /= np.linalg.norm(query)
+
+        if self._delta is None and len(self._questions) > self._built:
+            first = self._built
+            postings = np.concatenate(self._feature_ids[first:])
+            self._delta = _PostingIndex(
+                first,
+                np.fromiter((len(ids) for ids in self._feature_ids[first:]), dtype=np.int64),
+                postings,
+                np.concatenate(self._term_weights[first:]) * self._idf_of(postings),
+                self._slots[first:],
+                self._created[first:],
+                self._alive[first:],
+            )
+
+        oldest = self._clock() - self.ttl_secs
+        best_row, best_score = None, 0.0
+        for index in (self._main, self._delta):
+            if index is not None:
+                row, score = index.best(feature_ids, query, slots, oldest)
+                if score > best_score:
+                    best_row, best_score = row, score
+        return best_row, best_score
+
+    def _remove(self, row: int):
+        if not self._alive[row]:
+            return
+        self._alive[row] = False
+        self._live -= 1
+        index = self._main if row < self._built else self._delta
+        if index is not None:
+            index.alive[row - index.first_row] = False
+
+    def _evict_least_recently_used(self):
+        last_used = np.array(self._last_used)
+        last_used[~np.array(self._alive)] = np.inf
+        self._remove(int(np.argmin(last_used)))
+        self.evictions += 1
+
+    def _rebuild(self):
+        """Drops removed entries and rebuilds the main index and the IDF table over all entries."""
+        keep = [row for row, alive in enumerate(self._alive) if alive]
+        for name in ("_questions", "_sql", "_slots", "_literals", "_feature_ids", "_term_weights", "_created", "_last_used"):
+            values = getattr(self, name)
+            setattr(self, name, [values[row] for row in keep])
+        self._alive = [True] * len(keep)
+        self._live = self._built = count = len(keep)
+        self._main = self._delta = None
+        self.rebuilds += 1
+        if not count:
+            return
+
+        postings = np.concatenate(self._feature_ids)
+        # Features are unique within a question, so the counts are document frequencies
+        vocabulary, inverse, document_frequency = np.unique(postings, return_inverse=True, return_counts=True)
+        idf = (np.log((1 + count) / (1 + document_frequency)) + 1).astype(np.float32)
+        self._vocabulary = vocabulary
+        self._idf = idf
+        self._idf_unseen = float(np.log(1 + count) + 1)
+        self._main = _PostingIndex(
+            0,
+            np.fromiter((len(ids) for ids in self._feature_ids), dtype=np.int64, count=count),
+            postings,
+            np.concatenate(self._term_weights) * idf[inverse],
+            self._slots,
+            self._created,
+            self._alive,
+        )
+
+    def stats(self) -> Dict[str, float]:
+        lookups = self.hits + self.misses + self.rejected
+        return {
+            "entries": self._live,
+            "hits": self.hits,
+            "misses": self.misses,
+            "rejected": self.rejected,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            "evictions": self.evictions,
+            "rebuilds": self.rebuilds,
+        }
@@ -0,0 +1,339 @@
+# // Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# // SPDX-License-Identifier: MIT-0
+
+"""
+Session Manager
+
+Admission control for WebSocket sessions. The manager tracks the active sessions of this
+process together with event loop lag, CPU use and memory. It turns new callers away once the
+process is full, so a saturated task doesn't degrade every call it is already serving.
+
+A caller arriving while all session slots are taken waits up to `queue_timeout_secs` for a
+slot to free up. Callers arriving while the event loop is lagging or memory is over the limit
+are rejected right away. Rejected callers get close code 1013 (Try Again Later).
+
+`drain()` stops admitting sessions, waits for the active ones to finish up to a deadline, and
+then cancels the pipeline tasks of the remaining sessions.
+
+Worker processes sharing a port drain together: `request_drain()` also writes the drain
+deadline to a flag file shared by all workers, and every worker's sampler starts draining as
+soon as it sees the file, including workers restarted after the drain began.
+"""
+
+import asyncio
+import os
+import resource
+import sys
+import time
+from contextlib import asynccontextmanager
+from typing import Any, Dict, List, Optional, Tuple
+
+from loguru import logger
+
+# WebSocket close code for "Try Again Later" (RFC 6455 registry)
+TRY_AGAIN_LATER = 1013
+# Time cancelled sessions get to wind down at the end of a drain
+CANCEL_GRACE_SECS = 5.0
+
+
+class AdmissionRejected(Exception):
+    """Raised when a new session cannot be admitted."""
+
+    def __init__(self, reason: str):
+        super().__init__(reason)
+        self.reason = reason
+
+
+def current_rss_bytes() -> int:
+    """Returns the resident set size of this process."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        # Peak instead of current RSS where /proc is not available (kilobytes on Linux, bytes on macOS)
+        max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return max_rss if sys.platform == "darwin" else max_rss * 1024
+
+
+class SessionManager:
+    """Tracks active sessions and admits new ones while there is headroom."""
+
+    def __init__(
+        self,
+        max_sessions: int,
+        queue_timeout_secs: float = 2.0,
+        max_queued: Optional[int] = None,
+        max_loop_lag_ms: float = 200.0,
+        max_memory_mb: Optional[float] = None,
+        sample_interval_secs: float = 0.25,
+        drain_flag_path: Optional[str] = None,
+    ):
+        """Initialize the manager.
+
+        Args:
+            max_sessions: Maximum concurrent sessions in this process
+            queue_timeout_secs: How long a caller may wait for a free slot, 0 rejects right away
+            max_queued: Maximum callers waiting for a slot, defaults to max_sessions
+            max_loop_lag_ms: Event loop lag above which new sessions are rejected
+            max_memory_mb: Resident memory above which new sessions are rejected, None disables
+            sample_interval_secs: Interval of the loop lag and CPU sampler
+            drain_flag_path: File shared with the other worker processes signalling a drain,
+                None drains only this process
+        """
+        self.max_sessions = max_sessions
+        self.queue_timeout_secs = queue_timeout_secs
+        self.max_queued = max_sessions if max_queued is None else max_queued
+        self.max_loop_lag_ms = max_loop_lag_ms
+        self.max_memory_mb = max_memory_mb
+        self.sample_interval_secs = sample_interval_secs
+        self.drain_flag_path = drain_flag_path
+
+        self.active: Dict[str, float] = {}
+        self.queued = 0
+        self.admitted = 0
+        self.rejected = 0
+        self.loop_lag_ms = 0.0
+        self.cpu_percent = 0.0
+        self.draining = False
+        # (seconds since the drain started, active sessions) samples
+        self.drain_history: List[Tuple[float, int]] = []
+
+        self._tasks: Dict[str, Any] = {}
+        self._drain_task: Optional[asyncio.Task] = None
+
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._sampler: Optional[asyncio.Task] = None
+        self._next_id = 0
+
+    @property
+    def slots(self) -> asyncio.Semaphore:
+        # Created lazily so it binds to the server's event loop
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_sessions)
+        return self._slots
+
+    async def start(self):
+        """Starts the event loop lag and CPU sampler."""
+        if self._sampler is None:
+            self._check_drain_flag()
+            self._sampler = asyncio.create_task(self._sample())
+
+    async def stop(self):
+        """Stops the sampler."""
+        if self._sampler:
+            self._sampler.cancel()
+            try:
+                await self._sampler
+            except asyncio.CancelledError:
+                pass
+            self._sampler = None
+
+    async def _sample(self):
+        interval = self.sample_interval_secs
+        last_cpu = time.process_time()
+        last_wall = time.monotonic()
+        while True:
+            await asyncio.sleep(interval)
+            now = time.monotonic()
+            cpu = time.process_time()
+            # Anything past the requested sleep is time the loop was busy elsewhere
+            self.loop_lag_ms = max(0.0, (now - last_wall - interval) * 1000)
+            self.cpu_percent = 100 * (cpu - last_cpu) / (now - last_wall)
+            last_cpu, last_wall = cpu, now
+            self._check_drain_flag()
+
+    def _check_drain_flag(self):
+        # Another worker process was asked to drain
+        if self.drain_flag_path is None or self._drain_task is not None:
+            return
+        try:
+            with open(self.drain_flag_path) as f:
+                deadline = float(f.read())
+        except (OSError, ValueError):
+            return
+        logger.info("Drain requested by another worker")
+        self.start_drain(max(0.0, deadline - time.time()))
+
+    def memory_mb(self) -> float:
+        """Returns the resident memory of this process in megabytes."""
+        return current_rss_bytes() / (1024 * 1024)
+
+    def overload_reasons(self) -> List[str]:
+        """Returns why new sessions would be rejected regardless of free slots."""
+        reasons = []
+        if self.draining:
+            reasons.append("draining")
+        if self.loop_lag_ms > self.max_loop_lag_ms:
+            reasons.append(f"event loop lag {self.loop_lag_ms:.0f} ms")
+        if self.max_memory_mb and self.memory_mb() > self.max_memory_mb:
+            reasons.append(f"memory above {self.max_memory_mb:.0f} MB")
+        return reasons
+
+    def accepting(self) -> bool:
+        """Returns True if a new session would be admitted right now."""
+        return len(self.active) < self.max_sessions and not self.overload_reasons()
+
+    def capacity(self) -> Dict[str, Any]:
+        """Returns the capacity report served by the readiness route."""
+        return {
+            "accepting": self.accepting(),
+            "active_sessions": len(self.active),
+            "max_sessions": self.max_sessions,
+            "available_sessions": max(0, self.max_sessions - len(self.active)),
+            "queued": self.queued,
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "loop_lag_ms": round(self.loop_lag_ms, 1),
+            "cpu_percent": round(self.cpu_percent, 1),
+            "memory_mb": round(self.memory_mb(), 1),
+            "overload": self.overload_reasons(),
+            "draining": self.draining,
+            "drain_history": self.drain_history[-120:],
+        }
+
+    async def _acquire(self):
+        reasons = self.overload_reasons()
+        if reasons:
+            raise AdmissionRejected(", ".join(reasons))
+
+        if self.slots.locked():
+            if self.queue_timeout_secs <= 0 or self.queued >= self.max_queued:
+                raise AdmissionRejected("at capacity")
+            self.queued += 1
+            try:
+                await asyncio.wait_for(self.slots.acquire(), self.queue_timeout_secs)
+            except asyncio.TimeoutError:
+                raise AdmissionRejected("at capacity")
+            finally:
+                self.queued -= 1
+            # A drain may have started while the caller was queued
+            if self.draining:
+                self.slots.release()
+                raise AdmissionRejected("draining")
+        else:
+            await self.slots.acquire()
+
+    @asynccontextmanager
+    async def admit(self, session_id: Optional[str] = None):
+        """Holds a session slot for the duration of the block.
+
+        Args:
+            session_id: Identifier of the session, generated if None
+
+        Yields:
+            The session id
+
+        Raises:
+            AdmissionRejected: If the process has no headroom for another session
+        """
+        try:
+            await self._acquire()
+        except AdmissionRejected as e:
+            self.rejected += 1
+            logger.warning(f"Rejected session: {e.reason}")
+            raise
+
+        if session_id is None:
+            self._next_id += 1
+            session_id = f"session-{os.getpid()}-{self._next_id}"
+
+        self.admitted += 1
+        self.active[session_id] = time.monotonic()
+        try:
+            yield session_id
+        finally:
+            del self.active[session_id]
+            self._tasks.pop(session_id, None)
+            self.slots.release()
+
+    def register_task(self, session_id: str, task: Any):
+        """Registers the pipeline task of a session so a drain can cancel it.
+
+        Args:
+            session_id: Id yielded by admit()
+            task: Object with an async cancel() method, e.g. a PipelineTask
+        """
+        if session_id in self.active:
+            self._tasks[session_id] = task
+
+    def start_drain(self, timeout_secs: float, poll_secs: float = 1.0) -> asyncio.Task:
+        """Starts draining in the background, new sessions are rejected from now on.
+
+        A drain already in progress is returned instead of starting another one.
+
+        Args:
+            timeout_secs: How long active sessions may keep running
+            poll_secs: Interval of the progress log and drain history samples
+
+        Returns:
+            The drain task, its result is the summary returned by drain()
+        """
+        if self._drain_task is None:
+            self.draining = True
+            self._drain_task = asyncio.create_task(self._drain(timeout_secs, poll_secs))
+        return self._drain_task
+
+    def request_drain(self, timeout_secs: float) -> asyncio.Task:
+        """Starts draining this process and, through the drain flag, every other worker.
+
+        Args:
+            timeout_secs: How long active sessions may keep running
+
+        Returns:
+            The drain task of this process
+        """
+        if self.drain_flag_path is not None and self._drain_task is None:
+            # Same wall clock deadline for every worker
+            with open(self.drain_flag_path + ".tmp", "w") as f:
+                f.write(repr(time.time() + timeout_secs))
+            os.replace(self.drain_flag_path + ".tmp", self.drain_flag_path)
+        return self.start_drain(timeout_secs)
+
+    async def drain(self, timeout_secs: float, poll_secs: float = 1.0) -> Dict[str, Any]:
+        """Stops admitting sessions and waits for the active ones to finish.
+
+        Sessions still running after `timeout_secs` have their pipeline task cancelled.
+
+        Args:
+            timeout_secs: How long active sessions may keep running
+            poll_secs: Interval of the progress log and drain history samples
+
+        Returns:
+            Summary of the drain
+        """
+        # Shielded so a cancelled caller doesn't abandon the sessions halfway through the drain
+        return await asyncio.shield(self.start_drain(timeout_secs, poll_secs))
+
+    async def _drain(self, timeout_secs: float, poll_secs: float) -> Dict[str, Any]:
+        self.drain_history = []
+        start = time.monotonic()
+        logger.info(f"Draining {len(self.active)} sessions, deadline {timeout_secs:.0f}s")
+
+        while True:
+            elapsed = time.monotonic() - start
+            self.drain_history.append((round(elapsed, 1), len(self.active)))
+            if not self.active or elapsed >= timeout_secs:
+                break
+            logger.info(f"Draining: {len(self.active)} sessions active, {timeout_secs - elapsed:.0f}s left")
+            await asyncio.sleep(min(poll_secs, timeout_secs - elapsed))
+
+        cancelled = list(self._tasks.items())
+        for session_id, task in cancelled:
+            logger.warning(f"Drain deadline reached, cancelling {session_id}")
+            await task.cancel()
+
+        # Give cancelled sessions a moment to close their sockets and release their slots
+        deadline = time.monotonic() + CANCEL_GRACE_SECS
+        while self.active and time.monotonic() < deadline:
+            await asyncio.sleep(0.05)
+
+        elapsed = time.monotonic() - start
+        self.drain_history.append((round(elapsed, 1), len(self.active)))
+        result = {
+            "drained": len(self.active) == 0,
+            "cancelled": len(cancelled),
+            "remaining": len(self.active),
+            "secs": round(elapsed, 1),
+        }
+        logger.info(f"Drain finished: {result}")
+        return result
@@ -0,0 +1,55 @@
+# // Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# // SPDX-License-Identifier: MIT-0
+
+"""
+Session Timing
+
+Frame processor that logs how long a caller waited between the WebSocket being accepted and
+the first bot audio leaving the output transport.
+"""
+
+import time
+from typing import Optional
+
+from pipecat.frames.frames import BotStartedSpeakingFrame, Frame
+from pipecat.processors.frame_processor import FrameDirection, FrameProcessor
+
+from metrics import FIRST_AUDIO_SECONDS
+
+
+class FirstAudioTimer(FrameProcessor):
+    """Logs the accept-to-first-audio time of a session.
+
+    Place it right after `transport.output()`, which pushes a
+    BotStartedSpeakingFrame downstream when the first bot audio is sent.
+    """
+
+    def __init__(self, accepted_at: float, session_id: Optional[str] = None, **kwargs):
+        """Initialize the timer.
+
+        Args:
+            accepted_at: time.monotonic() timestamp of the WebSocket accept
+            session_id: Optional identifier included in the log line
+            **kwargs: Additional arguments passed to FrameProcessor
+        """
+        super().__init__(**kwargs)
+        self._accepted_at = accepted_at
+        self._session_id = session_id
+        self.first_audio_secs: Optional[float] = None
+
+    async def process_frame(self, frame: Frame, direction: FrameDirection):
+        """Records the first BotStartedSpeakingFrame and passes every frame through.
+
+        Args:
+            frame: The frame to process
+            direction: The direction of frame flow in the pipeline
+        """
+        await super().process_frame(frame, direction)
+
+        if self.first_audio_secs is None and isinstance(frame, BotStartedSpeakingFrame):
+            self.first_audio_secs = time.monotonic() - self._accepted_at
+            FIRST_AUDIO_SECONDS.observe(self.first_audio_secs)
+            session = f" [{self._session_id}]" if self._session_id else ""
+            print(f"Accept to first audio{session}: {self.first_audio_secs * 1000:.0f} ms", flush=True)
+
+        await self.push_frame(frame, direction)
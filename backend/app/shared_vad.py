@@ -0,0 +1,127 @@
+# // Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# // SPDX-License-Identifier: MIT-0
+
+"""
+Shared Silero VAD Model
+
+Pipecat's SileroVADAnalyzer loads its own copy of the Silero ONNX model and creates its own
+inference session for every instance, so every WebSocket connection pays the model load time
+and memory. This module keeps a single process-wide ONNX inference session and gives each
+session an analyzer that only owns its small recurrent state (a few kilobytes).
+
+ONNX Runtime inference sessions are safe to run concurrently from multiple threads, so the
+per-transport VAD executor threads can share the session without extra locking.
+"""
+
+import threading
+import time
+from importlib import resources
+from typing import Optional
+
+from loguru import logger
+
+from pipecat.audio.vad.silero import SileroOnnxModel, SileroVADAnalyzer
+from pipecat.audio.vad.vad_analyzer import VADAnalyzer, VADParams
+
+import onnxruntime
+
+from metrics import VAD_INFERENCE_SECONDS
+
+SILERO_MODEL_PACKAGE = "pipecat.audio.vad.data"
+SILERO_MODEL_NAME = "silero_vad.onnx"
+
+
+class SessionSileroModel(SileroOnnxModel):
+    """Silero model wrapper that owns only per-session state.
+
+    The inference session is shared; the recurrent state, audio context and
+    last sample rate belong to this instance.
+    """
+
+    def __init__(self, session: onnxruntime.InferenceSession):
+        """Initialize the per-session model.
+
+        Args:
+            session: The shared ONNX inference session
+        """
+        self.session = session
+        self.sample_rates = [8000, 16000]
+        self.reset_states()
+
+
+class SileroModelRegistry:
+    """Process-wide registry holding the shared Silero inference session."""
+
+    _lock = threading.Lock()
+    _session: Optional[onnxruntime.InferenceSession] = None
+
+    @classmethod
+    def get_session(cls) -> onnxruntime.InferenceSession:
+        """Gets the shared inference session, loading the model on first use.
+
+        Returns:
+            The shared ONNX inference session
+        """
+        if cls._session is None:
+            with cls._lock:
+                if cls._session is None:
+                    cls._session = cls._load_session()
+        return cls._session
+
+    @classmethod
+    def create_model(cls) -> SessionSileroModel:
+        """Creates a model with fresh per-session state on top of the shared session.
+
+        Returns:
+            A new SessionSileroModel
+        """
+        return SessionSileroModel(cls.get_session())
+
+    @classmethod
+    def _load_session(cls) -> onnxruntime.InferenceSession:
+        """Loads the Silero ONNX model into a new inference session."""
+        logger.debug("Loading shared Silero VAD model...")
+        model_path = str(resources.files(SILERO_MODEL_PACKAGE).joinpath(SILERO_MODEL_NAME))
+
+        opts = onnxruntime.SessionOptions()
+        opts.inter_op_num_threads = 1
+        opts.intra_op_num_threads = 1
+        providers = None
+        if "CPUExecutionProvider" in onnxruntime.get_available_providers():
+            providers = ["CPUExecutionProvider"]
+
+        session = onnxruntime.InferenceSession(model_path, providers=providers, sess_options=opts)
+        logger.debug("Loaded shared Silero VAD model")
+        return session
+
+
+class SharedSileroVADAnalyzer(SileroVADAnalyzer):
+    """Silero VAD analyzer that reuses the process-wide model.
+
+    Drop-in replacement for SileroVADAnalyzer; only the model loading differs.
+    """
+
+    def __init__(self, *, sample_rate: Optional[int] = None, params: Optional[VADParams] = None):
+        """Initialize the analyzer without loading a model of its own.
+
+        Args:
+            sample_rate: Audio sample rate (8000 or 16000 Hz). If None, will be set later.
+            params: VAD parameters for detection thresholds and timing.
+        """
+        VADAnalyzer.__init__(self, sample_rate=sample_rate, params=params)
+        self._model = SileroModelRegistry.create_model()
+        self._last_reset_time = 0
+
+    def voice_confidence(self, buffer) -> float:
+        """Runs the model on one window of audio and records the inference time.
+
+        Args:
+            buffer: Audio window as 16-bit PCM bytes
+
+        Returns:
+            Voice confidence between 0 and 1
+        """
+        start = time.perf_counter()
+        confidence = super().voice_confidence(buffer)
+        VAD_INFERENCE_SECONDS.observe(time.perf_counter() - start)
+        return confidence
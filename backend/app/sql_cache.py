@@ -0,0 +1,198 @@
+# // Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# // SPDX-License-Identifier: MIT-0
+
+"""
+SQL Cache
+
+Exact-match cache for generated SQL. Claude generates SQL at temperature 0.0, so the same
+question against the same schema gives the same query, and callers ask the same things over
+and over ("show my pending orders"). Entries are keyed on the normalized question plus a
+fingerprint of the schema in the prompt, so a schema change never serves stale SQL.
+
+Eviction is LRU with a TTL. Concurrent misses for the same key are coalesced (single-flight):
+the first caller generates the SQL, the others wait for its result instead of sending their
+own Bedrock request. Failures are not cached, waiting callers get the same exception.
+Callers that must check a value before it is served again compute it with `store=False` and
+`put()` it themselves once it proved good.
+
+The cache is used from tool executor threads, so it is guarded by a threading lock.
+"""
+
+import hashlib
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+from metrics import SQL_CACHE_LOOKUPS
+
+DEFAULT_MAX_ENTRIES = 1024
+DEFAULT_TTL_SECS = 3600.0
+
+_HITS = SQL_CACHE_LOOKUPS.labels("hit")
+_MISSES = SQL_CACHE_LOOKUPS.labels("miss")
+_COALESCED = SQL_CACHE_LOOKUPS.labels("coalesced")
+
+_WHITESPACE = re.compile(r"\s+")
+_EDGE_PUNCTUATION = re.compile(r"^[\s\"'`.,;:!?]+|[\s\"'`.,;:!?]+$")
+
+
+def normalize_question(text: str) -> str:
+    """Normalizes a question for exact matching: case, whitespace and edge punctuation.
+
+    "  Show my PENDING orders? " and "show my pending orders" give the same key.
+    """
+    text = text.replace("’", "'").replace("“", '"').replace("”", '"')
+    text = _EDGE_PUNCTUATION.sub("", text.lower())
+    return _WHITESPACE.sub(" ", text)
+
+
+def schema_fingerprint(schema: Optional[str]) -> str:
+    """Returns a short hash of the schema text, ignoring whitespace differences."""
+    normalized = _WHITESPACE.sub(" ", (schema or "").strip())
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()[:16]
+
+
+class _Flight:
+    """A computation in progress that other callers can wait for."""
+
+    __slots__ = ("done", "value", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class SQLCache:
+    """Thread-safe LRU + TTL cache with single-flight computation of missing entries."""
+
+    def __init__(
+        self,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        ttl_secs: float = DEFAULT_TTL_SECS,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """Initialize the cache.
+
+        Args:
+            max_entries: Entries kept before the least recently used one is evicted
+            ttl_secs: How long an entry is served after it was stored
+            clock: Time source, replaceable in tests
+        """
+        self.max_entries = max_entries
+        self.ttl_secs = ttl_secs
+        self._clock = clock
+        self._entries: "OrderedDict[Hashable, Tuple[Any, float]]" = OrderedDict()
+        self._flights: Dict[Hashable, _Flight] = {}
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    @staticmethod
+    def key(question: str, schema: Optional[str]) -> Tuple[str, str]:
+        """Returns the cache key of a question asked against a schema."""
+        return normalize_question(question), schema_fingerprint(schema)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _lookup(self, key: Hashable, now: float) -> Tuple[bool, Any]:
+        # Called with the lock held
+        entry = self._entries.get(key)
+        if entry is None:
+            return False, None
+        value, expires_at = entry
+        if expires_at <= now:
+            del self._entries[key]
+            self.expirations += 1
+            return False, None
+        self._entries.move_to_end(key)
+        return True, value
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Returns the cached value, or None if missing or expired."""
+        with self._lock:
+            return self._lookup(key, self._clock())[1]
+
+    def put(self, key: Hashable, value: Any):
+        """Stores a value, evicting the least recently used entries above max_entries."""
+        with self._lock:
+            self._entries[key] = (value, self._clock() + self.ttl_secs)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        """Drops all entries."""
+        with self._lock:
+            self._entries.clear()
+
+    def get_or_compute(self, key: Hashable, compute: Callable[[], Any], store: bool = True) -> Any:
+        """Returns the cached value for `key`, computing it once if missing.
+
+        Callers asking for a key that is already being computed wait for that computation.
+
+        Args:
+            key: Cache key, e.g. from SQLCache.key()
+            compute: Blocking function producing the value
+            store: Whether to store the computed value, False leaves that to the caller
+
+        Returns:
+            The cached or computed value
+
+        Raises:
+            Exception: Whatever `compute` raised, for the computing and the waiting callers
+        """
+        with self._lock:
+            found, value = self._lookup(key, self._clock())
+            if found:
+                self.hits += 1
+                _HITS.inc()
+                return value
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+                self.misses += 1
+                _MISSES.inc()
+            else:
+                self.coalesced += 1
+                _COALESCED.inc()
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.value
+
+        try:
+            flight.value = compute()
+            if store:
+                self.put(key, flight.value)
+            return flight.value
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+            flight.done.set()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses + self.coalesced
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "hit_rate": round((self.hits + self.coalesced) / lookups, 3) if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
@@ -1,39 +1,20 @@
 
-import boto3
-import json
+import threading
+import time
 from typing import Any, Dict, List, Optional
+from bedrock_client import BedrockRuntimeClient
 from database import PostgresDatabase
-
-class SQLQueryGenerator:
-    def __init__(self, region_name: str = "us-east-1"):
-        """
-        Initialize the SQL Query Generator with AWS Bedrock client and database connection.
-
-        Args:
-            region_name (str): AWS region name where Bedrock is available
-        """
-        self.bedrock = boto3.client(
-            service_name="bedrock-runtime",
-            region_name=region_name
-        )
-        self.model_id = "arn:aws:bedrock:us-east-1:381492244990:inference-profile/us.anthropic.claude-3-5-sonnet-20241022-v2:0"
-        self.db = PostgresDatabase()
-
-
-    def generate_query(self, text: str, schema: Optional[str] = None) -> str:
-        """
-        Generate an SQL query from natural language text.
-
-        Args:
-            text (str): Natural language description of the desired query
-            schema (Optional[str]): Database schema information to provide context
-
-        Returns:
-            str: Generated SQL query
-        """
-        # Construct the prompt
-
-        schema = """
+from intent_router import IntentRouter
+from metrics import BEDROCK_INVOKE_SECONDS
+from result_summarizer import ResultSummarizer
+from schema_cache import SchemaCache
+from schema_pruning import SchemaPruner
+from semantic_cache import SemanticSQLCache, parse_schema, verify_sql
+from sql_cache import SQLCache
+from tool_executor import tool_cancelled
+from turn_tracing import trace_span
+
+DEFAULT_SCHEMA = """
         Database Schema:
         1. CUSTOMERS Table:
            - customer_id (SERIAL PRIMARY KEY)
@@ -62,6 +43,152 @@ class SQLQueryGenerator:
     
         """
 
+class SQLQueryGenerator:
+    def __init__(
+        self,
+        region_name: str = "us-east-1",
+        cache: Optional[SQLCache] = None,
+        semantic_cache: Optional[SemanticSQLCache] = None,
+        summarizer: Optional[ResultSummarizer] = None,
+        bedrock: Optional[BedrockRuntimeClient] = None,
+        router: Optional[IntentRouter] = None,
+        schema_cache: Optional[SchemaCache] = None,
+        pruner: Optional[SchemaPruner] = None,
+    ):
+        """
+        Initialize the SQL Query Generator with AWS Bedrock client and database connection.
+
+        Args:
+            region_name (str): AWS region name where Bedrock is available
+            cache (Optional[SQLCache]): Cache for generated SQL, None generates every query
+            semantic_cache (Optional[SemanticSQLCache]): Reuses the SQL of similar questions
+                when the exact cache misses, None disables it
+            summarizer (Optional[ResultSummarizer]): Describes common result shapes without a
+                model call, None summarizes every result with Claude
+            bedrock (Optional[BedrockRuntimeClient]): Shared Bedrock client, a new one with
+                default settings if None
+            router (Optional[IntentRouter]): Answers common questions from SQL templates
+                without generating SQL, None generates SQL for every question
+            schema_cache (Optional[SchemaCache]): Schema description of the live database used
+                when no schema is passed, None uses DEFAULT_SCHEMA
+            pruner (Optional[SchemaPruner]): Sends only the part of the schema a question needs
+                with the SQL generation prompt, None sends the whole schema
+        """
+        self.bedrock = bedrock or BedrockRuntimeClient(region_name=region_name)
+        self.model_id = "arn:aws:bedrock:us-east-1:381492244990:inference-profile/us.anthropic.claude-3-5-sonnet-20241022-v2:0"
+        self.db = PostgresDatabase()
+        self.cache = cache
+        self.semantic_cache = semantic_cache
+        self.summarizer = summarizer
+        self.router = router
+        self.schema_cache = schema_cache
+        self.pruner = pruner
+        # SQL generated by the model in this thread, added to the semantic cache once it ran
+        self._generated = threading.local()
+
+    def _invoke_model(self, operation: str, body: Dict[str, Any]) -> str:
+        """
+        Invoke the Claude model and return the text of its reply.
+
+        Args:
+            operation (str): What the call is for, used to label the latency metric
+            body (Dict[str, Any]): Request body
+
+        Returns:
+            str: The model's reply text
+        """
+        start = time.perf_counter()
+        outcome = "error"
+        try:
+            with trace_span(f"bedrock.{operation}"):
+                response_body = self.bedrock.invoke_model(self.model_id, body, operation)
+
+            outcome = "ok"
+            return response_body['content'][0]['text'].strip()
+        finally:
+            BEDROCK_INVOKE_SECONDS.labels(operation, outcome).observe(time.perf_counter() - start)
+
+    def generate_sql(self, text: str, schema: str) -> str:
+        """
+        Generate the SQL for a question, served from the cache when the same question was
+        already asked against the same schema.
+
+        Args:
+            text (str): Natural language description of the desired query
+            schema (str): Database schema information to provide context
+
+        Returns:
+            str: Generated SQL query
+        """
+        if self.cache is None:
+            return self._generate_uncached(text, schema)
+
+        key = SQLCache.key(text, schema)
+
+        def compute():
+            query = self._generate_uncached(text, schema)
+            # Stored by generate_query once the database ran it, so failing SQL isn't replayed
+            self._generated.exact = (key, query)
+            return query
+
+        return self.cache.get_or_compute(key, compute, store=False)
+
+    def _generate_uncached(self, text: str, schema: str) -> str:
+        """
+        Generate the SQL for a question the exact cache doesn't have, reusing the SQL of a
+        similar question from the semantic cache when there is one. New SQL is added to the
+        semantic cache by generate_query, once the database ran it.
+
+        Args:
+            text (str): Natural language description of the desired query
+            schema (str): Database schema information to provide context
+
+        Returns:
+            str: Generated SQL query
+        """
+        if self.semantic_cache is not None:
+            query = self.semantic_cache.lookup(text, schema)
+            if query is not None:
+                return query
+
+        query = self._generate_with_model(text, schema)
+        self._generated.entry = (text, query, schema)
+        return query
+
+    def _generate_with_model(self, text: str, schema: str) -> str:
+        """
+        Ask Claude for the SQL of a question, prompting with the part of the schema the question
+        needs when a pruner is set.
+
+        Args:
+            text (str): Natural language description of the desired query
+            schema (str): Database schema information to provide context
+
+        Returns:
+            str: Generated SQL query
+        """
+        if self.pruner is None:
+            return self._invoke_model("sql_generation", self._sql_generation_body(text, schema))
+
+        selection = self.pruner.select(text, schema)
+        query = self._invoke_model("sql_generation", self._sql_generation_body(text, selection.schema))
+        if not selection.full and not verify_sql(query, parse_schema(selection.schema)):
+            # The pruned schema missed something the question needs, ask again with all of it
+            self.pruner.record_retry(selection)
+            query = self._invoke_model("sql_generation", self._sql_generation_body(text, schema))
+        return query
+
+    def _sql_generation_body(self, text: str, schema: Optional[str]) -> Dict[str, Any]:
+        """
+        Build the request body asking Claude for the SQL of a question.
+
+        Args:
+            text (str): Natural language description of the desired query
+            schema (Optional[str]): Database schema information to provide context
+
+        Returns:
+            Dict[str, Any]: Request body
+        """
         prompt = "You are an expert SQL developer with deep knowledge of relational databases and query optimization.\n"
 
         if schema:
@@ -76,8 +203,7 @@ class SQLQueryGenerator:
             "4. Output only the SQL query—do not include explanations, comments, or extra text."
         )
 
-        # Prepare the request body
-        body = {
+        return {
             "anthropic_version": "bedrock-2023-05-31",
             "max_tokens": 3000,
             "messages": [
@@ -89,61 +215,106 @@ class SQLQueryGenerator:
             "temperature": 0.0  # Use low temperature for more deterministic results
         }
 
-        try:
-            # Invoke Claude model
-            response = self.bedrock.invoke_model(
-                modelId=self.model_id,
-                body=json.dumps(body)
-            )
+    def generate_query(self, text: str, schema: Optional[str] = None) -> str:
+        """
+        Generate an SQL query from natural language text.
+
+        Args:
+            text (str): Natural language description of the desired query
+            schema (Optional[str]): Database schema information to provide context
 
-            # Parse and return the response
-            response_body = json.loads(response.get('body').read())
-            query = response_body['content'][0]['text'].strip()
+        Returns:
+            str: Generated SQL query
+        """
+        if not schema and self.schema_cache is not None:
+            schema = self.schema_cache.get()
+        schema = schema or DEFAULT_SCHEMA
+
+        try:
+            match = self.router.route(text, schema) if self.router is not None else None
+            if match is not None:
+                # Templates are known good and take their values as parameters
+                query, params = match.sql, match.params
+                print(f"SQL Template {match.intent}: ", query, params)
+            else:
+                self._generated.entry = self._generated.exact = None
+                query, params = self.generate_sql(text, schema), None
+                print("SQL Query Generated: ", query)
 
-            print("SQL Query Generated: ", query)
             # Validate the query
             if self.validate_query(query):
-                query_result = self.db.execute_query(query)
-
-                prompt = (
-                    "You are an SQL Analyst. Your job is to explain SQL query results to the user "
-                    "in a clear, friendly, and natural way. Do not repeat or describe the SQL query itself—"
-                    "only focus on summarizing the results in plain language that a non-technical user can understand. Do not return any special character in response. Just a single sentence that describes the output.\n\n"
-                    f"Here is the SQL Query: {query}\n\n"
-                    f"SQL Query Output:\n{query_result}\n"
-                )
-
-                body = {
-                    "anthropic_version": "bedrock-2023-05-31",
-                    "max_tokens": 3000,
-                    "messages": [
-                        {
-                            "role": "user",
-                            "content": prompt
-                        }
-                    ],
-                    "temperature": 0.1
-                }
-
-                try:
-                    response = self.bedrock.invoke_model(
-                        modelId=self.model_id,
-                        body=json.dumps(body)
+                # The caller may have hung up or timed out while the SQL was generated
+                if tool_cancelled():
+                    print("SQL tool call cancelled, skipping the query")
+                    return None
+                query_result = self.db.execute_query(query, params)
+                self._remember_generated()
+
+                if tool_cancelled():
+                    print("SQL tool call cancelled, skipping the summary")
+                    return None
+                if self.summarizer is None:
+                    summary = self._summarize_with_model(query, query_result)
+                else:
+                    # Common result shapes are described locally, saving a model call
+                    summary = self.summarizer.summarize(
+                        text, query, query_result, lambda: self._summarize_with_model(query, query_result)
                     )
+                print("Query Output: ", summary)
+                return summary
 
-                    # Parse and return the response
-                    response_body = json.loads(response.get('body').read())
-                    query_result = response_body['content'][0]['text'].strip()
+        except Exception as e:
+            raise Exception(f"Error generating SQL query: {str(e)}")
+
+    def _remember_generated(self):
+        """
+        Add the SQL generated for the current question to the exact cache, and the SQL the model
+        generated to the semantic cache, now that it is known to run.
+        """
+        exact = getattr(self._generated, "exact", None)
+        entry = getattr(self._generated, "entry", None)
+        self._generated.entry = self._generated.exact = None
+        if exact is not None and self.cache is not None:
+            self.cache.put(*exact)
+        if entry is not None and self.semantic_cache is not None:
+            self.semantic_cache.add(*entry)
+
+    def _summarize_with_model(self, query: str, query_result: List[Dict[str, Any]]) -> str:
+        """
+        Ask Claude for a one sentence summary of a query result.
+
+        Args:
+            query (str): The SQL query that was run
+            query_result (List[Dict[str, Any]]): Query result rows
 
-                    print("Query Output: ", query_result)
-                    return query_result
+        Returns:
+            str: The summary sentence
+        """
+        prompt = (
+            "You are an SQL Analyst. Your job is to explain SQL query results to the user "
+            "in a clear, friendly, and natural way. Do not repeat or describe the SQL query itself—"
+            "only focus on summarizing the results in plain language that a non-technical user can understand. Do not return any special character in response. Just a single sentence that describes the output.\n\n"
+            f"Here is the SQL Query: {query}\n\n"
+            f"SQL Query Output:\n{query_result}\n"
+        )
 
-                except Exception as e:
-                    raise Exception(f"Error invoking Claude model: {str(e)}")
+        body = {
+            "anthropic_version": "bedrock-2023-05-31",
+            "max_tokens": 3000,
+            "messages": [
+                {
+                    "role": "user",
+                    "content": prompt
+                }
+            ],
+            "temperature": 0.1
+        }
 
+        try:
+            return self._invoke_model("summarization", body)
 
         except Exception as e:
-            raise Exception(f"Error generating SQL query: {str(e)}")
+            raise Exception(f"Error invoking Claude model: {str(e)}")
 
     def validate_query(self, query: str) -> bool:
         """
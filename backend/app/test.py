@@ -8,7 +8,7 @@ This module provides a test client for the Virtual Banking Assistant WebSocket s
 It handles real-time audio streaming between the client and server, including:
 - Microphone input capture
 - Audio playback of server responses
-- WebSocket communication with base64 encoding/decoding
+- WebSocket communication with base64 encoding/decoding (or raw PCM in binary mode)
 - Buffer management for smooth audio playback
 
 Usage:
@@ -16,43 +16,74 @@ Usage:
 
 The client will connect to the configured WebSocket server and begin streaming
 audio from the microphone while playing back responses from the server.
+
+PyAudio is only needed for the microphone and speaker. The protocol handling in `AudioClient`
+is reused without it by the headless load generator (load_generator.py).
 """
 
 import asyncio
 import websockets
-import pyaudio
 import json
 import base64
 
+try:
+    import pyaudio
+except ImportError:  # Only needed for the live microphone client
+    pyaudio = None
+
 SAMPLE_RATE = 16000
+# Must match API_KEY in main.py, the server answers with it as the accepted subprotocol
+API_KEY = "Your-own-long-secret-text-to-access-the-api"
+# Offered next to the API key to switch to raw PCM binary frames (see base64_serializer.py)
+BINARY_AUDIO_PROTOCOL = "audio.pcm16"
 
 class AudioClient:
     """Audio client for testing the Virtual Banking Assistant WebSocket server.
-    
+
     Handles bidirectional audio communication with the server, including
-    microphone capture and audio playback.
+    microphone capture and audio playback. Subclasses replace the audio
+    source and sink by overriding `open_audio`, `read_chunk`, `on_audio`
+    and `on_interruption`.
     """
 
-    def __init__(self, 
-        websocket_url="ws://localhost:8000/ws"
+    # Audio parameters matching the server's expectations
+    CHUNK = 480  # 30ms at 16kHz
+    CHANNELS = 1
+    RATE = SAMPLE_RATE
+
+    def __init__(self,
+        websocket_url="ws://localhost:8000/ws",
+        api_key=API_KEY,
+        binary=False
     ):
         """Initialize the audio client.
-        
+
         Args:
             websocket_url: WebSocket server URL to connect to
+            api_key: API key offered as WebSocket subprotocol
+            binary: Send and receive raw PCM binary frames instead of base64 text
         """
         self.websocket_url = websocket_url
+        self.binary = binary
+        self.subprotocols = [api_key] + ([BINARY_AUDIO_PROTOCOL] if binary else [])
+        self.audio = None
+        self.stream = None
+        self.out_stream = None
+
+    @property
+    def chunk_bytes(self):
+        """Size of one audio chunk in bytes (16-bit samples)."""
+        return self.CHUNK * self.CHANNELS * 2
+
+    def open_audio(self):
+        """Open the microphone and speaker streams."""
+        if pyaudio is None:
+            raise RuntimeError("PyAudio is required for the microphone client: pip install pyaudio")
         self.audio = pyaudio.PyAudio()
-        
-        # Audio parameters matching the server's expectations
-        self.CHUNK = 480  # 30ms at 16kHz
-        self.FORMAT = pyaudio.paInt16
-        self.CHANNELS = 1
-        self.RATE = SAMPLE_RATE
-        
+
         # Initialize microphone input stream
         self.stream = self.audio.open(
-            format=self.FORMAT,
+            format=pyaudio.paInt16,
             channels=self.CHANNELS,
             rate=self.RATE,
             input=True,
@@ -60,59 +91,84 @@ class AudioClient:
         )
 
         # Initialize audio output stream
-        CHUNK = 1024
-        FORMAT = pyaudio.paInt16
-        CHANNELS = 1
-        RATE = SAMPLE_RATE
-
         self.out_stream = self.audio.open(
-            format=FORMAT,
-            channels=CHANNELS,
-            rate=RATE,
+            format=pyaudio.paInt16,
+            channels=self.CHANNELS,
+            rate=self.RATE,
             output=True
         )
 
+    def close_audio(self):
+        """Release the audio streams."""
+        if self.stream:
+            self.stream.stop_stream()
+            self.stream.close()
+        if self.out_stream:
+            self.out_stream.close()
+        if self.audio:
+            self.audio.terminate()
+
     def clear_buffer(self):
-        """Clear the audio buffer and stop current playback.
-        
-        This helps manage audio playback and prevent buffer overflow
-        by clearing queued audio data and resetting the output stream.
+        """Stop current playback.
+
+        Flushes the output stream so audio already queued for the
+        speaker isn't played after an interruption.
         """
-        # Clear the queue
-        while not self.audio_buffer.empty():
-            self.audio_buffer.get()
-            
-        # Stop current playback
-        self.is_playing = False
-        
-        # Flush the output stream
         self.out_stream.stop_stream()
         self.out_stream.start_stream()
-        
-    async def process_server_messages(self, websocket):
-        """Handle messages received from the server.
-        
+
+    async def read_chunk(self):
+        """Read the next audio chunk to send.
+
+        Returns:
+            One chunk of 16-bit PCM audio, or None to stop sending
+        """
+        return self.stream.read(self.CHUNK, exception_on_overflow=False)
+
+    def encode_chunk(self, data):
+        """Encode an audio chunk for the wire: raw bytes in binary mode, base64 text otherwise."""
+        if self.binary:
+            return data
+        return base64.b64encode(data).decode('utf-8')
+
+    def on_audio(self, audio_data):
+        """Called with every chunk of audio received from the server."""
+        self.out_stream.write(audio_data)
+
+    def on_interruption(self):
+        """Called when the server interrupts the bot's speech."""
+        print('Interruption')
+        self.clear_buffer()
+
+    def handle_message(self, message):
+        """Dispatch one server message.
+
         Args:
-            websocket: The WebSocket connection to receive messages from
+            message: Text message with a JSON event, or raw PCM bytes in binary mode
 
-        Processes different types of server messages:
+        Handles different types of server messages:
         - 'media': Audio data to play back
         - 'stop': Interruption signal to clear audio buffer
         """
-        try:
-            while True:
-                message = await websocket.recv()
-                message = json.loads(message)
+        if isinstance(message, bytes):
+            self.on_audio(message)
+            return
 
-                if message['event'] == 'media':
-                    # Decode and play audio data
-                    audio_data = base64.b64decode(message['data'])
-                    self.out_stream.write(audio_data)
+        message = json.loads(message)
+        if message['event'] == 'media':
+            self.on_audio(base64.b64decode(message['data']))
+        elif message['event'] == 'stop':
+            self.on_interruption()
 
-                elif message['event'] == 'stop':
-                    print('Interruption')
-                    clear_buffer()
+    async def process_server_messages(self, websocket):
+        """Handle messages received from the server.
 
+        Args:
+            websocket: The WebSocket connection to receive messages from
+        """
+        try:
+            async for message in websocket:
+                self.handle_message(message)
         except websockets.exceptions.ConnectionClosed:
             print("Connection to server closed")
         except Exception as e:
@@ -120,32 +176,36 @@ class AudioClient:
 
     async def send_audio(self, websocket):
         """Capture and send audio data to the server.
-        
+
         Args:
             websocket: The WebSocket connection to send audio through
 
-        Continuously reads from the microphone and sends base64-encoded
-        audio data to the server.
+        Continuously reads audio chunks and sends them encoded
+        for the negotiated mode.
         """
         try:
             while True:
-                # Read audio chunk from microphone
-                data = self.stream.read(self.CHUNK, exception_on_overflow=False)
-                # Encode audio data to base64
-                encoded_data = base64.b64encode(data).decode('utf-8')
-                await websocket.send(encoded_data)
+                data = await self.read_chunk()
+                if data is None:
+                    break
+                await websocket.send(self.encode_chunk(data))
                 await asyncio.sleep(0.01)  # Small delay to prevent overwhelming the server
         except Exception as e:
             print(f"Error sending audio: {e}")
 
+    def connect(self):
+        """Open the WebSocket connection, offering the API key as subprotocol."""
+        return websockets.connect(self.websocket_url, subprotocols=self.subprotocols)
+
     async def run(self):
         """Main client loop.
-        
+
         Establishes WebSocket connection and manages bidirectional
         audio communication with the server.
         """
+        self.open_audio()
         try:
-            async with websockets.connect(self.websocket_url) as websocket:
+            async with self.connect() as websocket:
                 print("Connected to server")
                 await asyncio.gather(
                     self.send_audio(websocket),
@@ -155,13 +215,11 @@ class AudioClient:
             print(f"Connection error: {e}")
         finally:
             # Clean up audio resources
-            self.stream.stop_stream()
-            self.stream.close()
-            self.audio.terminate()
+            self.close_audio()
 
     def start(self):
         """Start the client.
-        
+
         Initializes the WebSocket connection and begins audio streaming.
         Can be interrupted with Ctrl+C.
         """
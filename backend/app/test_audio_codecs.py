@@ -0,0 +1,79 @@
+import unittest
+import warnings
+
+import numpy as np
+
+from audio_codecs import ADPCM, MULAW, PCM16, ImaAdpcmCodec, MuLawCodec, create_codec
+
+with warnings.catch_warnings():
+    warnings.simplefilter("ignore", DeprecationWarning)
+    try:
+        import audioop
+    except ImportError:  # Removed in Python 3.13
+        audioop = None
+
+
+def make_pcm(samples: int, amplitude: float = 6000) -> bytes:
+    rng = np.random.default_rng(0)
+    return (rng.standard_normal(samples) * amplitude).clip(-32768, 32767).astype('<i2').tobytes()
+
+
+class TestAudioCodecs(unittest.TestCase):
+    def test_create_codec(self):
+        self.assertEqual(create_codec(PCM16).encode(b"\x01\x02"), b"\x01\x02")
+        self.assertIsInstance(create_codec(MULAW), MuLawCodec)
+        self.assertIsInstance(create_codec(ADPCM), ImaAdpcmCodec)
+        with self.assertRaises(ValueError):
+            create_codec("opus")
+
+    def test_mulaw_sizes_and_round_trip_error(self):
+        pcm = make_pcm(1600)
+        codec = MuLawCodec()
+        encoded = codec.encode(pcm)
+        self.assertEqual(len(encoded), 1600)
+
+        decoded = np.frombuffer(codec.decode(encoded), dtype='<i2').astype(np.int32)
+        original = np.frombuffer(pcm, dtype='<i2').astype(np.int32)
+        # μ-law keeps the error within a few percent of the sample magnitude
+        self.assertTrue(np.all(np.abs(decoded - original) <= np.abs(original) // 16 + 8))
+
+    @unittest.skipIf(audioop is None, "audioop not available")
+    def test_mulaw_matches_reference(self):
+        every_sample = np.arange(-32768, 32768, dtype='<i2').tobytes()
+        self.assertEqual(MuLawCodec().encode(every_sample), audioop.lin2ulaw(every_sample, 2))
+        every_code = bytes(range(256))
+        self.assertEqual(MuLawCodec().decode(every_code), audioop.ulaw2lin(every_code, 2))
+
+    @unittest.skipIf(audioop is None, "audioop not available")
+    def test_adpcm_matches_reference(self):
+        pcm = make_pcm(3200)
+        encoded = ImaAdpcmCodec().encode(pcm)
+        self.assertEqual(encoded, audioop.lin2adpcm(pcm, 2, None)[0])
+        self.assertEqual(ImaAdpcmCodec().decode(encoded), audioop.adpcm2lin(encoded, 2, None)[0])
+
+    @unittest.skipIf(audioop is None, "audioop not available")
+    def test_adpcm_decode_with_clipping_matches_reference(self):
+        encoded = audioop.lin2adpcm(make_pcm(3200, amplitude=30000), 2, None)[0]
+        self.assertEqual(ImaAdpcmCodec().decode(encoded), audioop.adpcm2lin(encoded, 2, None)[0])
+
+    def test_adpcm_streaming_matches_one_shot(self):
+        pcm = make_pcm(3200)
+        streaming = ImaAdpcmCodec()
+        # Odd-sized chunks exercise the pending sample carried between calls
+        chunks = [streaming.encode(pcm[i:i + 962]) for i in range(0, len(pcm), 962)]
+        self.assertEqual(b"".join(chunks), ImaAdpcmCodec().encode(pcm))
+
+        decoder = ImaAdpcmCodec()
+        decoded = b"".join(decoder.decode(chunk) for chunk in chunks)
+        self.assertEqual(decoded, ImaAdpcmCodec().decode(b"".join(chunks)))
+
+    def test_adpcm_reset(self):
+        pcm = make_pcm(320)
+        codec = ImaAdpcmCodec()
+        first = codec.encode(pcm)
+        codec.reset()
+        self.assertEqual(codec.encode(pcm), first)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,61 @@
+import asyncio
+import unittest
+
+from pipecat.frames.frames import (
+    StartInterruptionFrame,
+    StopInterruptionFrame,
+    TTSAudioRawFrame,
+    TTSStoppedFrame,
+)
+from pipecat.tests.utils import run_test
+
+from audio_packetizer import AudioTailPadder, packet_ms_from_subprotocols
+
+SAMPLE_RATE = 16000
+BYTES_PER_10MS = SAMPLE_RATE // 100 * 2
+
+
+def tts_audio(ms: int) -> TTSAudioRawFrame:
+    return TTSAudioRawFrame(audio=b"\x01\x00" * (SAMPLE_RATE * ms // 1000), sample_rate=SAMPLE_RATE, num_channels=1)
+
+
+class TestAudioTailPadder(unittest.TestCase):
+    def test_passes_audio_through_unchanged(self):
+        frames = [tts_audio(10) for _ in range(8)]
+        down, _ = asyncio.run(run_test(
+            AudioTailPadder(packet_ms=80),
+            frames_to_send=frames + [TTSStoppedFrame()],
+            expected_down_frames=[TTSAudioRawFrame] * 8 + [TTSStoppedFrame],
+        ))
+        self.assertTrue(all(len(frame.audio) == BYTES_PER_10MS for frame in down[:8]))
+
+    def test_pads_the_tail_of_the_turn(self):
+        down, _ = asyncio.run(run_test(
+            AudioTailPadder(packet_ms=40),
+            frames_to_send=[tts_audio(50), tts_audio(20), TTSStoppedFrame()],
+            expected_down_frames=[TTSAudioRawFrame, TTSAudioRawFrame, TTSAudioRawFrame, TTSStoppedFrame],
+        ))
+        # 70 ms of speech, 10 ms of silence complete the second packet
+        self.assertEqual(down[2].audio, bytes(BYTES_PER_10MS))
+
+    def test_interruption_resets_the_tail(self):
+        down, _ = asyncio.run(run_test(
+            AudioTailPadder(packet_ms=40),
+            frames_to_send=[
+                tts_audio(30), StartInterruptionFrame(), StopInterruptionFrame(), tts_audio(10), TTSStoppedFrame()
+            ],
+            expected_down_frames=[
+                StartInterruptionFrame, StopInterruptionFrame, TTSAudioRawFrame, TTSAudioRawFrame, TTSStoppedFrame
+            ],
+        ))
+        self.assertEqual(down[3].audio, bytes(3 * BYTES_PER_10MS))
+
+    def test_packet_ms_from_subprotocols(self):
+        self.assertEqual(packet_ms_from_subprotocols("key, audio.packet.120", 40), 120)
+        self.assertEqual(packet_ms_from_subprotocols("key, audio.packet.15", 40), 40)
+        self.assertEqual(packet_ms_from_subprotocols("key, audio.packet.abc", 40), 40)
+        self.assertEqual(packet_ms_from_subprotocols(None, 40), 40)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,120 @@
+import asyncio
+import base64
+import json
+import unittest
+
+from pipecat.frames.frames import (
+    InputAudioRawFrame,
+    OutputAudioRawFrame,
+    StartFrame,
+    StartInterruptionFrame,
+)
+from pipecat.serializers.base_serializer import FrameSerializerType
+
+from audio_codecs import ADPCM, MULAW, MuLawCodec, ImaAdpcmCodec
+from base64_serializer import BINARY_AUDIO_PROTOCOL, Base64AudioSerializer
+
+PCM = bytes(range(256)) * 4
+
+
+def make_serializer(**kwargs) -> Base64AudioSerializer:
+    serializer = Base64AudioSerializer(Base64AudioSerializer.InputParams(**kwargs))
+    asyncio.run(serializer.setup(StartFrame(audio_in_sample_rate=16000)))
+    return serializer
+
+
+class TestBase64AudioSerializer(unittest.TestCase):
+    def test_text_mode_round_trip(self):
+        serializer = make_serializer()
+        self.assertEqual(serializer.type, FrameSerializerType.TEXT)
+
+        payload = asyncio.run(serializer.serialize(
+            OutputAudioRawFrame(audio=PCM, sample_rate=16000, num_channels=1)
+        ))
+        message = json.loads(payload)
+        self.assertEqual(message["event"], "media")
+        self.assertEqual(base64.b64decode(message["data"]), PCM)
+
+        frame = asyncio.run(serializer.deserialize(base64.b64encode(PCM).decode()))
+        self.assertIsInstance(frame, InputAudioRawFrame)
+        self.assertEqual(frame.audio, PCM)
+
+    def test_binary_mode_round_trip(self):
+        serializer = make_serializer(binary=True)
+        self.assertEqual(serializer.type, FrameSerializerType.BINARY)
+
+        payload = asyncio.run(serializer.serialize(
+            OutputAudioRawFrame(audio=PCM, sample_rate=16000, num_channels=1)
+        ))
+        self.assertEqual(payload, PCM)
+
+        frame = asyncio.run(serializer.deserialize(PCM))
+        self.assertIsInstance(frame, InputAudioRawFrame)
+        self.assertEqual(frame.audio, PCM)
+
+    def test_binary_mode_does_not_copy_audio(self):
+        serializer = make_serializer(binary=True)
+        frame = asyncio.run(serializer.deserialize(PCM))
+        self.assertIs(frame.audio, PCM)
+
+    def test_odd_length_audio_is_rejected(self):
+        serializer = make_serializer(binary=True)
+        self.assertIsNone(asyncio.run(serializer.deserialize(PCM[:-1])))
+
+    def test_binary_mode_keeps_text_control_events(self):
+        serializer = make_serializer(binary=True)
+        payload = asyncio.run(serializer.serialize(StartInterruptionFrame()))
+        self.assertEqual(json.loads(payload), {"event": "stop"})
+
+    def test_binary_mode_accepts_legacy_base64_text(self):
+        serializer = make_serializer(binary=True)
+        frame = asyncio.run(serializer.deserialize(base64.b64encode(PCM).decode()))
+        self.assertEqual(frame.audio, PCM)
+
+    def test_params_from_subprotocols(self):
+        params = Base64AudioSerializer.InputParams.from_subprotocols(f"api-key, {BINARY_AUDIO_PROTOCOL}")
+        self.assertTrue(params.binary)
+        self.assertFalse(Base64AudioSerializer.InputParams.from_subprotocols("api-key").binary)
+        self.assertFalse(Base64AudioSerializer.InputParams.from_subprotocols(None).binary)
+
+    def test_params_from_subprotocols_with_codec_and_rate(self):
+        params = Base64AudioSerializer.InputParams.from_subprotocols(
+            f"api-key, {BINARY_AUDIO_PROTOCOL}, audio.codec.mulaw, audio.rate.8000"
+        )
+        self.assertEqual(params.codec, MULAW)
+        self.assertEqual(params.target_sample_rate, 8000)
+
+        params = Base64AudioSerializer.InputParams.from_subprotocols("api-key, audio.codec.opus, audio.rate.11")
+        self.assertEqual(params.codec, "pcm16")
+        self.assertEqual(params.target_sample_rate, 16000)
+
+    def test_mulaw_codec_round_trip(self):
+        serializer = make_serializer(binary=True, codec=MULAW)
+        payload = asyncio.run(serializer.serialize(
+            OutputAudioRawFrame(audio=PCM, sample_rate=16000, num_channels=1)
+        ))
+        self.assertEqual(payload, MuLawCodec().encode(PCM))
+
+        frame = asyncio.run(serializer.deserialize(payload))
+        self.assertEqual(frame.audio, MuLawCodec().decode(payload))
+        self.assertEqual(frame.sample_rate, 16000)
+
+    def test_adpcm_codec_in_text_mode(self):
+        serializer = make_serializer(codec=ADPCM)
+        payload = asyncio.run(serializer.serialize(
+            OutputAudioRawFrame(audio=PCM, sample_rate=16000, num_channels=1)
+        ))
+        encoded = base64.b64decode(json.loads(payload)["data"])
+        self.assertEqual(len(encoded), len(PCM) // 4)
+
+        frame = asyncio.run(serializer.deserialize(base64.b64encode(encoded).decode()))
+        self.assertEqual(frame.audio, ImaAdpcmCodec().decode(encoded))
+
+    def test_codec_with_lower_wire_rate_is_resampled(self):
+        serializer = make_serializer(binary=True, codec=MULAW, target_sample_rate=8000)
+        frame = asyncio.run(serializer.deserialize(bytes(1600)))
+        self.assertEqual(frame.sample_rate, 16000)
+
+
+if __name__ == '__main__':
+    unittest.main()
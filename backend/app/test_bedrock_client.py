@@ -0,0 +1,57 @@
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from bedrock_client import BedrockError, BedrockRuntimeClient
+from bench_bedrock_client import BODY, MODEL_ID, StandInBedrock, stand_in_session
+
+
+class TestBedrockRuntimeClient(unittest.TestCase):
+    def setUp(self):
+        self.stand_in = StandInBedrock(latency_secs=0.01, reply="SELECT 1")
+        self.stand_in.start()
+
+    def tearDown(self):
+        self.stand_in.stop()
+
+    def client(self, **kwargs) -> BedrockRuntimeClient:
+        return BedrockRuntimeClient(endpoint_url=self.stand_in.url, session=stand_in_session(), sleep=lambda secs: None, **kwargs)
+
+    def test_invokes_signed_requests(self):
+        client = self.client()
+        self.assertEqual(client.invoke_model(MODEL_ID, BODY)["content"][0]["text"], "SELECT 1")
+        self.assertEqual((self.stand_in.requests, self.stand_in.signed), (1, 1))
+
+    def test_concurrent_calls_share_the_connection_pool(self):
+        client = self.client(max_connections=20)
+        with ThreadPoolExecutor(max_workers=20) as pool:
+            for _ in range(3):
+                list(pool.map(lambda _: client.invoke_model(MODEL_ID, BODY), range(20)))
+        client.close()
+        self.assertEqual(self.stand_in.requests, 60)
+        self.assertLessEqual(self.stand_in.connections, 20)
+
+    def test_retries_throttling_within_attempts(self):
+        client = self.client(max_attempts=3)
+        self.stand_in.failures = [(429, "ThrottlingException")] * 2
+        self.assertEqual(client.invoke_model(MODEL_ID, BODY)["content"][0]["text"], "SELECT 1")
+
+        self.stand_in.failures = [(503, "ServiceUnavailableException")] * 3
+        with self.assertRaises(BedrockError) as raised:
+            client.invoke_model(MODEL_ID, BODY)
+        self.assertEqual(raised.exception.code, "ServiceUnavailableException")
+        self.assertEqual(self.stand_in.requests, 6)
+
+    def test_does_not_retry_client_errors_or_past_the_budget(self):
+        self.stand_in.failures = [(400, "ValidationException")]
+        with self.assertRaises(BedrockError) as raised:
+            self.client().invoke_model(MODEL_ID, BODY)
+        self.assertEqual((raised.exception.code, raised.exception.status), ("ValidationException", 400))
+
+        self.stand_in.failures = [(429, "ThrottlingException")]
+        with self.assertRaises(BedrockError):
+            self.client(latency_budget_secs=0).invoke_model(MODEL_ID, BODY)
+        self.assertEqual(self.stand_in.requests, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,190 @@
+import asyncio
+import threading
+import unittest
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import boto3
+from botocore.config import Config
+
+from credential_provider import AWSCredentials, CredentialProvider, create_default_fetcher, create_sts_fetcher
+
+STS_RESPONSE = """<GetSessionTokenResponse xmlns="https://sts.amazonaws.com/doc/2011-06-15/">
+  <GetSessionTokenResult>
+    <Credentials>
+      <AccessKeyId>AKIDSTUB{count}</AccessKeyId>
+      <SecretAccessKey>secret{count}</SecretAccessKey>
+      <SessionToken>token{count}</SessionToken>
+      <Expiration>{expiration}</Expiration>
+    </Credentials>
+  </GetSessionTokenResult>
+  <ResponseMetadata><RequestId>stub</RequestId></ResponseMetadata>
+</GetSessionTokenResponse>"""
+
+
+class StubSTS(ThreadingHTTPServer):
+    """Local stand-in for the STS GetSessionToken API."""
+
+    def __init__(self, lifetime_secs: float):
+        super().__init__(("127.0.0.1", 0), StubSTSHandler)
+        self.lifetime_secs = lifetime_secs
+        self.requests = 0
+        self.fail = False
+
+    @property
+    def endpoint(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+
+class StubSTSHandler(BaseHTTPRequestHandler):
+    def do_POST(self):
+        self.rfile.read(int(self.headers["Content-Length"]))
+        self.server.requests += 1
+        if self.server.fail:
+            self.send_response(500)
+            self.end_headers()
+            return
+
+        expiration = datetime.now(timezone.utc) + timedelta(seconds=self.server.lifetime_secs)
+        body = STS_RESPONSE.format(
+            count=self.server.requests,
+            expiration=expiration.strftime("%Y-%m-%dT%H:%M:%S.%fZ"),
+        ).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/xml")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class TestCredentialProvider(unittest.TestCase):
+    def start_stub(self, lifetime_secs: float) -> StubSTS:
+        stub = StubSTS(lifetime_secs)
+        threading.Thread(target=stub.serve_forever, daemon=True).start()
+        self.addCleanup(stub.server_close)
+        self.addCleanup(stub.shutdown)
+        return stub
+
+    def create_provider(self, stub: StubSTS, **kwargs) -> CredentialProvider:
+        sts_client = boto3.client(
+            "sts",
+            endpoint_url=stub.endpoint,
+            region_name="us-east-1",
+            aws_access_key_id="test",
+            aws_secret_access_key="test",
+            config=Config(retries={"total_max_attempts": 1}),
+        )
+        return CredentialProvider(create_sts_fetcher(sts_client), **kwargs)
+
+    def test_caches_credentials(self):
+        stub = self.start_stub(lifetime_secs=3600)
+        provider = self.create_provider(stub)
+
+        async def run():
+            await provider.start()
+            try:
+                return [provider.current() for _ in range(10)]
+            finally:
+                await provider.stop()
+
+        snapshots = asyncio.run(run())
+        self.assertEqual(stub.requests, 1)
+        self.assertTrue(all(snapshot is snapshots[0] for snapshot in snapshots))
+        self.assertEqual(snapshots[0].access_key_id, "AKIDSTUB1")
+        self.assertEqual(snapshots[0].session_token, "token1")
+        self.assertGreater(snapshots[0].expires_in(), 3500)
+
+    def test_refreshes_before_expiration(self):
+        stub = self.start_stub(lifetime_secs=2)
+        provider = self.create_provider(stub, refresh_margin_secs=1.7, retry_secs=0.1)
+
+        async def run():
+            await provider.start()
+            first = provider.current()
+            await asyncio.sleep(0.6)
+            second = provider.current()
+            await provider.stop()
+            return first, second
+
+        first, second = asyncio.run(run())
+        self.assertEqual(first.access_key_id, "AKIDSTUB1")
+        self.assertEqual(second.access_key_id, "AKIDSTUB2")
+        # The old snapshot is untouched
+        self.assertEqual(first.session_token, "token1")
+
+    def test_keeps_serving_cached_credentials_when_refresh_fails(self):
+        stub = self.start_stub(lifetime_secs=2)
+        provider = self.create_provider(stub, refresh_margin_secs=1.8, retry_secs=0.1)
+
+        async def run():
+            await provider.start()
+            stub.fail = True
+            await asyncio.sleep(0.5)
+            cached = provider.current()
+            stub.fail = False
+            await asyncio.sleep(0.3)
+            refreshed = provider.current()
+            await provider.stop()
+            return cached, refreshed
+
+        cached, refreshed = asyncio.run(run())
+        self.assertEqual(cached.access_key_id, "AKIDSTUB1")
+        self.assertGreater(provider.failure_count, 0)
+        self.assertNotEqual(refreshed.access_key_id, "AKIDSTUB1")
+
+    def test_default_chain_credentials(self):
+        stub = self.start_stub(lifetime_secs=3600)
+
+        # Temporary credentials, like the ECS task role, are used without asking STS
+        role = boto3.Session(aws_access_key_id="ASIAROLE", aws_secret_access_key="s", aws_session_token="role-token")
+        credentials = create_default_fetcher(role, sts_client=boto3.client(
+            "sts", endpoint_url=stub.endpoint, region_name="us-east-1"))()
+        self.assertEqual((credentials.access_key_id, credentials.session_token), ("ASIAROLE", "role-token"))
+        self.assertEqual(stub.requests, 0)
+
+        # Long-term keys get a session token, and are used as they are while STS fails
+        keys = boto3.Session(aws_access_key_id="AKIAKEYS", aws_secret_access_key="s", region_name="us-east-1")
+        fetch = create_default_fetcher(keys, sts_client=boto3.client(
+            "sts", endpoint_url=stub.endpoint, region_name="us-east-1", aws_access_key_id="AKIAKEYS",
+            aws_secret_access_key="s", config=Config(retries={"total_max_attempts": 1})))
+        self.assertEqual(fetch().session_token, "token1")
+        stub.fail = True
+        credentials = fetch()
+        self.assertEqual((credentials.access_key_id, credentials.session_token), ("AKIAKEYS", None))
+        self.assertLessEqual(credentials.expires_in(), 0)
+
+    def test_start_survives_a_failed_first_load(self):
+        stub = self.start_stub(lifetime_secs=3600)
+        stub.fail = True
+        provider = self.create_provider(stub, retry_secs=0.1)
+
+        async def run():
+            await provider.start()
+            with self.assertRaises(RuntimeError):
+                provider.current()
+            stub.fail = False
+            await asyncio.sleep(0.3)
+            credentials = provider.current()
+            await provider.stop()
+            return credentials
+
+        self.assertEqual(asyncio.run(run()).session_token, f"token{stub.requests}")
+        self.assertEqual(provider.failure_count, 1)
+
+    def test_current_requires_start(self):
+        provider = CredentialProvider(fetch=lambda: None)
+        with self.assertRaises(RuntimeError):
+            provider.current()
+
+    def test_snapshot_is_immutable_and_hides_secrets(self):
+        credentials = AWSCredentials("id", "secret", "token", datetime.now(timezone.utc))
+        with self.assertRaises(AttributeError):
+            credentials.session_token = "other"
+        self.assertNotIn("secret", repr(credentials))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,113 @@
+import asyncio
+import time
+import unittest
+
+from pipecat.frames.frames import (
+    FunctionCallInProgressFrame,
+    FunctionCallResultFrame,
+    FunctionCallsStartedFrame,
+    InputAudioRawFrame,
+    LLMFullResponseEndFrame,
+    LLMFullResponseStartFrame,
+    StartInterruptionFrame,
+    TranscriptionFrame,
+    TTSAudioRawFrame,
+    TTSStartedFrame,
+    TTSStoppedFrame,
+    TTSTextFrame,
+    UserStartedSpeakingFrame,
+    UserStoppedSpeakingFrame,
+)
+from pipecat.tests.utils import SleepFrame, run_test
+
+from fake_llm import FakeSpeechLLMService, fake_sql_tool
+
+REPLY = [LLMFullResponseStartFrame, TTSStartedFrame, TTSTextFrame]
+REPLY_END = [TTSStoppedFrame, LLMFullResponseEndFrame]
+
+
+def caller_turn(chunks=5):
+    audio = [InputAudioRawFrame(audio=bytes(640), sample_rate=16000, num_channels=1) for _ in range(chunks)]
+    return [UserStartedSpeakingFrame(), *audio, UserStoppedSpeakingFrame()]
+
+
+def fake(**kwargs):
+    params = dict(ttfb_secs=0.05, response_secs=0.2, chunk_ms=40, real_time_factor=0.5)
+    params.update(kwargs)
+    return FakeSpeechLLMService(params=FakeSpeechLLMService.InputParams(**params))
+
+
+class TestFakeSpeechLLMService(unittest.TestCase):
+    def test_answers_each_turn_with_paced_audio(self):
+        llm = fake()
+        down, _ = asyncio.run(run_test(
+            llm,
+            frames_to_send=[*caller_turn(), SleepFrame(0.4)],
+            expected_down_frames=[
+                UserStartedSpeakingFrame,
+                UserStoppedSpeakingFrame,
+                TranscriptionFrame,
+                *REPLY,
+                *[TTSAudioRawFrame] * 5,
+                *REPLY_END,
+            ],
+        ))
+        self.assertEqual(len(down[3 + len(REPLY)].audio), 1280)
+        self.assertEqual(llm.stats()["replies"], 1)
+        self.assertEqual(llm.stats()["input_audio_bytes"], 5 * 640)
+
+    def test_interruption_stops_the_reply(self):
+        llm = fake(response_secs=2)
+        down, _ = asyncio.run(run_test(
+            llm,
+            frames_to_send=[*caller_turn(), SleepFrame(0.15), StartInterruptionFrame(), SleepFrame(0.2)],
+            expected_down_frames=None,
+        ))
+        self.assertEqual(llm.interrupted, 1)
+        self.assertEqual(llm.replies, 0)
+
+    def test_calls_the_sql_tool_on_schedule(self):
+        llm = fake(tool_call_every=2)
+        questions = []
+
+        async def handler(params):
+            questions.append(params.arguments["text"])
+            await params.result_callback({"response": "SELECT 1"})
+
+        llm.register_function("generate_sql_query", handler)
+        down, _ = asyncio.run(run_test(
+            llm,
+            frames_to_send=[*caller_turn(), SleepFrame(0.4), *caller_turn(), SleepFrame(0.5)],
+            expected_down_frames=[
+                UserStartedSpeakingFrame,
+                UserStoppedSpeakingFrame,
+                TranscriptionFrame,
+                *REPLY,
+                *[TTSAudioRawFrame] * 5,
+                *REPLY_END,
+                UserStartedSpeakingFrame,
+                UserStoppedSpeakingFrame,
+                # System frame, overtakes the queued transcription
+                FunctionCallsStartedFrame,
+                TranscriptionFrame,
+                FunctionCallInProgressFrame,
+                FunctionCallResultFrame,
+                *REPLY,
+                *[TTSAudioRawFrame] * 5,
+                *REPLY_END,
+            ],
+        ))
+        self.assertEqual(len(questions), 1)
+        self.assertEqual(llm.tool_calls, 1)
+        self.assertEqual(llm.replies, 2)
+
+    def test_stub_sql_tool_blocks_like_the_real_one(self):
+        tool = fake_sql_tool(latency_secs=0.05)
+        start = time.monotonic()
+        result = tool({"text": "How many orders are pending?"})
+        self.assertGreaterEqual(time.monotonic() - start, 0.05)
+        self.assertIn("How many orders are pending?", result["response"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,52 @@
+import asyncio
+import signal
+import unittest
+from types import SimpleNamespace
+
+import uvicorn
+
+from graceful_shutdown import DrainingServer
+from session_manager import SessionManager
+
+
+class TestDrainingServer(unittest.TestCase):
+    def test_sigterm_drains_before_exiting(self):
+        manager = SessionManager(max_sessions=1)
+        app = SimpleNamespace(state=SimpleNamespace(session_manager=manager))
+        server = DrainingServer(uvicorn.Config(app=app), drain_timeout_secs=1)
+
+        async def session():
+            async with manager.admit():
+                await asyncio.sleep(0.2)
+
+        async def run():
+            running = asyncio.create_task(session())
+            await asyncio.sleep(0.01)
+            server.handle_exit(signal.SIGTERM, None)
+            # Still serving while the session finishes
+            self.assertFalse(server.should_exit)
+            self.assertTrue(manager.draining)
+            await running
+            result = await asyncio.wait_for(manager.start_drain(timeout_secs=1), 5)
+            self.assertTrue(result["drained"])
+            await asyncio.sleep(0)
+            return server.should_exit
+
+        self.assertTrue(asyncio.run(run()))
+
+    def test_second_signal_exits_right_away(self):
+        manager = SessionManager(max_sessions=1)
+        app = SimpleNamespace(state=SimpleNamespace(session_manager=manager))
+        server = DrainingServer(uvicorn.Config(app=app), drain_timeout_secs=60)
+
+        async def run():
+            async with manager.admit():
+                server.handle_exit(signal.SIGTERM, None)
+                server.handle_exit(signal.SIGINT, None)
+                return server.should_exit
+
+        self.assertTrue(asyncio.run(run()))
+
+
+if __name__ == '__main__':
+    unittest.main()
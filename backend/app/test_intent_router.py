@@ -0,0 +1,92 @@
+import unittest
+from datetime import datetime
+
+from intent_router import IntentRouter, extract_slots
+from sql_generator import DEFAULT_SCHEMA
+
+NOW = datetime(2025, 3, 12, 10, 30)
+
+
+class TestIntentRouter(unittest.TestCase):
+    def setUp(self):
+        self.router = IntentRouter(clock=lambda: NOW)
+
+    def test_routes_common_questions_to_templates(self):
+        cases = [
+            ("What's the status of order 1234?", "order_status", {"order_id": 1234}),
+            ("How many orders are pending?", "order_count", {"order_status": "pending"}),
+            ("Show me orders by status", "orders_by_status", {}),
+            ("What are the last three payments?", "recent_payments", {"limit": 3}),
+            ("How many failed payments by credit card?", "payment_count",
+             {"payment_status": "failed", "payment_method": "credit_card"}),
+            ("What is the total amount of payments?", "payment_total", {"payment_status": "success"}),
+            ("Who are the top 10 customers by spending?", "customer_totals", {"limit": 10}),
+            ("Which customers spent the most?", "customer_totals", {"limit": 5}),
+            ("Show the latest pending orders", "recent_orders", {"limit": 5, "order_status": "pending"}),
+            ("How much has jane@example.com spent?", "customer_spend", {"email": "jane@example.com"}),
+        ]
+        for question, intent, params in cases:
+            match = self.router.route(question, DEFAULT_SCHEMA)
+            self.assertIsNotNone(match, question)
+            self.assertEqual((match.intent, match.params), (intent, params), question)
+            self.assertNotIn("'", match.sql)
+
+    def test_extracts_periods(self):
+        cases = [
+            ("orders yesterday", (datetime(2025, 3, 11), datetime(2025, 3, 12))),
+            ("orders last week", (datetime(2025, 3, 3), datetime(2025, 3, 10))),
+            ("orders this month", (datetime(2025, 3, 1), datetime(2025, 4, 1))),
+            ("orders in the last 7 days", (datetime(2025, 3, 5), datetime(2025, 3, 13))),
+            ("orders in december", (datetime(2024, 12, 1), datetime(2025, 1, 1))),
+            ("orders in january 2025", (datetime(2025, 1, 1), datetime(2025, 2, 1))),
+            ("orders in may", (datetime(2024, 5, 1), datetime(2024, 6, 1))),
+            ("orders may 2024", (datetime(2024, 5, 1), datetime(2024, 6, 1))),
+        ]
+        for text, period in cases:
+            slots, rest = extract_slots(text, NOW)
+            self.assertEqual(slots.values["period"], period, text)
+            self.assertEqual(rest.split(), ["orders"], text)
+
+        # The modal "may" isn't a month
+        slots, rest = extract_slots("how many orders may be pending", NOW)
+        self.assertNotIn("period", slots.values)
+        self.assertIsNone(self.router.route("How many orders may be pending?", DEFAULT_SCHEMA))
+
+        match = self.router.route("How many customers signed up last month?")
+        self.assertEqual(match.intent, "customer_count")
+        self.assertEqual((match.params["since"], match.params["until"]), (datetime(2025, 2, 1), datetime(2025, 3, 1)))
+
+    def test_falls_back_when_unsure(self):
+        for question in [
+            "How many orders did John place?",
+            "What is the average order value?",
+            "How many pending or processing orders are there?",
+            "Total payments per customer",
+            "Tell me a joke about orders",
+            # A payment status that orders don't have
+            "How many orders failed?",
+            # Lists without a limit or a listing word would be cut to the default limit
+            "Show me the pending orders",
+            "Total spending per customer",
+        ]:
+            self.assertIsNone(self.router.route(question, DEFAULT_SCHEMA), question)
+
+    def test_checks_templates_against_the_schema(self):
+        question = "How many orders are pending?"
+        self.assertIsNotNone(self.router.route(question, DEFAULT_SCHEMA))
+        renamed = DEFAULT_SCHEMA.replace("- status (", "- order_status (", 1)
+        self.assertIsNone(self.router.route(question, renamed))
+
+    def test_reports_hit_rate(self):
+        self.router.route("How many orders are pending?")
+        self.router.route("Show recent payments")
+        self.router.route("How many orders did John place?")
+        self.assertEqual(self.router.stats(), {
+            "routed": {"order_count": 1, "recent_payments": 1},
+            "fallbacks": 1,
+            "hit_rate": 0.667,
+        })
+
+
+if __name__ == '__main__':
+    unittest.main()
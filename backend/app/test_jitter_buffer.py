@@ -0,0 +1,59 @@
+import unittest
+
+from jitter_buffer import InboundJitterBuffer
+
+SAMPLE_RATE = 16000
+FRAME_BYTES = SAMPLE_RATE * 20 // 1000 * 2
+
+
+def audio(ms: int) -> bytes:
+    return b"\x01\x00" * (SAMPLE_RATE * ms // 1000)
+
+
+class TestInboundJitterBuffer(unittest.TestCase):
+    def test_reslices_irregular_chunks(self):
+        buffer = InboundJitterBuffer(SAMPLE_RATE, frame_ms=20, target_ms=20)
+        # 480-sample chunks from the test client are 30 ms
+        for _ in range(4):
+            buffer.push(audio(30))
+        self.assertEqual(buffer.depth, 6)
+
+        frames = [buffer.pop() for _ in range(6)]
+        self.assertTrue(all(len(frame) == FRAME_BYTES for frame in frames))
+
+    def test_waits_for_target_depth(self):
+        buffer = InboundJitterBuffer(SAMPLE_RATE, frame_ms=20, target_ms=60)
+        buffer.push(audio(40))
+        self.assertIsNone(buffer.pop())
+        buffer.push(audio(20))
+        self.assertIsNotNone(buffer.pop())
+        self.assertEqual(buffer.depth, 2)
+
+    def test_counts_underruns_once_per_starvation(self):
+        buffer = InboundJitterBuffer(SAMPLE_RATE, frame_ms=20, target_ms=20)
+        buffer.push(audio(20))
+        self.assertIsNotNone(buffer.pop())
+        self.assertIsNone(buffer.pop())
+        self.assertIsNone(buffer.pop())
+        self.assertEqual(buffer.underruns, 1)
+
+    def test_drops_oldest_frames_on_overrun(self):
+        buffer = InboundJitterBuffer(SAMPLE_RATE, frame_ms=20, target_ms=20, max_ms=100)
+        # Eight frames, each filled with its own number
+        buffer.push(b"".join(bytes([i, 0]) * (FRAME_BYTES // 2) for i in range(8)))
+        self.assertEqual(buffer.depth, 5)
+        self.assertEqual(buffer.overruns, 3)
+        self.assertEqual(buffer.stats()["depth_ms"], 100)
+        self.assertEqual([buffer.pop()[0] for _ in range(5)], [3, 4, 5, 6, 7])
+
+    def test_reset(self):
+        buffer = InboundJitterBuffer(SAMPLE_RATE, frame_ms=20)
+        buffer.push(audio(50))
+        buffer.reset()
+        self.assertEqual(buffer.depth, 0)
+        buffer.push(audio(10))
+        self.assertEqual(buffer.depth, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
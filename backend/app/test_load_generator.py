@@ -0,0 +1,123 @@
+import asyncio
+import base64
+import json
+import os
+import tempfile
+import unittest
+import wave
+
+import numpy as np
+import websockets
+
+from load_generator import LoadClient, TalkPattern, load_audio, run_load
+from test import API_KEY, SAMPLE_RATE
+
+CHUNK_BYTES = 960
+REPLY_CHUNKS = 20
+
+
+def speech(secs):
+    t = np.arange(int(secs * SAMPLE_RATE)) / SAMPLE_RATE
+    return (8000 * np.sin(2 * np.pi * 220 * t)).astype("<i2").tobytes()
+
+
+async def stand_in_bot(websocket):
+    """Answers every caller turn with 30 ms chunks of audio and stops when talked over."""
+    talking = False
+    reply = None
+
+    async def answer():
+        for _ in range(REPLY_CHUNKS):
+            await websocket.send(json.dumps({"event": "media", "data": base64.b64encode(speech(0.03)).decode()}))
+            await asyncio.sleep(0.03)
+
+    try:
+        async for message in websocket:
+            loud = np.abs(np.frombuffer(base64.b64decode(message), dtype="<i2")).max() > 1000
+            if loud and reply and not reply.done():
+                reply.cancel()
+                await websocket.send(json.dumps({"event": "stop"}))
+            if talking and not loud:
+                reply = asyncio.create_task(answer())
+            talking = loud
+    except websockets.exceptions.ConnectionClosed:
+        pass
+
+
+async def reject(websocket):
+    await websocket.close(code=1013, reason="at capacity")
+
+
+class TestLoadGenerator(unittest.TestCase):
+    def run_against(self, handler, **kwargs):
+        async def run():
+            async with websockets.serve(handler, "127.0.0.1", 0, subprotocols=[API_KEY]) as server:
+                port = server.sockets[0].getsockname()[1]
+                return await run_load(f"ws://127.0.0.1:{port}/ws", [speech(0.3)], arrival_rate=50, seed=1, **kwargs)
+
+        return asyncio.run(run())
+
+    def test_records_turn_timings(self):
+        pattern = TalkPattern(turns=2, talk_secs=0.2, silence_secs=0.9, jitter=0, tail_secs=0.5)
+        report = self.run_against(stand_in_bot, sessions=3, pattern=pattern)
+
+        self.assertEqual(report["completed"], 3)
+        self.assertEqual(report["peak_concurrent"], 3)
+        self.assertEqual(report["connect_ms"]["count"], 3)
+        self.assertEqual(report["first_audio_ms"]["count"], 3)
+        self.assertEqual(report["response_ms"]["count"], 6)
+        self.assertLess(report["response_ms"]["p50"], 200)
+        self.assertEqual(report["barge_in_ms"]["count"], 0)
+        for result in report["results"]:
+            self.assertEqual(result["audio_received_bytes"], 2 * REPLY_CHUNKS * CHUNK_BYTES)
+
+    def test_measures_barge_in(self):
+        pattern = TalkPattern(turns=2, talk_secs=0.2, silence_secs=2, jitter=0, barge_in_ms=150, tail_secs=0.5)
+        report = self.run_against(stand_in_bot, sessions=2, pattern=pattern)
+
+        self.assertEqual(report["barge_in_ms"]["count"], 2)
+        self.assertEqual(report["barge_in_missed"], 0)
+        self.assertLess(report["barge_in_ms"]["max"], 200)
+        # The first reply is cut short by the barge-in
+        for result in report["results"]:
+            self.assertLess(result["audio_received_bytes"], 2 * REPLY_CHUNKS * CHUNK_BYTES)
+
+    def test_counts_rejected_sessions(self):
+        report = self.run_against(reject, sessions=2, pattern=TalkPattern(turns=1, talk_secs=0.2, silence_secs=0.2))
+
+        self.assertEqual(report["rejected"], 2)
+        self.assertEqual(report["completed"], 0)
+        self.assertEqual(report["sessions_without_audio"], 2)
+
+    def test_drops_chunks_when_behind(self):
+        client = LoadClient("ws://unused", 0, speech(0.3), TalkPattern(turns=1, talk_secs=0.3, silence_secs=0, jitter=0))
+
+        class SlowWebsocket:
+            async def send(self, data):
+                await asyncio.sleep(0.1)
+
+        asyncio.run(client.send_audio(SlowWebsocket()))
+        self.assertGreater(client.result.frames_dropped, 0)
+        self.assertEqual(client.result.frames_sent + client.result.frames_dropped, 11)
+
+    def test_loads_wav_and_rejects_other_formats(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "caller.wav")
+            with wave.open(path, "wb") as f:
+                f.setnchannels(1)
+                f.setsampwidth(2)
+                f.setframerate(SAMPLE_RATE)
+                f.writeframes(speech(0.1))
+            self.assertEqual(load_audio(path), speech(0.1))
+
+            with wave.open(path, "wb") as f:
+                f.setnchannels(1)
+                f.setsampwidth(2)
+                f.setframerate(8000)
+                f.writeframes(speech(0.1))
+            with self.assertRaises(ValueError):
+                load_audio(path)
+
+
+if __name__ == '__main__':
+    unittest.main()
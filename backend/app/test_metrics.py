@@ -0,0 +1,153 @@
+import asyncio
+import shutil
+import tempfile
+import time
+import unittest
+
+import httpx
+from fastapi import FastAPI
+
+from pipecat.frames.frames import MetricsFrame, StartFrame
+from pipecat.metrics.metrics import LLMTokenUsage, LLMUsageMetricsData, TTFBMetricsData
+from pipecat.tests.utils import run_test
+
+from base64_serializer import Base64AudioSerializer
+from metrics import (
+    CONTENT_TYPE,
+    Counter,
+    Gauge,
+    Histogram,
+    MetricsRegistry,
+    PipelineMetricsCollector,
+    metrics_router,
+    processor_label,
+)
+
+
+def scrape() -> str:
+    app = FastAPI()
+    app.include_router(metrics_router)
+
+    async def get():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.get("/metrics")
+
+    response = asyncio.run(get())
+    assert response.status_code == 200
+    assert response.headers["content-type"] == CONTENT_TYPE
+    return response.text
+
+
+def sample(text: str, name: str) -> float:
+    """Returns the value of the sample line starting with `name `."""
+    for line in text.splitlines():
+        if line.startswith(name + " "):
+            return float(line.split()[-1])
+    raise AssertionError(f"{name} not found")
+
+
+class TestMetrics(unittest.TestCase):
+    def test_exposition_format(self):
+        registry = MetricsRegistry()
+        counter = Counter("test_requests_total", "Requests", ["route"], registry=registry)
+        gauge = Gauge("test_active", "Active", registry=registry)
+        histogram = Histogram("test_latency_seconds", "Latency", buckets=(0.1, 1.0), registry=registry)
+
+        counter.labels('/a"b').inc()
+        counter.labels('/a"b').inc(2)
+        gauge.set_function(lambda: 7)
+        for value in (0.05, 0.5, 5):
+            histogram.observe(value)
+
+        text = registry.render()
+        self.assertIn("# TYPE test_requests_total counter", text)
+        self.assertIn('test_requests_total{route="/a\\"b"} 3', text)
+        self.assertIn("test_active 7", text)
+        self.assertIn('test_latency_seconds_bucket{le="0.1"} 1', text)
+        self.assertIn('test_latency_seconds_bucket{le="1"} 2', text)
+        self.assertIn('test_latency_seconds_bucket{le="+Inf"} 3', text)
+        self.assertIn("test_latency_seconds_count 3", text)
+        self.assertEqual(sample(text, "test_latency_seconds_sum"), 5.55)
+
+    def test_duplicate_names_are_rejected(self):
+        registry = MetricsRegistry()
+        Counter("test_total", "Test", registry=registry)
+        with self.assertRaises(ValueError):
+            Counter("test_total", "Test", registry=registry)
+
+    def test_workers_share_their_metrics(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        registries = []
+        for worker, calls in (("101", 2), ("202", 5)):
+            registry = MetricsRegistry()
+            counter = Counter("test_calls_total", "Calls", ["tool"], registry=registry)
+            histogram = Histogram("test_latency_seconds", "Latency", buckets=(1.0,), registry=registry)
+            counter.labels("sql").inc(calls)
+            histogram.observe(0.5)
+            registry.share(directory, worker, interval_secs=None)
+            registries.append((registry, counter))
+
+        # A scrape of either worker sees both, with its own latest values
+        registries[0][1].labels("sql").inc()
+        text = registries[0][0].render()
+        self.assertEqual(text.count("# TYPE test_calls_total counter"), 1)
+        self.assertEqual(sample(text, 'test_calls_total{worker="101",tool="sql"}'), 3)
+        self.assertEqual(sample(text, 'test_calls_total{worker="202",tool="sql"}'), 5)
+        self.assertEqual(sample(text, 'test_latency_seconds_count{worker="202"}'), 1)
+        self.assertIn('test_latency_seconds_bucket{worker="101",le="+Inf"} 1', text)
+        self.assertEqual(registries[1][0].render(), text)
+
+    def test_scrape_reports_serializer_traffic(self):
+        frames_before = sample(scrape(), 'voice_serializer_frames_total{direction="in"}')
+
+        serializer = Base64AudioSerializer()
+
+        async def run():
+            await serializer.setup(StartFrame(audio_in_sample_rate=16000))
+            for _ in range(3):
+                await serializer.deserialize("AAAAAA==")
+
+        asyncio.run(run())
+        text = scrape()
+        self.assertEqual(sample(text, 'voice_serializer_frames_total{direction="in"}'), frames_before + 3)
+        self.assertIn("# TYPE voice_vad_inference_seconds histogram", text)
+        self.assertIn("# TYPE voice_bedrock_invoke_seconds histogram", text)
+
+    def test_collects_pipeline_metrics_frames(self):
+        frame = MetricsFrame(data=[
+            TTFBMetricsData(processor="TestLLMService#42", value=0.3),
+            LLMUsageMetricsData(
+                processor="TestLLMService#42",
+                value=LLMTokenUsage(prompt_tokens=10, completion_tokens=5, total_tokens=15),
+            ),
+        ])
+        asyncio.run(run_test(
+            PipelineMetricsCollector(),
+            frames_to_send=[frame],
+            expected_down_frames=[MetricsFrame],
+        ))
+
+        text = scrape()
+        self.assertEqual(processor_label("TestLLMService#42"), "TestLLMService")
+        self.assertIn('voice_pipeline_ttfb_seconds_count{processor="TestLLMService"} 1', text)
+        self.assertIn('voice_llm_tokens_total{processor="TestLLMService",kind="prompt"} 10', text)
+
+    def test_recording_is_cheap(self):
+        registry = MetricsRegistry()
+        counter = Counter("test_hot_total", "Hot path", ["direction"], registry=registry).labels("in")
+        histogram = Histogram("test_hot_seconds", "Hot path", registry=registry)
+
+        iterations = 100_000
+        start = time.perf_counter()
+        for _ in range(iterations):
+            counter.inc()
+            histogram.observe(0.001)
+        per_update = (time.perf_counter() - start) / (2 * iterations)
+        # Well under a microsecond on a laptop, the bound leaves room for slow CI machines
+        self.assertLess(per_update, 20e-6)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,94 @@
+import datetime
+import unittest
+from decimal import Decimal
+
+from result_summarizer import ResultSummarizer, format_value
+
+
+def no_fallback():
+    raise AssertionError("fallback called")
+
+
+class TestResultSummarizer(unittest.TestCase):
+    def test_scalars(self):
+        summarizer = ResultSummarizer()
+        cases = [
+            ("how many orders are pending", "SELECT COUNT(*) FROM orders WHERE status = 'pending'",
+             [{"count": 12}], "There are 12 matching orders."),
+            ("how many customers signed up today", "SELECT COUNT(*) AS customer_count FROM customers",
+             [{"customer_count": 1}], "There is 1 matching customer."),
+            ("what did we take in payments", "SELECT SUM(amount) FROM payments",
+             [{"sum": Decimal("1520.75")}], "The total amount is $1,520.75."),
+            ("when was the last order", "SELECT MAX(order_date) AS last_order FROM orders",
+             [{"last_order": datetime.datetime(2025, 3, 4, 14, 5)}], "The last order is March 4, 2025 at 14:05."),
+        ]
+        for question, query, rows, expected in cases:
+            self.assertEqual(summarizer.summarize(question, query, rows, no_fallback), expected)
+        self.assertEqual(summarizer.stats()["local"], {"scalar": 4})
+
+    def test_rows_lists_groups_and_empty_results(self):
+        summarizer = ResultSummarizer()
+        self.assertEqual(
+            summarizer.summarize("what's jane's email", "SELECT first_name, email FROM customers WHERE customer_id = 1",
+                                 [{"first_name": "Jane", "email": "jane@example.com"}], no_fallback),
+            "The first name is Jane and the email is jane@example.com.",
+        )
+        self.assertEqual(
+            summarizer.summarize("who are our newest customers", "SELECT first_name, last_name FROM customers LIMIT 2",
+                                 [{"first_name": "Jane", "last_name": "Doe"}, {"first_name": "Ana", "last_name": "Lee"}],
+                                 no_fallback),
+            "I found 2 customers: Jane Doe and Ana Lee.",
+        )
+        self.assertEqual(
+            summarizer.summarize("orders by status", "SELECT status, COUNT(*) FROM orders GROUP BY status",
+                                 [{"status": "pending", "count": 12}, {"status": "completed", "count": 30}],
+                                 no_fallback),
+            "By status: pending 12 and completed 30.",
+        )
+        self.assertEqual(
+            summarizer.summarize("any failed payments", "SELECT * FROM payments WHERE status = 'failed'", [], no_fallback),
+            "I didn't find any matching payments.",
+        )
+
+    def test_falls_back_for_complex_results(self):
+        summarizer = ResultSummarizer()
+        rows = [{"order_id": i, "status": "pending", "total_amount": Decimal(i), "order_date": None} for i in range(20)]
+        summary = summarizer.summarize("list pending orders", "SELECT * FROM orders", rows, lambda: "Twenty orders are pending.")
+        self.assertEqual(summary, "Twenty orders are pending.")
+        summarizer.summarize("how many orders", "SELECT COUNT(*) FROM orders", [{"count": 3}], no_fallback)
+        self.assertEqual(summarizer.stats(), {"local": {"scalar": 1}, "fallbacks": {"complex": 1}, "fallback_rate": 0.5})
+
+    def test_falls_back_when_the_table_is_not_what_was_counted(self):
+        summarizer = ResultSummarizer()
+        cases = [
+            ("how many customers ordered", "SELECT COUNT(DISTINCT customer_id) FROM orders", [{"count": 4}]),
+            ("how many months had orders",
+             "SELECT EXTRACT(MONTH FROM order_date) AS month, COUNT(*) FROM orders GROUP BY month",
+             [{"month": 1, "count": 5}, {"month": 2, "count": 7}]),
+            ("how many orders did customers place",
+             "SELECT COUNT(customer_id) FROM (SELECT customer_id FROM orders) o", [{"count": 9}]),
+        ]
+        for question, query, rows in cases:
+            self.assertEqual(summarizer.summarize(question, query, rows, lambda: "fallback"), "fallback", query)
+        self.assertEqual(summarizer.summarize("how many orders", "SELECT COUNT(order_id) FROM orders",
+                                              [{"count": 2}], no_fallback), "There are 2 matching orders.")
+
+    def test_writes_are_not_reported_as_empty(self):
+        summarizer = ResultSummarizer()
+        for query in ("UPDATE orders SET status = 'cancelled' WHERE order_id = 7",
+                      "DELETE FROM payments WHERE payment_id = 3",
+                      "INSERT INTO customers (first_name) VALUES ('Ana')"):
+            self.assertEqual(summarizer.summarize("cancel order 7", query, [], no_fallback),
+                             "Done, the database was updated.", query)
+        self.assertEqual(summarizer.stats()["local"], {"write": 3})
+
+    def test_formats_values_for_speech(self):
+        self.assertEqual(format_value(Decimal("1234.5")), "1,234.50")
+        self.assertEqual(format_value(3.0), "3")
+        self.assertEqual(format_value(Decimal("99"), "total_amount"), "$99.00")
+        self.assertEqual(format_value(datetime.date(2025, 1, 2)), "January 2, 2025")
+        self.assertEqual(format_value(None), "none")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,167 @@
+import unittest
+
+from schema_cache import (
+    COLUMNS_QUERY,
+    CONSTRAINTS_QUERY,
+    ENUMS_QUERY,
+    FINGERPRINT_QUERY,
+    ROW_ESTIMATES_QUERY,
+    VALUE_STATS_QUERY,
+    SchemaCache,
+    check_values,
+    column_type,
+)
+from semantic_cache import parse_schema
+
+
+def column(table, name, data_type, udt_name=None, length=None, precision=None, scale=None, default=None):
+    return {
+        "table_name": table, "column_name": name, "data_type": data_type, "udt_name": udt_name or data_type,
+        "character_maximum_length": length, "numeric_precision": precision, "numeric_scale": scale,
+        "column_default": default,
+    }
+
+
+class CatalogDatabase:
+    """Answers the introspection queries from canned catalog rows."""
+
+    def __init__(self):
+        self.fingerprint = "a"
+        self.fail = False
+        self.queries = []
+        self.rows = {
+            COLUMNS_QUERY: [
+                column("customers", "customer_id", "integer", default="nextval('customers_customer_id_seq')"),
+                column("customers", "email", "character varying", length=100),
+                column("orders", "order_id", "integer", default="nextval('orders_order_id_seq')"),
+                column("orders", "customer_id", "integer"),
+                column("orders", "total_amount", "numeric", precision=10, scale=2),
+                column("orders", "status", "character varying", length=20),
+                column("orders", "channel", "USER-DEFINED", udt_name="sales_channel"),
+                column("orders", "region", "text"),
+                column("order_tags", "order_id", "integer"),
+                column("order_tags", "tag", "text"),
+            ],
+            CONSTRAINTS_QUERY: [
+                {"table_name": "customers", "kind": "p", "definition": "PRIMARY KEY (customer_id)",
+                 "columns": ["customer_id"], "referenced_table": None},
+                {"table_name": "customers", "kind": "u", "definition": "UNIQUE (email)",
+                 "columns": ["email"], "referenced_table": None},
+                {"table_name": "orders", "kind": "p", "definition": "PRIMARY KEY (order_id)",
+                 "columns": ["order_id"], "referenced_table": None},
+                {"table_name": "orders", "kind": "f", "definition": "FOREIGN KEY (customer_id) REFERENCES customers(customer_id)",
+                 "columns": ["customer_id"], "referenced_table": "customers"},
+                {"table_name": "orders", "kind": "c",
+                 "definition": "CHECK (((status)::text = ANY ((ARRAY['pending'::character varying, "
+                               "'completed'::character varying])::text[])))",
+                 "columns": ["status"], "referenced_table": None},
+                {"table_name": "order_tags", "kind": "p", "definition": "PRIMARY KEY (order_id, tag)",
+                 "columns": ["order_id", "tag"], "referenced_table": None},
+            ],
+            ENUMS_QUERY: [{"type_name": "sales_channel", "label": "web"}, {"type_name": "sales_channel", "label": "phone"}],
+            ROW_ESTIMATES_QUERY: [
+                {"table_name": "customers", "row_estimate": 1234},
+                {"table_name": "orders", "row_estimate": 45678},
+                {"table_name": "order_tags", "row_estimate": -1},
+            ],
+            VALUE_STATS_QUERY: [
+                {"table_name": "orders", "column_name": "region", "common_values": ["north", "south"], "n_distinct": 2},
+                # Some values weren't sampled
+                {"table_name": "order_tags", "column_name": "tag", "common_values": ["gift"], "n_distinct": 3},
+            ],
+        }
+
+    def execute_query(self, query, params=None):
+        self.queries.append(query)
+        if self.fail:
+            raise Exception("connection refused")
+        if query == FINGERPRINT_QUERY:
+            return [{"fingerprint": self.fingerprint}]
+        return self.rows[query]
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestSchemaCache(unittest.TestCase):
+    def test_renders_the_live_schema(self):
+        schema = SchemaCache(CatalogDatabase()).get()
+        self.assertEqual(schema, "\n".join([
+            "Database Schema:",
+            "1. CUSTOMERS Table: ~1,200 rows",
+            "   - customer_id (SERIAL PRIMARY KEY)",
+            "   - email (VARCHAR(100), UNIQUE)",
+            "2. ORDER_TAGS Table:",
+            "   - order_id (INTEGER)",
+            "   - tag (TEXT)",
+            "   primary key (order_id, tag)",
+            "3. ORDERS Table: ~46,000 rows",
+            "   - order_id (SERIAL PRIMARY KEY)",
+            "   - customer_id (INTEGER, FK -> customers)",
+            "   - total_amount (DECIMAL(10,2))",
+            "   - status (VARCHAR(20)) [valid values: pending, completed]",
+            "   - channel (SALES_CHANNEL) [valid values: web, phone]",
+            "   - region (TEXT) [valid values: north, south]",
+        ]) + "\n")
+
+        info = parse_schema(schema)
+        self.assertEqual(info.tables["orders"], frozenset(
+            {"order_id", "customer_id", "total_amount", "status", "channel", "region"}
+        ))
+        self.assertIn("pending", info.values)
+
+    def test_introspects_again_only_when_the_fingerprint_changes(self):
+        db, clock = CatalogDatabase(), Clock()
+        cache = SchemaCache(db, check_interval_secs=30, clock=clock)
+        first = cache.get()
+        self.assertEqual(len(db.queries), 6)
+
+        # Within the interval the description is served without queries
+        clock.now = 10
+        self.assertIs(cache.get(), first)
+        self.assertEqual(len(db.queries), 6)
+
+        # Then one fingerprint query
+        clock.now = 31
+        self.assertIs(cache.get(), first)
+        self.assertEqual(db.queries[6:], [FINGERPRINT_QUERY])
+
+        db.fingerprint = "b"
+        db.rows[COLUMNS_QUERY].append(column("customers", "phone", "character varying", length=20))
+        clock.now = 62
+        self.assertIn("- phone (VARCHAR(20))", cache.get())
+        self.assertEqual(cache.stats(), {"fingerprint": "b", "live": True, "checks": 3, "refreshes": 2, "errors": 0})
+
+    def test_keeps_serving_when_the_database_fails(self):
+        db, clock = CatalogDatabase(), Clock()
+        db.fail = True
+        cache = SchemaCache(db, check_interval_secs=30, fallback="built-in schema", clock=clock)
+        self.assertEqual(cache.get(), "built-in schema")
+        self.assertEqual(cache.get(), "built-in schema")
+        self.assertEqual(len(db.queries), 1)
+
+        db.fail = False
+        cache.invalidate()
+        live = cache.get()
+        self.assertTrue(live.startswith("Database Schema:"))
+
+        db.fail = True
+        clock.now = 31
+        self.assertIs(cache.get(), live)
+        self.assertEqual(cache.stats()["errors"], 2)
+
+    def test_reads_types_and_check_values(self):
+        self.assertEqual(column_type(column("t", "c", "timestamp without time zone")), "TIMESTAMP")
+        self.assertEqual(column_type(column("t", "c", "bigint", default="nextval('s')")), "BIGSERIAL")
+        self.assertEqual(column_type(column("t", "c", "ARRAY", udt_name="_text")), "TEXT[]")
+        self.assertEqual(check_values("CHECK ((kind IN ('a', 'it''s')))"), ("a", "it's"))
+        self.assertEqual(check_values("CHECK ((amount > (0)::numeric))"), ())
+
+
+if __name__ == '__main__':
+    unittest.main()
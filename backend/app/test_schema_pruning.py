@@ -0,0 +1,97 @@
+import unittest
+
+from bench_schema_pruning import EXTENDED_SCHEMA, SCHEMAS, evaluate
+from schema_pruning import SchemaPruner, estimate_tokens
+from semantic_cache import parse_schema
+from sql_generator import DEFAULT_SCHEMA, SQLQueryGenerator
+
+
+class ScriptedBedrock:
+    """Replies to SQL generation prompts in order and keeps the prompts."""
+
+    def __init__(self, *replies):
+        self.replies = list(replies)
+        self.prompts = []
+
+    def invoke_model(self, model_id, body, operation="invoke_model"):
+        self.prompts.append(body["messages"][0]["content"])
+        return {"content": [{"text": self.replies.pop(0)}]}
+
+
+class TestSchemaPruner(unittest.TestCase):
+    def test_keeps_the_tables_a_question_needs(self):
+        pruner = SchemaPruner()
+        cases = [
+            ("How many orders are pending?", ("orders",)),
+            ("What is the email of customer Jane Doe?", ("customers",)),
+            ("How many transactions were declined by digital wallet?", ("payments",)),
+            ("Which clients spent the most?", ("customers", "orders")),
+        ]
+        for question, tables in cases:
+            selection = pruner.select(question, DEFAULT_SCHEMA)
+            self.assertFalse(selection.full, question)
+            self.assertEqual(selection.tables, tables, question)
+            self.assertEqual(set(parse_schema(selection.schema).tables), set(tables), question)
+            self.assertLess(estimate_tokens(selection.schema), estimate_tokens(DEFAULT_SCHEMA))
+
+        selection = pruner.select("How many orders are pending?", DEFAULT_SCHEMA)
+        self.assertTrue(selection.schema.startswith("Database Schema:\n1. ORDERS Table:\n"))
+        self.assertIn("[valid values: pending, processing, completed, cancelled]", selection.schema)
+
+    def test_follows_foreign_keys_in_a_larger_schema(self):
+        pruner = SchemaPruner()
+        selection = pruner.select("What are the best selling products in electronics?", EXTENDED_SCHEMA)
+        self.assertEqual(selection.tables, ("order_items", "products"))
+        selection = pruner.select("How much has jane@example.com paid?", EXTENDED_SCHEMA)
+        self.assertEqual(selection.tables, ("customers", "orders", "payments"))
+        # A value word of a far away table ("low" ticket priority) doesn't pull it in
+        self.assertEqual(pruner.select("Which products are low on stock?", EXTENDED_SCHEMA).tables, ("products",))
+
+        for name, schema in SCHEMAS.items():
+            self.assertEqual(evaluate(name, schema)["summary"]["coverage"], 1.0, name)
+
+    def test_falls_back_to_the_full_schema(self):
+        pruner = SchemaPruner()
+        for question, reason in [
+            ("Tell me a joke", "no_match"),
+            ("How much has jane@example.com paid?", "all_tables"),
+        ]:
+            selection = pruner.select(question, DEFAULT_SCHEMA)
+            self.assertEqual((selection.full, selection.reason, selection.schema), (True, reason, DEFAULT_SCHEMA))
+
+        disconnected = DEFAULT_SCHEMA + "\n4. AUDIT_LOG Table:\n   - entry (TEXT)\n"
+        self.assertEqual(pruner.select("Show the audit log for orders", disconnected).reason, "not_joinable")
+        self.assertEqual(pruner.stats()["results"], {"no_match": 1, "all_tables": 1, "not_joinable": 1})
+
+    def test_prunes_columns_of_wide_tables(self):
+        columns = "".join(f"   - note_{i} (TEXT)\n" for i in range(20))
+        schema = DEFAULT_SCHEMA + f"\n4. SHIPMENTS Table:\n   - shipment_id (SERIAL PRIMARY KEY)\n" \
+                                  f"   - order_id (INTEGER, FK -> orders)\n   - shipped_at (TIMESTAMP)\n" \
+                                  f"   - carrier (VARCHAR(50)) [valid values: ups, dhl]\n{columns}"
+        selection = SchemaPruner().select("How many shipments went with dhl?", schema)
+        self.assertEqual(selection.tables, ("shipments",))
+        self.assertEqual(sorted(parse_schema(selection.schema).tables["shipments"]),
+                         ["carrier", "order_id", "shipment_id", "shipped_at"])
+
+    def test_generator_asks_again_with_the_full_schema(self):
+        pruner = SchemaPruner()
+        bedrock = ScriptedBedrock(
+            "SELECT COUNT(*) FROM orders WHERE status = 'pending'",
+            # References a table the pruned schema doesn't have
+            "SELECT SUM(p.amount) FROM orders o JOIN payments p ON p.order_id = o.order_id",
+            "SELECT SUM(amount) FROM payments p JOIN orders o ON o.order_id = p.order_id WHERE o.status = 'completed'",
+        )
+        generator = SQLQueryGenerator(bedrock=bedrock, pruner=pruner)
+
+        generator.generate_sql("How many orders are pending?", DEFAULT_SCHEMA)
+        self.assertNotIn("CUSTOMERS Table", bedrock.prompts[0])
+
+        query = generator.generate_sql("How much did completed orders bring in?", DEFAULT_SCHEMA)
+        self.assertIn("o.status = 'completed'", query)
+        self.assertNotIn("PAYMENTS Table", bedrock.prompts[1])
+        self.assertIn("PAYMENTS Table", bedrock.prompts[2])
+        self.assertEqual(pruner.stats()["full_schema_retries"], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
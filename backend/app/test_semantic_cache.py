@@ -0,0 +1,151 @@
+import random
+import unittest
+
+from semantic_cache import SemanticSQLCache, parse_schema, question_literals, question_slots, tokenize, verify_sql
+from sql_generator import DEFAULT_SCHEMA, SQLQueryGenerator
+
+PENDING_SQL = "SELECT COUNT(*) FROM orders WHERE status = 'pending'"
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class FakeBedrock:
+    def __init__(self, sql):
+        self.sql = sql
+
+    def invoke_model(self, model_id, body, operation="invoke_model"):
+        return {"content": [{"text": self.sql}]}
+
+
+class FakeDatabase:
+    def __init__(self, error=None):
+        self.error = error
+
+    def execute_query(self, query, params=None):
+        if self.error:
+            raise self.error
+        return [{"count": 3}]
+
+
+class TestSemanticSQLCache(unittest.TestCase):
+    def test_reuses_sql_of_paraphrases(self):
+        cache = SemanticSQLCache()
+        cache.add("How many orders are pending?", PENDING_SQL, DEFAULT_SCHEMA)
+        for question in ("count the pending orders", "what is the number of pending orders"):
+            self.assertEqual(cache.lookup(question, DEFAULT_SCHEMA), PENDING_SQL)
+        self.assertIsNone(cache.lookup("list customers with a gmail email", DEFAULT_SCHEMA))
+        self.assertEqual((cache.hits, cache.misses), (2, 1))
+
+    def test_slot_words_must_match(self):
+        values = parse_schema(DEFAULT_SCHEMA).values
+        self.assertEqual(question_slots(tokenize("top 5 pending orders last week"), values),
+                         {"top", "5", "pending", "last", "week"})
+
+        cache = SemanticSQLCache()
+        cache.add("How many orders are pending?", PENDING_SQL, DEFAULT_SCHEMA)
+        for question in ("how many orders are completed", "how many orders are not pending",
+                         "how many pending orders last month"):
+            self.assertIsNone(cache.lookup(question, DEFAULT_SCHEMA), question)
+
+    def test_names_in_the_sql_must_be_in_the_question(self):
+        question = "How many completed orders with credit card payments did customer John Smith place this year?"
+        sql = ("SELECT COUNT(*) FROM orders o JOIN customers c ON c.customer_id = o.customer_id "
+               "JOIN payments p ON p.order_id = o.order_id WHERE c.first_name = 'John' AND c.last_name = 'Smith' "
+               "AND o.status = 'completed' AND p.payment_method = 'credit_card' AND p.status = 'success'")
+        self.assertEqual(question_literals(sql, tokenize(question)),
+                         ({"john"}, {"smith"}, {"completed"}, {"credit", "card"}))
+
+        cache = SemanticSQLCache()
+        cache.add(question, sql, DEFAULT_SCHEMA)
+        other = question.replace("John", "Jane")
+        # Similar enough to be reused if names weren't checked
+        self.assertGreater(cache.nearest(other, DEFAULT_SCHEMA)[1], cache.threshold)
+        self.assertIsNone(cache.lookup(other, DEFAULT_SCHEMA))
+        self.assertEqual(cache.lookup(question.replace("did", "has"), DEFAULT_SCHEMA), sql)
+        self.assertEqual((cache.hits, cache.rejected, len(cache)), (1, 1, 1))
+
+    def test_quotes_inside_names(self):
+        question = "How many orders did customer Liam O'Brien place?"
+        sql = ("SELECT COUNT(*) FROM orders o JOIN customers c ON c.customer_id = o.customer_id "
+               "WHERE c.first_name = 'Liam' AND c.last_name = 'O''Brien'")
+        self.assertEqual(question_literals(sql, tokenize(question)), ({"liam"}, {"o'brien"}))
+
+        cache = SemanticSQLCache()
+        cache.add(question, sql, DEFAULT_SCHEMA)
+        self.assertIsNone(cache.lookup(question.replace("O'Brien", "O'Neil"), DEFAULT_SCHEMA))
+        self.assertEqual(cache.lookup(question.replace("did", "has"), DEFAULT_SCHEMA), sql)
+
+    def test_generator_only_caches_sql_that_ran(self):
+        cache = SemanticSQLCache()
+        generator = SQLQueryGenerator(bedrock=FakeBedrock(PENDING_SQL), semantic_cache=cache)
+        generator._summarize_with_model = lambda query, rows: "There are 3 pending orders."
+
+        generator.db = FakeDatabase(RuntimeError("column \"status\" does not exist"))
+        with self.assertRaises(Exception):
+            generator.generate_query("How many orders are pending?", DEFAULT_SCHEMA)
+        self.assertEqual(len(cache), 0)
+
+        generator.db = FakeDatabase()
+        generator.generate_query("How many orders are pending?", DEFAULT_SCHEMA)
+        self.assertEqual(cache.lookup("count the pending orders", DEFAULT_SCHEMA), PENDING_SQL)
+
+    def test_verifies_sql_against_the_schema(self):
+        schema = parse_schema(DEFAULT_SCHEMA)
+        self.assertTrue(verify_sql(
+            "SELECT c.first_name, SUM(o.total_amount) AS spent FROM customers c "
+            "JOIN orders o ON o.customer_id = c.customer_id GROUP BY c.first_name ORDER BY spent DESC LIMIT 5",
+            schema,
+        ))
+        self.assertTrue(verify_sql(
+            "SELECT EXTRACT(MONTH FROM order_date) AS m, COUNT(*) FROM orders "
+            "WHERE order_date >= NOW() - INTERVAL '30 days' GROUP BY m",
+            schema,
+        ))
+        for sql in ("SELECT * FROM refunds", "SELECT o.discount FROM orders o", "SELECT loyalty_points FROM customers"):
+            self.assertFalse(verify_sql(sql, schema), sql)
+
+        # The status column was renamed, the cached query no longer fits
+        cache = SemanticSQLCache()
+        cache.add("How many orders are pending?", PENDING_SQL, DEFAULT_SCHEMA)
+        renamed = DEFAULT_SCHEMA.replace("- status (VARCHAR(20)) [valid values: pending,", "- state (VARCHAR(20)) [valid values: pending,")
+        self.assertIsNone(cache.lookup("count the pending orders", renamed))
+        self.assertEqual((cache.rejected, len(cache)), (1, 0))
+
+    def test_expires_and_evicts_least_recently_used(self):
+        clock = FakeClock()
+        cache = SemanticSQLCache(max_entries=2, ttl_secs=10, clock=clock)
+        cache.add("how many orders are pending", PENDING_SQL, DEFAULT_SCHEMA)
+        cache.add("list customer emails", "SELECT email FROM customers", DEFAULT_SCHEMA)
+        clock.now = 1
+        self.assertIsNotNone(cache.lookup("count the pending orders", DEFAULT_SCHEMA))
+        cache.add("sum of payment amounts", "SELECT SUM(amount) FROM payments", DEFAULT_SCHEMA)
+        self.assertIsNone(cache.lookup("show the emails of customers", DEFAULT_SCHEMA))
+        self.assertEqual(cache.evictions, 1)
+
+        clock.now = 10
+        self.assertIsNotNone(cache.lookup("what is the sum of payment amounts", DEFAULT_SCHEMA))
+        clock.now = 11
+        self.assertIsNone(cache.lookup("what is the sum of payment amounts", DEFAULT_SCHEMA))
+
+    def test_finds_neighbours_among_many_entries(self):
+        rng = random.Random(7)
+        words = [f"word{i}" for i in range(2000)]
+        cache = SemanticSQLCache(max_entries=20000)
+        for i in range(20000):
+            cache.add(" ".join(rng.sample(words, 6)), f"SELECT {i} FROM orders", DEFAULT_SCHEMA)
+        cache.add("How many orders are pending?", PENDING_SQL, DEFAULT_SCHEMA)
+
+        self.assertEqual(len(cache), 20000)
+        self.assertGreater(cache.rebuilds, 1)
+        self.assertEqual(cache.lookup("count the pending orders", DEFAULT_SCHEMA), PENDING_SQL)
+        self.assertIsNone(cache.lookup("word1 word2 word3", DEFAULT_SCHEMA))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,144 @@
+import asyncio
+import time
+import unittest
+
+from session_manager import AdmissionRejected, SessionManager
+
+
+class TestSessionManager(unittest.TestCase):
+    def test_rejects_above_the_limit(self):
+        manager = SessionManager(max_sessions=2, queue_timeout_secs=0)
+
+        async def run():
+            async with manager.admit(), manager.admit():
+                self.assertFalse(manager.accepting())
+                with self.assertRaises(AdmissionRejected):
+                    async with manager.admit():
+                        pass
+            self.assertTrue(manager.accepting())
+
+        asyncio.run(run())
+        self.assertEqual(manager.admitted, 2)
+        self.assertEqual(manager.rejected, 1)
+        self.assertEqual(manager.active, {})
+
+    def test_queued_caller_gets_the_next_free_slot(self):
+        manager = SessionManager(max_sessions=1, queue_timeout_secs=1)
+
+        async def first():
+            async with manager.admit():
+                await asyncio.sleep(0.1)
+
+        async def second():
+            await asyncio.sleep(0.01)
+            async with manager.admit() as session_id:
+                return session_id
+
+        async def run():
+            return await asyncio.gather(first(), second())
+
+        _, session_id = asyncio.run(run())
+        self.assertTrue(session_id)
+        self.assertEqual(manager.rejected, 0)
+
+    def test_queue_timeout_rejects(self):
+        manager = SessionManager(max_sessions=1, queue_timeout_secs=0.05)
+
+        async def run():
+            async with manager.admit():
+                with self.assertRaises(AdmissionRejected) as raised:
+                    async with manager.admit():
+                        pass
+                self.assertEqual(raised.exception.reason, "at capacity")
+                self.assertEqual(manager.queued, 0)
+
+        asyncio.run(run())
+
+    def test_rejects_when_overloaded(self):
+        manager = SessionManager(max_sessions=10, max_memory_mb=1)
+        capacity = manager.capacity()
+        self.assertFalse(capacity["accepting"])
+        self.assertEqual(capacity["available_sessions"], 10)
+
+        async def run():
+            with self.assertRaises(AdmissionRejected):
+                async with manager.admit():
+                    pass
+
+        asyncio.run(run())
+
+    def test_samples_event_loop_lag(self):
+        manager = SessionManager(max_sessions=10, max_loop_lag_ms=100, sample_interval_secs=0.05)
+
+        async def run():
+            await manager.start()
+            await asyncio.sleep(0.1)
+            time.sleep(0.3)  # Block the loop
+            await asyncio.sleep(0.01)
+            lagging = manager.capacity()
+            await manager.stop()
+            return lagging
+
+        capacity = asyncio.run(run())
+        self.assertGreater(capacity["loop_lag_ms"], 100)
+        self.assertFalse(capacity["accepting"])
+        self.assertTrue(capacity["overload"])
+
+    def test_drain_waits_for_active_sessions(self):
+        manager = SessionManager(max_sessions=2)
+
+        async def session():
+            async with manager.admit():
+                await asyncio.sleep(0.2)
+
+        async def run():
+            running = asyncio.create_task(session())
+            await asyncio.sleep(0.01)
+            drain = manager.start_drain(timeout_secs=5, poll_secs=0.05)
+            self.assertFalse(manager.accepting())
+            with self.assertRaises(AdmissionRejected) as raised:
+                async with manager.admit():
+                    pass
+            self.assertEqual(raised.exception.reason, "draining")
+            # A second request joins the drain in progress
+            self.assertIs(manager.start_drain(timeout_secs=5), drain)
+            result = await drain
+            await running
+            return result
+
+        result = asyncio.run(run())
+        self.assertTrue(result["drained"])
+        self.assertEqual(result["cancelled"], 0)
+        self.assertLess(result["secs"], 1)
+        self.assertEqual(manager.drain_history[0][1], 1)
+        self.assertEqual(manager.drain_history[-1][1], 0)
+
+    def test_drain_cancels_sessions_after_the_deadline(self):
+        manager = SessionManager(max_sessions=2)
+
+        class FakePipelineTask:
+            def __init__(self, task):
+                self.task = task
+
+            async def cancel(self):
+                self.task.cancel()
+
+        async def session():
+            async with manager.admit() as session_id:
+                manager.register_task(session_id, FakePipelineTask(asyncio.current_task()))
+                await asyncio.sleep(60)
+
+        async def run():
+            running = asyncio.create_task(session())
+            await asyncio.sleep(0.01)
+            result = await manager.drain(timeout_secs=0.1, poll_secs=0.05)
+            self.assertTrue(running.cancelled())
+            return result
+
+        result = asyncio.run(run())
+        self.assertTrue(result["drained"])
+        self.assertEqual(result["cancelled"], 1)
+        self.assertEqual(manager.active, {})
+
+if __name__ == '__main__':
+    unittest.main()
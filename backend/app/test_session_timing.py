@@ -0,0 +1,24 @@
+import asyncio
+import time
+import unittest
+
+from pipecat.frames.frames import BotStartedSpeakingFrame
+from pipecat.tests.utils import run_test
+
+from session_timing import FirstAudioTimer
+
+
+class TestFirstAudioTimer(unittest.TestCase):
+    def test_records_first_bot_audio_only(self):
+        timer = FirstAudioTimer(accepted_at=time.monotonic() - 0.5)
+        asyncio.run(run_test(
+            timer,
+            frames_to_send=[BotStartedSpeakingFrame(), BotStartedSpeakingFrame()],
+            expected_down_frames=[BotStartedSpeakingFrame] * 2,
+        ))
+        self.assertGreaterEqual(timer.first_audio_secs, 0.5)
+        self.assertLess(timer.first_audio_secs, 5)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,88 @@
+import threading
+import unittest
+
+import numpy as np
+
+from shared_vad import SharedSileroVADAnalyzer, SileroModelRegistry
+
+SAMPLE_RATE = 16000
+
+
+def make_audio(seed: int) -> bytes:
+    rng = np.random.default_rng(seed)
+    return (rng.standard_normal(512) * 8000).astype(np.int16).tobytes()
+
+
+def new_analyzer() -> SharedSileroVADAnalyzer:
+    analyzer = SharedSileroVADAnalyzer()
+    analyzer.set_sample_rate(SAMPLE_RATE)
+    return analyzer
+
+
+class TestSharedSileroVAD(unittest.TestCase):
+    def test_analyzers_share_the_inference_session(self):
+        first = new_analyzer()
+        second = new_analyzer()
+        self.assertIs(first._model.session, second._model.session)
+        self.assertIs(first._model.session, SileroModelRegistry.get_session())
+
+    def test_sessions_do_not_share_state(self):
+        first = new_analyzer()
+        second = new_analyzer()
+        self.assertIsNot(first._model._state, second._model._state)
+
+        # Feeding audio into one analyzer must not change the other's state. The
+        # analyzer resets its state on the first call, so feed it twice.
+        first.voice_confidence(make_audio(1))
+        first.voice_confidence(make_audio(2))
+        self.assertFalse(np.any(second._model._state))
+        self.assertTrue(np.any(first._model._state))
+
+    def test_confidence_matches_an_isolated_analyzer(self):
+        chunks = [make_audio(seed) for seed in range(5)]
+        noise = [make_audio(seed + 100) for seed in range(5)]
+
+        reference = new_analyzer()
+        expected = [reference.voice_confidence(chunk) for chunk in chunks]
+
+        # Interleave another session's audio on the shared session
+        shared = new_analyzer()
+        other = new_analyzer()
+        results = []
+        for chunk, other_chunk in zip(chunks, noise):
+            other.voice_confidence(other_chunk)
+            results.append(shared.voice_confidence(chunk))
+
+        np.testing.assert_allclose(results, expected, rtol=1e-5)
+
+    def test_concurrent_sessions(self):
+        chunks = [make_audio(seed) for seed in range(20)]
+        expected = [new_analyzer().voice_confidence(chunk) for chunk in chunks[:1]]
+        errors = []
+
+        def run():
+            analyzer = new_analyzer()
+            try:
+                result = analyzer.voice_confidence(chunks[0])
+                np.testing.assert_allclose(result, expected[0], rtol=1e-5)
+                for chunk in chunks[1:]:
+                    analyzer.voice_confidence(chunk)
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=run) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+
+    def test_per_session_state_is_small(self):
+        analyzer = new_analyzer()
+        analyzer.voice_confidence(make_audio(1))
+        model = analyzer._model
+        self.assertLess(model._state.nbytes + model._context.nbytes, 4096)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,144 @@
+import threading
+import time
+import unittest
+
+from sql_cache import SQLCache, normalize_question, schema_fingerprint
+from sql_generator import DEFAULT_SCHEMA, SQLQueryGenerator
+
+PENDING_SQL = "SELECT COUNT(*) FROM orders WHERE status = 'pending'"
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class FakeBedrock:
+    def __init__(self, sql):
+        self.sql = sql
+        self.calls = 0
+
+    def invoke_model(self, model_id, body, operation="invoke_model"):
+        self.calls += 1
+        return {"content": [{"text": self.sql}]}
+
+
+class FakeDatabase:
+    def __init__(self, error=None):
+        self.error = error
+
+    def execute_query(self, query, params=None):
+        if self.error:
+            raise self.error
+        return [{"count": 3}]
+
+
+class TestSQLCache(unittest.TestCase):
+    def test_normalizes_questions_and_schemas(self):
+        self.assertEqual(normalize_question("  Show my PENDING   orders? "), "show my pending orders")
+        self.assertEqual(normalize_question("“show my pending orders.”"), "show my pending orders")
+        self.assertNotEqual(normalize_question("show my pending orders"), normalize_question("show my orders"))
+        self.assertEqual(schema_fingerprint("a  b\n c"), schema_fingerprint(" a b c "))
+        self.assertNotEqual(SQLCache.key("orders", "schema v1"), SQLCache.key("orders", "schema v2"))
+
+    def test_hits_after_first_miss(self):
+        cache = SQLCache()
+        calls = []
+
+        def compute():
+            calls.append(1)
+            return "SELECT 1"
+
+        for question in ("Show my pending orders", "show my pending orders?"):
+            self.assertEqual(cache.get_or_compute(SQLCache.key(question, "schema"), compute), "SELECT 1")
+        self.assertEqual(len(calls), 1)
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+    def test_expires_and_evicts_least_recently_used(self):
+        clock = FakeClock()
+        cache = SQLCache(max_entries=2, ttl_secs=10, clock=clock)
+        cache.put("a", 1)
+        cache.put("b", 2)
+        cache.get("a")
+        cache.put("c", 3)
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual((cache.get("a"), cache.get("c")), (1, 3))
+        self.assertEqual(cache.evictions, 1)
+
+        clock.now = 10
+        self.assertIsNone(cache.get("a"))
+        self.assertEqual(cache.expirations, 1)
+
+    def test_coalesces_concurrent_misses(self):
+        cache = SQLCache()
+        calls = []
+        results = []
+
+        def compute():
+            calls.append(1)
+            time.sleep(0.2)
+            return "SELECT 1"
+
+        def ask():
+            results.append(cache.get_or_compute(SQLCache.key("show my pending orders", "schema"), compute))
+
+        threads = [threading.Thread(target=ask) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results, ["SELECT 1"] * 8)
+        self.assertEqual(cache.misses, 1)
+        self.assertEqual(cache.coalesced, 7)
+
+    def test_failures_reach_waiters_and_are_not_cached(self):
+        cache = SQLCache()
+        errors = []
+
+        def compute():
+            time.sleep(0.1)
+            raise RuntimeError("throttled")
+
+        def ask():
+            try:
+                cache.get_or_compute("key", compute)
+            except RuntimeError as e:
+                errors.append(str(e))
+
+        threads = [threading.Thread(target=ask) for _ in range(3)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, ["throttled"] * 3)
+        self.assertEqual(len(cache), 0)
+        self.assertEqual(cache.get_or_compute("key", lambda: "SELECT 1"), "SELECT 1")
+
+    def test_generator_only_caches_sql_that_ran(self):
+        cache = SQLCache()
+        bedrock = FakeBedrock(PENDING_SQL)
+        generator = SQLQueryGenerator(bedrock=bedrock, cache=cache)
+        generator._summarize_with_model = lambda query, rows: "There are 3 pending orders."
+
+        generator.db = FakeDatabase(RuntimeError("column \"status\" does not exist"))
+        for _ in range(3):
+            with self.assertRaises(Exception):
+                generator.generate_query("How many orders are pending?", DEFAULT_SCHEMA)
+        self.assertEqual(bedrock.calls, 3)
+        self.assertEqual(len(cache), 0)
+
+        generator.db = FakeDatabase()
+        for _ in range(2):
+            generator.generate_query("How many orders are pending?", DEFAULT_SCHEMA)
+        self.assertEqual(bedrock.calls, 4)
+        self.assertEqual(cache.get(SQLCache.key("how many orders are pending", DEFAULT_SCHEMA)), PENDING_SQL)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,183 @@
+import asyncio
+import contextvars
+import threading
+import time
+import unittest
+
+from sql_generator import SQLQueryGenerator
+from tool_executor import ToolExecutor, tool_cancelled
+
+request_id = contextvars.ContextVar("request_id", default=None)
+
+
+async def measure_loop_lag(stop: asyncio.Event, interval: float = 0.005) -> float:
+    """Returns the longest time the event loop was blocked while `stop` was unset."""
+    worst = 0.0
+    while not stop.is_set():
+        start = time.monotonic()
+        await asyncio.sleep(interval)
+        worst = max(worst, time.monotonic() - start - interval)
+    return worst
+
+
+def slow_tool(arguments):
+    time.sleep(arguments.get("secs", 0.2))
+    return {"response": arguments.get("value")}
+
+
+class TestToolExecutor(unittest.TestCase):
+    def setUp(self):
+        self.executor = ToolExecutor(max_workers=4, default_timeout_secs=5)
+        self.addCleanup(self.executor.shutdown)
+
+    def test_blocking_tools_do_not_block_the_event_loop(self):
+        self.executor.register("slow", slow_tool)
+
+        async def run():
+            stop = asyncio.Event()
+            monitor = asyncio.create_task(measure_loop_lag(stop))
+            results = await asyncio.gather(*[
+                self.executor.run("slow", {"value": i, "secs": 0.2}) for i in range(4)
+            ])
+            stop.set()
+            return results, await monitor
+
+        start = time.monotonic()
+        results, lag = asyncio.run(run())
+        self.assertEqual([result["response"] for result in results], [0, 1, 2, 3])
+        # Four 200 ms calls run in parallel, and the loop stays responsive
+        self.assertLess(time.monotonic() - start, 0.6)
+        self.assertLess(lag, 0.05)
+
+    def test_timeout_returns_error_and_signals_the_tool(self):
+        observed = threading.Event()
+
+        def stubborn(arguments):
+            deadline = time.monotonic() + 2
+            while time.monotonic() < deadline:
+                if tool_cancelled():
+                    observed.set()
+                    return None
+                time.sleep(0.01)
+
+        self.executor.register("stubborn", stubborn, timeout_secs=0.1)
+        result = asyncio.run(self.executor.run("stubborn", {}))
+        self.assertIn("error", result)
+        self.assertTrue(observed.wait(1))
+        self.assertEqual(self.executor.stats()["stubborn"].timeouts, 1)
+
+    def test_cancellation_propagates_and_signals_the_tool(self):
+        observed = threading.Event()
+
+        def long_running(arguments):
+            while not tool_cancelled():
+                time.sleep(0.01)
+            observed.set()
+
+        self.executor.register("long", long_running)
+
+        async def run():
+            task = asyncio.create_task(self.executor.run("long", {}))
+            await asyncio.sleep(0.05)
+            task.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await task
+
+        asyncio.run(run())
+        self.assertTrue(observed.wait(1))
+        self.assertEqual(self.executor.stats()["long"].cancellations, 1)
+
+    def test_per_tool_concurrency_limit(self):
+        lock = threading.Lock()
+        active = [0]
+        peak = [0]
+
+        def tracked(arguments):
+            with lock:
+                active[0] += 1
+                peak[0] = max(peak[0], active[0])
+            time.sleep(0.05)
+            with lock:
+                active[0] -= 1
+
+        self.executor.register("limited", tracked, max_concurrency=2)
+
+        async def run():
+            await asyncio.gather(*[self.executor.run("limited", {}) for _ in range(6)])
+
+        asyncio.run(run())
+        self.assertEqual(peak[0], 2)
+
+    def test_timed_out_calls_keep_their_slot_until_the_thread_finishes(self):
+        release = threading.Event()
+        started = []
+
+        def ignores_cancel(arguments):
+            started.append(arguments["n"])
+            release.wait(2)
+
+        self.executor.register("slow", ignores_cancel, timeout_secs=0.05, max_concurrency=1)
+
+        async def run():
+            first = await self.executor.run("slow", {"n": 1})
+            second = asyncio.create_task(self.executor.run("slow", {"n": 2}))
+            await asyncio.sleep(0.1)
+            # The first thread is still running, so the second call waits for the slot
+            self.assertEqual(started, [1])
+            release.set()
+            return first, await second
+
+        first, second = asyncio.run(run())
+        self.assertIn("error", first)
+        self.assertEqual(started, [1, 2])
+
+    def test_sql_tool_skips_the_database_after_a_timeout(self):
+        done = threading.Event()
+
+        class SlowBedrock:
+            def invoke_model(self, model_id, body, operation="invoke_model"):
+                time.sleep(0.2)
+                return {"content": [{"text": "SELECT COUNT(*) FROM orders"}]}
+
+        class RecordingDatabase:
+            queries = []
+
+            def execute_query(self, query, params=None):
+                self.queries.append(query)
+                return [{"count": 1}]
+
+        generator = SQLQueryGenerator(bedrock=SlowBedrock())
+        generator.db = RecordingDatabase()
+
+        def sql_tool(arguments):
+            try:
+                return generator.generate_query(arguments["question"])
+            finally:
+                done.set()
+
+        self.executor.register("sql", sql_tool, timeout_secs=0.05)
+        result = asyncio.run(self.executor.run("sql", {"question": "How many orders are there?"}))
+        self.assertIn("error", result)
+        self.assertTrue(done.wait(1))
+        self.assertEqual(generator.db.queries, [])
+
+    def test_errors_are_returned_as_results(self):
+        def broken(arguments):
+            raise ValueError("bad query")
+
+        self.executor.register("broken", broken)
+        result = asyncio.run(self.executor.run("broken", {}))
+        self.assertEqual(result, {"error": "bad query"})
+
+    def test_context_variables_reach_the_worker_thread(self):
+        self.executor.register("context", lambda arguments: request_id.get())
+
+        async def run():
+            request_id.set("abc")
+            return await self.executor.run("context", {})
+
+        self.assertEqual(asyncio.run(run()), "abc")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,151 @@
+import asyncio
+import os
+import sqlite3
+import tempfile
+import time
+import unittest
+
+from transcript_sink import (
+    JsonlTranscriptStore,
+    SQLiteTranscriptStore,
+    TranscriptRecord,
+    TranscriptSink,
+    TranscriptStore,
+    create_store,
+)
+
+
+class SlowStore(TranscriptStore):
+    def __init__(self):
+        self.records = []
+
+    def write_batch(self, records):
+        time.sleep(0.05)
+        self.records.extend(records)
+
+
+def record(session_id: str, i: int) -> TranscriptRecord:
+    return TranscriptRecord(session_id=session_id, role="user", content=f"message {i}")
+
+
+class TestTranscriptSink(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+
+    def test_sqlite_store_uses_wal_and_keys_by_session(self):
+        path = os.path.join(self.tmp.name, "transcripts.db")
+        store = SQLiteTranscriptStore(path)
+        sink = TranscriptSink(store)
+
+        async def run():
+            await sink.start()
+            for i in range(10):
+                sink.put(record("a" if i % 2 else "b", i))
+            await sink.stop()
+
+        asyncio.run(run())
+        with sqlite3.connect(path) as conn:
+            self.assertEqual(conn.execute("PRAGMA journal_mode").fetchone()[0], "wal")
+            rows = conn.execute("SELECT content FROM transcripts WHERE session_id = 'a' ORDER BY id").fetchall()
+        self.assertEqual([row[0] for row in rows], [f"message {i}" for i in range(1, 10, 2)])
+        self.assertEqual(sink.stats()["written"], 10)
+
+    def test_drops_oldest_when_full(self):
+        store = SlowStore()
+        sink = TranscriptSink(store, max_queue=5)
+        for i in range(8):
+            sink.put(record("a", i))
+        self.assertEqual(sink.dropped, 3)
+        asyncio.run(sink.stop())
+        self.assertEqual([r.content for r in store.records], [f"message {i}" for i in range(3, 8)])
+
+    def test_put_never_waits_for_the_store(self):
+        store = SlowStore()
+        sink = TranscriptSink(store, batch_size=100)
+
+        async def run():
+            await sink.start()
+            start = time.perf_counter()
+            for i in range(1000):
+                sink.put(record("a", i))
+            elapsed = time.perf_counter() - start
+            await sink.stop()
+            return elapsed
+
+        self.assertLess(asyncio.run(run()), 0.05)
+        self.assertEqual(len(store.records), 1000)
+
+    def test_stop_waits_for_the_write_in_flight(self):
+        class ClosingStore(SlowStore):
+            closed = False
+            writes_after_close = 0
+
+            def write_batch(self, records):
+                super().write_batch(records)
+                self.writes_after_close += self.closed
+
+            def close(self):
+                self.closed = True
+
+        store = ClosingStore()
+        sink = TranscriptSink(store, flush_interval_secs=0.01)
+
+        async def run():
+            await sink.start()
+            for i in range(5):
+                sink.put(record("a", i))
+            # The writer is in the middle of the only batch when the sink is stopped
+            await asyncio.sleep(0.02)
+            await sink.stop()
+
+        asyncio.run(run())
+        self.assertTrue(store.closed)
+        self.assertEqual(store.writes_after_close, 0)
+        self.assertEqual([r.content for r in store.records], [f"message {i}" for i in range(5)])
+
+    def test_jsonl_segments_roll_over(self):
+        directory = os.path.join(self.tmp.name, "segments")
+        store = JsonlTranscriptStore(directory, segment_max_bytes=200)
+        sink = TranscriptSink(store, batch_size=2)
+
+        async def run():
+            await sink.start()
+            for i in range(10):
+                sink.put(record("a", i))
+            await sink.stop()
+
+        asyncio.run(run())
+        segments = sorted(os.listdir(directory))
+        self.assertGreater(len(segments), 1)
+        self.assertTrue(all(name.startswith(f"{os.getpid()}-") for name in segments))
+        lines = []
+        for name in segments:
+            with open(os.path.join(directory, name)) as f:
+                lines.extend(f.read().splitlines())
+        self.assertEqual(len(lines), 10)
+
+    def test_throughput(self):
+        store = create_store(f"sqlite:{os.path.join(self.tmp.name, 'bench.db')}")
+        sink = TranscriptSink(store, max_queue=100000)
+        count = 20000
+
+        async def run():
+            await sink.start()
+            start = time.perf_counter()
+            for i in range(count):
+                sink.put(record(f"session-{i % 50}", i))
+            await sink.stop()
+            return time.perf_counter() - start
+
+        elapsed = asyncio.run(run())
+        self.assertEqual(sink.written, count)
+        self.assertGreater(count / elapsed, 5000)
+
+    def test_unknown_store(self):
+        with self.assertRaises(ValueError):
+            create_store("postgres://localhost")
+
+
+if __name__ == '__main__':
+    unittest.main()
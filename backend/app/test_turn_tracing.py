@@ -0,0 +1,129 @@
+import asyncio
+import json
+import os
+import tempfile
+import time
+import unittest
+from types import SimpleNamespace
+
+from pipecat.frames.frames import (
+    BotStartedSpeakingFrame,
+    TTSAudioRawFrame,
+    UserStoppedSpeakingFrame,
+)
+from pipecat.tests.utils import run_test
+
+from tool_executor import ToolExecutor
+from turn_tracing import LatencySummary, TraceWriter, TurnTracer, percentile, summarize_files, trace_span
+
+
+class TestTurnTracing(unittest.TestCase):
+    def test_marks_stages_of_a_turn(self):
+        tracer = TurnTracer("session-1")
+        audio = TTSAudioRawFrame(audio=b"\x00\x00" * 160, sample_rate=16000, num_channels=1)
+
+        async def run():
+            await run_test(
+                tracer.processor("input"),
+                frames_to_send=[UserStoppedSpeakingFrame()],
+                expected_down_frames=[UserStoppedSpeakingFrame],
+            )
+            await asyncio.sleep(0.01)
+            await run_test(tracer.processor("llm"), frames_to_send=[audio], expected_down_frames=[TTSAudioRawFrame])
+            tracer.on_media_serialized()
+            # run_test ends with an EndFrame, which finishes the turn
+            await run_test(
+                tracer.processor("output"),
+                frames_to_send=[BotStartedSpeakingFrame()],
+                expected_down_frames=[BotStartedSpeakingFrame],
+            )
+
+        asyncio.run(run())
+        trace = tracer.last_trace
+        self.assertIsNone(tracer.current)
+        self.assertEqual(trace["session_id"], "session-1")
+        self.assertEqual(trace["marks"]["vad_stop"], 0)
+        self.assertGreaterEqual(trace["marks"]["llm_first_audio"], 10)
+        self.assertLessEqual(trace["marks"]["llm_first_audio"], trace["marks"]["first_media_serialized"])
+        self.assertLessEqual(trace["marks"]["first_media_serialized"], trace["marks"]["bot_started_speaking"])
+
+    def test_tool_spans_reach_worker_threads(self):
+        tracer = TurnTracer("session-1")
+        executor = ToolExecutor(max_workers=2)
+        self.addCleanup(executor.shutdown)
+
+        def tool(arguments):
+            with trace_span("bedrock.sql_generation"):
+                time.sleep(0.02)
+            with trace_span("db.query"):
+                pass
+            return {"response": "ok"}
+
+        executor.register("sql", tool)
+        results = []
+
+        async def result_callback(result):
+            results.append(result)
+
+        async def run():
+            tracer.start_turn()
+            handler = tracer.wrap_tool("sql", executor.handler("sql"))
+            await handler(SimpleNamespace(arguments={}, result_callback=result_callback))
+            tracer.finish_turn()
+
+        asyncio.run(run())
+        spans = {span["name"]: span for span in tracer.last_trace["spans"]}
+        self.assertEqual(results, [{"response": "ok"}])
+        self.assertEqual(set(spans), {"tool.sql", "bedrock.sql_generation", "db.query"})
+        self.assertGreaterEqual(spans["bedrock.sql_generation"]["ms"], 20)
+        self.assertGreaterEqual(spans["tool.sql"]["ms"], spans["bedrock.sql_generation"]["ms"])
+
+    def test_spans_outside_a_turn_are_ignored(self):
+        with trace_span("db.query"):
+            pass
+
+    def test_writes_json_lines_and_summarizes(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "traces.jsonl")
+            writer = TraceWriter(path)
+            summary = LatencySummary()
+            tracer = TurnTracer("session-1", writer, summary)
+            for _ in range(3):
+                tracer.start_turn()
+                tracer.mark("bot_started_speaking")
+            tracer.finish_turn()
+            writer.close()
+
+            with open(path) as f:
+                traces = [json.loads(line) for line in f]
+            self.assertEqual([trace["turn"] for trace in traces], [1, 2, 3])
+            self.assertEqual(summary.summary()["bot_started_speaking"]["count"], 3)
+            self.assertEqual(summarize_files([path]).summary(), summary.summary())
+
+    def test_rotates_the_trace_file_by_size(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "traces.jsonl")
+            writer = TraceWriter(path, max_bytes=200)
+            for turn in range(20):
+                writer.write({"turn": turn, "marks": {}, "spans": []})
+            writer.close()
+
+            with open(path) as f:
+                current = [json.loads(line)["turn"] for line in f]
+            with open(path + ".1") as f:
+                rotated = [json.loads(line)["turn"] for line in f]
+            # Only one rotated file is kept, the older turns are gone
+            self.assertFalse(os.path.exists(path + ".2"))
+            self.assertGreater(rotated[0], 0)
+            self.assertEqual(rotated + current, list(range(rotated[0], 20)))
+
+    def test_percentile(self):
+        values = list(range(1, 101))
+        self.assertEqual(percentile(values, 50), 50)
+        self.assertEqual(percentile(values, 95), 95)
+        self.assertEqual(percentile(values, 99), 99)
+        self.assertEqual(percentile([7], 99), 7)
+
+
+if __name__ == '__main__':
+    unittest.main()
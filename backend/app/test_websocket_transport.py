@@ -0,0 +1,204 @@
+import asyncio
+import base64
+import json
+import time
+import unittest
+
+from pipecat.frames.frames import (
+    CancelFrame,
+    InputAudioRawFrame,
+    StartInterruptionFrame,
+    TTSAudioRawFrame,
+)
+from pipecat.pipeline.pipeline import Pipeline
+from pipecat.processors.frame_processor import FrameProcessor
+from pipecat.tests.utils import SleepFrame, run_test
+from pipecat.transports.network.fastapi_websocket import FastAPIWebsocketCallbacks
+from starlette.websockets import WebSocketState
+
+from base64_serializer import Base64AudioSerializer
+from websocket_transport import AudioWebsocketParams, AudioWebsocketTransport, MixedFrameWebsocketClient
+
+SAMPLE_RATE = 16000
+# 20 ms of 16 kHz 16-bit mono audio
+PCM_20MS = b"\x01\x00" * (SAMPLE_RATE // 50)
+
+
+class FakeWebSocket:
+    """Client side of a WebSocket following a script of (delay, message) pairs.
+
+    Delays are counted from the previous message, on the client's own clock, so messages due
+    while the server's event loop was blocked arrive together. A None message disconnects,
+    after the last message the socket stays open and idle.
+    """
+
+    def __init__(self, script):
+        self.script = list(script)
+        self.sent = []
+        self.application_state = WebSocketState.CONNECTED
+        self.client_state = WebSocketState.CONNECTED
+        self._due = None
+
+    async def receive(self):
+        if not self.script:
+            await asyncio.Event().wait()
+        delay, message = self.script.pop(0)
+        now = time.monotonic()
+        self._due = (self._due or now) + delay
+        await asyncio.sleep(max(0.0, self._due - now))
+        if message is None:
+            return {"type": "websocket.disconnect", "code": 1000}
+        if isinstance(message, bytes):
+            return {"type": "websocket.receive", "bytes": message}
+        return {"type": "websocket.receive", "text": message}
+
+    async def send_bytes(self, data):
+        self.sent.append(bytes(data))
+
+    async def send_text(self, data):
+        self.sent.append(data)
+
+    async def close(self):
+        self.application_state = self.client_state = WebSocketState.DISCONNECTED
+
+
+class AudioRecorder(FrameProcessor):
+    """Records when input audio frames arrive, optionally blocking the event loop once."""
+
+    def __init__(self, stall_at=None, stall_secs=0.0):
+        super().__init__()
+        self.times = []
+        self.stall_at = stall_at
+        self.stall_secs = stall_secs
+
+    async def process_frame(self, frame, direction):
+        await super().process_frame(frame, direction)
+        if isinstance(frame, InputAudioRawFrame):
+            self.times.append(time.monotonic())
+            if len(self.times) == self.stall_at:
+                time.sleep(self.stall_secs)
+        await self.push_frame(frame, direction)
+
+
+def make_transport(websocket, **kwargs):
+    serializer = Base64AudioSerializer(Base64AudioSerializer.InputParams(binary=True))
+    return AudioWebsocketTransport(websocket, AudioWebsocketParams(
+        serializer=serializer,
+        audio_in_enabled=True,
+        audio_out_enabled=True,
+        audio_in_sample_rate=SAMPLE_RATE,
+        audio_out_sample_rate=SAMPLE_RATE,
+        **kwargs,
+    ))
+
+
+def callbacks():
+    async def ignore(websocket):
+        pass
+
+    return FastAPIWebsocketCallbacks(
+        on_client_connected=ignore, on_client_disconnected=ignore, on_session_timeout=ignore
+    )
+
+
+class TestMixedFrameWebsocketClient(unittest.TestCase):
+    def test_receives_and_sends_both_message_types(self):
+        websocket = FakeWebSocket([(0, PCM_20MS), (0, '{"event": "stop"}'), (0, None), (0, PCM_20MS)])
+        client = MixedFrameWebsocketClient(websocket, callbacks())
+
+        async def run():
+            received = [message async for message in client.receive()]
+            await client.send(PCM_20MS)
+            await client.send('{"event": "stop"}')
+            return received
+
+        received = asyncio.run(run())
+        # Nothing is read after the disconnect
+        self.assertEqual(received, [PCM_20MS, '{"event": "stop"}'])
+        self.assertEqual(websocket.sent, [PCM_20MS, '{"event": "stop"}'])
+
+    def test_mixed_session(self):
+        # Binary audio and base64 audio in a text message from the same client
+        websocket = FakeWebSocket([(0, PCM_20MS), (0, base64.b64encode(PCM_20MS).decode())])
+        transport = make_transport(websocket, audio_out_10ms_chunks=2)
+        recorder = AudioRecorder()
+
+        asyncio.run(run_test(
+            Pipeline([transport.input(), recorder, transport.output()]),
+            frames_to_send=[
+                SleepFrame(0.1),
+                TTSAudioRawFrame(audio=PCM_20MS, sample_rate=SAMPLE_RATE, num_channels=1),
+                SleepFrame(0.1),
+                StartInterruptionFrame(),
+            ],
+        ))
+
+        self.assertEqual(len(recorder.times), 2)
+        binary = [message for message in websocket.sent if isinstance(message, bytes)]
+        text = [json.loads(message) for message in websocket.sent if isinstance(message, str)]
+        self.assertEqual(binary, [PCM_20MS])
+        self.assertIn({"event": "stop"}, text)
+
+
+class TestAudioWebsocketInputTransport(unittest.TestCase):
+    def run_input(self, websocket, recorder, frames_to_send, **params):
+        transport = make_transport(
+            websocket, jitter_buffer_frame_ms=20, jitter_buffer_target_ms=40, jitter_buffer_max_ms=100, **params
+        )
+        asyncio.run(run_test(
+            Pipeline([transport.input(), recorder]), frames_to_send=frames_to_send, expected_down_frames=None
+        ))
+        return transport.input()
+
+    def test_paces_bursts_and_counts_underruns_and_overruns(self):
+        # 200 ms of audio in one burst, twice what the buffer holds
+        websocket = FakeWebSocket([(0.05, PCM_20MS)] + [(0, PCM_20MS)] * 9)
+        recorder = AudioRecorder()
+        transport_input = self.run_input(websocket, recorder, [SleepFrame(0.5)])
+
+        # The oldest 100 ms were dropped, the rest was released one frame per 20 ms
+        self.assertEqual(len(recorder.times), 5)
+        gaps = [b - a for a, b in zip(recorder.times, recorder.times[1:])]
+        self.assertGreater(min(gaps), 0.01)
+        self.assertLess(max(gaps), 0.05)
+
+        jitter_buffer = transport_input.jitter_buffer
+        self.assertEqual(jitter_buffer.overruns, 5)
+        self.assertEqual(jitter_buffer.underruns, 1)
+        # The pacer ends with the pipeline
+        self.assertIsNone(transport_input._pacer_task)
+
+    def test_resumes_cadence_after_a_stall(self):
+        # A steady stream of 20 ms frames while the event loop blocks for 200 ms
+        websocket = FakeWebSocket([(0.02, PCM_20MS)] * 25)
+        recorder = AudioRecorder(stall_at=3, stall_secs=0.2)
+        self.run_input(websocket, recorder, [SleepFrame(0.8)])
+
+        gaps = [b - a for a, b in zip(recorder.times[3:], recorder.times[4:])]
+        # Without re-syncing, the 10 missed intervals are released back to back
+        self.assertLessEqual(len([gap for gap in gaps if gap < 0.005]), 1)
+
+    def test_cancel_stops_the_pacer(self):
+        # Frames keep arriving, but nothing is released once the pipeline is cancelled
+        websocket = FakeWebSocket([(0.02, PCM_20MS)] * 20)
+        recorder = AudioRecorder()
+        transport = make_transport(websocket, jitter_buffer_frame_ms=20)
+
+        async def run():
+            await run_test(
+                Pipeline([transport.input(), recorder]),
+                frames_to_send=[SleepFrame(0.15), CancelFrame()],
+                send_end_frame=False,
+            )
+            released = len(recorder.times)
+            await asyncio.sleep(0.1)
+            return released
+
+        released = asyncio.run(run())
+        self.assertGreater(released, 0)
+        self.assertEqual(len(recorder.times), released)
+        self.assertIsNone(transport.input()._pacer_task)
+
+
+if __name__ == '__main__':
+    unittest.main()
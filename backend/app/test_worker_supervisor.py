@@ -0,0 +1,131 @@
+import json
+import os
+import signal
+import time
+import unittest
+import urllib.error
+import urllib.request
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse
+
+from metrics import metrics_router
+from session_manager import SessionManager
+from worker_supervisor import WorkerSupervisor, shared_path
+
+session_manager = SessionManager(max_sessions=1, sample_interval_secs=0.05, drain_flag_path=shared_path("drain"))
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await session_manager.start()
+    yield
+    await session_manager.stop()
+
+
+app = FastAPI(lifespan=lifespan)
+app.include_router(metrics_router)
+
+
+@app.get("/pid")
+async def pid():
+    return os.getpid()
+
+
+@app.get("/ready")
+async def ready():
+    return JSONResponse({"pid": os.getpid()}, status_code=200 if session_manager.accepting() else 503)
+
+
+@app.post("/drain")
+async def drain():
+    session_manager.request_drain(60)
+    return os.getpid()
+
+
+def wait_until(predicate, timeout: float = 30.0) -> bool:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.1)
+    return False
+
+
+def get_pid(port: int):
+    try:
+        with urllib.request.urlopen(f"http://127.0.0.1:{port}/pid", timeout=1) as response:
+            return int(response.read())
+    except OSError:
+        return None
+
+
+class TestWorkerSupervisor(unittest.TestCase):
+    def start_supervisor(self, **kwargs) -> WorkerSupervisor:
+        supervisor = WorkerSupervisor("test_worker_supervisor:app", host="127.0.0.1", port=0, **kwargs)
+        supervisor.start()
+        self.addCleanup(supervisor.stop)
+        self.assertTrue(wait_until(lambda: get_pid(supervisor.port) is not None))
+        return supervisor
+
+    def test_workers_share_the_port(self):
+        for reuse_port in (True, False):
+            with self.subTest(reuse_port=reuse_port):
+                supervisor = self.start_supervisor(workers=2, reuse_port=reuse_port)
+                self.assertEqual(len(supervisor.pids()), 2)
+                self.assertIn(get_pid(supervisor.port), supervisor.pids())
+                supervisor.stop()
+
+    def test_any_worker_serves_the_metrics_of_all(self):
+        supervisor = self.start_supervisor(workers=2)
+
+        def scrape():
+            with urllib.request.urlopen(f"http://127.0.0.1:{supervisor.port}/metrics", timeout=1) as response:
+                return response.read().decode()
+
+        for pid in supervisor.pids():
+            self.assertTrue(wait_until(lambda: f'voice_active_sessions{{worker="{pid}"}}' in scrape()))
+
+    def test_a_drain_reaches_every_worker(self):
+        supervisor = self.start_supervisor(workers=2)
+        url = f"http://127.0.0.1:{supervisor.port}"
+
+        def readiness():
+            try:
+                with urllib.request.urlopen(f"{url}/ready", timeout=1) as response:
+                    return json.load(response)["pid"], response.status
+            except urllib.error.HTTPError as e:
+                return json.load(e)["pid"], e.code
+
+        urllib.request.urlopen(urllib.request.Request(f"{url}/drain", method="POST"), timeout=1).close()
+
+        # Whichever worker answers, it is draining
+        not_ready = set()
+
+        def all_not_ready():
+            pid, status = readiness()
+            if status == 503:
+                not_ready.add(pid)
+            else:
+                not_ready.discard(pid)
+            return not_ready == set(supervisor.pids())
+
+        self.assertTrue(wait_until(all_not_ready))
+        self.assertTrue(all(readiness()[1] == 503 for _ in range(20)))
+
+    def test_restarts_dead_workers(self):
+        supervisor = self.start_supervisor(workers=1)
+        [old_pid] = supervisor.pids()
+        os.kill(old_pid, signal.SIGKILL)
+
+        def restarted():
+            supervisor.check_workers()
+            return get_pid(supervisor.port) not in (None, old_pid)
+
+        self.assertTrue(wait_until(restarted))
+        self.assertEqual(supervisor.restarts, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,212 @@
+# // Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# // SPDX-License-Identifier: MIT-0
+
+"""
+Tool Executor
+
+Runs LLM function call handlers without blocking the event loop. Blocking tools (Bedrock and
+psycopg2 calls) run on a bounded thread pool shared by all sessions, each call has a timeout,
+and every tool can be limited to a number of concurrent calls.
+
+Pipecat cancels the handler task when the caller interrupts or disconnects. A thread cannot be
+stopped from the outside, so the executor releases the caller right away and sets a cancel
+event that long running tools can poll with `tool_cancelled()`. The call keeps its slot in the
+tool's concurrency limit until the thread has actually finished, so abandoned calls can't pile
+up on the database.
+
+Handlers run in a copy of the caller's contextvars context, so context-local state (e.g.
+tracing ids) is visible inside the worker thread.
+"""
+
+import asyncio
+import contextvars
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Optional
+
+from loguru import logger
+
+from pipecat.services.llm_service import FunctionCallParams
+
+from metrics import TOOL_CALL_SECONDS
+
+DEFAULT_MAX_WORKERS = 8
+DEFAULT_TIMEOUT_SECS = 30.0
+
+_cancel_event: contextvars.ContextVar[Optional[threading.Event]] = contextvars.ContextVar(
+    "tool_cancel_event", default=None
+)
+
+
+def tool_cancelled() -> bool:
+    """Returns True if the tool call running in this context was cancelled or timed out."""
+    event = _cancel_event.get()
+    return event is not None and event.is_set()
+
+
+@dataclass
+class ToolStats:
+    """Counters for a registered tool."""
+
+    calls: int = 0
+    errors: int = 0
+    timeouts: int = 0
+    cancellations: int = 0
+    in_flight: int = 0
+    total_secs: float = 0.0
+
+
+@dataclass
+class RegisteredTool:
+    """A tool registered with the executor."""
+
+    name: str
+    func: Callable[[Dict[str, Any]], Any]
+    timeout_secs: float
+    semaphore: Optional[asyncio.Semaphore]
+    stats: ToolStats = field(default_factory=ToolStats)
+
+
+class ToolExecutor:
+    """Runs blocking tool functions on a bounded thread pool."""
+
+    def __init__(self, max_workers: int = DEFAULT_MAX_WORKERS, default_timeout_secs: float = DEFAULT_TIMEOUT_SECS):
+        """Initialize the executor.
+
+        Args:
+            max_workers: Size of the thread pool shared by all tools
+            default_timeout_secs: Timeout for tools registered without one
+        """
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="tool")
+        self._default_timeout_secs = default_timeout_secs
+        self._tools: Dict[str, RegisteredTool] = {}
+
+    def register(
+        self,
+        name: str,
+        func: Callable[[Dict[str, Any]], Any],
+        *,
+        timeout_secs: Optional[float] = None,
+        max_concurrency: Optional[int] = None,
+    ):
+        """Registers a blocking tool function.
+
+        Args:
+            name: Function name used by the LLM
+            func: Blocking function taking the call arguments and returning the result
+            timeout_secs: Per-call timeout, defaults to the executor's default
+            max_concurrency: Maximum concurrent calls of this tool across all sessions
+        """
+        semaphore = asyncio.Semaphore(max_concurrency) if max_concurrency else None
+        self._tools[name] = RegisteredTool(
+            name=name,
+            func=func,
+            timeout_secs=timeout_secs or self._default_timeout_secs,
+            semaphore=semaphore,
+        )
+
+    def handler(self, name: str) -> Callable[[FunctionCallParams], Any]:
+        """Returns an async handler for `llm.register_function`.
+
+        Args:
+            name: Name of a registered tool
+
+        Returns:
+            Coroutine function passing the result of the call to the result callback
+        """
+        async def handle(params: FunctionCallParams):
+            result = await self.run(name, params.arguments)
+            await params.result_callback(result)
+
+        return handle
+
+    async def run(self, name: str, arguments: Dict[str, Any]) -> Any:
+        """Runs a tool call on the pool.
+
+        Errors and timeouts are returned as {"error": ...} results so the LLM can
+        tell the caller. Cancellation propagates to the caller.
+
+        Args:
+            name: Name of a registered tool
+            arguments: Arguments from the LLM function call
+
+        Returns:
+            The tool result
+        """
+        tool = self._tools[name]
+        if tool.semaphore:
+            # Released by _run once the worker thread is done
+            await tool.semaphore.acquire()
+        return await self._run(tool, arguments)
+
+    async def _run(self, tool: RegisteredTool, arguments: Dict[str, Any]) -> Any:
+        cancel_event = threading.Event()
+        context = contextvars.copy_context()
+        context.run(_cancel_event.set, cancel_event)
+
+        loop = asyncio.get_running_loop()
+        try:
+            future = self._pool.submit(context.run, tool.func, arguments)
+        except BaseException:
+            if tool.semaphore:
+                tool.semaphore.release()
+            raise
+        if tool.semaphore:
+            future.add_done_callback(lambda _: self._release(loop, tool.semaphore))
+
+        stats = tool.stats
+        stats.calls += 1
+        stats.in_flight += 1
+        start = time.monotonic()
+        outcome = "ok"
+        try:
+            # Shielded so a timeout or cancellation leaves the thread's future alone
+            return await asyncio.wait_for(asyncio.shield(asyncio.wrap_future(future)), tool.timeout_secs)
+        except asyncio.TimeoutError:
+            # Skips calls still waiting for a pool thread, running ones see the event
+            future.cancel()
+            cancel_event.set()
+            outcome = "timeout"
+            stats.timeouts += 1
+            logger.warning(f"Tool {tool.name} timed out after {tool.timeout_secs}s")
+            return {"error": f"{tool.name} timed out"}
+        except asyncio.CancelledError:
+            future.cancel()
+            cancel_event.set()
+            outcome = "cancelled"
+            stats.cancellations += 1
+            logger.debug(f"Tool {tool.name} cancelled")
+            raise
+        except Exception as e:
+            outcome = "error"
+            stats.errors += 1
+            logger.error(f"Tool {tool.name} failed: {e}")
+            return {"error": str(e)}
+        finally:
+            elapsed = time.monotonic() - start
+            stats.in_flight -= 1
+            stats.total_secs += elapsed
+            TOOL_CALL_SECONDS.labels(tool.name, outcome).observe(elapsed)
+
+    @staticmethod
+    def _release(loop: asyncio.AbstractEventLoop, semaphore: asyncio.Semaphore):
+        # Called from the worker thread when a call finishes
+        try:
+            loop.call_soon_threadsafe(semaphore.release)
+        except RuntimeError:
+            # The event loop is already closed
+            pass
+
+    def stats(self) -> Dict[str, ToolStats]:
+        """Returns the counters of every registered tool."""
+        return {name: tool.stats for name, tool in self._tools.items()}
+
+    def shutdown(self, wait: bool = False):
+        """Shuts down the thread pool.
+
+        Args:
+            wait: Whether to wait for running calls to finish
+        """
+        self._pool.shutdown(wait=wait, cancel_futures=True)
@@ -0,0 +1,260 @@
+# // Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# // SPDX-License-Identifier: MIT-0
+
+"""
+Transcript Sink
+
+Takes transcript messages off the pipeline without blocking it. `put()` only appends to a
+bounded in-memory queue. When the queue is full the oldest record is dropped, so a slow disk
+never stalls audio. A background task drains the queue in batches into an append-only store
+keyed by session id:
+
+- `SQLiteTranscriptStore`: a SQLite database in WAL mode, one transaction per batch
+- `JsonlTranscriptStore`: JSON lines segment files, rolled over at a size limit. Segment names
+  carry the pid, so worker processes sharing a directory never write the same file
+
+Stores are picked with a URL, e.g. "sqlite:transcripts.db" or "jsonl:transcripts/".
+"""
+
+import asyncio
+import json
+import os
+import sqlite3
+import time
+from collections import deque
+from dataclasses import asdict, dataclass, field
+from typing import Deque, List, Optional
+
+from loguru import logger
+
+DEFAULT_MAX_QUEUE = 10000
+DEFAULT_BATCH_SIZE = 500
+DEFAULT_FLUSH_INTERVAL_SECS = 0.25
+
+
+@dataclass
+class TranscriptRecord:
+    """One transcript message of a session."""
+
+    session_id: str
+    role: str
+    content: str
+    timestamp: Optional[str] = None
+    received_at: float = field(default_factory=time.time)
+
+
+class TranscriptStore:
+    """Append-only store written by the sink's background writer, one batch at a time."""
+
+    def write_batch(self, records: List[TranscriptRecord]):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+class SQLiteTranscriptStore(TranscriptStore):
+    """Stores transcripts in a SQLite database in WAL mode."""
+
+    def __init__(self, path: str):
+        """Initialize the store.
+
+        Args:
+            path: Database file, created if missing
+        """
+        self.path = path
+        # Only the writer thread uses the connection, but that thread may change between batches
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS transcripts (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                session_id TEXT NOT NULL,
+                role TEXT NOT NULL,
+                content TEXT NOT NULL,
+                timestamp TEXT,
+                received_at REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS transcripts_session ON transcripts (session_id, id)")
+        self._conn.commit()
+
+    def write_batch(self, records: List[TranscriptRecord]):
+        with self._conn:
+            self._conn.executemany(
+                "INSERT INTO transcripts (session_id, role, content, timestamp, received_at) VALUES (?, ?, ?, ?, ?)",
+                [(r.session_id, r.role, r.content, r.timestamp, r.received_at) for r in records],
+            )
+
+    def read_session(self, session_id: str) -> List[TranscriptRecord]:
+        """Returns the transcript of a session in order."""
+        rows = self._conn.execute(
+            "SELECT session_id, role, content, timestamp, received_at FROM transcripts WHERE session_id = ? ORDER BY id",
+            (session_id,),
+        ).fetchall()
+        return [TranscriptRecord(*row) for row in rows]
+
+    def close(self):
+        self._conn.close()
+
+
+class JsonlTranscriptStore(TranscriptStore):
+    """Stores transcripts as JSON lines in numbered segment files of this process."""
+
+    def __init__(self, directory: str, segment_max_bytes: int = 64 * 1024 * 1024):
+        """Initialize the store.
+
+        Args:
+            directory: Directory holding the segments, created if missing
+            segment_max_bytes: Size after which a new segment is started
+        """
+        self.directory = directory
+        self.segment_max_bytes = segment_max_bytes
+        os.makedirs(directory, exist_ok=True)
+        self._prefix = f"{os.getpid()}-"
+        existing = sorted(
+            name for name in os.listdir(directory) if name.startswith(self._prefix) and name.endswith(".jsonl")
+        )
+        self._segment = int(existing[-1][len(self._prefix):].split(".")[0]) if existing else 0
+        self._file = None
+        self._open_segment()
+
+    def _open_segment(self):
+        if self._file:
+            self._file.close()
+        path = os.path.join(self.directory, f"{self._prefix}{self._segment:08d}.jsonl")
+        self._file = open(path, "a", encoding="utf-8")
+
+    def write_batch(self, records: List[TranscriptRecord]):
+        self._file.write("".join(json.dumps(asdict(r), separators=(",", ":")) + "\n" for r in records))
+        self._file.flush()
+        if self._file.tell() >= self.segment_max_bytes:
+            self._segment += 1
+            self._open_segment()
+
+    def close(self):
+        self._file.close()
+
+
+def create_store(url: str) -> TranscriptStore:
+    """Creates a store from a URL like "sqlite:transcripts.db" or "jsonl:transcripts/".
+
+    Raises:
+        ValueError: If the scheme is unknown
+    """
+    scheme, _, path = url.partition(":")
+    if scheme == "sqlite":
+        return SQLiteTranscriptStore(path)
+    if scheme == "jsonl":
+        return JsonlTranscriptStore(path)
+    raise ValueError(f"Unknown transcript store: {url}")
+
+
+class TranscriptSink:
+    """Bounded drop-oldest queue drained into a store by a background task."""
+
+    def __init__(
+        self,
+        store: TranscriptStore,
+        max_queue: int = DEFAULT_MAX_QUEUE,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        flush_interval_secs: float = DEFAULT_FLUSH_INTERVAL_SECS,
+    ):
+        """Initialize the sink.
+
+        Args:
+            store: Where batches are written
+            max_queue: Records held in memory before the oldest are dropped
+            batch_size: Maximum records per store write
+            flush_interval_secs: Maximum time a record waits before being written
+        """
+        self.store = store
+        self.batch_size = batch_size
+        self.flush_interval_secs = flush_interval_secs
+        self._queue: Deque[TranscriptRecord] = deque(maxlen=max_queue)
+        self._ready: Optional[asyncio.Event] = None
+        self._writer: Optional[asyncio.Task] = None
+        self._stopping = False
+
+        self.enqueued = 0
+        self.dropped = 0
+        self.written = 0
+        self.batches = 0
+        self.errors = 0
+
+    def put(self, record: TranscriptRecord):
+        """Queues a record without blocking, dropping the oldest one if the queue is full."""
+        if len(self._queue) == self._queue.maxlen:
+            self.dropped += 1
+        self._queue.append(record)
+        self.enqueued += 1
+        if self._ready and len(self._queue) >= self.batch_size:
+            self._ready.set()
+
+    @property
+    def pending(self) -> int:
+        """Number of records waiting to be written."""
+        return len(self._queue)
+
+    async def start(self):
+        """Starts the background writer."""
+        if self._writer is None:
+            self._stopping = False
+            self._ready = asyncio.Event()
+            self._writer = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stops the writer after writing everything still queued, then closes the store."""
+        if self._writer:
+            # Cancelling would leave a batch write running in its thread while the store closes,
+            # so the writer is woken up and finishes on its own
+            self._stopping = True
+            self._ready.set()
+            await self._writer
+            self._writer = None
+        while self._queue:
+            await self._write_batch()
+        self.store.close()
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._ready.wait(), self.flush_interval_secs)
+            except asyncio.TimeoutError:
+                pass
+            self._ready.clear()
+            while self._queue:
+                await self._write_batch()
+            if self._stopping:
+                return
+
+    def _take_batch(self) -> List[TranscriptRecord]:
+        batch = []
+        queue = self._queue
+        while queue and len(batch) < self.batch_size:
+            batch.append(queue.popleft())
+        return batch
+
+    async def _write_batch(self):
+        batch = self._take_batch()
+        try:
+            await asyncio.to_thread(self.store.write_batch, batch)
+            self.written += len(batch)
+            self.batches += 1
+        except Exception as e:
+            self.errors += 1
+            self.dropped += len(batch)
+            logger.error(f"Error writing {len(batch)} transcript records: {e}")
+
+    def stats(self) -> dict:
+        return {
+            "enqueued": self.enqueued,
+            "written": self.written,
+            "dropped": self.dropped,
+            "pending": self.pending,
+            "batches": self.batches,
+            "errors": self.errors,
+        }
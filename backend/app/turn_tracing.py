@@ -0,0 +1,371 @@
+# // Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# // SPDX-License-Identifier: MIT-0
+
+"""
+Turn Tracing
+
+Gives every conversation turn a trace id and records when each stage happened, relative to the
+moment the VAD decided the caller stopped speaking:
+
+- `vad_stop`: UserStoppedSpeakingFrame from the input transport (turn start, offset 0)
+- `llm_first_output` / `llm_first_audio`: first text or audio coming out of the LLM
+- `function_call`: the LLM requested a tool call
+- `bot_started_speaking`: first bot audio handed to the output transport
+- `first_media_serialized`: first audio frame serialized for the WebSocket
+- `bot_stopped_speaking`, `user_started_speaking`
+
+Tool calls and the Bedrock and Postgres calls inside them are recorded as spans with
+`trace_span()`. The current trace travels in a contextvar, which the tool executor copies into
+its worker threads.
+
+A turn ends when the next one starts or the session ends. It is then written as one compact
+JSON line and added to a process-wide latency summary (p50/p95/p99 per stage). The trace file
+is rotated to `<path>.1` when it reaches its size limit, so at most twice the limit is kept.
+
+Summarize a trace file with:
+    python turn_tracing.py turn_traces.jsonl
+"""
+
+import argparse
+import contextvars
+import json
+import math
+import os
+import threading
+import time
+import uuid
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from typing import Any, Callable, Deque, Dict, List, Optional
+
+from pipecat.frames.frames import (
+    BotStartedSpeakingFrame,
+    BotStoppedSpeakingFrame,
+    CancelFrame,
+    EndFrame,
+    Frame,
+    FunctionCallInProgressFrame,
+    LLMTextFrame,
+    TTSAudioRawFrame,
+    TTSTextFrame,
+    UserStartedSpeakingFrame,
+    UserStoppedSpeakingFrame,
+)
+from pipecat.processors.frame_processor import FrameDirection, FrameProcessor
+
+PERCENTILES = (50, 95, 99)
+DEFAULT_TRACE_MAX_BYTES = 100 * 1024 * 1024
+
+current_trace: contextvars.ContextVar[Optional["TurnTrace"]] = contextvars.ContextVar(
+    "current_trace", default=None
+)
+
+
+class TurnTrace:
+    """Timestamps and spans of one conversation turn."""
+
+    def __init__(self, session_id: Optional[str], turn: int):
+        """Initialize the trace, the turn starts now.
+
+        Args:
+            session_id: Session the turn belongs to
+            turn: Turn number within the session
+        """
+        self.trace_id = uuid.uuid4().hex[:16]
+        self.session_id = session_id
+        self.turn = turn
+        self.start = time.monotonic()
+        self.wall_time = time.time()
+        self.marks: Dict[str, float] = {}
+        self.spans: List[Dict[str, Any]] = []
+
+    def offset_ms(self, at: float) -> float:
+        """Converts a time.monotonic() timestamp to milliseconds since the turn start."""
+        return round((at - self.start) * 1000, 1)
+
+    def mark(self, name: str, at: Optional[float] = None):
+        """Records the first time `name` happened in this turn."""
+        if name not in self.marks:
+            self.marks[name] = self.offset_ms(at or time.monotonic())
+
+    def add_span(self, name: str, start: float, end: float, **attrs):
+        """Records a span between two time.monotonic() timestamps."""
+        span = {"name": name, "start_ms": self.offset_ms(start), "ms": round((end - start) * 1000, 1)}
+        span.update(attrs)
+        # list.append is atomic, spans may come from tool threads
+        self.spans.append(span)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "trace_id": self.trace_id,
+            "session_id": self.session_id,
+            "turn": self.turn,
+            "ts": round(self.wall_time, 3),
+            "marks": self.marks,
+            "spans": self.spans,
+        }
+
+
+@contextmanager
+def trace_span(name: str, **attrs):
+    """Records the block as a span of the current turn, does nothing outside a turn.
+
+    Args:
+        name: Span name, e.g. "bedrock.sql_generation"
+        **attrs: Extra fields stored with the span
+    """
+    trace = current_trace.get()
+    if trace is None:
+        yield
+        return
+
+    start = time.monotonic()
+    try:
+        yield
+    except BaseException as e:
+        attrs["error"] = type(e).__name__
+        raise
+    finally:
+        trace.add_span(name, start, time.monotonic(), **attrs)
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an ascending list."""
+    index = max(0, math.ceil(pct / 100 * len(sorted_values)) - 1)
+    return sorted_values[index]
+
+
+class LatencySummary:
+    """Keeps recent stage latencies and reports their percentiles."""
+
+    def __init__(self, max_samples: Optional[int] = 10000):
+        """Initialize the summary.
+
+        Args:
+            max_samples: Samples kept per stage, older ones are dropped. None keeps all
+        """
+        self._samples: Dict[str, Deque[float]] = defaultdict(lambda: deque(maxlen=max_samples))
+        self._lock = threading.Lock()
+
+    def add(self, trace: Dict[str, Any]):
+        """Adds the marks (offset from VAD stop) and span durations of a trace."""
+        with self._lock:
+            for name, offset in trace["marks"].items():
+                if name != "vad_stop":
+                    self._samples[name].append(offset)
+            for span in trace["spans"]:
+                self._samples[f"span:{span['name']}"].append(span["ms"])
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """Returns count and p50/p95/p99 in milliseconds per stage."""
+        with self._lock:
+            samples = {name: sorted(values) for name, values in self._samples.items() if values}
+        return {
+            name: {"count": len(values), **{f"p{pct}": percentile(values, pct) for pct in PERCENTILES}}
+            for name, values in sorted(samples.items())
+        }
+
+    def format(self) -> str:
+        """Returns the summary as a text table."""
+        lines = [f"{'stage':<36} {'count':>6} {'p50':>9} {'p95':>9} {'p99':>9}"]
+        for name, stats in self.summary().items():
+            lines.append(
+                f"{name:<36} {stats['count']:>6} {stats['p50']:>9.1f} {stats['p95']:>9.1f} {stats['p99']:>9.1f}"
+            )
+        return "\n".join(lines)
+
+
+class TraceWriter:
+    """Appends traces as JSON lines to a file, rotating it by size."""
+
+    def __init__(self, path: str, max_bytes: int = DEFAULT_TRACE_MAX_BYTES):
+        """Initialize the writer.
+
+        Args:
+            path: JSON lines file to append to
+            max_bytes: Size at which the file is moved to `<path>.1`, 0 never rotates
+        """
+        self.path = path
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._open()
+
+    def _open(self):
+        self._file = open(self.path, "a", buffering=1)
+        self._inode = os.fstat(self._file.fileno()).st_ino
+
+    def _rotate(self):
+        self._file.close()
+        try:
+            # Another worker process appending to the same file may have rotated it already
+            if os.stat(self.path).st_ino == self._inode:
+                os.replace(self.path, self.path + ".1")
+        except FileNotFoundError:
+            pass
+        self._open()
+
+    def write(self, trace: Dict[str, Any]):
+        line = json.dumps(trace, separators=(",", ":"))
+        with self._lock:
+            if self.max_bytes and self._file.tell() >= self.max_bytes:
+                self._rotate()
+            self._file.write(line + "\n")
+
+    def close(self):
+        self._file.close()
+
+
+class TurnTracer:
+    """Tracks the turns of one session."""
+
+    def __init__(
+        self,
+        session_id: Optional[str] = None,
+        writer: Optional[TraceWriter] = None,
+        summary: Optional[LatencySummary] = None,
+    ):
+        """Initialize the tracer.
+
+        Args:
+            session_id: Session identifier stored in every trace
+            writer: Where finished traces are written, None to skip writing
+            summary: Summary finished traces are added to
+        """
+        self.session_id = session_id
+        self.writer = writer
+        self.summary = summary
+        self.current: Optional[TurnTrace] = None
+        self.last_trace: Optional[Dict[str, Any]] = None
+        self._turns = 0
+
+    def start_turn(self, at: Optional[float] = None) -> TurnTrace:
+        """Finishes the current turn and starts a new one."""
+        self.finish_turn()
+        self._turns += 1
+        self.current = TurnTrace(self.session_id, self._turns)
+        if at is not None:
+            self.current.start = at
+        self.current.mark("vad_stop", self.current.start)
+        return self.current
+
+    def finish_turn(self):
+        """Writes the current turn, if any."""
+        if self.current is None:
+            return
+        trace = self.current.to_dict()
+        self.current = None
+        self.last_trace = trace
+        if self.writer:
+            self.writer.write(trace)
+        if self.summary:
+            self.summary.add(trace)
+
+    def mark(self, name: str):
+        """Marks `name` in the current turn."""
+        if self.current:
+            self.current.mark(name)
+
+    def on_media_serialized(self):
+        """Serializer hook, called for every serialized audio frame."""
+        if self.current and "first_media_serialized" not in self.current.marks:
+            self.current.mark("first_media_serialized")
+
+    def wrap_tool(self, name: str, handler: Callable) -> Callable:
+        """Wraps a function call handler so it runs inside a span of the current turn.
+
+        Args:
+            name: Tool name, the span is called "tool.<name>"
+            handler: Async function call handler
+
+        Returns:
+            The wrapped handler
+        """
+        async def handle(params):
+            token = current_trace.set(self.current)
+            try:
+                with trace_span(f"tool.{name}"):
+                    await handler(params)
+            finally:
+                current_trace.reset(token)
+
+        return handle
+
+    def processor(self, stage: str) -> "TurnTraceProcessor":
+        """Creates the pipeline processor for a stage: "input", "llm" or "output"."""
+        return TurnTraceProcessor(self, stage)
+
+
+class TurnTraceProcessor(FrameProcessor):
+    """Marks turn stages from the frames passing one point of the pipeline.
+
+    - "input" goes right after transport.input()
+    - "llm" goes right after the LLM service
+    - "output" goes right after transport.output()
+    """
+
+    def __init__(self, tracer: TurnTracer, stage: str, **kwargs):
+        super().__init__(**kwargs)
+        self._tracer = tracer
+        self._stage = stage
+
+    async def process_frame(self, frame: Frame, direction: FrameDirection):
+        """Marks the stage the frame represents and passes it through.
+
+        Args:
+            frame: The frame to process
+            direction: The direction of frame flow in the pipeline
+        """
+        await super().process_frame(frame, direction)
+
+        if direction == FrameDirection.DOWNSTREAM:
+            tracer = self._tracer
+            if self._stage == "input":
+                if isinstance(frame, UserStoppedSpeakingFrame):
+                    tracer.start_turn()
+                elif isinstance(frame, UserStartedSpeakingFrame):
+                    tracer.mark("user_started_speaking")
+            elif self._stage == "llm":
+                if isinstance(frame, (LLMTextFrame, TTSTextFrame, TTSAudioRawFrame)):
+                    tracer.mark("llm_first_output")
+                if isinstance(frame, TTSAudioRawFrame):
+                    tracer.mark("llm_first_audio")
+                elif isinstance(frame, FunctionCallInProgressFrame):
+                    tracer.mark("function_call")
+            elif self._stage == "output":
+                if isinstance(frame, BotStartedSpeakingFrame):
+                    tracer.mark("bot_started_speaking")
+                elif isinstance(frame, BotStoppedSpeakingFrame):
+                    tracer.mark("bot_stopped_speaking")
+                elif isinstance(frame, (EndFrame, CancelFrame)):
+                    tracer.finish_turn()
+
+        await self.push_frame(frame, direction)
+
+
+def summarize_files(paths: List[str]) -> LatencySummary:
+    """Builds a latency summary from JSON lines trace files."""
+    summary = LatencySummary(max_samples=None)
+    for path in paths:
+        with open(path) as f:
+            for line in f:
+                if line.strip():
+                    summary.add(json.loads(line))
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Summarize per-turn latency traces")
+    parser.add_argument("paths", nargs="+", help="JSON lines trace files")
+    parser.add_argument("--json", action="store_true", help="Print the summary as JSON")
+    args = parser.parse_args()
+
+    summary = summarize_files(args.paths)
+    if args.json:
+        print(json.dumps(summary.summary(), indent=2))
+    else:
+        print("Milliseconds since VAD stop (marks) or span duration (span:*)")
+        print(summary.format())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,238 @@
+# // Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# // SPDX-License-Identifier: MIT-0
+
+"""
+WebSocket Transport with Mixed Text/Binary Messages
+
+Pipecat's FastAPIWebsocketTransport picks a single WebSocket message type for the whole
+connection based on the serializer type. The binary audio mode of Base64AudioSerializer
+sends audio as binary messages but keeps control events (e.g. `stop`) as small JSON text
+messages, so this module provides a transport whose client sends and receives both.
+
+The input side can also run inbound audio through an InboundJitterBuffer, releasing fixed-size
+frames to the VAD and the LLM at a steady cadence instead of as they arrive from the network.
+Its underruns, overruns and depth are exported as voice_jitter_buffer_* metrics.
+"""
+
+import asyncio
+import time
+import typing
+from typing import Optional
+
+from fastapi import WebSocket
+from loguru import logger
+from starlette.websockets import WebSocketState
+
+from pipecat.frames.frames import CancelFrame, EndFrame, InputAudioRawFrame, StartFrame
+from pipecat.transports.network.fastapi_websocket import (
+    FastAPIWebsocketCallbacks,
+    FastAPIWebsocketClient,
+    FastAPIWebsocketInputTransport,
+    FastAPIWebsocketOutputTransport,
+    FastAPIWebsocketParams,
+    FastAPIWebsocketTransport,
+)
+
+from jitter_buffer import InboundJitterBuffer
+from metrics import JITTER_BUFFER_DEPTH_SECONDS, JITTER_BUFFER_OVERRUNS, JITTER_BUFFER_UNDERRUNS
+
+
+class AudioWebsocketParams(FastAPIWebsocketParams):
+    """Configuration parameters for AudioWebsocketTransport.
+
+    Parameters:
+        jitter_buffer_frame_ms: Duration of the frames released by the inbound
+            jitter buffer, or None to push audio as it arrives
+        jitter_buffer_target_ms: Audio to accumulate before releasing frames
+        jitter_buffer_max_ms: Maximum buffered inbound audio before dropping the oldest frames
+    """
+
+    jitter_buffer_frame_ms: Optional[int] = None
+    jitter_buffer_target_ms: int = 40
+    jitter_buffer_max_ms: int = 200
+
+
+class MixedFrameWebsocketClient(FastAPIWebsocketClient):
+    """WebSocket client that sends and receives both text and binary messages.
+
+    Outgoing payloads are sent as binary messages when they are bytes and as
+    text messages when they are strings. Incoming messages are yielded as bytes
+    or str depending on how the client sent them.
+    """
+
+    def __init__(self, websocket: WebSocket, callbacks: FastAPIWebsocketCallbacks):
+        """Initialize the mixed frame client.
+
+        Args:
+            websocket: The FastAPI WebSocket connection
+            callbacks: Event callback functions
+        """
+        super().__init__(websocket, False, callbacks)
+
+    def receive(self) -> typing.AsyncIterator[bytes | str]:
+        """Gets an async iterator over incoming text and binary messages.
+
+        Returns:
+            An async iterator yielding bytes for binary messages and str for text messages
+        """
+        return self._iter_messages()
+
+    async def _iter_messages(self) -> typing.AsyncIterator[bytes | str]:
+        """Yields incoming messages until the client disconnects."""
+        while self._websocket.application_state == WebSocketState.CONNECTED:
+            message = await self._websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                return
+            if message.get("bytes") is not None:
+                yield message["bytes"]
+            elif message.get("text") is not None:
+                yield message["text"]
+
+    async def send(self, data: str | bytes):
+        """Sends data as a binary message for bytes and a text message for str.
+
+        Args:
+            data: The payload to send
+        """
+        self._is_binary = isinstance(data, (bytes, bytearray, memoryview))
+        await super().send(data)
+
+
+class AudioWebsocketInputTransport(FastAPIWebsocketInputTransport):
+    """WebSocket input transport that paces inbound audio through a jitter buffer."""
+
+    def __init__(self, *args, **kwargs):
+        """Initialize the input transport.
+
+        Args:
+            *args: Arguments passed to FastAPIWebsocketInputTransport
+            **kwargs: Keyword arguments passed to FastAPIWebsocketInputTransport
+        """
+        super().__init__(*args, **kwargs)
+        self._jitter_buffer: Optional[InboundJitterBuffer] = None
+        self._pacer_task: Optional[asyncio.Task] = None
+
+    @property
+    def jitter_buffer(self) -> Optional[InboundJitterBuffer]:
+        """Gets the session's jitter buffer, if enabled and audio has arrived."""
+        return self._jitter_buffer
+
+    async def start(self, frame: StartFrame):
+        """Start the input transport and the jitter buffer pacer.
+
+        Args:
+            frame: The start frame containing initialization parameters
+        """
+        await super().start(frame)
+        if self._params.jitter_buffer_frame_ms and not self._pacer_task:
+            self._pacer_task = self.create_task(self._pace_audio())
+
+    async def stop(self, frame: EndFrame):
+        """Stop the input transport and the jitter buffer pacer.
+
+        Args:
+            frame: The end frame signaling transport shutdown
+        """
+        await self._stop_pacer()
+        await super().stop(frame)
+
+    async def cancel(self, frame: CancelFrame):
+        """Cancel the input transport and the jitter buffer pacer.
+
+        Args:
+            frame: The cancel frame signaling immediate cancellation
+        """
+        await self._stop_pacer()
+        await super().cancel(frame)
+
+    async def push_audio_frame(self, frame: InputAudioRawFrame):
+        """Queues inbound audio in the jitter buffer, or pushes it directly if disabled.
+
+        Args:
+            frame: The input audio frame received from the client
+        """
+        if not self._params.jitter_buffer_frame_ms:
+            await super().push_audio_frame(frame)
+            return
+
+        if not self._jitter_buffer:
+            self._jitter_buffer = InboundJitterBuffer(
+                frame.sample_rate,
+                frame_ms=self._params.jitter_buffer_frame_ms,
+                target_ms=self._params.jitter_buffer_target_ms,
+                max_ms=self._params.jitter_buffer_max_ms,
+                num_channels=frame.num_channels,
+            )
+        overruns = self._jitter_buffer.overruns
+        self._jitter_buffer.push(frame.audio)
+        if self._jitter_buffer.overruns != overruns:
+            JITTER_BUFFER_OVERRUNS.inc(self._jitter_buffer.overruns - overruns)
+
+    async def _pace_audio(self):
+        """Releases one jitter buffer frame per frame interval."""
+        interval = self._params.jitter_buffer_frame_ms / 1000
+        next_release = time.monotonic()
+        while True:
+            next_release += interval
+            now = time.monotonic()
+            if next_release < now - interval:
+                # Fell behind after a stall, restart the cadence instead of bursting to catch up
+                next_release = now
+            await asyncio.sleep(max(0.0, next_release - now))
+            self.reset_watchdog()
+
+            if not self._jitter_buffer:
+                continue
+
+            underruns = self._jitter_buffer.underruns
+            depth_ms = self._jitter_buffer.depth_ms
+            audio = self._jitter_buffer.pop()
+            if self._jitter_buffer.underruns != underruns:
+                JITTER_BUFFER_UNDERRUNS.inc()
+            if audio is not None:
+                JITTER_BUFFER_DEPTH_SECONDS.observe(depth_ms / 1000)
+                await super().push_audio_frame(InputAudioRawFrame(
+                    audio=audio,
+                    sample_rate=self._jitter_buffer.sample_rate,
+                    num_channels=self._jitter_buffer.num_channels,
+                ))
+
+    async def _stop_pacer(self):
+        """Cancels the pacer task and logs the final jitter buffer counters."""
+        if self._pacer_task:
+            await self.cancel_task(self._pacer_task)
+            self._pacer_task = None
+        if self._jitter_buffer:
+            logger.debug(f"{self} jitter buffer stats: {self._jitter_buffer.stats()}")
+
+
+class AudioWebsocketTransport(FastAPIWebsocketTransport):
+    """FastAPI WebSocket transport that allows mixed text and binary messages
+    and paces inbound audio through an optional jitter buffer.
+    """
+
+    def __init__(
+        self,
+        websocket: WebSocket,
+        params: AudioWebsocketParams,
+        input_name: Optional[str] = None,
+        output_name: Optional[str] = None,
+    ):
+        """Initialize the transport.
+
+        Args:
+            websocket: The FastAPI WebSocket connection
+            params: Transport configuration parameters
+            input_name: Optional name for the input processor
+            output_name: Optional name for the output processor
+        """
+        super().__init__(websocket, params, input_name=input_name, output_name=output_name)
+
+        # Replace the single-message-type client created by the base class
+        self._client = MixedFrameWebsocketClient(websocket, self._callbacks)
+        self._input = AudioWebsocketInputTransport(
+            self, self._client, self._params, name=self._input_name
+        )
+        self._output = FastAPIWebsocketOutputTransport(
+            self, self._client, self._params, name=self._output_name
+        )
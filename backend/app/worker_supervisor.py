@@ -0,0 +1,255 @@
+# // Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# // SPDX-License-Identifier: MIT-0
+
+"""
+Worker Supervisor
+
+Runs the FastAPI app in several worker processes so sessions are spread over all cores of the
+task. Each worker is a separate uvicorn server that imports the app itself, so it warms up its
+own VAD model, credentials and clients in its lifespan.
+
+Two ways of sharing the port are supported:
+- SO_REUSEPORT (default where available): every worker binds its own socket and the kernel
+  spreads new connections evenly over them. This suits long-lived WebSocket sessions, which
+  would otherwise pile up on whichever worker wins the shared accept queue.
+- Pre-fork: the supervisor binds one socket and every worker accepts from it.
+
+The supervisor gives the workers a shared directory, found with `shared_path()`:
+- metrics are recorded per worker, and each worker writes snapshots there, so a scrape of
+  /metrics on the shared port returns the samples of all workers with a `worker` label,
+  whichever worker answers it (see metrics.py)
+- a drain requested from one worker (POST /admin/drain) leaves a flag there that the session
+  managers of all workers watch (see session_manager.py)
+
+The supervisor restarts workers that die and stops all of them on SIGINT/SIGTERM. On SIGTERM
+each worker drains its sessions first (see graceful_shutdown.py), so the supervisor waits for
+the drain deadline before killing them.
+"""
+
+import multiprocessing
+import os
+import shutil
+import signal
+import socket
+import tempfile
+import threading
+import time
+from typing import List, Optional
+
+import uvicorn
+from loguru import logger
+
+from graceful_shutdown import DEFAULT_DRAIN_TIMEOUT_SECS, DrainingServer
+from metrics import REGISTRY, snapshot_path
+
+# Minimum time between two restarts of the same worker slot
+RESTART_BACKOFF_SECS = 1.0
+# Time on top of the drain deadline before workers that haven't exited are killed
+SHUTDOWN_GRACE_SECS = 10.0
+# Set in worker processes to the directory shared by all workers
+SHARED_DIR_ENV = "VOICE_WORKER_SHARED_DIR"
+
+
+def shared_path(name: str) -> Optional[str]:
+    """Returns a path in the directory shared by the worker processes, None outside of a worker."""
+    directory = os.environ.get(SHARED_DIR_ENV)
+    return os.path.join(directory, name) if directory else None
+
+
+def default_worker_count() -> int:
+    """Returns the number of cores this process may run on."""
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def bind_socket(host: str, port: int, reuse_port: bool = False) -> socket.socket:
+    """Binds a listening TCP socket.
+
+    Args:
+        host: Interface to bind
+        port: Port to bind, 0 for any free port
+        reuse_port: Whether to set SO_REUSEPORT so other processes can bind the same port
+
+    Returns:
+        The bound socket
+    """
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    if reuse_port:
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+    sock.bind((host, port))
+    sock.set_inheritable(True)
+    return sock
+
+
+def run_worker(
+    app: str,
+    host: str,
+    port: int,
+    sock: Optional[socket.socket],
+    log_level: str,
+    drain_timeout_secs: float = DEFAULT_DRAIN_TIMEOUT_SECS,
+    shared_dir: Optional[str] = None,
+):
+    """Worker process entry point, serves the app until stopped.
+
+    Args:
+        app: Import string of the ASGI app, e.g. "main:app"
+        host: Interface to bind when not given a socket
+        port: Port to bind when not given a socket
+        sock: Socket shared by the supervisor, or None to bind with SO_REUSEPORT
+        log_level: uvicorn log level
+        drain_timeout_secs: How long sessions may keep running after SIGTERM
+        shared_dir: Directory shared with the other workers for metrics snapshots and the
+            drain flag
+    """
+    if shared_dir:
+        # Read by the app when uvicorn imports it below
+        os.environ[SHARED_DIR_ENV] = shared_dir
+        REGISTRY.share(shared_dir, str(os.getpid()))
+    if sock is None:
+        sock = bind_socket(host, port, reuse_port=True)
+
+    config = uvicorn.Config(app=app, host=host, port=port, log_level=log_level)
+    server = DrainingServer(config, drain_timeout_secs=drain_timeout_secs)
+    server.run(sockets=[sock])
+
+
+class WorkerSupervisor:
+    """Starts worker processes and keeps them running."""
+
+    def __init__(
+        self,
+        app: str,
+        host: str = "0.0.0.0",
+        port: int = 8000,
+        workers: Optional[int] = None,
+        reuse_port: Optional[bool] = None,
+        log_level: str = "error",
+        drain_timeout_secs: float = DEFAULT_DRAIN_TIMEOUT_SECS,
+    ):
+        """Initialize the supervisor.
+
+        Args:
+            app: Import string of the ASGI app, e.g. "main:app"
+            host: Interface to listen on
+            port: Port to listen on
+            workers: Number of worker processes, one per available core by default
+            reuse_port: Use SO_REUSEPORT instead of a shared pre-forked socket,
+                defaults to True where the platform supports it
+            log_level: uvicorn log level for the workers
+            drain_timeout_secs: How long workers drain sessions after SIGTERM
+        """
+        self.app = app
+        self.host = host
+        self.port = port
+        self.workers = workers or default_worker_count()
+        self.reuse_port = hasattr(socket, "SO_REUSEPORT") if reuse_port is None else reuse_port
+        self.log_level = log_level
+        self.drain_timeout_secs = drain_timeout_secs
+        self.restarts = 0
+
+        # Workers are spawned so they don't inherit the supervisor's threads or event loop
+        self._context = multiprocessing.get_context("spawn")
+        self._processes: List[Optional[multiprocessing.Process]] = [None] * self.workers
+        self._started_at: List[float] = [0.0] * self.workers
+        self._socket: Optional[socket.socket] = None
+        self._shared_dir: Optional[str] = None
+        self._should_exit = threading.Event()
+
+    def _spawn(self, slot: int):
+        process = self._context.Process(
+            target=run_worker,
+            args=(
+                self.app, self.host, self.port, self._socket, self.log_level, self.drain_timeout_secs,
+                self._shared_dir,
+            ),
+            name=f"worker-{slot}",
+            daemon=True,
+        )
+        process.start()
+        self._processes[slot] = process
+        self._started_at[slot] = time.monotonic()
+        logger.info(f"Started worker {slot} (pid {process.pid})")
+
+    def start(self):
+        """Binds the port and starts all workers."""
+        self._shared_dir = tempfile.mkdtemp(prefix="voice-workers-")
+        if self.reuse_port:
+            # Keep one socket bound in the supervisor so the port stays reserved between restarts
+            self._reserved = bind_socket(self.host, self.port, reuse_port=True)
+            self.port = self._reserved.getsockname()[1]
+        else:
+            self._socket = bind_socket(self.host, self.port)
+            self.port = self._socket.getsockname()[1]
+
+        for slot in range(self.workers):
+            self._spawn(slot)
+
+    def check_workers(self):
+        """Restarts workers that have exited."""
+        for slot, process in enumerate(self._processes):
+            if process is None or process.is_alive():
+                continue
+            if time.monotonic() - self._started_at[slot] < RESTART_BACKOFF_SECS:
+                continue
+            logger.warning(f"Worker {slot} (pid {process.pid}) exited with {process.exitcode}, restarting")
+            self._remove_snapshot(process.pid)
+            process.close()
+            self.restarts += 1
+            self._spawn(slot)
+
+    def _remove_snapshot(self, pid: int):
+        # Drops the metrics of a worker that is gone from later scrapes
+        try:
+            os.remove(snapshot_path(self._shared_dir, str(pid)))
+        except OSError:
+            pass
+
+    def pids(self) -> List[int]:
+        """Returns the pids of the running workers."""
+        return [process.pid for process in self._processes if process and process.is_alive()]
+
+    def stop(self, timeout: Optional[float] = None):
+        """Stops all workers, killing those that don't exit within `timeout`.
+
+        Args:
+            timeout: Seconds to wait, defaults to the drain deadline plus a grace period
+        """
+        if timeout is None:
+            timeout = self.drain_timeout_secs + SHUTDOWN_GRACE_SECS
+        self._should_exit.set()
+        for process in self._processes:
+            if process and process.is_alive():
+                process.terminate()
+        deadline = time.monotonic() + timeout
+        for process in self._processes:
+            if process:
+                process.join(max(0.0, deadline - time.monotonic()))
+                if process.is_alive():
+                    process.kill()
+                    process.join()
+
+        for sock in (self._socket, getattr(self, "_reserved", None)):
+            if sock:
+                sock.close()
+        if self._shared_dir:
+            shutil.rmtree(self._shared_dir, ignore_errors=True)
+
+    def run(self):
+        """Runs the workers until SIGINT or SIGTERM."""
+        def handle_exit(signum, frame):
+            self._should_exit.set()
+
+        signal.signal(signal.SIGINT, handle_exit)
+        signal.signal(signal.SIGTERM, handle_exit)
+
+        self.start()
+        mode = "SO_REUSEPORT" if self.reuse_port else "pre-fork"
+        print(f"Serving {self.app} on {self.host}:{self.port} with {self.workers} workers ({mode})", flush=True)
+        try:
+            while not self._should_exit.wait(0.5):
+                self.check_workers()
+        finally:
+            self.stop()
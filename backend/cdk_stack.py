@@ -123,6 +123,10 @@ class CdkStack(Stack):
         )
         container = task_def.add_container("VirtualBankingAssistantContainer",
             image=ecs.ContainerImage.from_docker_image_asset(docker_image),
+            # One worker process per vCPU
+            environment={"WEB_CONCURRENCY": "2", "DRAIN_TIMEOUT_SECS": "100"},
+            # SIGTERM starts a session drain (DRAIN_TIMEOUT_SECS), SIGKILL follows after the stop timeout
+            stop_timeout=Duration.seconds(120),
             logging=ecs.LogDriver.aws_logs(stream_prefix="VirtualBankingAssistant")
         )
         container.add_port_mappings(ecs.PortMapping(container_port=container_port, protocol=ecs.Protocol.TCP))